@@ -0,0 +1,59 @@
+"""
+관리자 API
+
+DB 인덱스 점검/생성, 질문 템플릿 통계 등 운영 작업용 엔드포인트.
+"""
+
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+
+from app.graph.question_templates import reset_template_stats, template_stats
+from app.services.index_advisor import apply_missing_indexes, inspect_indexes
+
+router = APIRouter()
+
+
+# ── 엔드포인트 ────────────────────────────────────────────────────
+
+
+@router.get("/indexes")
+async def get_index_report(
+    tables: Optional[List[str]] = Query(None, description="점검할 테이블 (기본: 전체)"),
+    explain: bool = Query(True, description="도구 쿼리 EXPLAIN 실행"),
+):
+    """sqlt_data_* 파티션과 알람 테이블의 누락/미사용 인덱스 및 전체 스캔 쿼리 보고"""
+    try:
+        return await run_in_threadpool(inspect_indexes, tables, explain)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"인덱스 점검 실패: {e}")
+
+
+@router.post("/indexes/apply")
+async def apply_indexes(
+    tables: Optional[List[str]] = Query(None, description="대상 테이블 (기본: 전체)"),
+):
+    """
+    누락 인덱스 생성.
+    PostgreSQL은 CONCURRENTLY, MariaDB는 ALGORITHM=INPLACE LOCK=NONE으로 쓰기를 막지 않습니다.
+    """
+    try:
+        report = await run_in_threadpool(inspect_indexes, tables, False)
+        report["applied"] = await run_in_threadpool(apply_missing_indexes, report)
+        return report
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"인덱스 생성 실패: {e}")
+
+
+@router.get("/templates/stats")
+async def get_template_stats():
+    """질문 템플릿(ReAct 우회) 템플릿별 적중률과 지연 시간"""
+    return template_stats()
+
+
+@router.delete("/templates/stats")
+async def clear_template_stats():
+    """질문 템플릿 통계 초기화"""
+    reset_template_stats()
+    return {"status": "reset"}
@@ -0,0 +1,160 @@
+"""
+알람 API
+
+LLM을 거치지 않고 알람 분석 서비스를 직접 사용하는 엔드포인트.
+/alarms/report는 ISA-18.2 알람 성능 보고서(flood, chattering, stale, bad actor)를 반환합니다.
+/alarms/active는 OPC UA 알람 구독으로 유지하는 현재 알람 테이블을 반환합니다 (SQL 조회 없음).
+/alarms/events는 알람 이벤트 이력을 (eventtime, id) 키셋 커서로 페이지 단위 조회합니다.
+/alarms/histogram은 시간대/요일/간격별 발생 건수 분포를 반환합니다.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+
+from app.services.alarm_analytics import build_alarm_report, get_alarm_report_cache
+from app.services.alarm_events import MAX_PAGE_SIZE, page_alarm_events
+from app.services.alarm_histogram import alarm_histogram
+from app.services.history import parse_time_arg
+from app.services.live_alarms import get_active_alarm_table
+
+router = APIRouter()
+
+
+# ── 엔드포인트 ────────────────────────────────────────────────────
+
+
+@router.get("/active")
+async def active_alarms(
+    tag_path: Optional[str] = Query(None, description="source/조건 이름 검색어 (부분 일치)"),
+    unacked_only: bool = Query(False, description="미확인 알람만"),
+    active_only: bool = Query(False, description="활성 알람만 (해제됐지만 미확인인 알람 제외)"),
+):
+    """
+    현재 알람 (priority 높은 순 → 오래된 순).
+
+    구독이 끊긴 동안에는 status.connected=false이며 alarms는 최신 상태가 아닐 수 있습니다.
+    """
+    table = get_active_alarm_table()
+    alarms = table.snapshot(tag_path, unacked_only=unacked_only, active_only=active_only)
+    return {"status": table.status(), "alarms": [a.to_dict() for a in alarms]}
+
+
+@router.get("/active/status")
+async def active_alarms_status():
+    """실시간 알람 구독 상태 (연결 여부, 마지막 이벤트 시각, 활성/미확인 건수)"""
+    return get_active_alarm_table().status()
+
+
+@router.get("/events")
+async def alarm_events(
+    start: Optional[str] = Query(None, description="시작 시각 YYYY-MM-DD[ HH:MM[:SS]] (기본 24시간 전)"),
+    end: Optional[str] = Query(None, description="종료 시각 (미포함, 기본 없음)"),
+    tag_path: Optional[str] = Query(None, description="태그 경로 필터 (예: FAN1, BMS/MFD)"),
+    event_type: Optional[str] = Query(None, description="active, clear, ack"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="페이지 크기"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor (다른 조건은 첫 페이지 기준)"),
+):
+    """
+    알람 이벤트 이력 (최신순).
+
+    next_cursor로 이어서 읽으며, 뒤쪽 페이지도 첫 페이지와 같은 비용입니다.
+    """
+    try:
+        start_dt = parse_time_arg(start) if start else datetime.now() - timedelta(hours=24)
+        end_dt = parse_time_arg(end) if end else None
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    try:
+        page = await run_in_threadpool(
+            page_alarm_events, start_dt, end_dt, tag_path, event_type, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        raise HTTPException(500, f"알람 이벤트 조회 실패: {e}")
+    return {"events": page.rows, "next_cursor": page.next_cursor}
+
+
+@router.get("/report")
+async def alarm_report(
+    start: Optional[str] = Query(None, description="시작 시각 YYYY-MM-DD[ HH:MM[:SS]] (기본 7일 전)"),
+    end: Optional[str] = Query(None, description="종료 시각 (미포함, 기본 현재)"),
+    tag_path: Optional[str] = Query(None, description="태그 경로 필터 (예: FAN1, BMS/MFD)"),
+    top_n: int = Query(10, ge=1, le=100, description="bad actor 상위 N개"),
+    flood_threshold: Optional[int] = Query(None, ge=1, description="창당 flood 기준 건수"),
+    chatter_count: Optional[int] = Query(None, ge=2, description="chattering 기준 발생 횟수"),
+    chatter_seconds: Optional[int] = Query(None, ge=1, description="chattering 시간 창 (초)"),
+    stale_hours: Optional[float] = Query(None, gt=0, description="stale 기준 미해제 시간"),
+):
+    """
+    알람 성능 보고서 (운영 구역별 알람률/flood 구간, chattering, stale, bad actor).
+
+    같은 기간/파라미터의 보고서는 캐시되며, 현재 시각에 걸친 기간만 짧은 TTL로 다시 계산합니다.
+    """
+    try:
+        end_dt = parse_time_arg(end) if end else datetime.now()
+        start_dt = parse_time_arg(start) if start else end_dt - timedelta(days=7)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if end_dt <= start_dt:
+        raise HTTPException(400, "end must be after start")
+
+    try:
+        return await run_in_threadpool(
+            build_alarm_report,
+            start_dt,
+            end_dt,
+            tag_path,
+            top_n,
+            flood_threshold,
+            chatter_count,
+            chatter_seconds,
+            stale_hours,
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        raise HTTPException(500, f"알람 보고서 생성 실패: {e}")
+
+
+@router.get("/histogram")
+async def alarm_histogram_endpoint(
+    start: Optional[str] = Query(None, description="시작 시각 YYYY-MM-DD[ HH:MM[:SS]] (기본 7일 전)"),
+    end: Optional[str] = Query(None, description="종료 시각 (미포함, 기본 현재)"),
+    tag_path: Optional[str] = Query(None, description="태그 경로 필터 (예: FAN1, BMS/MFD)"),
+    bucket: str = Query("hour_of_day", description="hour_of_day, day_of_week, interval"),
+    interval_minutes: int = Query(60, ge=1, description="bucket=interval일 때 간격 (분)"),
+    split_by: Optional[str] = Query(None, description="priority, area"),
+):
+    """알람 발생(active) 건수 분포 (정시 단위 버킷은 알람 롤업에서 계산)"""
+    try:
+        end_dt = parse_time_arg(end) if end else datetime.now()
+        start_dt = parse_time_arg(start) if start else end_dt - timedelta(days=7)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    try:
+        return await run_in_threadpool(
+            alarm_histogram, start_dt, end_dt, tag_path, bucket, interval_minutes, split_by
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        raise HTTPException(500, f"알람 분포 조회 실패: {e}")
+
+
+@router.get("/report/cache/stats")
+async def alarm_report_cache_stats():
+    """알람 보고서 캐시 메트릭"""
+    return get_alarm_report_cache().metrics()
+
+
+@router.delete("/report/cache")
+async def clear_alarm_report_cache():
+    """알람 보고서 캐시 초기화"""
+    get_alarm_report_cache().clear()
+    return {"status": "ok", "message": "알람 보고서 캐시 초기화 완료"}
@@ -4,18 +4,24 @@ Approval endpoint for human-in-the-loop safety controls.
 Allows operators to approve or reject pending write operations.
 """
 
+import json
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
+from app.core.config import settings
+from app.services.approval_events import action_to_dict, get_approval_event_bus
 from app.services.approval_storage import (
+    claim_pending_action,
     get_pending_action,
+    list_actions,
     list_pending_actions,
     update_pending_action,
 )
-from app.services.opc import get_opc_client
+from app.services.write_executor import WriteOutcome, execute_writes, record_outcome
 
 router = APIRouter()
 
@@ -38,6 +44,37 @@ class ApprovalResponse(BaseModel):
     result: Optional[dict] = None
 
 
+class BulkApprovalRequest(BaseModel):
+    """Approve or reject several pending actions at once."""
+
+    action_ids: list[str] = Field(..., min_length=1, max_length=500)
+    approved: bool
+    operator: str
+    notes: Optional[str] = None
+    coalesce: Optional[bool] = None  # default: settings.opc_write_coalesce
+
+
+class BulkApprovalItem(BaseModel):
+    """Per-action result of a bulk decision."""
+
+    action_id: str
+    status: str  # executed, failed, superseded, rate_limited, rejected, not_found, not_pending
+    message: str
+    tag_path: Optional[str] = None
+    value: Any = None
+    status_code: Optional[str] = None  # OPC UA StatusCode of the write
+    superseded_by: Optional[str] = None
+    retry_after: Optional[float] = None
+
+
+class BulkApprovalResponse(BaseModel):
+    """Response after a bulk decision."""
+
+    operator: str
+    counts: dict[str, int]
+    results: list[BulkApprovalItem]
+
+
 @router.post("/approve", response_model=ApprovalResponse)
 async def approve_action(request: ApprovalRequest):
     """
@@ -52,63 +89,69 @@ async def approve_action(request: ApprovalRequest):
     Raises:
         HTTPException: If action not found or already processed
     """
-    # Retrieve pending action
-    action = get_pending_action(request.action_id)
+    # Claim the pending action atomically: a concurrent decision on the same id
+    # (another /approve, /approve/bulk or a resumed run) loses the claim and never writes
+    action = claim_pending_action(request.action_id, "executing" if request.approved else "rejected")
 
     if not action:
-        raise HTTPException(status_code=404, detail=f"Action {request.action_id} not found")
-
-    # Check if already processed
-    if action.status != "pending":
+        current = get_pending_action(request.action_id)
+        if not current:
+            raise HTTPException(status_code=404, detail=f"Action {request.action_id} not found")
         raise HTTPException(
             status_code=400,
-            detail=f"Action {request.action_id} already {action.status}",
+            detail=f"Action {request.action_id} already {current.status}",
         )
 
     if request.approved:
         # Execute the write operation
         try:
-            opc_client = get_opc_client()
-            result = await opc_client.write_tag(action.tag_path, action.value)
-
-            # Update action status
-            action.status = "executed"
-            update_pending_action(action)
-
-            # Log approval (in production, save to database with timestamp and operator)
-            print(
-                f"[Approval] Action {action.id} APPROVED by {request.operator} "
-                f"at {datetime.now().isoformat()}"
-            )
-            print(f"[Approval] Executed: {action.tag_path} -> {action.value}")
-            if request.notes:
-                print(f"[Approval] Notes: {request.notes}")
-
-            return ApprovalResponse(
-                status="executed",
-                action_id=action.id,
-                message=f"Write operation executed successfully. Tag {action.tag_path} set to {action.value}",
-                result={
-                    "tag_path": action.tag_path,
-                    "value": action.value,
-                    "executed_at": datetime.now().isoformat(),
-                    "operator": request.operator,
-                    "opc_result": result,
-                },
-            )
-
+            (outcome,) = await execute_writes([action])
         except Exception as e:
-            # Mark as failed
-            action.status = "rejected"
-            update_pending_action(action)
+            outcome = WriteOutcome(action, "failed", opc_result={"error": str(e)})
 
+        # Record who decided and when (persisted with the action); failed writes keep the error in notes,
+        # rate-limited ones are released back to pending
+        record_outcome(outcome, request.operator, request.notes)
+        if outcome.status == "rate_limited":
+            raise HTTPException(
+                status_code=429,
+                detail=f"Tag {action.tag_path} was written less than "
+                f"{settings.opc_write_min_interval_seconds}s ago; action stays pending",
+                headers={"Retry-After": str(max(1, round(outcome.retry_after or 1)))},
+            )
+        if outcome.status == "failed":
             raise HTTPException(
                 status_code=500,
-                detail=f"Failed to execute write operation: {str(e)}",
+                detail=f"Failed to execute write operation: {outcome.error}",
             )
 
+        # Log approval
+        print(
+            f"[Approval] Action {action.id} APPROVED by {request.operator} "
+            f"at {action.approved_at.isoformat()}"
+        )
+        print(f"[Approval] Executed: {action.tag_path} -> {action.value}")
+        if request.notes:
+            print(f"[Approval] Notes: {request.notes}")
+
+        return ApprovalResponse(
+            status="executed",
+            action_id=action.id,
+            message=f"Write operation executed successfully. Tag {action.tag_path} set to {action.value}",
+            result={
+                "tag_path": action.tag_path,
+                "value": action.value,
+                "executed_at": action.approved_at.isoformat(),
+                "operator": request.operator,
+                "opc_result": outcome.opc_result,
+            },
+        )
+
     else:
         # Reject the action
+        action.operator = request.operator
+        action.notes = request.notes
+        action.approved_at = datetime.now()
         action.status = "rejected"
         update_pending_action(action)
 
@@ -127,10 +170,90 @@ async def approve_action(request: ApprovalRequest):
         )
 
 
+@router.post("/approve/bulk", response_model=BulkApprovalResponse)
+async def approve_bulk(request: BulkApprovalRequest):
+    """
+    Approve or reject several pending actions in one call.
+
+    Approved writes go to the OPC UA server as a single Write request. Writes to the
+    same tag are coalesced (last requested wins) unless coalesce=false, and tags
+    written too recently are skipped as rate_limited and stay pending.
+    Each action is claimed atomically first, so ids decided concurrently elsewhere are
+    reported as not_pending and never written twice. Unknown or already processed ids
+    are reported per item instead of failing the call.
+
+    Returns:
+        BulkApprovalResponse with one result per distinct action id
+    """
+    results: dict[str, BulkApprovalItem] = {}
+    actions = []
+    for action_id in dict.fromkeys(request.action_ids):
+        action = claim_pending_action(action_id, "executing" if request.approved else "rejected")
+        if action is not None:
+            actions.append(action)
+            continue
+        current = get_pending_action(action_id)
+        if current is None:
+            results[action_id] = BulkApprovalItem(action_id=action_id, status="not_found", message="Action not found")
+        else:
+            results[action_id] = BulkApprovalItem(
+                action_id=action_id, status="not_pending", message=f"Action already {current.status}",
+                tag_path=current.tag_path, value=current.value,
+            )
+
+    if not request.approved:
+        outcomes = []
+        for action in actions:
+            action.operator = request.operator
+            action.notes = request.notes
+            action.approved_at = datetime.now()
+            action.status = "rejected"
+            update_pending_action(action)
+            results[action.id] = BulkApprovalItem(
+                action_id=action.id, status="rejected", message=f"Rejected by {request.operator}",
+                tag_path=action.tag_path, value=action.value,
+            )
+    else:
+        try:
+            outcomes = await execute_writes(actions, request.coalesce)
+        except Exception as e:
+            outcomes = [WriteOutcome(a, "failed", opc_result={"error": str(e)}) for a in actions]
+
+    for outcome in outcomes:
+        record_outcome(outcome, request.operator, request.notes)
+        action = outcome.action
+        message = {
+            "executed": f"Tag {action.tag_path} set to {action.value}",
+            "failed": f"Write failed: {outcome.error}",
+            "superseded": f"Superseded by later write {outcome.superseded_by}",
+            "rate_limited": f"Tag written too recently; retry after {outcome.retry_after}s",
+        }[outcome.status]
+        results[action.id] = BulkApprovalItem(
+            action_id=action.id,
+            status=outcome.status,
+            message=message,
+            tag_path=action.tag_path,
+            value=action.value,
+            status_code=(outcome.opc_result or {}).get("status_code"),
+            superseded_by=outcome.superseded_by,
+            retry_after=outcome.retry_after,
+        )
+
+    ordered = [results[action_id] for action_id in dict.fromkeys(request.action_ids)]
+    counts: dict[str, int] = {}
+    for item in ordered:
+        counts[item.status] = counts.get(item.status, 0) + 1
+    print(
+        f"[Approval] Bulk {'approval' if request.approved else 'rejection'} by {request.operator}: "
+        + ", ".join(f"{k}={v}" for k, v in counts.items())
+    )
+    return BulkApprovalResponse(operator=request.operator, counts=counts, results=ordered)
+
+
 @router.get("/pending")
 async def list_pending():
     """
-    List all pending actions awaiting approval.
+    List pending actions awaiting approval (expired actions excluded), oldest first.
 
     Returns:
         List of pending actions with details
@@ -151,3 +274,100 @@ async def list_pending():
             for action in pending
         ],
     }
+
+
+RISK_LEVELS = ("low", "medium", "high")
+
+
+def _sse(event_type: str, data, event_id: Optional[str] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.get("/pending/stream")
+async def stream_pending(
+    risk_level: Optional[str] = Query(None, description="Comma-separated risk levels to receive (low,medium,high)"),
+    cursor: Optional[str] = Query(None, description="Last received event id (replay after it)"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Server-Sent Events stream of approval events (replaces polling GET /pending).
+
+    Events:
+        snapshot: current pending actions (first connection only, no cursor)
+        created / updated: a pending action was stored or changed (data = action)
+        reset: the cursor is too old or from before a restart, or the client fell behind; reload GET /pending
+
+    Reconnecting EventSource clients send Last-Event-ID automatically and receive
+    the events they missed from the in-memory replay buffer. Event ids are
+    "<epoch>-<seq>"; an id from before a server restart gets a reset.
+    """
+    levels = None
+    if risk_level:
+        levels = [r.strip().lower() for r in risk_level.split(",") if r.strip()]
+        unknown = [r for r in levels if r not in RISK_LEVELS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown risk level: {', '.join(unknown)}")
+    bus = get_approval_event_bus()
+    after = None
+    if cursor or last_event_id:
+        try:
+            after = bus.parse_event_id(cursor or last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Event id must be '<epoch>-<seq>'")
+
+    async def events():
+        yield "retry: 2000\n\n"
+        position = after
+        if position is None:
+            # position first, then snapshot: anything published meanwhile is replayed (clients upsert by id)
+            position = bus.last_seq
+            pending = [
+                action_to_dict(a) for a in list_pending_actions()
+                if levels is None or a.risk_level in levels
+            ]
+            yield _sse("snapshot", {"count": len(pending), "actions": pending}, bus.event_id(position))
+        async for event in bus.subscribe(position, levels, settings.approval_stream_heartbeat_seconds):
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield _sse(event.type, event.data, bus.event_id(event.seq))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/pending/history")
+async def list_action_history(
+    tag_path: Optional[str] = Query(None, description="Exact tag path"),
+    status: Optional[str] = Query(None, description="pending, executing, executed, rejected, failed, expired, superseded"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """
+    Recent approval decisions (newest first), kept for approval_retention_days.
+
+    Returns:
+        Actions of any status with operator and decision time
+    """
+    actions = list_actions(tag_path, status, limit)
+    return {
+        "count": len(actions),
+        "actions": [
+            {
+                "id": action.id,
+                "tag_path": action.tag_path,
+                "value": action.value,
+                "status": action.status,
+                "risk_level": action.risk_level,
+                "requested_at": action.requested_at.isoformat(),
+                "approved_at": action.approved_at.isoformat() if action.approved_at else None,
+                "operator": action.operator,
+                "notes": action.notes,
+                "reason": action.reason,
+            }
+            for action in actions
+        ],
+    }
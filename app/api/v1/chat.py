@@ -2,9 +2,10 @@ import re
 import uuid
 from typing import Optional
 
-from fastapi import APIRouter, Request
-from langchain_core.messages import AIMessage, HumanMessage
+from fastapi import APIRouter, HTTPException, Request
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
+from langgraph.types import Command
 from pydantic import BaseModel, field_validator
 
 router = APIRouter()
@@ -35,13 +36,35 @@ class QueryRequest(BaseModel):
         return self.question or self.query or ""
 
 
+class ResumeRequest(BaseModel):
+    """Approval decision for a run paused by interrupt() (returned as __interrupt__ from /ask)."""
+
+    thread_id: str
+    approved: bool
+    operator: str
+    notes: Optional[str] = None
+
+
+def _thread_config(thread_id: str) -> RunnableConfig:
+    return RunnableConfig(
+        configurable={"thread_id": thread_id},
+        recursion_limit=30,
+    )
+
+
+async def _pending_interrupts(fastapi_request: Request, thread_id: str) -> tuple:
+    """체크포인트에 저장된 thread의 미해결 interrupt (checkpointer 없으면 항상 빈 tuple)"""
+    if fastapi_request.app.state.checkpointer is None:
+        return ()
+    snapshot = await fastapi_request.app.state.app_graph.aget_state(_thread_config(thread_id))
+    return snapshot.interrupts
+
+
 @router.post("/ask")
 async def ask(request: QueryRequest, fastapi_request: Request):
     question_text = request.get_question_text()
 
     if not question_text:
-        from fastapi import HTTPException
-
         raise HTTPException(
             status_code=422, detail="Either 'question' or 'query' field is required"
         )
@@ -74,17 +97,70 @@ async def ask(request: QueryRequest, fastapi_request: Request):
 
     app_graph = fastapi_request.app.state.app_graph
 
+    # 승인 대기 중인 thread에 새 질문을 넣으면 응답 없는 tool_call이 남음 → /resume 먼저
+    if await _pending_interrupts(fastapi_request, thread_id):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Thread {thread_id} is waiting for approval. Call /resume first.",
+        )
+
     # GraphState 초기값: confirmed_tag_path가 있으면 Disambiguation 건너뜀
-    inputs: dict = {"messages": [HumanMessage(content=question_text)]}
-    if confirmed_tag_path:
-        inputs["confirmed_tag_path"] = confirmed_tag_path
+    # (checkpointer가 thread 상태를 보존하므로 질문마다 바뀌는 필드는 명시적으로 초기화)
+    inputs: dict = {
+        "messages": [HumanMessage(content=question_text)],
+        "confirmed_tag_path": confirmed_tag_path,
+        "tag_candidates": None,
+        "pending_actions": None,
+        "retry_count": 0,
+    }
 
-    config = RunnableConfig(
-        configurable={"thread_id": thread_id},
-        recursion_limit=30,
+    result = await app_graph.ainvoke(inputs, config=_thread_config(thread_id))
+    return _build_response(thread_id, result)
+
+
+@router.post("/resume")
+async def resume(request: ResumeRequest, fastapi_request: Request):
+    """
+    interrupt()로 멈춘 실행을 체크포인트에서 이어서 실행 (Command(resume=...)).
+
+    intent_router / disambiguation / generate_chat을 다시 실행하지 않고 멈춘 도구 노드부터
+    재개하므로 쓰기 실행 전 LLM 호출이 없습니다.
+    """
+    if fastapi_request.app.state.checkpointer is None:
+        raise HTTPException(status_code=503, detail="Checkpointer disabled; runs cannot be resumed")
+    if not await _pending_interrupts(fastapi_request, request.thread_id):
+        raise HTTPException(status_code=404, detail=f"No interrupted run for thread {request.thread_id}")
+
+    print(
+        f"\n[Session: {request.thread_id}] Resume: "
+        f"{'APPROVED' if request.approved else 'REJECTED'} by {request.operator}"
     )
+    decision = {"approved": request.approved, "operator": request.operator, "notes": request.notes}
+    result = await fastapi_request.app.state.app_graph.ainvoke(
+        Command(resume=decision), config=_thread_config(request.thread_id)
+    )
+    return _build_response(request.thread_id, result)
+
 
-    result = await app_graph.ainvoke(inputs, config=config)
+def _build_response(thread_id: str, result: dict) -> dict:
+    # ── 승인 대기 (interrupt) ─────────────────────────────────────
+    interrupts = result.get("__interrupt__")
+    if interrupts:
+        payload = interrupts[0].value
+        return {
+            "thread_id": thread_id,
+            "intent": result.get("intent_category"),
+            "answer": payload.get("message", "승인이 필요합니다."),
+            "__interrupt__": [{"id": i.id, "value": i.value} for i in interrupts],
+            "pending_action": {
+                "id": payload.get("action_id"),
+                "tag": payload.get("tag_path"),
+                "value": payload.get("value"),
+                "risk_level": payload.get("risk_level"),
+                "approval_url": "/resume",
+                "requested_at": payload.get("requested_at"),
+            },
+        }
 
     # ── 태그 Disambiguation 응답 처리 ─────────────────────────────
     # tag_disambiguation_node가 복수 후보를 발견한 경우
@@ -102,7 +178,7 @@ async def ask(request: QueryRequest, fastapi_request: Request):
     last_message = result["messages"][-1]
     final_answer = (
         last_message.content
-        if isinstance(last_message, AIMessage)
+        if isinstance(last_message, (AIMessage, ToolMessage))  # resume 후에는 도구 결과로 종료
         else "응답을 생성하지 못했습니다."
     )
 
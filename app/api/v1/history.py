@@ -0,0 +1,181 @@
+"""
+태그 히스토리 API
+
+LLM을 거치지 않고 히스토리 서비스(범위 계획, 롤업, 결과 캐시)를 직접 사용하는 엔드포인트.
+차트용 시계열은 /history/series (컬럼형 JSON + ETag), 대용량 원본은 /history/export로 제공합니다.
+원본 샘플을 페이지 단위로 넘겨보려면 /history/raw (키셋 커서)를 사용합니다.
+"""
+
+import hashlib
+import json
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.services.history import MAX_RAW_PAGE_SIZE, page_raw_history, parse_time_arg, to_ms
+from app.services.history_cache import get_history_cache
+from app.services.history_export import (
+    EXPORT_FORMATS,
+    encode_export,
+    iter_export_chunks,
+    parquet_available,
+)
+from app.services.history_series import build_series
+from app.services.tag_resolver import resolve_tags
+
+router = APIRouter()
+
+
+# ── 엔드포인트 ────────────────────────────────────────────────────
+
+
+@router.get("/cache/stats")
+async def history_cache_stats():
+    """히스토리 결과 캐시 메트릭 (hit/miss/eviction, 항목 수, 디스크 계층 상태)"""
+    return get_history_cache().metrics()
+
+
+@router.delete("/cache")
+async def clear_history_cache():
+    """히스토리 결과 캐시 전체 삭제 (메모리 + 디스크)"""
+    get_history_cache().clear()
+    return {"status": "ok", "message": "히스토리 캐시 초기화 완료"}
+
+
+@router.get("/export")
+async def export_history(
+    tags: str = Query(..., description="쉼표 구분 태그 경로/이름/와일드카드 (예: Line1/FAN/*)"),
+    start: str = Query(..., description="시작 시각 YYYY-MM-DD[ HH:MM[:SS]]"),
+    end: str = Query(..., description="종료 시각 (미포함)"),
+    format: str = Query("csv", description="csv, ndjson, parquet"),
+    chunk_size: int = Query(5000, ge=100, le=100000),
+):
+    """
+    원본 히스토리 스트리밍 내보내기.
+
+    파티션별 서버 측 커서에서 chunk_size 행씩 읽어 바로 인코딩하므로
+    기간 길이와 무관하게 메모리 사용량이 일정합니다.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(400, f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(400, "parquet export requires pyarrow on the server")
+    try:
+        start_ms = to_ms(parse_time_arg(start))
+        end_ms = to_ms(parse_time_arg(end))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if end_ms <= start_ms:
+        raise HTTPException(400, "end must be after start")
+
+    try:
+        tag_map, missing = resolve_tags(tags.split(","))
+    except Exception as e:
+        raise HTTPException(500, f"태그 조회 실패: {e}")
+    if not tag_map:
+        raise HTTPException(404, f"태그를 찾을 수 없습니다: {', '.join(missing) or tags}")
+
+    chunks = iter_export_chunks(tag_map, start_ms, end_ms, chunk_size)
+    filename = f"history_{start[:10]}_{end[:10]}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if missing:
+        headers["X-Missing-Tags"] = ",".join(missing)
+    return StreamingResponse(
+        encode_export(chunks, format), media_type=EXPORT_FORMATS[format], headers=headers
+    )
+
+
+@router.get("/series")
+def history_series(
+    request: Request,
+    tags: str = Query(..., description="쉼표 구분 태그 경로/이름/와일드카드"),
+    start: str = Query(..., description="시작 시각 YYYY-MM-DD[ HH:MM[:SS]]"),
+    end: str = Query(..., description="종료 시각 (미포함)"),
+    max_points: int = Query(500, ge=2, le=2000),
+    mode: str = Query("auto", description="auto, bucket, raw"),
+    bucket_seconds: Optional[int] = Query(None, ge=1),
+    aggregation: str = Query("avg"),
+    method: str = Query("lttb", description="raw 모드 다운샘플링: lttb, minmax, none"),
+):
+    """
+    차트용 컬럼형 시계열 (LLM 미사용).
+
+    응답 본문 해시를 ETag로 제공하며 If-None-Match가 일치하면 304를 반환합니다.
+    종료된 구간은 결과 캐시에 무기한 보관되므로 반복 조회는 DB를 거치지 않습니다.
+    """
+    try:
+        payload = build_series(
+            tags.split(","),
+            to_ms(parse_time_arg(start)),
+            to_ms(parse_time_arg(end)),
+            max_points=max_points,
+            mode=mode,
+            bucket_seconds=bucket_seconds,
+            aggregation=aggregation,
+            method=method,
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        raise HTTPException(500, f"히스토리 조회 실패: {e}")
+    if not payload["series"]:
+        raise HTTPException(404, f"태그를 찾을 수 없습니다: {', '.join(payload['missing']) or tags}")
+
+    body = json.dumps(payload, separators=(",", ":"), allow_nan=False, default=str).encode()
+    etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+    max_age = 86400 if payload["closed"] else settings.history_cache_open_ttl_seconds
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={max_age}"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/raw")
+def history_raw(
+    tag: Optional[str] = Query(None, description="태그 경로/이름 (cursor가 없을 때 필수)"),
+    start: Optional[str] = Query(None, description="시작 시각 YYYY-MM-DD[ HH:MM[:SS]] (cursor가 없을 때 필수)"),
+    end: Optional[str] = Query(None, description="종료 시각 (미포함, cursor가 없을 때 필수)"),
+    limit: int = Query(1000, ge=1, le=MAX_RAW_PAGE_SIZE, description="페이지 크기"),
+    order: str = Query("asc", description="asc (오래된 순) 또는 desc (최신순)"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor (다른 조건은 첫 페이지 기준)"),
+):
+    """
+    원본 샘플 페이지 조회 (컬럼형 JSON).
+
+    (t_stamp, tagid) 키셋 커서로 이어서 읽으므로 뒤쪽 페이지도 첫 페이지와 같은 비용입니다.
+    next_cursor가 null이면 마지막 페이지입니다.
+    """
+    if cursor:
+        tag_ids, start_ms, end_ms = (), 0, 0
+    else:
+        if not (tag and start and end):
+            raise HTTPException(400, "tag, start, end are required without cursor")
+        if order not in ("asc", "desc"):
+            raise HTTPException(400, "order must be asc or desc")
+        try:
+            start_ms = to_ms(parse_time_arg(start))
+            end_ms = to_ms(parse_time_arg(end))
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        try:
+            tag_map, _ = resolve_tags([tag])
+        except Exception as e:
+            raise HTTPException(500, f"태그 조회 실패: {e}")
+        if not tag_map:
+            raise HTTPException(404, f"태그를 찾을 수 없습니다: {tag}")
+        tag_ids = next(iter(tag_map.values()))
+
+    try:
+        page = page_raw_history(tag_ids, start_ms, end_ms, limit, cursor, descending=order == "desc")
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        raise HTTPException(500, f"히스토리 조회 실패: {e}")
+    return {
+        "tagid": [row[0] for row in page.rows],
+        "t_stamp": [row[1] for row in page.rows],
+        "value": [row[2] for row in page.rows],
+        "next_cursor": page.next_cursor,
+    }
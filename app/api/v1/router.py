@@ -1,7 +1,10 @@
 from fastapi import APIRouter
 from app.api.v1.chat import router as chat_router
+from app.api.v1.admin import router as admin_router
+from app.api.v1.alarms import router as alarms_router
 from app.api.v1.approve import router as approve_router
 from app.api.v1.health import router as health_router
+from app.api.v1.history import router as history_router
 from app.api.v1.tags import router as tags_router
 
 api_router = APIRouter()
@@ -10,3 +13,6 @@ api_router.include_router(health_router, prefix="/health", tags=["Health"])
 api_router.include_router(chat_router, tags=["Chat"])
 api_router.include_router(approve_router, tags=["Approval"])
 api_router.include_router(tags_router, prefix="/tags", tags=["Tags"])
+api_router.include_router(history_router, prefix="/history", tags=["History"])
+api_router.include_router(alarms_router, prefix="/alarms", tags=["Alarms"])
+api_router.include_router(admin_router, prefix="/admin", tags=["Admin"])
@@ -52,6 +52,9 @@ class Settings(BaseSettings):
     opc_security_policy: str = "None"  # "None" 또는 "Basic256Sha256"
     opc_username: str = "Admin"
     opc_password: str = "P@ssw0rd"
+    opc_write_coalesce: bool = True               # 일괄 승인에서 같은 태그 쓰기는 마지막 요청만 실행 (나머지 superseded)
+    opc_write_min_interval_seconds: float = 1.0   # 같은 태그/장치에 연속 쓰기 최소 간격 (0 = 제한 없음)
+    opc_write_rate_scope: str = "tag"             # "tag" | "device" (태그의 상위 폴더 단위)
 
     # ── SQL ──────────────────────────────────────────────────────
     sql_host: str = "127.0.0.1"
@@ -60,6 +63,100 @@ class Settings(BaseSettings):
     sql_password: str = "1111"
     sql_db: str = "postgres"
 
+    # ── db_query 가드 (LLM 임의 SELECT 보호) ─────────────────────────
+    db_query_max_rows: int = 500                  # LIMIT 자동 추가/축소 상한
+    db_query_timeout_seconds: float = 10.0        # 문장별 실행 제한 시간
+    db_query_max_cost: float = 1_000_000.0        # EXPLAIN 총 비용 상한 (PostgreSQL)
+    db_query_max_plan_rows: int = 5_000_000       # EXPLAIN 예상 스캔 행 수 상한
+    db_query_slow_ms: int = 2000                  # 이 시간 이상 걸린 쿼리는 느린 쿼리 로그에 기록
+    db_query_slow_log_path: str = "./logs/slow_queries.jsonl"
+
+    # ── 히스토리 롤업 (시간별/일별 집계 테이블) ───────────────────
+    rollup_enabled: bool = True
+    rollup_interval_seconds: int = 300   # 증분 갱신 주기
+    rollup_settle_seconds: int = 600     # 늦게 기록되는 데이터 대기 시간
+    rollup_backfill_days: int = 90       # 최초 실행 시 소급 계산 기간
+    rollup_batch_hours: int = 6          # 한 번에 처리하는 원본 구간 (시간)
+
+    # ── 알람 source 인덱스 (LIKE 대신 source IN 조회) ────────────────
+    alarm_index_enabled: bool = True
+    alarm_index_refresh_seconds: int = 60         # 새 source 증분 반영 주기 (조회 시 확인)
+    alarm_index_max_sources: int = 500            # IN 목록 상한 (초과 시 LIKE 사용)
+
+    # ── 알람 롤업 (source × 시간 × eventtype × priority 건수) ──────────
+    alarm_rollup_enabled: bool = True
+    alarm_rollup_interval_seconds: int = 300      # 증분 갱신 주기
+    alarm_rollup_settle_seconds: int = 120        # 이 시간이 지난 시간 버킷만 롤업
+    alarm_rollup_backfill_days: int = 90          # 최초 실행 시 소급 계산 기간
+    alarm_rollup_batch_hours: int = 24            # 한 번에 처리하는 원본 구간 (시간)
+    alarm_rollup_hot_days: int = 14               # 메모리 사본으로 보관하는 최근 기간
+
+    # ── 알람 에피소드 (active → ack → clear 발생 단위) ─────────────
+    alarm_episode_days: int = 30                  # 메모리 저장소 보관 기간 (0 = 항상 원본에서 생성)
+    alarm_episode_refresh_seconds: int = 60       # 증분 반영 주기 (조회 시 확인)
+    alarm_episode_lookback_hours: int = 24        # 원본 생성 시 창 이전에 시작한 에피소드 탐색 구간
+
+    # ── 실시간 알람 (OPC UA Alarms & Conditions 구독) ──────────────
+    live_alarms_enabled: bool = True
+    live_alarm_publishing_ms: int = 500
+    live_alarm_check_seconds: int = 10            # 구독 상태 확인 / 재구독 주기
+    live_alarm_max_backoff_seconds: int = 600     # 구독 실패가 이어질 때 재시도 간격 상한 (지수 증가)
+
+    # ── 알람 성능 분석 (ISA-18.2) ─────────────────────────────────
+    alarm_area_depth: int = 2                     # 운영 구역 = 태그 경로 앞 N 단계
+    alarm_flood_window_minutes: int = 10
+    alarm_flood_threshold: int = 10               # 창당 이 건수를 넘으면 flood
+    alarm_chatter_count: int = 3                  # chatter_seconds 안에 이 횟수 이상 발생하면 chattering
+    alarm_chatter_seconds: int = 60
+    alarm_stale_hours: float = 24                 # 이 시간 이상 미해제면 stale
+    alarm_report_cache_entries: int = 128
+    alarm_report_open_ttl_seconds: int = 60       # 현재 시각에 걸친 기간의 보고서 캐시 TTL
+
+    # ── 알람 원인 상관 분석 ───────────────────────────────────────
+    correlation_pre_minutes: int = 60             # 알람 발생 전 분석 구간
+    correlation_post_minutes: int = 10            # 알람 발생 후 분석 구간
+    correlation_step_seconds: int = 10            # 공통 격자 간격
+    correlation_trend_minutes: int = 15           # 알람 직전 추세 구간
+    correlation_max_lag_minutes: int = 15         # 지연 상호상관 최대 선행 시간
+    correlation_max_tags: int = 40                # sibling 태그 상한
+
+    # ── 쓰기 승인 저장소 (HITL pending action) ────────────────────
+    approval_store_backend: str = "sqlite"        # "sqlite" | "redis" | "memory"
+    approval_store_path: str = "./data/approvals.db"
+    approval_redis_url: str = "redis://localhost:6379/0"
+    approval_pending_ttl_seconds: int = 3600      # 이 시간 동안 승인되지 않으면 expired
+    approval_retention_days: int = 30             # 처리 완료(executed/rejected/failed/expired) 보관 기간
+    approval_sweep_interval_seconds: int = 300
+    approval_sweep_batch: int = 1000              # 정리 1회당 최대 삭제 건수
+    approval_event_buffer: int = 1000             # /pending/stream 재연결 시 재전송 가능한 이벤트 수
+    approval_stream_queue_size: int = 1000        # 구독자별 대기 이벤트 상한 (초과 시 reset 후 종료)
+    approval_stream_heartbeat_seconds: float = 15.0
+
+    # ── LangGraph 체크포인터 (승인 대기 실행 /resume) ─────────────
+    checkpointer_backend: str = "sqlite"          # "sqlite" (./data/checkpoints.db) | "memory" | "none"
+
+    # ── 히스토리 결과 캐시 ────────────────────────────────────────
+    history_cache_enabled: bool = True
+    history_cache_max_entries: int = 512
+    history_cache_open_ttl_seconds: int = 30      # 현재 시각에 걸친 구간의 TTL
+    history_cache_settle_seconds: int = 120       # 이 시간보다 오래된 구간은 불변으로 간주
+    history_cache_disk_path: str = ""             # 예: "./data/history_cache.db" (빈 값 = 비활성)
+    history_cache_disk_max_entries: int = 10000
+
+    # ── 시간가중 분석 ─────────────────────────────────────────────
+    analytics_pool_workers: int = 2               # 0 = 프로세스 풀 비활성
+    analytics_pool_min_samples: int = 200000      # 이 샘플 수 이상이면 프로세스 풀에서 계산
+
+    # ── 질문 템플릿 (ReAct 우회) ──────────────────────────────────
+    question_templates_enabled: bool = True
+    question_templates_llm_answer: bool = True    # False면 조회 결과를 그대로 답변 (LLM 0회)
+
+    # ── 에이전트 실행 모드 ("react" | "plan_execute") ─────────────
+    historian_agent_mode: str = "react"
+    alarm_agent_mode: str = "react"
+    plan_max_steps: int = 8                       # 계획 단계 수 상한 (초과 시 ReAct로 전환)
+    plan_max_parallel: int = 4                    # 동시에 실행할 도구 호출 수
+
     # ── LangSmith 추적 설정 ───────────────────────────────────────
     langsmith_tracing: bool = False
     langsmith_endpoint: str = "https://api.smith.langchain.com"
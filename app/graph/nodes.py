@@ -1,8 +1,9 @@
 from langgraph.types import interrupt
 from langchain.agents import create_agent
-from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.messages import AIMessage, SystemMessage, ToolMessage
 from langchain_core.prompts import ChatPromptTemplate
 
+from app.core.config import settings
 from app.core.llm_factory import get_llm
 from app.graph.state import (
     GraphState,
@@ -18,6 +19,9 @@ from app.graph.prompts import (
     KNOWLEDGE_AGENT_PROMPT,
     AGGREGATION_PROMPT,
 )
+from app.graph.plan_execute import plan_and_execute
+from app.graph.question_templates import answer_with_template
+from app.services.date_parser import TimeRange, format_time_hint, parse_time_range
 from app.services.vectorstore import get_retriever
 from app.tools import chat_tools_list
 from app.tools.tag_history_tools import tag_history_tools_list
@@ -89,12 +93,29 @@ Respond ONLY in valid JSON format: {{"destination": "<category>"}}
 
     print(f"[Router] Decision: {destination}")
 
+    # 시간 표현은 LLM 도구 호출 없이 미리 해석해 에이전트 프롬프트에 주입
+    time_range = parse_time_range(question)
+    if time_range:
+        print(f"[Router] Time range: {time_range.start} ~ {time_range.end} ({time_range.expression})")
+
     return {
         "intent_category": destination,
         "payload": question,
+        "time_range": time_range.to_dict() if time_range else None,
     }
 
 
+def _time_hint(state: GraphState) -> str:
+    """state의 사전 해석 시간 범위를 프롬프트 힌트로 변환 (없으면 빈 문자열)"""
+    data = state.get("time_range")
+    if not data:
+        return ""
+    try:
+        return format_time_hint(TimeRange.from_dict(data))
+    except (KeyError, ValueError):
+        return ""
+
+
 def retrieve_rag(state: GraphState):
     retriever = get_retriever()
     if not retriever:
@@ -203,8 +224,9 @@ You can query both Tag History data and Alarm History data.
 ## Tag History Tools (태그 히스토리)
 
 1. `parse_date_to_partition(date_string)`: 자연어 날짜를 파티션 정보로 변환
-   - 입력: "2025년 9월 1일", "어제", "오늘" 등
-   - 출력: year, month, day, expected_table 정보
+   - 입력: "2025년 9월 1일", "어제", "지난달", "최근 3시간" 등
+   - 출력: year, month, day, expected_table, start_time/end_time 범위 정보
+   - 아래에 "시간 범위 사전 해석" 섹션이 있으면 호출하지 말고 그 값을 사용
 
 2. `get_tag_id(tag_name)`: 태그명으로 ID 조회
    - 입력: "FAN1", "Tank1" 등 (부분 일치)
@@ -214,25 +236,70 @@ You can query both Tag History data and Alarm History data.
    - tag_id, year, month: 필수
    - start_day, end_day: 일자 범위 (선택)
    - aggregation: "raw", "avg", "max", "min", "sum", "count"
+   - raw 결과는 max_points(기본 200)개로 형태를 보존하며 축소되고 original_points가 함께 보고됨
+   - raw는 최신순 limit행 단위 페이지이며, 더 이전 데이터가 있으면 결과의 cursor를 그대로 전달해 이어서 조회 (limit를 늘려 다시 조회하지 마세요)
 
 4. `find_partition_table(year, month)`: 파티션 테이블 존재 여부 확인
 
+5. `get_tag_history_buckets(tag_id, start_time, end_time, bucket_seconds, aggregation)`: 시간 버킷 집계
+   - "어제 시간별 평균", "이번 달 일별 최대" 같은 질문에 사용 (raw 조회 대신)
+   - bucket_seconds: 3600=시간별, 86400=일별
+   - aggregation: "avg", "min", "max", "sum", "count", "first", "last"
+
+6. `get_tag_statistics(tag_id, start_time, end_time, metrics, integral_unit)`: 시간가중 통계
+   - Ignition은 값 변경 시에만 기록하므로 "평균"은 get_tag_history의 avg 대신 이 도구의 twa 사용
+   - 적산량(integral), 표준편차, 백분위수, 변화율, ON/OFF 시간 및 전환 횟수(state)
+   - "어제 펌프 가동 시간", "지난주 유량 적산", "어제 몇 번 켜졌어?" 같은 질문에 사용
+
+7. `get_multi_tag_history(tag_paths, start_time, end_time, step_seconds, method, correlation)`: 다중 태그 조회
+   - "FAN1과 FAN2 비교", "Line1 팬 전체 추이" 같은 질문에 한 번의 호출로 사용 (get_tag_id 불필요)
+   - tag_paths: 쉼표 구분 ("FAN1,FAN2") 또는 그룹 패턴 ("Line1/FAN/*")
+   - 공통 시간 격자로 정렬된 표 반환, correlation=True면 태그 간 상관계수 포함
+
 ## Alarm History Tools (알람 히스토리)
 
-5. `get_latest_alarm_for_tag(tag_path)`: 특정 태그의 최근 알람 조회
+8. `get_latest_alarm_for_tag(tag_path)`: 특정 태그의 최근 알람 조회
    - "FAN1 알람 언제 발생?" → get_latest_alarm_for_tag(tag_path="FAN1")
 
-6. `search_alarm_events(tag_path, hours_ago, event_type, limit)`: 알람 이벤트 검색
+9. `search_alarm_events(tag_path, hours_ago, event_type, limit)`: 알람 이벤트 검색
    - tag_path: 태그 경로 (선택)
    - hours_ago: 최근 N시간 (기본 24)
    - event_type: "active", "clear", "ack" (선택)
+   - cursor: 결과에 "다음 페이지"가 있으면 그 cursor만 전달해 다음 페이지 조회 (limit를 늘려 다시 조회하지 마세요)
 
-7. `get_alarm_statistics(tag_path, days)`: 알람 통계 조회
+10. `get_alarm_statistics(tag_path, days)`: 알람 통계 조회
    - 발생 횟수, 태그별 분포
 
-8. `get_alarm_count_by_period(tag_path, start_date, end_date)`: 기간별 알람 횟수
+11. `get_alarm_count_by_period(tag_path, start_date, end_date)`: 기간별 알람 횟수
    - start_date, end_date: "YYYY-MM-DD" 형식
 
+12. `get_alarm_duration(tag_path, start_date, end_date, limit)`: 알람 상태였던 총 시간 (source별)
+   - active → clear 에피소드 기준, 미해제 알람은 현재까지
+
+13. `get_alarm_ack_stats(tag_path, start_date, end_date)`: 확인(ack)까지 걸린 시간 통계
+   - 평균(MTTA), 중앙값, 최대, 미확인 건수 (priority별)
+
+14. `get_longest_alarm_episodes(tag_path, start_date, end_date, limit)`: 가장 오래 지속된 알람 에피소드
+
+15. `get_alarm_flood_report(tag_path, start_date, end_date)`: 구역별 10분당 알람률과 flood 구간 (ISA-18.2)
+
+16. `get_chattering_alarms(tag_path, start_date, end_date, min_count, window_seconds)`: 짧은 시간에 반복 발생한 알람
+
+17. `get_stale_alarms(tag_path, hours)`: N시간 이상 해제되지 않은 알람
+
+18. `get_bad_actor_alarms(tag_path, start_date, end_date, limit)`: 발생 건수 상위 알람과 누적 비중
+
+19. `analyze_alarm_cause(tag_path, alarm_time, limit)`: 알람 전후 같은 폴더 태그의 변화점/추세/지연 상관으로 원인 후보 순위
+   - "FAN1 알람 원인" → analyze_alarm_cause(tag_path="FAN1")
+
+20. `get_active_alarms(tag_path, unacked_only, limit)`: OPC UA 알람 구독으로 유지하는 현재 활성/미확인 알람
+   - "지금 울리는 알람" → get_active_alarms()
+   - "미확인 알람" → get_active_alarms(unacked_only=True)
+
+21. `get_alarm_histogram(tag_path, start_date, end_date, bucket, interval_minutes, split_by)`: 시간대/요일/간격별 알람 발생 건수 벡터
+   - "알람이 주로 몇 시에 발생해?" → get_alarm_histogram(bucket="hour_of_day")
+   - "요일별 priority별 알람" → get_alarm_histogram(bucket="day_of_week", split_by="priority")
+
 ## Workflow Examples
 
 ### 태그 히스토리 조회
@@ -241,6 +308,20 @@ Q: "2025년 9월 1일 FAN1 평균 RPM은?"
 2. get_tag_id("FAN1") → id=5
 3. get_tag_history(5, 2025, 9, 1, 1, "avg") → avg_value=1234.5
 
+Q: "어제 FAN1 시간별 평균 RPM"
+1. parse_date_to_partition("어제") → year=2025, month=9, day=1
+2. get_tag_id("FAN1") → id=5
+3. get_tag_history_buckets(5, "2025-09-01", "2025-09-02", 3600, "avg") → 24개 시간별 평균
+
+Q: "어제 Pump1 가동 시간과 기동 횟수"
+1. parse_date_to_partition("어제") → year=2025, month=9, day=1
+2. get_tag_id("Pump1") → id=8
+3. get_tag_statistics(8, "2025-09-01", "2025-09-02", "state") → on_s, rising
+
+Q: "어제 FAN1과 FAN2 RPM 비교해줘"
+1. parse_date_to_partition("어제") → year=2025, month=9, day=1
+2. get_multi_tag_history("FAN1,FAN2", "2025-09-01", "2025-09-02", 3600, correlation=True)
+
 ### 알람 조회
 Q: "FAN1 알람이 최근에 언제 발생했어?"
 1. get_latest_alarm_for_tag(tag_path="FAN1") → eventtime, source 정보
@@ -248,6 +329,10 @@ Q: "FAN1 알람이 최근에 언제 발생했어?"
 Q: "지난주 Smoke 알람 통계 알려줘"
 1. get_alarm_statistics(tag_path="Smoke", days=7) → 발생 횟수, 분포
 
+Q: "지난주 FAN1 알람이 얼마나 오래 지속됐어?"
+1. parse_date_to_partition("지난주") → start_time, end_day
+2. get_alarm_duration(tag_path="FAN1", start_date="2025-09-01", end_date="2025-09-07") → source별 알람 시간
+
 Answer in Korean. 숫자와 시간 정보를 명확하게 전달하세요."""
 
 
@@ -259,15 +344,27 @@ def sql_react_agent(state: GraphState):
     """
     print("[SQL ReAct Agent] Processing database query...")
 
+    # 정형화된 질문은 템플릿으로 도구 체인을 직접 실행 (ReAct 반복 생략)
+    if settings.question_templates_enabled:
+        time_range = state.get("time_range")
+        answer = answer_with_template(
+            state["messages"][-1].content,
+            TimeRange.from_dict(time_range) if time_range else None,
+            {"confirmed_tag_path": state.get("confirmed_tag_path")},
+        )
+        if answer is not None:
+            return {"messages": state["messages"] + [AIMessage(content=answer)]}
+
     llm = get_llm(temperature=0)
     # 태그 히스토리 도구 + 알람 도구 결합
     combined_tools = tag_history_tools_list + alarm_tools_list
 
     # Create ReAct agent with specialized SQL prompt
+    time_hint = _time_hint(state)
     sql_agent = create_agent(
         model=llm,
         tools=combined_tools,
-        system_prompt=SQL_AGENT_PROMPT,
+        system_prompt=f"{SQL_AGENT_PROMPT}\n\n{time_hint}" if time_hint else SQL_AGENT_PROMPT,
     )
 
     # Execute agent
@@ -525,17 +622,29 @@ def historian_agent(state: GraphState):
     # Extract only the latest user question
     latest_question = state["messages"][-1].content
 
+    time_hint = _time_hint(state)
+
+    # Plan-and-Execute: 첫 진입(도구 결과가 아닌 질문)에서만 시도, 실패 시 ReAct
+    if settings.historian_agent_mode == "plan_execute" and not isinstance(state["messages"][-1], ToolMessage):
+        system_prompt = f"{HISTORIAN_AGENT_PROMPT}\n\n{time_hint}" if time_hint else HISTORIAN_AGENT_PROMPT
+        response = plan_and_execute(latest_question, tag_history_tools_list, system_prompt, "Historian Agent")
+        if response is not None:
+            print("[Historian Agent] Completed (plan-and-execute)")
+            return {
+                "messages": [response],
+                "agents_completed": state.get("agents_completed", 0) + 1,
+            }
+
     llm = get_llm(temperature=0)
     llm_with_tools = llm.bind_tools(tag_history_tools_list)
 
-    agent_chain = ChatPromptTemplate.from_messages(
-        [
-            ("system", HISTORIAN_AGENT_PROMPT),
-            ("human", "{question}"),
-        ]
-    ) | llm_with_tools
+    messages = [("system", HISTORIAN_AGENT_PROMPT)]
+    if time_hint:
+        messages.append(("system", "{time_hint}"))
+    messages.append(("human", "{question}"))
+    agent_chain = ChatPromptTemplate.from_messages(messages) | llm_with_tools
 
-    response = agent_chain.invoke({"question": latest_question})
+    response = agent_chain.invoke({"question": latest_question, "time_hint": time_hint})
 
     # Mark message with agent name for aggregation
     response.name = "Historian Agent"
@@ -564,17 +673,29 @@ def alarm_agent(state: GraphState):
     # Extract only the latest user question
     latest_question = state["messages"][-1].content
 
+    time_hint = _time_hint(state)
+
+    # Plan-and-Execute: 첫 진입(도구 결과가 아닌 질문)에서만 시도, 실패 시 ReAct
+    if settings.alarm_agent_mode == "plan_execute" and not isinstance(state["messages"][-1], ToolMessage):
+        system_prompt = f"{ALARM_AGENT_PROMPT}\n\n{time_hint}" if time_hint else ALARM_AGENT_PROMPT
+        response = plan_and_execute(latest_question, alarm_tools_list, system_prompt, "Alarm Agent")
+        if response is not None:
+            print("[Alarm Agent] Completed (plan-and-execute)")
+            return {
+                "messages": [response],
+                "agents_completed": state.get("agents_completed", 0) + 1,
+            }
+
     llm = get_llm(temperature=0)
     llm_with_tools = llm.bind_tools(alarm_tools_list)
 
-    agent_chain = ChatPromptTemplate.from_messages(
-        [
-            ("system", ALARM_AGENT_PROMPT),
-            ("human", "{question}"),
-        ]
-    ) | llm_with_tools
+    messages = [("system", ALARM_AGENT_PROMPT)]
+    if time_hint:
+        messages.append(("system", "{time_hint}"))
+    messages.append(("human", "{question}"))
+    agent_chain = ChatPromptTemplate.from_messages(messages) | llm_with_tools
 
-    response = agent_chain.invoke({"question": latest_question})
+    response = agent_chain.invoke({"question": latest_question, "time_hint": time_hint})
 
     # Mark message with agent name for aggregation
     response.name = "Alarm Agent"
@@ -866,17 +987,25 @@ def validate_agent_response(state: GraphState):
 # ============================================================================
 
 
-def execute_tool_with_approval(state: GraphState):
+async def execute_tool_with_approval(state: GraphState):
     """
     Execute tools with modern interrupt-based approval for write operations.
 
     This replaces the legacy approval workflow with LangGraph 1.x interrupt() pattern.
     When a write operation is detected, the graph pauses and waits for human approval.
+
+    Resumed with Command(resume={"approved", "operator", "notes"}) (POST /resume), the node
+    re-runs from the top without any LLM call: the pending action id is derived from the
+    tool_call id, so the action stored before the interrupt is found again and written
+    through the write executor.
     """
     from langchain_core.messages import ToolMessage
     from datetime import datetime
     import uuid
 
+    from app.graph.state import PendingAction
+    from app.services.approval_storage import get_pending_action, store_pending_action
+
     # Get the last AI message with tool calls
     last_message = state["messages"][-1]
 
@@ -912,23 +1041,26 @@ def execute_tool_with_approval(state: GraphState):
         is_write_operation = tool_name == "write_ignition_tag"
 
         if is_write_operation:
-            # Create pending action
-            from app.graph.state import PendingAction
-
-            action = PendingAction(
-                id=str(uuid.uuid4()),
-                action_type="write_tag",
-                tag_path=tool_args.get("tag_path", "unknown"),
-                value=tool_args.get("value"),
-                reason=f"User requested write operation via {tool_name}",
-                requested_at=datetime.now(),
-                status="pending",
-                risk_level=_assess_risk_level(tool_args.get("tag_path", "")),
-            )
+            # Stable id: the node re-runs from the top on resume
+            action_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"tool_call:{tool_id}"))
+            action = get_pending_action(action_id)
+            if action is None:
+                action = PendingAction(
+                    id=action_id,
+                    action_type="write_tag",
+                    tag_path=tool_args.get("tag_path", "unknown"),
+                    value=tool_args.get("value"),
+                    reason=f"User requested write operation via {tool_name}",
+                    requested_at=datetime.now(),
+                    status="pending",
+                    risk_level=_assess_risk_level(tool_args.get("tag_path", "")),
+                )
+                # Visible in GET /pending and /pending/stream while the graph is paused
+                store_pending_action(action)
 
-            print(f"[HITL] Write operation detected: {action.tag_path} -> {action.value}")
-            print(f"[HITL] Risk level: {action.risk_level}")
-            print(f"[HITL] Interrupting graph for approval...")
+                print(f"[HITL] Write operation detected: {action.tag_path} -> {action.value}")
+                print(f"[HITL] Risk level: {action.risk_level}")
+                print(f"[HITL] Interrupting graph for approval...")
 
             # Use LangGraph interrupt() to pause execution and wait for approval
             # The interrupt value will be stored in the checkpointer
@@ -942,7 +1074,7 @@ def execute_tool_with_approval(state: GraphState):
                           f"Tag: {action.tag_path}\n"
                           f"Value: {action.value}\n"
                           f"Risk: {action.risk_level}\n\n"
-                          f"Use /api/v1/approve to approve or reject.",
+                          f"Use /api/v1/resume with this thread_id to approve or reject.",
             }
 
             # This will pause the graph and save state
@@ -952,47 +1084,19 @@ def execute_tool_with_approval(state: GraphState):
             # When resumed, human_response will contain the approval decision
             if human_response:
                 print(f"[HITL] Received approval response: {human_response}")
-
-                if human_response.get("approved"):
-                    # Execute the write operation
-                    try:
-                        import asyncio
-                        if asyncio.iscoroutinefunction(tool_func.func):
-                            result = asyncio.run(tool_func.func(**tool_args))
-                        else:
-                            result = tool_func.func(**tool_args)
-
-                        tool_content = f"✅ Approved by {human_response.get('operator', 'unknown')}\n{str(result)}"
-                        print(f"[HITL] Write operation executed successfully")
-
-                    except Exception as e:
-                        tool_content = f"❌ Error executing approved operation: {str(e)}"
-                        print(f"[HITL] Error: {e}")
-                else:
-                    tool_content = f"🚫 Rejected by {human_response.get('operator', 'unknown')}\n" \
-                                 f"Reason: {human_response.get('notes', 'No reason provided')}"
-                    print(f"[HITL] Write operation rejected")
-
-                tool_messages.append(
-                    ToolMessage(content=tool_content, tool_call_id=tool_id)
-                )
+                tool_content = await _apply_approval(action.id, human_response)
             else:
                 # No response yet, should not happen but handle gracefully
                 print("[HITL] Warning: Interrupt returned None")
-                tool_messages.append(
-                    ToolMessage(
-                        content="⏸️ Awaiting approval...",
-                        tool_call_id=tool_id,
-                    )
-                )
+                tool_content = "⏸️ Awaiting approval..."
+
+            tool_messages.append(
+                ToolMessage(content=tool_content, tool_call_id=tool_id)
+            )
         else:
             # Non-write operation, execute immediately
             try:
-                import asyncio
-                if asyncio.iscoroutinefunction(tool_func.func):
-                    result = asyncio.run(tool_func.func(**tool_args))
-                else:
-                    result = tool_func.func(**tool_args)
+                result = await tool_func.ainvoke(tool_args)
 
                 tool_messages.append(
                     ToolMessage(content=str(result), tool_call_id=tool_id)
@@ -1009,6 +1113,70 @@ def execute_tool_with_approval(state: GraphState):
     return {"messages": tool_messages}
 
 
+async def _apply_approval(action_id: str, human_response: dict) -> str:
+    """Apply a resumed approval decision to the stored action; returns the ToolMessage content."""
+    from datetime import datetime
+
+    from app.services.approval_storage import claim_pending_action, get_pending_action, update_pending_action
+    from app.services.write_executor import WriteOutcome, execute_writes, record_outcome
+
+    operator = human_response.get("operator", "unknown")
+    notes = human_response.get("notes")
+
+    action = claim_pending_action(action_id, "executing" if human_response.get("approved") else "rejected")
+    if action is None:
+        # Decided elsewhere (POST /approve), by an earlier resume of this node (several write
+        # tool_calls re-run from the top) or expired while paused - never write twice
+        current = get_pending_action(action_id)
+        print(f"[HITL] Action {action_id} is {current.status if current else 'missing'}, skipping write")
+        return _describe_decision(action_id, current)
+
+    if not human_response.get("approved"):
+        action.status = "rejected"
+        action.operator = operator
+        action.notes = notes
+        action.approved_at = datetime.now()
+        update_pending_action(action)
+        print(f"[HITL] Write operation rejected")
+        return f"🚫 Rejected by {operator}\nReason: {notes or 'No reason provided'}"
+
+    try:
+        (outcome,) = await execute_writes([action])
+    except Exception as e:
+        outcome = WriteOutcome(action, "failed", opc_result={"error": str(e)})
+    record_outcome(outcome, operator, notes)
+
+    if outcome.status == "executed":
+        print(f"[HITL] Write operation executed successfully")
+        return f"✅ Approved by {operator}\n{action.tag_path} -> {action.value} ({outcome.opc_result.get('status_code', 'OK')})"
+    if outcome.status == "rate_limited":
+        print(f"[HITL] Write rate limited, action stays pending")
+        return (
+            f"⏳ {action.tag_path} was written too recently; retry after {outcome.retry_after}s.\n"
+            f"Action {action.id} stays pending (POST /api/v1/approve)."
+        )
+    print(f"[HITL] Error: {outcome.error}")
+    return f"❌ Error executing approved operation: {outcome.error}"
+
+
+def _describe_decision(action_id: str, action) -> str:
+    """ToolMessage content for an action that was already decided (the stored outcome)."""
+    if action is None:
+        return f"⚠️ Action {action_id} not found; no write performed"
+    by = action.operator or "unknown"
+    if action.status == "executed":
+        return f"✅ Approved by {by}\n{action.tag_path} -> {action.value} (already written)"
+    if action.status == "rejected":
+        return f"🚫 Rejected by {by}\nReason: {action.notes or 'No reason provided'}"
+    if action.status == "failed":
+        return f"❌ Approved by {by} but the write failed: {action.notes}"
+    if action.status == "superseded":
+        return f"↪️ Approved by {by}; {action.notes or 'superseded by a later write'} ({action.tag_path} not written)"
+    if action.status == "executing":
+        return f"⏳ {action.tag_path} -> {action.value} is being written by another approval"
+    return f"⚠️ Action {action_id} is {action.status}; no write performed"
+
+
 def _assess_risk_level(tag_path: str) -> str:
     """Assess risk level based on tag path patterns."""
     tag_lower = tag_path.lower()
@@ -0,0 +1,198 @@
+"""
+Plan-and-Execute 모드 - historian/alarm 에이전트의 ReAct 루프 대안.
+
+1. 계획: LLM이 도구 호출 DAG 전체를 구조화 출력으로 한 번에 작성
+2. 실행: 의존성이 없는 단계끼리 스레드 풀에서 병렬 실행 (LLM 호출 없음)
+3. 종합: 실행 결과로 LLM이 최종 답변 작성
+
+LLM 왕복이 질문당 2회로 고정됩니다. 계획 생성/검증에 실패하면 None을 반환해
+호출한 에이전트가 기존 ReAct 방식으로 처리합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, Sequence
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.tools import BaseTool
+
+from app.core.config import settings
+from app.core.llm_factory import get_llm
+from app.graph.prompts import PLAN_SYNTHESIS_PROMPT, PLANNER_PROMPT
+from app.graph.state import PlanStep, ToolPlanOutput
+
+
+AGENT_MODES = ("react", "plan_execute")
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+_MAX_RESULT_CHARS = 4000
+
+
+class PlanError(ValueError):
+    """실행할 수 없는 계획 (알 수 없는 도구, 순환 의존성 등)"""
+
+
+# ── 계획 검증 ─────────────────────────────────────────────────────
+
+
+def plan_levels(steps: Sequence[PlanStep], tool_names: set[str], max_steps: int) -> list[list[PlanStep]]:
+    """
+    계획을 검증하고 병렬 실행 단위(레벨)로 나눔.
+
+    Raises:
+        PlanError: 단계 수 초과, 중복 id, 알 수 없는 도구/의존성, 순환 의존성
+    """
+    if len(steps) > max_steps:
+        raise PlanError(f"plan has {len(steps)} steps (max {max_steps})")
+    by_id = {}
+    for step in steps:
+        if step.id in by_id:
+            raise PlanError(f"duplicate step id: {step.id}")
+        if step.tool not in tool_names:
+            raise PlanError(f"unknown tool: {step.tool}")
+        by_id[step.id] = step
+    for step in steps:
+        unknown = [d for d in step.depends_on if d not in by_id]
+        if unknown:
+            raise PlanError(f"step {step.id} depends on unknown steps: {unknown}")
+
+    levels: list[list[PlanStep]] = []
+    done: set[str] = set()
+    remaining = list(steps)
+    while remaining:
+        ready = [s for s in remaining if all(d in done for d in s.depends_on)]
+        if not ready:
+            raise PlanError(f"cyclic dependencies: {[s.id for s in remaining]}")
+        levels.append(ready)
+        done.update(s.id for s in ready)
+        remaining = [s for s in remaining if s.id not in done]
+    return levels
+
+
+# ── 실행 ──────────────────────────────────────────────────────────
+
+
+def _reference_value(arg_name: str, output: str) -> str:
+    """인자 값 전체가 참조일 때: 같은 이름의 key=value → 첫 번째 숫자 → 결과 전체"""
+    named = re.search(rf"\b{re.escape(arg_name)}=([^,\s]+)", output)
+    if named:
+        return named.group(1)
+    number = _NUMBER.search(output)
+    return number.group() if number else output
+
+
+def resolve_args(args: dict[str, Any], outputs: dict[str, str]) -> dict[str, Any]:
+    """인자 안의 "{step_id}" 참조를 앞 단계 결과로 치환"""
+    resolved = {}
+    for name, value in args.items():
+        if isinstance(value, str):
+            whole = _PLACEHOLDER.fullmatch(value.strip())
+            if whole and whole.group(1) in outputs:
+                value = _reference_value(name, outputs[whole.group(1)])
+            else:
+                value = _PLACEHOLDER.sub(
+                    lambda m: outputs.get(m.group(1), m.group(0)), value
+                )
+        resolved[name] = value
+    return resolved
+
+
+def _run_tool(tool: BaseTool, args: dict[str, Any]) -> str:
+    if getattr(tool, "coroutine", None) is not None and getattr(tool, "func", None) is None:
+        return str(asyncio.run(tool.ainvoke(args)))
+    return str(tool.invoke(args))
+
+
+def execute_plan(
+    levels: list[list[PlanStep]], tools: dict[str, BaseTool], max_parallel: int
+) -> dict[str, str]:
+    """레벨 순서로 실행하고 같은 레벨의 단계는 병렬 실행. 실패한 단계에 의존하는 단계는 건너뜀"""
+    outputs: dict[str, str] = {}
+    failed: set[str] = set()
+
+    def run(step: PlanStep) -> tuple[str, str, bool]:
+        blocked = [d for d in step.depends_on if d in failed]
+        if blocked:
+            return step.id, f"Skipped: dependency failed ({', '.join(blocked)})", False
+        try:
+            args = resolve_args(step.args, outputs)
+            print(f"[Plan] {step.id}: {step.tool}({args})")
+            return step.id, _run_tool(tools[step.tool], args), True
+        except Exception as e:
+            return step.id, f"Error: {e}", False
+
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as pool:
+        for level in levels:
+            for step_id, output, ok in pool.map(run, level):
+                outputs[step_id] = output
+                if not ok:
+                    failed.add(step_id)
+    return outputs
+
+
+# ── 계획 / 종합 ───────────────────────────────────────────────────
+
+
+def _describe_tools(tools: Sequence[BaseTool]) -> str:
+    lines = []
+    for tool in tools:
+        summary = (tool.description or "").strip().split("\n")[0]
+        lines.append(f"- {tool.name}({json.dumps(tool.args, ensure_ascii=False)}): {summary}")
+    return "\n".join(lines)
+
+
+def _format_results(steps: Sequence[PlanStep], outputs: dict[str, str]) -> str:
+    parts = []
+    for step in steps:
+        output = outputs.get(step.id, "")
+        if len(output) > _MAX_RESULT_CHARS:
+            output = output[:_MAX_RESULT_CHARS] + "...(생략)"
+        args = json.dumps(step.args, ensure_ascii=False, default=str)
+        parts.append(f"[{step.id}] {step.tool}({args})\n{output}")
+    return "\n\n".join(parts)
+
+
+def plan_and_execute(
+    question: str,
+    tools: Sequence[BaseTool],
+    system_prompt: str,
+    agent_name: str,
+) -> Optional[AIMessage]:
+    """
+    계획 → 병렬 실행 → 종합 (LLM 2회).
+
+    Returns:
+        최종 답변 메시지 (name=agent_name). 계획 실패 시 None (ReAct로 처리)
+    """
+    llm = get_llm(temperature=0)
+    planner_prompt = (
+        PLANNER_PROMPT.replace("<tools>", _describe_tools(tools))
+        .replace("<max_steps>", str(settings.plan_max_steps))
+    )
+    try:
+        plan: ToolPlanOutput = llm.with_structured_output(ToolPlanOutput, method="json_mode").invoke([
+            SystemMessage(content=f"{system_prompt}\n\n{planner_prompt}"),
+            HumanMessage(content=question),
+        ])
+        levels = plan_levels(plan.steps, {t.name for t in tools}, settings.plan_max_steps)
+    except Exception as e:
+        print(f"[{agent_name}] Plan failed, falling back to ReAct: {e}")
+        return None
+
+    print(f"[{agent_name}] Plan: {len(plan.steps)} steps in {len(levels)} levels")
+    outputs = execute_plan(levels, {t.name: t for t in tools}, settings.plan_max_parallel)
+    if plan.steps and all(o.startswith(("Error:", "Skipped:")) for o in outputs.values()):
+        print(f"[{agent_name}] All plan steps failed, falling back to ReAct")
+        return None
+
+    results = _format_results(plan.steps, outputs) if plan.steps else "(도구 호출 없음)"
+    response = llm.invoke([
+        SystemMessage(content=f"{system_prompt}\n\n{PLAN_SYNTHESIS_PROMPT}"),
+        HumanMessage(content=f"질문: {question}\n\n도구 실행 결과:\n{results}"),
+    ])
+    return AIMessage(content=response.content, name=agent_name)
@@ -0,0 +1,302 @@
+"""
+질문 템플릿 - 정형화된 SQL 경로 질문을 ReAct 루프 없이 처리.
+
+"<태그> <기간> 평균/최대/최소", "<태그> 알람 최근 언제", "<기간> 알람 통계" 형태를
+로컬 파싱(date_parser + tag_resolver)으로 인식해 도구 체인을 직접 실행하고,
+답변 문장 생성에만 LLM을 최대 1회 사용합니다. 일치하지 않으면 None을 반환해
+sql_react_agent가 기존 방식으로 처리합니다.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.core.config import settings
+from app.core.llm_factory import get_llm
+from app.graph.prompts import TEMPLATE_ANSWER_PROMPT
+from app.services.date_parser import TimeRange, parse_time_range
+from app.services.history import aggregate_range, format_ms, time_weighted_average, to_ms
+from app.services.tag_resolver import normalize_tag_path, resolve_tags
+from app.tools.alarm_tools import get_alarm_count_by_period, get_latest_alarm_for_tag
+
+
+_AGGREGATION_WORDS = {
+    "avg": ("평균", "average", "avg", "mean"),
+    "max": ("최대", "최고", "최댓값", "max", "maximum", "highest", "peak"),
+    "min": ("최소", "최저", "최솟값", "min", "minimum", "lowest"),
+}
+_AGGREGATION_LABELS = {"avg": "시간가중 평균", "max": "최대", "min": "최소"}
+
+_ALARM_WORDS = re.compile(r"알람|경보|alarm", re.I)
+_LATEST_WORDS = re.compile(r"최근|마지막|언제|latest|last|when", re.I)
+_STATISTICS_WORDS = re.compile(r"통계|몇\s*번|몇\s*회|횟수|건수|count|statistics|how many", re.I)
+# 템플릿이 다루지 않는 요청 (추이/비교/원인 분석 등)은 에이전트로
+_COMPLEX_WORDS = re.compile(r"추이|트렌드|비교|상관|원인|분석|그래프|차트|trend|compare|why", re.I)
+
+# 태그 이름 후보: 영문으로 시작하는 식별자 (FAN1, Tank_01, Line1/FAN1)
+_TAG_CANDIDATE = re.compile(r"[A-Za-z][A-Za-z0-9_\-]*(?:/[A-Za-z0-9_\-]+)*")
+_STOPWORDS = {
+    "avg", "average", "mean", "max", "maximum", "min", "minimum", "highest", "lowest", "peak",
+    "alarm", "alarms", "last", "latest", "when", "today", "yesterday", "this", "week", "month",
+    "year", "from", "to", "past", "hours", "hour", "days", "day", "count", "statistics", "how",
+    "many", "the", "of", "and", "am", "pm", "h", "what", "was", "is", "value", "show", "me",
+    "give", "tell", "for", "in", "on", "at", "a", "an",
+}
+_MAX_TAG_CANDIDATES = 6
+
+
+@dataclass
+class _TemplateStats:
+    hits: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    llm_calls: int = 0
+
+
+@dataclass
+class _Stats:
+    questions: int = 0
+    fallthrough: int = 0
+    templates: dict[str, _TemplateStats] = field(default_factory=dict)
+
+
+_stats = _Stats()
+_stats_lock = threading.Lock()
+
+
+# ── 파싱 ──────────────────────────────────────────────────────────
+
+
+def _aggregations(question: str) -> list[str]:
+    lowered = question.lower()
+    return [
+        agg for agg, words in _AGGREGATION_WORDS.items()
+        if any(re.search(rf"(?<![a-z]){re.escape(w)}(?![a-z])", lowered) for w in words)
+    ]
+
+
+def tag_candidates(question: str) -> list[str]:
+    """질문에서 태그 이름 후보 추출 (인접 후보를 이은 'a/b'를 먼저 시도)"""
+    words = [w for w in _TAG_CANDIDATE.findall(question) if w.lower() not in _STOPWORDS]
+    joined = [f"{a}/{b}" for a, b in zip(words, words[1:])]
+    # 숫자/구분자가 있는 단어(FAN1, Tank_01)가 태그일 가능성이 높으므로 먼저
+    words.sort(key=lambda w: not re.search(r"[\d_/\-]", w))
+    return (joined + words)[:_MAX_TAG_CANDIDATES]
+
+
+def resolve_single_tag(question: str, confirmed_path: Optional[str] = None) -> Optional[tuple[str, tuple[int, ...]]]:
+    """
+    질문의 태그를 하나로 확정. 후보가 없거나 여러 태그로 해석되면 None (에이전트가 명확화).
+    """
+    specs = [confirmed_path] if confirmed_path else tag_candidates(question)
+    for spec in specs:
+        resolved, _ = resolve_tags([spec], limit=2)
+        if len(resolved) == 1:
+            path, ids = next(iter(resolved.items()))
+            return path, ids
+        if len(resolved) > 1:
+            return None
+    return None
+
+
+def _clamp(time_range: TimeRange, now: datetime) -> Optional[tuple[int, int]]:
+    end = min(time_range.end, now)
+    if end <= time_range.start:
+        return None
+    return to_ms(time_range.start), to_ms(end)
+
+
+# ── 템플릿 ────────────────────────────────────────────────────────
+
+
+@dataclass
+class TemplateMatch:
+    """일치한 템플릿과 실행 함수"""
+
+    template: str
+    run: Callable[[], str]
+
+
+def _match_tag_statistic(question: str, time_range: Optional[TimeRange], context: dict) -> Optional[TemplateMatch]:
+    aggregations = _aggregations(question)
+    if not aggregations or time_range is None or _ALARM_WORDS.search(question):
+        return None
+    span = _clamp(time_range, datetime.now())
+    if span is None:
+        return None
+    tag = resolve_single_tag(question, context.get("confirmed_tag_path"))
+    if tag is None:
+        return None
+    path, ids = tag
+
+    def run() -> str:
+        total = aggregate_range(ids, span[0], span[1], "avg")
+        period = f"{format_ms(span[0])} ~ {format_ms(span[1])}"
+        if not total.count:
+            return f"{path} ({period}): 데이터 없음"
+        results = []
+        for agg in aggregations:
+            # 값 변경 시에만 기록되는 히스토리안 데이터: 평균은 샘플 평균이 아닌 시간가중평균
+            value = time_weighted_average(ids, span[0], span[1]) if agg == "avg" else total.value(agg)
+            if value is not None:
+                results.append(f"{_AGGREGATION_LABELS[agg]}={value:.4g}")
+        return f"{path} ({period}, 샘플 {total.count}개): {', '.join(results)}"
+
+    return TemplateMatch("tag_statistic", run)
+
+
+def _alarm_filter(question: str, context: dict) -> Optional[str]:
+    if context.get("confirmed_tag_path"):
+        return normalize_tag_path(context["confirmed_tag_path"]).rsplit("/", 1)[-1]
+    candidates = [c for c in tag_candidates(question) if "/" not in c]
+    return candidates[0] if candidates else None
+
+
+def _match_alarm_latest(question: str, time_range: Optional[TimeRange], context: dict) -> Optional[TemplateMatch]:
+    if not _ALARM_WORDS.search(question) or not _LATEST_WORDS.search(question):
+        return None
+    if _STATISTICS_WORDS.search(question) or (time_range and time_range.granularity != "relative"):
+        return None
+    tag = _alarm_filter(question, context)
+    return TemplateMatch(
+        "alarm_latest", lambda: get_latest_alarm_for_tag.invoke({"tag_path": tag})
+    )
+
+
+def _match_alarm_statistics(question: str, time_range: Optional[TimeRange], context: dict) -> Optional[TemplateMatch]:
+    if not _ALARM_WORDS.search(question) or not _STATISTICS_WORDS.search(question):
+        return None
+    # get_alarm_count_by_period는 일 단위이므로 시각 단위 범위는 에이전트로
+    if time_range is None or time_range.start.time() != datetime.min.time():
+        return None
+    # get_alarm_count_by_period의 end_date는 포함 범위
+    last_day = min(time_range.end, datetime.now()) - timedelta(microseconds=1)
+    args: dict[str, Any] = {
+        "tag_path": _alarm_filter(question, context),
+        "start_date": time_range.start.strftime("%Y-%m-%d"),
+        "end_date": last_day.strftime("%Y-%m-%d"),
+    }
+    return TemplateMatch("alarm_statistics", lambda: get_alarm_count_by_period.invoke(args))
+
+
+TEMPLATES = ("tag_statistic", "alarm_latest", "alarm_statistics")
+_MATCHERS = (_match_tag_statistic, _match_alarm_statistics, _match_alarm_latest)
+
+
+def match_template(question: str, time_range: Optional[TimeRange] = None, context: Optional[dict] = None) -> Optional[TemplateMatch]:
+    """질문에 맞는 템플릿 (없으면 None)"""
+    if _COMPLEX_WORDS.search(question):
+        return None
+    context = context or {}
+    if time_range is None:
+        time_range = parse_time_range(question)
+    for matcher in _MATCHERS:
+        matched = matcher(question, time_range, context)
+        if matched:
+            return matched
+    return None
+
+
+# ── 실행 / 통계 ───────────────────────────────────────────────────
+
+
+def _phrase_answer(question: str, data: str) -> tuple[str, bool]:
+    """조회 결과를 답변 문장으로 변환 (LLM 1회). 실패 시 조회 결과 그대로"""
+    if not settings.question_templates_llm_answer:
+        return data, False
+    try:
+        response = get_llm(temperature=0).invoke([
+            SystemMessage(content=TEMPLATE_ANSWER_PROMPT),
+            HumanMessage(content=f"질문: {question}\n\n조회 결과:\n{data}"),
+        ])
+        return response.content or data, True
+    except Exception as e:
+        print(f"[Templates] 답변 생성 실패, 조회 결과 반환: {e}")
+        return data, True
+
+
+def _record(template: Optional[str], elapsed_ms: float = 0.0, error: bool = False, llm_call: bool = False) -> None:
+    with _stats_lock:
+        _stats.questions += 1
+        if template is None:
+            _stats.fallthrough += 1
+            return
+        entry = _stats.templates.setdefault(template, _TemplateStats())
+        if error:
+            entry.errors += 1
+            _stats.fallthrough += 1
+            return
+        entry.hits += 1
+        entry.total_ms += elapsed_ms
+        entry.max_ms = max(entry.max_ms, elapsed_ms)
+        entry.llm_calls += int(llm_call)
+
+
+def answer_with_template(
+    question: str, time_range: Optional[TimeRange] = None, context: Optional[dict] = None
+) -> Optional[str]:
+    """
+    템플릿으로 답변. 일치하는 템플릿이 없거나 실행에 실패하면 None (에이전트로 처리).
+    """
+    started = time.perf_counter()
+    try:
+        matched = match_template(question, time_range, context)
+    except Exception as e:
+        print(f"[Templates] 템플릿 매칭 실패: {e}")
+        matched = None
+    if matched is None:
+        _record(None)
+        return None
+
+    try:
+        data = matched.run()
+    except Exception as e:
+        print(f"[Templates] {matched.template} 실행 실패, 에이전트로 전환: {e}")
+        _record(matched.template, error=True)
+        return None
+
+    answer, llm_call = _phrase_answer(question, data)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _record(matched.template, elapsed_ms, llm_call=llm_call)
+    print(f"[Templates] {matched.template} 처리 ({elapsed_ms:.0f}ms)")
+    return answer
+
+
+def template_stats() -> dict:
+    """템플릿별 적중률/지연 시간"""
+    with _stats_lock:
+        questions = _stats.questions
+        templates = {}
+        for name in TEMPLATES:
+            entry = _stats.templates.get(name, _TemplateStats())
+            templates[name] = {
+                "hits": entry.hits,
+                "errors": entry.errors,
+                "hit_rate": round(entry.hits / questions, 4) if questions else 0.0,
+                "avg_ms": round(entry.total_ms / entry.hits, 1) if entry.hits else None,
+                "max_ms": round(entry.max_ms, 1) if entry.hits else None,
+                "llm_calls": entry.llm_calls,
+            }
+        matched = sum(t["hits"] for t in templates.values())
+        return {
+            "enabled": settings.question_templates_enabled,
+            "questions": questions,
+            "matched": matched,
+            "fallthrough": _stats.fallthrough,
+            "hit_rate": round(matched / questions, 4) if questions else 0.0,
+            "templates": templates,
+        }
+
+
+def reset_template_stats() -> None:
+    global _stats
+    with _stats_lock:
+        _stats = _Stats()
@@ -18,7 +18,7 @@ class PendingAction:
     value: Any
     reason: str
     requested_at: datetime
-    status: Literal["pending", "approved", "rejected", "executed"]
+    status: Literal["pending", "executing", "approved", "rejected", "executed", "failed", "expired", "superseded"]
     risk_level: Literal["low", "medium", "high"]
     operator: Optional[str] = None  # Who approved/rejected
     notes: Optional[str] = None  # Approval/rejection notes
@@ -64,6 +64,29 @@ class SupervisorRouterOutput(BaseModel):
     )
 
 
+class PlanStep(BaseModel):
+    """One tool call in a plan-and-execute plan."""
+
+    id: str = Field(description="Unique step id, e.g. 's1'")
+    tool: str = Field(description="Tool name to call")
+    args: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Tool arguments. Use '{s1}' to insert the output of step s1",
+    )
+    depends_on: List[str] = Field(
+        default_factory=list, description="Step ids that must finish before this step"
+    )
+
+
+class ToolPlanOutput(BaseModel):
+    """Structured output for plan-and-execute agents (DAG of tool calls)."""
+
+    steps: List[PlanStep] = Field(
+        default_factory=list, description="Tool calls; independent steps run in parallel"
+    )
+    reasoning: str = Field(default="", description="Why these tool calls answer the question")
+
+
 class GraphState(TypedDict):
     messages: List[BaseMessage]  # Removed add_messages reducer for stateless mode
     intent_category: str
@@ -90,3 +113,6 @@ class GraphState(TypedDict):
     # Tag Disambiguation (벡터 검색 기반 태그 명확화)
     tag_candidates: Optional[List[Dict[str, Any]]]  # 복수 후보 → 카드 UI 표시
     confirmed_tag_path: Optional[str]  # 확정된 태그 경로 (단일 매칭 또는 사용자 선택)
+
+    # 시간 범위 사전 해석 (intent_router에서 date_parser로 계산, TimeRange.to_dict 형식)
+    time_range: Optional[Dict[str, Any]]
@@ -1,4 +1,4 @@
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
 import os
 
 from fastapi import FastAPI, Response
@@ -11,6 +11,14 @@ from app.graph.builder import build_graph
 from app.services.vectorstore import init_retriever
 from app.services.tag_store import init_tag_store, ingest_tags
 from app.services.opc import get_opc_client
+from app.services.analytics import shutdown_analytics_pool
+from app.services.rollup import start_rollup_maintainer, stop_rollup_maintainer
+from app.services.alarm_index import warm_alarm_index
+from app.services.alarm_episodes import warm_episode_store
+from app.services.alarm_rollup import start_alarm_rollup_maintainer, stop_alarm_rollup_maintainer
+from app.services.live_alarms import start_live_alarms, stop_live_alarms
+from app.services.approval_storage import start_approval_sweeper, stop_approval_sweeper
+from app.services.checkpointer import get_checkpointer_context
 import asyncio
 
 
@@ -54,12 +62,40 @@ async def lifespan(app: FastAPI):
     except Exception as exc:
         print(f"[Warning] OPC 태그 초기 동기화 실패: {exc}")
 
-    # No checkpointer - state is not persisted (stateless mode)
-    print("[Checkpointer] Stateless mode - no state persistence")
-    app.state.checkpointer = None
-    app.state.app_graph = build_graph(checkpointer=None)
+    # 체크포인터: interrupt()로 멈춘 승인 대기 실행을 /resume에서 이어서 실행
+    checkpointer_stack = AsyncExitStack()
+    checkpointer = None
+    if settings.checkpointer_backend == "none":
+        print("[Checkpointer] Stateless mode - no state persistence")
+    else:
+        try:
+            checkpointer = await checkpointer_stack.enter_async_context(
+                get_checkpointer_context(use_memory=settings.checkpointer_backend == "memory")
+            )
+        except Exception as exc:
+            print(f"[Warning] 체크포인터 초기화 실패, stateless 모드로 실행: {exc}")
+    app.state.checkpointer = checkpointer
+    app.state.app_graph = build_graph(checkpointer=checkpointer)
+
+    # 히스토리 롤업 증분 유지 (백그라운드)
+    start_rollup_maintainer()
+    start_alarm_rollup_maintainer()
+    # 알람 source 인덱스 / 에피소드 저장소 초기 로드 (백그라운드)
+    asyncio.create_task(asyncio.to_thread(warm_alarm_index))
+    asyncio.create_task(asyncio.to_thread(warm_episode_store))
+    # OPC UA 알람 구독 (현재 알람 테이블, 끊기면 재구독)
+    start_live_alarms()
+    # 승인 대기 TTL 만료 / 처리 완료 보관 기간 정리
+    start_approval_sweeper()
     yield
 
+    await stop_live_alarms()
+    await stop_approval_sweeper()
+
+    await stop_rollup_maintainer()
+    await stop_alarm_rollup_maintainer()
+    shutdown_analytics_pool()
+    await checkpointer_stack.aclose()
     print("[System] 서버 종료")
 
 
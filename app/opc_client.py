@@ -2,7 +2,7 @@ import asyncio
 import logging
 import os
 from pathlib import Path
-from typing import Any, Optional, Sequence
+from typing import Any, Callable, Optional, Sequence
 from asyncua import Client, ua
 
 logger = logging.getLogger(__name__)
@@ -12,6 +12,55 @@ _PROJECT_ROOT = Path(__file__).resolve().parent.parent
 _CERT_PATH = _PROJECT_ROOT / "client_cert.pem"
 _KEY_PATH = _PROJECT_ROOT / "client_key.pem"
 
+_INT_TYPES = {
+    ua.VariantType.SByte, ua.VariantType.Byte, ua.VariantType.Int16, ua.VariantType.UInt16,
+    ua.VariantType.Int32, ua.VariantType.UInt32, ua.VariantType.Int64, ua.VariantType.UInt64,
+}
+_FLOAT_TYPES = {ua.VariantType.Float, ua.VariantType.Double}
+
+
+def _coerce(value: Any, vtype: ua.VariantType) -> Any:
+    """쓰기 값을 태그 VariantType에 맞게 변환 (문자 -> 숫자/불리언)"""
+    if vtype == ua.VariantType.Boolean:
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return bool(value)
+    if vtype in _INT_TYPES and not isinstance(value, int):
+        if isinstance(value, str):
+            try:
+                return int(value.strip())
+            except ValueError:
+                value = float(value)  # "12.0", "1e3"
+        # 소수 부분을 버리면 의도와 다른 값이 써지므로 거부 ("12.7" → 12 금지)
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError(f"{value!r} is not an integer")
+        return int(value)
+    if vtype in _FLOAT_TYPES and not isinstance(value, float):
+        return float(value)
+    if vtype == ua.VariantType.String and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+class _AlarmEventHandler:
+    """구독 이벤트 → 필드 dict 콜백 (asyncua가 이벤트 루프에서 호출)"""
+
+    def __init__(self, callback: Callable[[dict], None], on_lost: Callable[[], None]):
+        self._callback = callback
+        self._on_lost = on_lost
+
+    def event_notification(self, event):
+        try:
+            fields = {name: v.Value for name, v in event.get_event_props_as_fields_dict().items()}
+            self._callback(fields)
+        except Exception as e:
+            logger.warning("Failed to handle alarm event: %s", e)
+
+    def status_change_notification(self, status):
+        # 세션/구독 타임아웃 등 → 구독을 잃은 것으로 표시 (유지 작업이 재구독)
+        logger.warning("OPC UA alarm subscription status changed: %s", status)
+        self._on_lost()
+
 
 class IgnitionOpcClient:
     """
@@ -41,6 +90,13 @@ class IgnitionOpcClient:
         self._connected: bool = False
         self._lock = asyncio.Lock()
 
+        # Alarms & Conditions 구독 (구독을 만든 연결이 살아 있을 때만 유효)
+        self._alarm_subscription = None
+        self._alarm_client: Optional[Client] = None
+
+        # 태그 경로(정규화) -> VariantType. browse/read 시 채워 쓰기 전 사전 읽기를 생략
+        self._variant_types: dict[str, ua.VariantType] = {}
+
     # -------------------------
     # Helpers
     # -------------------------
@@ -54,6 +110,13 @@ class IgnitionOpcClient:
         tag_path = self._normalize_tag_path(tag_path)
         return f"ns={self.namespace_index};s={tag_path}"
 
+    def _remember_type(self, tag_path: str, vtype: Optional[ua.VariantType]):
+        if vtype and vtype != ua.VariantType.Null:
+            self._variant_types[self._normalize_tag_path(tag_path)] = vtype
+
+    def cached_type(self, tag_path: str) -> Optional[ua.VariantType]:
+        return self._variant_types.get(self._normalize_tag_path(tag_path))
+
     async def _connect_once(self):
         # /discovery 경로는 Endpoint 탐색 전용이므로 실제 연결 시에는 제거
         connect_url = self.endpoint_url
@@ -127,6 +190,7 @@ class IgnitionOpcClient:
         try:
             node = self._client.get_node(node_id)
             dv = await node.read_data_value()
+            self._remember_type(tag_path, dv.Value.VariantType)
 
             return {
                 "tag": tag_path,
@@ -143,37 +207,123 @@ class IgnitionOpcClient:
             return {"tag": tag_path, "nodeId": node_id, "error": str(e)}
 
     async def write_tag(self, tag_path: str, value: Any) -> dict:
-        await self._ensure()
-        node_id = self._node_id(tag_path)
+        return (await self.write_tags([(tag_path, value)]))[0]
 
-        try:
-            node = self._client.get_node(node_id)
+    async def write_tags(self, items: Sequence[tuple[str, Any]]) -> list[dict]:
+        """
+        여러 태그를 하나의 OPC UA Write 요청으로 기록합니다.
 
-            # 타입 맞춰서 쓰기 (VariantType 유지)
-            dv = await node.read_data_value()
-            vtype = dv.Value.VariantType
+        VariantType은 browse/read 때 캐시한 값을 사용하고, 캐시에 없는 태그만
+        한 번의 Read 요청으로 조회합니다. 결과는 items 순서대로 태그별 StatusCode를 담습니다.
+        (같은 태그를 여러 번 넣으면 서버가 순서대로 적용 - 병합은 호출자 책임)
+        """
+        if not items:
+            return []
+        await self._ensure()
+        node_ids = [self._node_id(tag_path) for tag_path, _ in items]
 
-            # 필요 시 기본 캐스팅 (문자 -> 숫자)
-            cur = dv.Value.Value
-            if isinstance(cur, bool):
-                if isinstance(value, str):
-                    value = value.strip().lower() in ("1", "true", "yes", "on")
+        try:
+            nodes = [self._client.get_node(node_id) for node_id in node_ids]
+
+            missing = [i for i, (tag_path, _) in enumerate(items) if self.cached_type(tag_path) is None]
+            if missing:
+                dvs = await self._client.read_attributes([nodes[i] for i in missing])
+                for i, dv in zip(missing, dvs):
+                    if dv.StatusCode.is_good() and dv.Value is not None:
+                        self._remember_type(items[i][0], dv.Value.VariantType)
+
+            results: list[Optional[dict]] = [None] * len(items)
+            write_idx, write_nodes, variants = [], [], []
+            for i, (tag_path, value) in enumerate(items):
+                vtype = self.cached_type(tag_path)
+                if vtype is None:
+                    results[i] = {"tag": tag_path, "nodeId": node_ids[i], "error": "Unknown tag type (node not readable)"}
+                    continue
+                try:
+                    value = _coerce(value, vtype)
+                except (TypeError, ValueError) as e:
+                    results[i] = {"tag": tag_path, "nodeId": node_ids[i], "error": f"Invalid value for {vtype.name}: {e}"}
+                    continue
+                write_idx.append(i)
+                write_nodes.append(nodes[i])
+                variants.append(ua.Variant(value, vtype))
+
+            codes = await self._client.write_values(write_nodes, variants, raise_on_partial_error=False) if write_nodes else []
+            for i, variant, code in zip(write_idx, variants, codes):
+                tag_path = items[i][0]
+                result = {"tag": tag_path, "nodeId": node_ids[i], "written": variant.Value, "status_code": code.name}
+                if code.is_good():
+                    result["status"] = "OK"
                 else:
-                    value = bool(value)
-            elif isinstance(cur, int) and not isinstance(value, int):
-                value = int(value)
-            elif isinstance(cur, float) and not isinstance(value, float):
-                value = float(value)
-
-            await node.write_value(ua.Variant(value, vtype))
-
-            return {"tag": tag_path, "nodeId": node_id, "written": value, "status": "OK"}
+                    result["error"] = code.name
+                    if code.value == ua.StatusCodes.BadTypeMismatch:
+                        # 태그 타입이 바뀐 경우 - 다음 쓰기에서 다시 조회
+                        self._variant_types.pop(self._normalize_tag_path(tag_path), None)
+                results[i] = result
+            return results
 
         except Exception as e:
             async with self._lock:
                 self._connected = False
                 self._client = None
-            return {"tag": tag_path, "nodeId": node_id, "error": str(e)}
+            return [
+                {"tag": tag_path, "nodeId": node_id, "error": str(e)}
+                for (tag_path, _), node_id in zip(items, node_ids)
+            ]
+
+    # -------------------------
+    # Alarms & Conditions
+    # -------------------------
+    @property
+    def alarm_subscription_alive(self) -> bool:
+        return (
+            self._alarm_subscription is not None
+            and self._connected
+            and self._client is not None
+            and self._client is self._alarm_client
+        )
+
+    async def subscribe_alarms(self, callback: Callable[[dict], None], publishing_interval_ms: int = 500):
+        """
+        Server 노드의 Alarms & Conditions 이벤트 구독.
+
+        구독 후 ConditionRefresh를 호출해 Retain 상태인 조건(현재 활성/미확인 알람)을
+        이벤트로 다시 받습니다. callback은 이벤트마다 필드 dict
+        ("SourceName", "ConditionName", "ActiveState/Id", "AckedState/Id", "Retain", ...)로 호출됩니다.
+        """
+        await self._ensure()
+        await self.unsubscribe_alarms()
+        client = self._client
+        handler = _AlarmEventHandler(callback, self._on_alarm_subscription_lost)
+        subscription = await client.create_subscription(publishing_interval_ms, handler)
+        await subscription.subscribe_alarms_and_conditions(ua.ObjectIds.Server, ua.ObjectIds.ConditionType)
+        self._alarm_subscription = subscription
+        self._alarm_client = client
+
+        try:
+            condition_type = client.get_node(ua.NodeId(ua.ObjectIds.ConditionType))
+            await condition_type.call_method(
+                ua.NodeId(ua.ObjectIds.ConditionType_ConditionRefresh),
+                ua.Variant(subscription.subscription_id, ua.VariantType.UInt32),
+            )
+        except Exception as e:
+            # 일부 서버는 ConditionRefresh 미지원 - 이후 상태 변경 이벤트만 반영
+            logger.warning("ConditionRefresh failed: %s", e)
+        logger.info("OPC UA alarm subscription created (id=%s)", subscription.subscription_id)
+
+    def _on_alarm_subscription_lost(self):
+        self._alarm_subscription = None
+        self._alarm_client = None
+
+    async def unsubscribe_alarms(self):
+        subscription, client = self._alarm_subscription, self._alarm_client
+        self._alarm_subscription = None
+        self._alarm_client = None
+        if subscription is not None and client is self._client and self._connected:
+            try:
+                await subscription.delete()
+            except Exception as e:
+                logger.debug("Failed to delete alarm subscription: %s", e)
 
     async def _get_tags_namespace_index(self) -> int:
         """Ignition 태그 네임스페이스 인덱스를 동적으로 조회"""
@@ -262,6 +412,7 @@ class IgnitionOpcClient:
                     if node_class == ua.NodeClass.Variable:
                         try:
                             dv = await child.read_data_value()
+                            self._remember_type(current_path, dv.Value.VariantType)
                             tag_type = dv.Value.VariantType.name if dv.Value.VariantType else "Unknown"
                             tags.append({
                                 "tag_path": current_path,
@@ -0,0 +1,318 @@
+"""
+알람 성능 분석 (ISA-18.2) - flood, chattering, stale, bad actor.
+
+발생(active) 이벤트 시각만 읽어 NumPy로 계산합니다.
+- 슬라이딩 창 건수: 정렬된 시각 배열에서 searchsorted 한 번으로 각 이벤트부터 창 끝까지의 건수
+- 운영 구역: 태그 경로 앞 alarm_area_depth 단계 (예: "BMS/MFD")
+- chattering: source별 그룹을 정수 키 (source 코드 × 간격 + 시각)로 이어 붙여 한 번에 창 건수 계산
+- stale: 알람 에피소드 중 기준 시각에 미해제 상태로 alarm_stale_hours 이상 지속된 것
+
+보고서는 (분 단위로 내린 기간, 필터, 파라미터)별로 캐시하며, 현재 시각에 걸친 기간은
+짧은 TTL로만 보관합니다. stale은 에피소드 저장소 범위(alarm_episode_days) 안에서
+발생한 알람만 찾습니다.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.alarm_episodes import episodes_between
+from app.services.alarm_index import in_clause, like_clause, parse_source, resolve_sources
+from app.services.alarm_rollup import to_datetime
+from app.services.history_cache import HistoryCache
+from app.services.sql import fetch_rows
+
+
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+_MAX_FLOOD_INTERVALS = 20
+
+_report_cache = HistoryCache(max_entries=settings.alarm_report_cache_entries)
+
+
+def get_alarm_report_cache() -> HistoryCache:
+    return _report_cache
+
+
+# ── 창 계산 ───────────────────────────────────────────────────────
+
+
+def windowed_counts(times_ms: np.ndarray, window_ms: float) -> np.ndarray:
+    """정렬된 시각 배열에서 각 이벤트 시각부터 [t, t + window) 안의 건수"""
+    times_ms = np.asarray(times_ms)
+    return np.searchsorted(times_ms, times_ms + window_ms, side="left") - np.arange(len(times_ms))
+
+
+def flood_intervals(times_ms: np.ndarray, window_ms: float, threshold: int) -> list[tuple[float, float, int]]:
+    """
+    창 건수가 threshold를 넘는 구간을 병합한 flood 구간 목록.
+
+    Returns:
+        [(시작 ms, 종료 ms, 최대 창 건수), ...]
+    """
+    times_ms = np.asarray(times_ms, dtype=np.float64)
+    if len(times_ms) == 0:
+        return []
+    counts = windowed_counts(times_ms, window_ms)
+    flooded = np.flatnonzero(counts > threshold)
+    if len(flooded) == 0:
+        return []
+    starts = times_ms[flooded]
+    # 창 안 마지막 이벤트까지를 구간 끝으로
+    ends = times_ms[flooded + counts[flooded] - 1]
+    # 앞 구간 끝 이후에 시작하면 새 구간
+    new_group = np.r_[True, starts[1:] > np.maximum.accumulate(ends)[:-1]]
+    group_idx = np.flatnonzero(new_group)
+    return [
+        (float(s), float(e), int(p))
+        for s, e, p in zip(
+            starts[group_idx],
+            np.maximum.reduceat(ends, group_idx),
+            np.maximum.reduceat(counts[flooded], group_idx),
+        )
+    ]
+
+
+def bucket_counts(times_ms: np.ndarray, start_ms: float, end_ms: float, window_ms: float) -> np.ndarray:
+    """[start, end)를 window 간격 고정 구간으로 나눈 구간별 건수"""
+    n_buckets = max(1, int(np.ceil((end_ms - start_ms) / window_ms)))
+    idx = ((np.asarray(times_ms, dtype=np.float64) - start_ms) // window_ms).astype(np.int64)
+    idx = idx[(idx >= 0) & (idx < n_buckets)]
+    return np.bincount(idx, minlength=n_buckets)
+
+
+def max_windowed_counts(codes: np.ndarray, times_ms: np.ndarray, window_ms: int) -> np.ndarray:
+    """
+    그룹(codes)별 최대 슬라이딩 창 건수.
+
+    그룹마다 전체 시간 범위 + 창보다 큰 간격을 두고 정수 키로 이어 붙여
+    그룹 경계를 넘는 창 없이 searchsorted 한 번으로 계산합니다.
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    times = np.asarray(times_ms, dtype=np.int64)
+    n_groups = int(codes.max()) + 1 if len(codes) else 0
+    if n_groups == 0:
+        return np.zeros(0, dtype=np.int64)
+    times = times - times.min()
+    span = int(times.max()) + int(window_ms) + 1
+    keys = np.sort(codes * span + times)
+    counts = np.searchsorted(keys, keys + window_ms, side="left") - np.arange(len(keys))
+    result = np.zeros(n_groups, dtype=np.int64)
+    np.maximum.at(result, keys // span, counts)
+    return result
+
+
+def operator_area(source: str, depth: Optional[int] = None) -> str:
+    """source의 운영 구역 (태그 경로 앞 depth 단계)"""
+    depth = settings.alarm_area_depth if depth is None else depth
+    parts = [p for p in parse_source(source).tag_path.split("/") if p]
+    return "/".join(parts[:depth]) if parts[:depth] else "(root)"
+
+
+# ── 조회 ──────────────────────────────────────────────────────────
+
+
+def _fetch_activations(start: datetime, end: datetime, tag_path: Optional[str]) -> tuple[list[str], np.ndarray]:
+    """기간 내 active 이벤트 (source 목록, 시각 ms 배열)"""
+    conditions = [
+        "eventtype = 0",
+        f"eventtime >= '{start.strftime(_TIME_FORMAT)}'",
+        f"eventtime < '{end.strftime(_TIME_FORMAT)}'",
+    ]
+    if tag_path:
+        sources = resolve_sources(tag_path)
+        conditions.append(like_clause(tag_path) if sources is None else in_clause(sources))
+    rows = fetch_rows(
+        f"SELECT source, eventtime FROM alarm_events WHERE {' AND '.join(conditions)}"
+    )
+    names, times = [], []
+    for source, eventtime in rows:
+        ts = to_datetime(eventtime)
+        if source is None or ts is None:
+            continue
+        names.append(source)
+        times.append(ts.timestamp() * 1000)
+    return names, np.asarray(times, dtype=np.float64)
+
+
+def _fmt_ms(ms: float) -> str:
+    return datetime.fromtimestamp(ms / 1000).strftime(_TIME_FORMAT)
+
+
+def _isa_rating(avg_per_window: float) -> str:
+    """ISA-18.2 운영자당 평균 알람률 기준 (10분당 ~1건 수용 가능, ~2건 관리 가능)"""
+    if avg_per_window <= 1:
+        return "acceptable"
+    if avg_per_window <= 2:
+        return "manageable"
+    return "overloaded"
+
+
+def find_stale_alarms(
+    start: datetime, end: datetime, tag_path: Optional[str], stale_hours: float, now: Optional[datetime] = None
+) -> list[dict]:
+    """
+    end 시점에 미해제 상태로 stale_hours 이상 지속된 알람 (오래된 순).
+
+    발생(active) 이벤트가 조회 범위 안에 있는 에피소드만 대상입니다. 저장소 범위
+    (alarm_episode_days) 또는 lookback보다 먼저 발생해 계속 미해제인 알람은 시작 시각을
+    알 수 없어 포함되지 않습니다.
+    """
+    cutoff = end - timedelta(hours=stale_hours)
+    stale = []
+    for e in episodes_between(start, end, tag_path, now=now):
+        if e.start is not None and e.start <= cutoff and (e.clear is None or e.clear > end):
+            stale.append({
+                "source": e.source,
+                "tag_path": parse_source(e.source).tag_path,
+                "active_since": e.start.strftime(_TIME_FORMAT),
+                "hours": round((end - e.start).total_seconds() / 3600, 1),
+                "acked": e.ack is not None and e.ack <= end,
+                "priority": e.priority,
+            })
+    return sorted(stale, key=lambda s: -s["hours"])
+
+
+# ── 보고서 ────────────────────────────────────────────────────────
+
+
+def build_alarm_report(
+    start: datetime,
+    end: datetime,
+    tag_path: Optional[str] = None,
+    top_n: int = 10,
+    flood_threshold: Optional[int] = None,
+    chatter_count: Optional[int] = None,
+    chatter_seconds: Optional[int] = None,
+    stale_hours: Optional[float] = None,
+    now: Optional[datetime] = None,
+) -> dict:
+    """기간 [start, end)의 알람 성능 보고서 (캐시 사용)"""
+    now = now or datetime.now()
+    # 열린 기간(기본 "최근 7일", REST end=now)은 호출마다 마이크로초까지 달라지므로
+    # 분 단위로 내려 같은 분 안의 호출이 같은 키(한 번의 계산)를 공유하게 함
+    start = start.replace(second=0, microsecond=0)
+    end = min(end, now).replace(second=0, microsecond=0)
+    if end <= start:
+        raise ValueError("end must be after start")
+    params = (
+        settings.alarm_flood_window_minutes,
+        settings.alarm_flood_threshold if flood_threshold is None else flood_threshold,
+        settings.alarm_chatter_count if chatter_count is None else chatter_count,
+        settings.alarm_chatter_seconds if chatter_seconds is None else chatter_seconds,
+        settings.alarm_stale_hours if stale_hours is None else stale_hours,
+        settings.alarm_area_depth,
+    )
+    key = ("alarm_report", start, end, tag_path or "", top_n, params)
+    cached = _report_cache.get(key)
+    if cached is not None:
+        return cached
+
+    report = _compute_report(start, end, tag_path, top_n, *params, now=now)
+    # 현재 시각에 걸친 기간은 새 이벤트가 들어오므로 짧게만 보관
+    settled = end <= now - timedelta(seconds=settings.alarm_rollup_settle_seconds)
+    _report_cache.put(key, report, None if settled else settings.alarm_report_open_ttl_seconds)
+    return report
+
+
+def _compute_report(
+    start: datetime,
+    end: datetime,
+    tag_path: Optional[str],
+    top_n: int,
+    window_minutes: int,
+    flood_threshold: int,
+    chatter_count: int,
+    chatter_seconds: int,
+    stale_hours: float,
+    area_depth: int,
+    now: datetime,
+) -> dict:
+    window_ms = window_minutes * 60_000
+    start_ms, end_ms = start.timestamp() * 1000, end.timestamp() * 1000
+    names, times = _fetch_activations(start, end, tag_path)
+    total = len(times)
+
+    source_names, source_codes = np.unique(np.asarray(names, dtype=str), return_inverse=True)
+    per_source = np.bincount(source_codes, minlength=len(source_names))
+
+    # ── 구역별 알람률 / flood ──
+    areas = []
+    if total:
+        source_areas = np.asarray([operator_area(s, area_depth) for s in source_names.tolist()], dtype=str)
+        area_names, area_codes = np.unique(source_areas[source_codes], return_inverse=True)
+        for code, area in enumerate(area_names.tolist()):
+            area_times = np.sort(times[area_codes == code])
+            buckets = bucket_counts(area_times, start_ms, end_ms, window_ms)
+            intervals = flood_intervals(area_times, window_ms, flood_threshold)
+            avg = float(buckets.mean())
+            areas.append({
+                "area": area,
+                "activations": int(len(area_times)),
+                "avg_per_window": round(avg, 3),
+                "peak_per_window": int(windowed_counts(area_times, window_ms).max()),
+                "flood_window_pct": round(float((buckets > flood_threshold).mean()) * 100, 2),
+                "flood_count": len(intervals),
+                "flood_minutes": round(sum(e - s for s, e, _ in intervals) / 60_000, 1),
+                "floods": [
+                    {"start": _fmt_ms(s), "end": _fmt_ms(e), "peak": p}
+                    for s, e, p in intervals[:_MAX_FLOOD_INTERVALS]
+                ],
+                "rating": _isa_rating(avg),
+            })
+        areas.sort(key=lambda a: (-a["flood_count"], -a["activations"]))
+
+    # ── chattering ──
+    chattering = []
+    if total:
+        peaks = max_windowed_counts(source_codes, times.astype(np.int64), chatter_seconds * 1000)
+        for code in np.flatnonzero(peaks >= chatter_count).tolist():
+            chattering.append({
+                "source": str(source_names[code]),
+                "tag_path": parse_source(str(source_names[code])).tag_path,
+                "max_in_window": int(peaks[code]),
+                "activations": int(per_source[code]),
+            })
+        chattering.sort(key=lambda c: (-c["max_in_window"], -c["activations"]))
+
+    # ── bad actors ──
+    bad_actors = []
+    if total:
+        order = np.argsort(-per_source, kind="stable")[:top_n]
+        cumulative = np.cumsum(per_source[order]) / total * 100
+        for rank, (code, share) in enumerate(zip(order.tolist(), cumulative.tolist()), start=1):
+            bad_actors.append({
+                "rank": rank,
+                "source": str(source_names[code]),
+                "tag_path": parse_source(str(source_names[code])).tag_path,
+                "activations": int(per_source[code]),
+                "share_pct": round(float(per_source[code]) / total * 100, 2),
+                "cumulative_pct": round(share, 2),
+            })
+
+    stale = find_stale_alarms(start, end, tag_path, stale_hours, now)
+
+    n_windows = max(1, int(np.ceil((end_ms - start_ms) / window_ms)))
+    return {
+        "start": start.strftime(_TIME_FORMAT),
+        "end": end.strftime(_TIME_FORMAT),
+        "tag_path": tag_path,
+        "parameters": {
+            "window_minutes": window_minutes,
+            "flood_threshold": flood_threshold,
+            "chatter_count": chatter_count,
+            "chatter_seconds": chatter_seconds,
+            "stale_hours": stale_hours,
+            "area_depth": area_depth,
+        },
+        "total_activations": total,
+        "sources": int(len(source_names)),
+        "avg_per_window": round(total / n_windows, 3),
+        "areas": areas,
+        "chattering": chattering,
+        "stale": stale,
+        "bad_actors": bad_actors,
+    }
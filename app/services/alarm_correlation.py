@@ -0,0 +1,240 @@
+"""
+알람 원인 상관 분석 - 알람 에피소드 전후의 공정 태그 변화를 점수화.
+
+1. 대상 에피소드: 태그의 가장 최근 알람 (또는 지정 시각에 가장 가까운 알람)
+2. 후보 태그: 알람 태그와 같은 폴더의 태그들 (sibling)
+3. 조회: 알람 전 correlation_pre_minutes ~ 후 correlation_post_minutes 구간을
+   fetch_multi_series로 파티션당 한 번의 쿼리로 조회한 뒤 공통 격자로 정렬
+4. 태그별 지표 (NumPy)
+   - 변화점: 평균 이동이 가장 큰 단일 분할점 (누적합으로 모든 분할점을 한 번에 계산)
+   - 알람 직전 추세: 마지막 correlation_trend_minutes 기울기를 기준 구간 표준편차로 정규화
+   - 지연 상호상관: 후보 태그가 알람 신호(알람 태그 값, 없으면 0/1 계단)를 앞서는 지연별 상관계수
+5. 점수 = 0.5·|상관| + 0.3·변화점 크기(알람 이전일 때만) + 0.2·추세 크기 → 내림차순
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.core.config import settings
+from app.services.alarm_episodes import Episode, episodes_between
+from app.services.alarm_index import parse_source
+from app.services.analytics import make_grid, resample
+from app.services.history import fetch_multi_series, to_ms
+from app.services.tag_resolver import expand_tag_pattern, normalize_tag_path, resolve_tag_paths
+
+
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 정규화된 크기(표준편차 배수)가 이 값이면 해당 항목 만점
+_FULL_SCALE_Z = 4.0
+
+
+# ── 지표 계산 ─────────────────────────────────────────────────────
+
+
+def change_point(values: np.ndarray) -> Optional[tuple[int, float]]:
+    """
+    평균 이동이 가장 큰 단일 분할점.
+
+    Returns:
+        (분할 인덱스 k: values[k]부터 새 구간, 이동 크기 z = |평균 차| / 구간 내 표준편차) 또는 None
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    if n < 4:
+        return None
+    csum = np.cumsum(x)
+    k = np.arange(1, n)
+    left_mean = csum[:-1] / k
+    right_mean = (csum[-1] - csum[:-1]) / (n - k)
+    score = k * (n - k) / n * (left_mean - right_mean) ** 2
+    best = int(np.argmax(score))
+    split = best + 1
+    shift = abs(right_mean[best] - left_mean[best])
+    if shift == 0:
+        return None
+    residual = np.r_[x[:split] - left_mean[best], x[split:] - right_mean[best]]
+    scale = residual.std()
+    z = shift / scale if scale > 0 else _FULL_SCALE_Z * 10
+    return split, float(z)
+
+
+def trend_z(values: np.ndarray, baseline: np.ndarray, step_s: float) -> Optional[float]:
+    """구간 기울기 × 구간 길이를 기준 구간 표준편차로 나눈 값 (부호 = 방향)"""
+    y = np.asarray(values, dtype=np.float64)
+    if len(y) < 3:
+        return None
+    if np.ptp(y) == 0:
+        return 0.0
+    t = np.arange(len(y)) * step_s
+    slope = np.polyfit(t, y, 1)[0]
+    scale = float(np.std(baseline)) if len(baseline) > 1 else 0.0
+    if scale == 0:
+        scale = abs(float(np.mean(baseline))) * 0.01 if len(baseline) else 0.0
+    change = slope * t[-1]
+    if scale == 0:
+        return 0.0 if change == 0 else float(np.sign(change) * _FULL_SCALE_Z * 10)
+    return float(change / scale)
+
+
+def lagged_correlation(x: np.ndarray, y: np.ndarray, max_lag: int) -> Optional[tuple[int, float]]:
+    """
+    x가 y를 lag 스텝 앞설 때의 상관계수 중 절댓값 최대 (lag = 0..max_lag).
+
+    x의 지연 구간들을 sliding_window_view로 한 번에 만들어 행렬 연산으로 계산합니다.
+
+    Returns:
+        (lag 스텝, 상관계수) 또는 None (상수 시계열 등)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    max_lag = min(max_lag, len(x) - 3)
+    if max_lag < 0:
+        return None
+    # windows[j] = x[j : j + n - max_lag] ↔ y[max_lag:] 이므로 lag = max_lag - j
+    windows = sliding_window_view(x, len(x) - max_lag)
+    target = y[max_lag:]
+    xc = windows - windows.mean(axis=1, keepdims=True)
+    yc = target - target.mean()
+    denom = np.linalg.norm(xc, axis=1) * np.linalg.norm(yc)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.where(denom > 0, xc @ yc / denom, np.nan)
+    if np.all(np.isnan(corr)):
+        return None
+    best = int(np.nanargmax(np.abs(corr)))
+    return max_lag - best, float(corr[best])
+
+
+def _fill(values: np.ndarray) -> Optional[np.ndarray]:
+    """격자 값의 NaN(첫 샘플 이전)을 첫 유효값으로 채움. 유효값이 없으면 None"""
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return None
+    out = values.copy()
+    out[~valid] = values[np.argmax(valid)]
+    return out
+
+
+# ── 분석 ──────────────────────────────────────────────────────────
+
+
+def find_episode(tag_path: str, alarm_time: Optional[datetime] = None, now: Optional[datetime] = None) -> Optional[Episode]:
+    """분석 대상 에피소드: alarm_time에 가장 가까운 발생, 없으면 최근 7일 중 가장 최근 발생"""
+    now = now or datetime.now()
+    if alarm_time is not None:
+        candidates = episodes_between(alarm_time - timedelta(days=1), alarm_time + timedelta(days=1), tag_path, now=now)
+        candidates = [e for e in candidates if e.start is not None]
+        return min(candidates, key=lambda e: abs((e.start - alarm_time).total_seconds()), default=None)
+    candidates = [e for e in episodes_between(now - timedelta(days=7), now, tag_path, now=now) if e.start is not None]
+    return max(candidates, key=lambda e: e.start, default=None)
+
+
+def sibling_tags(alarm_tag_path: str) -> tuple[Optional[str], dict[str, tuple[int, ...]]]:
+    """
+    알람 태그와 같은 폴더의 히스토리 태그.
+
+    Returns:
+        (히스토리에 있는 알람 태그 경로 또는 None, 경로 → ID 목록)
+    """
+    path = normalize_tag_path(alarm_tag_path)
+    own = resolve_tag_paths([path])
+    folder = path.rsplit("/", 1)[0] if "/" in path else ""
+    tags = dict(expand_tag_pattern(f"{folder}/*", settings.correlation_max_tags)) if folder else {}
+    tags.update(own)
+    return (path if path in own else None), tags
+
+
+def correlate_alarm(
+    tag_path: str,
+    alarm_time: Optional[datetime] = None,
+    limit: int = 5,
+    now: Optional[datetime] = None,
+) -> dict:
+    """
+    알람 에피소드의 원인 후보 태그 순위.
+
+    Raises:
+        LookupError: 에피소드나 히스토리 태그를 찾지 못한 경우
+    """
+    now = now or datetime.now()
+    episode = find_episode(tag_path, alarm_time, now)
+    if episode is None:
+        raise LookupError(f"'{tag_path}' 알람 에피소드를 찾을 수 없습니다.")
+    alarm_tag = parse_source(episode.source).tag_path
+    target_path, tags = sibling_tags(alarm_tag)
+    if not tags:
+        raise LookupError(f"'{alarm_tag}' 폴더에 히스토리 태그가 없습니다.")
+
+    step_ms = settings.correlation_step_seconds * 1000
+    alarm_ms = to_ms(episode.start)
+    start_ms = alarm_ms - settings.correlation_pre_minutes * 60_000
+    end_ms = min(alarm_ms + settings.correlation_post_minutes * 60_000, to_ms(now))
+    series = fetch_multi_series(tags, start_ms, end_ms)
+    grid = make_grid(start_ms, end_ms, step_ms)
+    alarm_idx = int(np.searchsorted(grid, alarm_ms))
+    trend_steps = settings.correlation_trend_minutes * 60_000 // step_ms
+    max_lag = settings.correlation_max_lag_minutes * 60_000 // step_ms
+
+    aligned = {}
+    for path, (ts, values, prior) in series.items():
+        filled = _fill(resample(ts, values, grid, "ffill", prior))
+        if filled is not None:
+            aligned[path] = filled
+
+    # 알람 신호: 알람 태그 값이 있으면 그 값, 없으면 발생 시점 0 → 1 계단
+    signal = aligned.get(target_path) if target_path else None
+    signal_name = target_path if signal is not None else "alarm_state"
+    if signal is None:
+        signal = (grid >= alarm_ms).astype(np.float64)
+
+    contributors = []
+    for path, values in aligned.items():
+        if path == target_path:
+            continue
+        cp = change_point(values)
+        trend = None
+        if alarm_idx > trend_steps:
+            pre = values[:alarm_idx]
+            trend = trend_z(pre[-trend_steps:], pre[:-trend_steps], settings.correlation_step_seconds)
+        lagged = lagged_correlation(values, signal, max_lag)
+
+        cp_lead_s = (alarm_ms - int(grid[cp[0]])) / 1000 if cp else None
+        cp_part = min(cp[1] / _FULL_SCALE_Z, 1.0) if cp and cp_lead_s >= 0 else 0.0
+        trend_part = min(abs(trend) / _FULL_SCALE_Z, 1.0) if trend is not None else 0.0
+        corr_part = abs(lagged[1]) if lagged else 0.0
+        score = 0.5 * corr_part + 0.3 * cp_part + 0.2 * trend_part
+        if score == 0:
+            continue
+        contributors.append({
+            "tag_path": path,
+            "score": round(score, 3),
+            "correlation": round(lagged[1], 3) if lagged else None,
+            "lead_s": lagged[0] * settings.correlation_step_seconds if lagged else None,
+            "change_point": datetime.fromtimestamp(grid[cp[0]] / 1000).strftime(_TIME_FORMAT) if cp else None,
+            "change_lead_s": cp_lead_s,
+            "shift_z": round(cp[1], 2) if cp else None,
+            "trend_z": round(trend, 2) if trend is not None else None,
+            "value_before": round(float(values[0]), 4),
+            "value_at_alarm": round(float(values[min(alarm_idx, len(values) - 1)]), 4),
+        })
+    contributors.sort(key=lambda c: -c["score"])
+
+    return {
+        "alarm_source": episode.source,
+        "alarm_tag": alarm_tag,
+        "alarm_start": episode.start.strftime(_TIME_FORMAT),
+        "alarm_clear": episode.clear.strftime(_TIME_FORMAT) if episode.clear else None,
+        "priority": episode.priority,
+        "window": [
+            datetime.fromtimestamp(start_ms / 1000).strftime(_TIME_FORMAT),
+            datetime.fromtimestamp(end_ms / 1000).strftime(_TIME_FORMAT),
+        ],
+        "signal": signal_name,
+        "candidates": len(aligned) - int(target_path in aligned),
+        "contributors": contributors[:limit],
+    }
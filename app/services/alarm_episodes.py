@@ -0,0 +1,343 @@
+"""
+알람 에피소드 - active(0) / ack(2) / clear(1) 이벤트를 source + eventid별로 묶은 발생 단위.
+
+이벤트를 (source, eventid, 시각) 순으로 한 번 정렬한 뒤 NumPy reduceat으로
+에피소드별 시작/확인/해제 시각과 최고 priority를 계산합니다.
+최근 alarm_episode_days 기간은 id 워터마크 기준으로 증분 갱신되는 메모리 저장소에 유지하고,
+그보다 오래된 구간은 원본 이벤트로 즉석에서 만듭니다.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.alarm_index import in_clause, like_clause, resolve_sources, source_matches
+from app.services.alarm_rollup import to_datetime
+from app.services.sql import fetch_rows, stream_rows
+
+
+EVENT_ACTIVE, EVENT_CLEAR, EVENT_ACK = 0, 1, 2
+
+# 같은 시각이면 active → ack → clear 순으로 처리
+_TYPE_RANK = {EVENT_ACTIVE: 0, EVENT_ACK: 1, EVENT_CLEAR: 2}
+
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 저장소 적재 시 한 번에 읽는 이벤트 행 수
+_LOAD_CHUNK_ROWS = 20000
+
+
+@dataclass
+class Episode:
+    """알람 한 번의 발생 구간"""
+
+    source: str
+    eventid: str
+    priority: int
+    start: Optional[datetime]   # active 시각 (조회 범위 이전에 발생했으면 None)
+    ack: Optional[datetime]
+    clear: Optional[datetime]   # None이면 아직 해제되지 않음
+
+    def duration_s(self, now: datetime) -> Optional[float]:
+        if self.start is None:
+            return None
+        return ((self.clear or now) - self.start).total_seconds()
+
+    def overlap_s(self, window_start: datetime, window_end: datetime, now: datetime) -> float:
+        """[window_start, window_end)와 겹치는 알람 시간 (시작을 모르면 창 시작부터)"""
+        start = max(self.start or window_start, window_start)
+        end = min(self.clear or now, window_end, now)
+        return max(0.0, (end - start).total_seconds())
+
+    def time_to_ack_s(self) -> Optional[float]:
+        if self.start is None or self.ack is None:
+            return None
+        return (self.ack - self.start).total_seconds()
+
+
+# ── 페어링 (NumPy) ────────────────────────────────────────────────
+
+
+def _ms_to_datetime(values: np.ndarray) -> list[Optional[datetime]]:
+    return [None if np.isnan(v) else datetime.fromtimestamp(v / 1000) for v in values.tolist()]
+
+
+def build_episodes(
+    sources: Sequence[str],
+    eventids: Sequence[str],
+    eventtypes: Sequence[int],
+    times_ms: Sequence[float],
+    priorities: Sequence[int],
+) -> list[Episode]:
+    """
+    이벤트 배열을 에피소드로 변환 (정렬 1회 + reduceat).
+
+    같은 (source, eventid) 그룹 안에서 active가 나올 때마다 새 에피소드가 시작되고,
+    active 없이 시작하는 그룹(ack/clear만 있는 경우)은 시작 시각이 없는 에피소드가 됩니다.
+    """
+    if len(times_ms) == 0:
+        return []
+    source_names, source_codes = np.unique(np.asarray(sources, dtype=object).astype(str), return_inverse=True)
+    eventid_names, eventid_codes = np.unique(np.asarray(eventids, dtype=object).astype(str), return_inverse=True)
+    types = np.asarray(eventtypes, dtype=np.int64)
+    times = np.asarray(times_ms, dtype=np.float64)
+    prios = np.asarray(priorities, dtype=np.int64)
+    ranks = np.vectorize(lambda t: _TYPE_RANK.get(int(t), 3), otypes=[np.int64])(types)
+
+    order = np.lexsort((ranks, times, eventid_codes, source_codes))
+    source_codes, eventid_codes = source_codes[order], eventid_codes[order]
+    types, times, prios = types[order], times[order], prios[order]
+
+    group_start = np.r_[True, (source_codes[1:] != source_codes[:-1]) | (eventid_codes[1:] != eventid_codes[:-1])]
+    starts = np.flatnonzero(group_start | (types == EVENT_ACTIVE))
+
+    start_times = np.where(types[starts] == EVENT_ACTIVE, times[starts], np.nan)
+    ack_times = np.minimum.reduceat(np.where(types == EVENT_ACK, times, np.inf), starts)
+    clear_times = np.minimum.reduceat(np.where(types == EVENT_CLEAR, times, np.inf), starts)
+    ack_times[np.isinf(ack_times)] = np.nan
+    clear_times[np.isinf(clear_times)] = np.nan
+    max_prios = np.maximum.reduceat(prios, starts)
+
+    return [
+        Episode(str(source_names[s]), str(eventid_names[e]), int(p), st, ak, cl)
+        for s, e, p, st, ak, cl in zip(
+            source_codes[starts].tolist(),
+            eventid_codes[starts].tolist(),
+            max_prios.tolist(),
+            _ms_to_datetime(start_times),
+            _ms_to_datetime(ack_times),
+            _ms_to_datetime(clear_times),
+        )
+    ]
+
+
+def _rows_to_episodes(rows: Iterable[tuple]) -> tuple[list[Episode], int]:
+    """(id, source, eventid, eventtype, priority, eventtime) 행 → (에피소드, 최대 id)"""
+    ids, sources, eventids, types, times, prios = [], [], [], [], [], []
+    for row_id, source, eventid, eventtype, priority, eventtime in rows:
+        ts = to_datetime(eventtime)
+        if source is None or ts is None:
+            continue
+        ids.append(int(row_id))
+        sources.append(source)
+        # eventid가 없는 행은 행 id로 대체 (단독 에피소드)
+        eventids.append(eventid if eventid is not None else f"#{row_id}")
+        types.append(int(eventtype or 0))
+        times.append(ts.timestamp() * 1000)
+        prios.append(int(priority or 0))
+    return build_episodes(sources, eventids, types, times, prios), max(ids, default=0)
+
+
+def _fetch_events(where: str) -> list[tuple]:
+    return fetch_rows(
+        f"""
+        SELECT id, source, eventid, eventtype, priority, eventtime
+        FROM alarm_events
+        WHERE {where}
+        """
+    )
+
+
+def _stream_events(where: str) -> Iterator[list[tuple]]:
+    """id 순서로 나눠 읽기 - 조각 경계에 걸친 에피소드는 EpisodeStore.merge가 이어 붙임"""
+    yield from stream_rows(
+        f"""
+        SELECT id, source, eventid, eventtype, priority, eventtime
+        FROM alarm_events
+        WHERE {where}
+        ORDER BY id
+        """,
+        chunk_size=_LOAD_CHUNK_ROWS,
+    )
+
+
+# ── 증분 저장소 ───────────────────────────────────────────────────
+
+
+class EpisodeStore:
+    """최근 기간 에피소드 (id 워터마크 기준 증분 갱신)"""
+
+    def __init__(self):
+        self.start: Optional[datetime] = None       # 저장소가 덮는 시작 시각
+        self.watermark_id = 0
+        self._episodes: list[Episode] = []
+        self._latest: dict[tuple[str, str], Episode] = {}
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._episodes)
+
+    def merge(self, episodes: list[Episode]) -> None:
+        """새 배치의 에피소드 반영. 시작 없는 에피소드는 같은 eventid의 기존 에피소드에 이어 붙임"""
+        for episode in episodes:
+            key = (episode.source, episode.eventid)
+            previous = self._latest.get(key)
+            if episode.start is None and previous is not None:
+                previous.ack = previous.ack or episode.ack
+                previous.clear = previous.clear or episode.clear
+                previous.priority = max(previous.priority, episode.priority)
+                continue
+            self._episodes.append(episode)
+            self._latest[key] = episode
+
+    def refresh(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.now()
+        with self._lock:
+            start = None
+            if self.start is None:
+                # 첫 적재 - 중간에 실패했다면 남은 조각을 버리고 처음부터
+                start = now - timedelta(days=settings.alarm_episode_days)
+                self._episodes, self._latest, self.watermark_id = [], {}, 0
+                batches = _stream_events(f"eventtime >= '{start.strftime(_TIME_FORMAT)}'")
+            else:
+                batches = _stream_events(f"id > {self.watermark_id}")
+                self._evict(now)
+            added = 0
+            for rows in batches:
+                episodes, max_id = _rows_to_episodes(rows)
+                self.merge(episodes)
+                self.watermark_id = max(self.watermark_id, max_id)
+                added += len(episodes)
+            if start is not None:
+                self.start = start
+            self._refreshed_at = time.monotonic()
+        return added
+
+    def _evict(self, now: datetime) -> None:
+        horizon = now - timedelta(days=settings.alarm_episode_days)
+        if self.start is not None and horizon <= self.start:
+            return
+        kept = [e for e in self._episodes if e.clear is None or e.clear >= horizon]
+        if len(kept) != len(self._episodes):
+            self._episodes = kept
+            self._latest = {(e.source, e.eventid): e for e in kept}
+        self.start = horizon
+
+    def ensure_fresh(self) -> None:
+        if self.start is None or time.monotonic() - self._refreshed_at >= settings.alarm_episode_refresh_seconds:
+            self.refresh()
+
+    def episodes(self) -> list[Episode]:
+        return list(self._episodes)
+
+
+_store = EpisodeStore()
+
+
+def get_episode_store() -> EpisodeStore:
+    return _store
+
+
+def warm_episode_store() -> None:
+    """서버 시작 시 초기 로드 (첫 에피소드 질문에서 보관 기간 전체 적재를 기다리지 않도록)"""
+    if settings.alarm_episode_days <= 0:
+        return
+    try:
+        added = _store.refresh()
+        print(f"[AlarmEpisodes] 에피소드 {added}개 적재 (id≤{_store.watermark_id})")
+    except Exception as e:
+        print(f"[AlarmEpisodes] 초기 로드 실패 (조회 시 재시도): {e}")
+
+
+def episodes_between(
+    start: datetime, end: datetime, tag_path: Optional[str] = None, now: Optional[datetime] = None
+) -> list[Episode]:
+    """
+    [start, end)와 겹치는 에피소드. 저장소 범위 안이면 메모리에서, 아니면 원본에서 생성.
+    """
+    now = now or datetime.now()
+    sources = resolve_sources(tag_path) if tag_path else None
+    if sources == []:
+        return []
+
+    if settings.alarm_episode_days > 0:
+        _store.ensure_fresh()
+    if _store.start is not None and start >= _store.start:
+        candidates = _store.episodes()
+        if sources is not None:
+            wanted = set(sources)
+            candidates = [e for e in candidates if e.source in wanted]
+        elif tag_path:
+            candidates = [e for e in candidates if source_matches(e.source, tag_path)]
+    else:
+        # 창 이전에 시작한 에피소드를 잡기 위해 앞쪽 여유 구간 포함
+        lookback = start - timedelta(hours=settings.alarm_episode_lookback_hours)
+        conditions = [
+            f"eventtime >= '{lookback.strftime(_TIME_FORMAT)}'",
+            f"eventtime < '{end.strftime(_TIME_FORMAT)}'",
+        ]
+        if sources is not None:
+            conditions.append(in_clause(sources))
+        elif tag_path:
+            conditions.append(like_clause(tag_path))
+        candidates, _ = _rows_to_episodes(_fetch_events(" AND ".join(conditions)))
+
+    return [
+        e for e in candidates
+        if (e.start is None or e.start < end) and (e.clear is None or e.clear > start)
+    ]
+
+
+# ── 지표 ──────────────────────────────────────────────────────────
+
+
+def alarm_time_by_source(
+    episodes: list[Episode], start: datetime, end: datetime, now: Optional[datetime] = None
+) -> list[dict]:
+    """source별 창 내 알람 시간 합계 (내림차순)"""
+    now = now or datetime.now()
+    totals: dict[str, dict] = {}
+    for e in episodes:
+        entry = totals.setdefault(e.source, {"source": e.source, "alarm_s": 0.0, "episodes": 0, "open": 0})
+        entry["alarm_s"] += e.overlap_s(start, end, now)
+        entry["episodes"] += 1
+        entry["open"] += int(e.clear is None)
+    return sorted(totals.values(), key=lambda t: -t["alarm_s"])
+
+
+def ack_statistics(episodes: list[Episode]) -> dict:
+    """확인까지 걸린 시간(MTTA) 통계 - 전체 및 priority별"""
+
+    def summarize(group: list[Episode]) -> dict:
+        delays = np.array([d for d in (e.time_to_ack_s() for e in group) if d is not None])
+        return {
+            "episodes": len(group),
+            "acked": int(len(delays)),
+            "unacked": sum(1 for e in group if e.ack is None),
+            "mtta_s": float(delays.mean()) if len(delays) else None,
+            "median_s": float(np.median(delays)) if len(delays) else None,
+            "max_s": float(delays.max()) if len(delays) else None,
+        }
+
+    with_start = [e for e in episodes if e.start is not None]
+    by_priority = {}
+    for priority in sorted({e.priority for e in with_start}):
+        by_priority[priority] = summarize([e for e in with_start if e.priority == priority])
+    return {"overall": summarize(with_start), "by_priority": by_priority}
+
+
+def longest_episodes(episodes: list[Episode], limit: int = 10, now: Optional[datetime] = None) -> list[Episode]:
+    now = now or datetime.now()
+    known = [e for e in episodes if e.start is not None]
+    return sorted(known, key=lambda e: -(e.duration_s(now) or 0.0))[:limit]
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m {secs:02d}s"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
@@ -0,0 +1,117 @@
+"""
+알람 이벤트 조회 - (eventtime, id) 키셋 페이지네이션.
+
+최신 이벤트부터 ORDER BY eventtime DESC, id DESC로 limit + 1행을 읽어
+다음 페이지 유무를 판단하고, 마지막 행의 (eventtime, id)를 커서로 돌려줍니다.
+다음 페이지는 `eventtime < t OR (eventtime = t AND id < id)`로 시작 위치를 찾습니다.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+
+from app.services.alarm_index import source_clause
+from app.services.pagination import Page, decode_cursor, encode_cursor, is_int, is_str, optional
+from app.services.sql import fetch_rows
+
+
+CURSOR_KIND = "alarm_events"
+
+# 페이지 크기 상한 (REST /alarms/events의 le와 같음, 커서의 limit도 이 값으로 제한)
+MAX_PAGE_SIZE = 5000
+
+_CURSOR_SCOPE = {
+    "start": optional(is_str),
+    "end": optional(is_str),
+    "tag_path": optional(is_str),
+    "eventtype": optional(is_int),
+    "limit": is_int,
+}
+_CURSOR_POSITION = (is_str, is_int)
+
+EVENT_TYPES = {"active": 0, "clear": 1, "ack": 2, "acknowledged": 2}
+
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_COLUMNS = ("id", "eventtime", "source", "displaypath", "priority", "eventtype")
+
+
+def _time_key(value: Any) -> str:
+    """커서에 저장하는 eventtime - DB가 돌려준 값과 정확히 같게 비교되도록 소수 초까지 보존"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value)
+
+
+def page_alarm_events(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    tag_path: Optional[str] = None,
+    event_type: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Page:
+    """
+    알람 이벤트 한 페이지 (최신순).
+
+    cursor가 있으면 인자 대신 커서에 담긴 첫 페이지의 조건(기간, 필터, limit)을 사용합니다.
+
+    Returns:
+        Page(rows=[{id, eventtime, source, displaypath, priority, eventtype}, ...], next_cursor)
+
+    Raises:
+        ValueError: 잘못된 커서, event_type 또는 limit
+    """
+    if cursor:
+        scope, position = decode_cursor(cursor, CURSOR_KIND, _CURSOR_SCOPE, _CURSOR_POSITION, MAX_PAGE_SIZE)
+        after_time, after_id = position
+    else:
+        if event_type and event_type.lower() not in EVENT_TYPES:
+            raise ValueError(f"지원하지 않는 event_type: {event_type}. 사용 가능: active, clear, ack")
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit은 1~{MAX_PAGE_SIZE} 사이여야 합니다.")
+        scope = {
+            "start": start.strftime(_TIME_FORMAT) if start else None,
+            "end": end.strftime(_TIME_FORMAT) if end else None,
+            "tag_path": tag_path,
+            "eventtype": EVENT_TYPES[event_type.lower()] if event_type else None,
+            "limit": limit,
+        }
+        after_time = after_id = None
+
+    conditions, params = [], {}
+    if scope["start"]:
+        conditions.append("eventtime >= :start")
+        params["start"] = scope["start"]
+    if scope["end"]:
+        conditions.append("eventtime < :end")
+        params["end"] = scope["end"]
+    if scope["tag_path"]:
+        conditions.append(source_clause(scope["tag_path"]))
+    if scope["eventtype"] is not None:
+        conditions.append("eventtype = :eventtype")
+        params["eventtype"] = scope["eventtype"]
+    if after_time is not None:
+        conditions.append("(eventtime < :after_time OR (eventtime = :after_time AND id < :after_id))")
+        params.update(after_time=after_time, after_id=int(after_id))
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = fetch_rows(
+        f"""
+        SELECT {', '.join(_COLUMNS)}
+        FROM alarm_events
+        {where}
+        ORDER BY eventtime DESC, id DESC
+        LIMIT {int(scope['limit']) + 1}
+        """,
+        params,
+    )
+
+    page_size = int(scope["limit"])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(CURSOR_KIND, scope, [_time_key(last[1]), int(last[0])])
+    return Page(rows=[dict(zip(_COLUMNS, row)) for row in rows], next_cursor=next_cursor)
@@ -0,0 +1,173 @@
+"""
+알람 발생 분포 - 시간대(0~23시), 요일, 고정 간격별 발생 건수.
+
+"알람이 주로 언제 발생해?" 같은 질문에 이벤트 목록 대신 24개 숫자 벡터를 돌려줍니다.
+- 정시 단위 버킷(시간대, 요일, 60분 배수 간격)은 alarm_rollup의 시간별 건수에서 계산
+- 60분 미만/비정시 간격만 원본 active 이벤트 시각을 읽어 NumPy로 분류
+- priority 또는 운영 구역(source 그룹)별로 나눠 볼 수 있음
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from app.services.alarm_analytics import operator_area
+from app.services.alarm_index import in_clause, like_clause, resolve_sources
+from app.services.alarm_rollup import floor_hour, hourly_counts, to_datetime
+from app.services.sql import fetch_rows
+
+
+BUCKETS = ("hour_of_day", "day_of_week", "interval")
+SPLITS = ("priority", "area")
+
+WEEKDAYS = ("월", "화", "수", "목", "금", "토", "일")
+
+# interval 버킷 수 상한 (LLM 컨텍스트 보호)
+MAX_INTERVAL_BUCKETS = 200
+
+# area 분할 시 표시하는 그룹 수 (나머지는 "(other)"로 합침)
+MAX_GROUPS = 8
+
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _labels(bucket: str, origin: datetime, interval: timedelta, n_bins: int) -> list[str]:
+    if bucket == "hour_of_day":
+        return [f"{h:02d}" for h in range(24)]
+    if bucket == "day_of_week":
+        return list(WEEKDAYS)
+    fmt = "%m-%d %H:%M" if interval < timedelta(days=1) else "%Y-%m-%d"
+    return [(origin + i * interval).strftime(fmt) for i in range(n_bins)]
+
+
+def _bin_index(bucket: str, times: list[datetime], origin: datetime, interval: timedelta) -> np.ndarray:
+    if bucket == "hour_of_day":
+        return np.fromiter((t.hour for t in times), dtype=np.int64, count=len(times))
+    if bucket == "day_of_week":
+        return np.fromiter((t.weekday() for t in times), dtype=np.int64, count=len(times))
+    offsets = np.fromiter(((t - origin).total_seconds() for t in times), dtype=np.float64, count=len(times))
+    return (offsets // interval.total_seconds()).astype(np.int64)
+
+
+def _fetch_raw(start: datetime, end: datetime, tag_path: Optional[str]) -> list[tuple[datetime, str, int, int]]:
+    """60분 미만 간격용 원본 active 이벤트 (시각, source, priority, 1)"""
+    conditions = [
+        "eventtype = 0",
+        f"eventtime >= '{start.strftime(_TIME_FORMAT)}'",
+        f"eventtime < '{end.strftime(_TIME_FORMAT)}'",
+    ]
+    if tag_path:
+        sources = resolve_sources(tag_path)
+        if sources == []:
+            return []
+        conditions.append(like_clause(tag_path) if sources is None else in_clause(sources))
+    rows = fetch_rows(
+        f"SELECT eventtime, source, priority FROM alarm_events WHERE {' AND '.join(conditions)}"
+    )
+    records = []
+    for eventtime, source, priority in rows:
+        ts = to_datetime(eventtime)
+        if ts is not None and source is not None:
+            records.append((ts, source, int(priority or 0), 1))
+    return records
+
+
+def alarm_histogram(
+    start: datetime,
+    end: datetime,
+    tag_path: Optional[str] = None,
+    bucket: str = "hour_of_day",
+    interval_minutes: int = 60,
+    split_by: Optional[str] = None,
+) -> dict:
+    """
+    [start, end) active 이벤트의 버킷별 발생 건수.
+
+    Args:
+        bucket: "hour_of_day" (24개), "day_of_week" (월~일 7개), "interval" (interval_minutes 간격)
+        split_by: None, "priority", "area" (운영 구역 = 태그 경로 앞 alarm_area_depth 단계)
+
+    Returns:
+        {start, end, tag_path, bucket, interval_minutes, split_by, resolution, labels, total, series, peak}
+
+    Raises:
+        ValueError: 지원하지 않는 bucket/split_by, 잘못된 간격, 버킷 수 초과
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"지원하지 않는 bucket: {bucket}. 사용 가능: {', '.join(BUCKETS)}")
+    if split_by is not None and split_by not in SPLITS:
+        raise ValueError(f"지원하지 않는 split_by: {split_by}. 사용 가능: {', '.join(SPLITS)}")
+    if end <= start:
+        raise ValueError("end must be after start")
+
+    interval = timedelta(minutes=interval_minutes)
+    hourly = bucket != "interval" or (interval_minutes > 0 and interval_minutes % 60 == 0)
+    if bucket == "interval":
+        if interval_minutes <= 0:
+            raise ValueError("interval_minutes는 1 이상이어야 합니다.")
+        # 정시 단위 간격은 롤업 버킷과 경계가 맞도록 시작 정시에 정렬
+        origin = floor_hour(start) if hourly else start
+        n_bins = int(np.ceil((end - origin) / interval))
+        if n_bins > MAX_INTERVAL_BUCKETS:
+            raise ValueError(
+                f"버킷 수({n_bins})가 상한({MAX_INTERVAL_BUCKETS})을 넘습니다. interval_minutes를 늘리세요."
+            )
+    else:
+        origin = start
+        n_bins = 24 if bucket == "hour_of_day" else 7
+
+    if hourly:
+        records = hourly_counts(start, end, tag_path, eventtype=0, by_source=split_by == "area")
+    else:
+        records = _fetch_raw(start, end, tag_path)
+
+    times = [r[0] for r in records]
+    counts = np.fromiter((r[3] for r in records), dtype=np.int64, count=len(records))
+    idx = _bin_index(bucket, times, origin, interval)
+    valid = (idx >= 0) & (idx < n_bins)
+    total = np.bincount(idx[valid], weights=counts[valid], minlength=n_bins).astype(np.int64)
+
+    series: dict[str, list[int]] = {}
+    if split_by and records:
+        if split_by == "priority":
+            groups = np.fromiter((r[2] for r in records), dtype=np.int64, count=len(records))
+            names = {int(g): f"priority {int(g)}" for g in np.unique(groups)}
+        else:
+            codes: dict[str, int] = {}
+            groups = np.fromiter(
+                (codes.setdefault(operator_area(r[1]), len(codes)) for r in records),
+                dtype=np.int64,
+                count=len(records),
+            )
+            names = {code: area for area, code in codes.items()}
+        per_group = {}
+        for code in names:
+            mask = valid & (groups == code)
+            per_group[code] = np.bincount(idx[mask], weights=counts[mask], minlength=n_bins).astype(np.int64)
+        if split_by == "priority":
+            ranked = sorted(names, reverse=True)
+        else:
+            ranked = sorted(names, key=lambda code: (-per_group[code].sum(), names[code]))
+        shown, rest = ranked[:MAX_GROUPS], ranked[MAX_GROUPS:]
+        series = {names[code]: per_group[code].tolist() for code in shown}
+        if rest:
+            series["(other)"] = np.sum([per_group[code] for code in rest], axis=0).tolist()
+
+    labels = _labels(bucket, origin, interval, n_bins)
+    peak = int(np.argmax(total)) if total.sum() else None
+    return {
+        "start": start.strftime(_TIME_FORMAT),
+        "end": end.strftime(_TIME_FORMAT),
+        "tag_path": tag_path,
+        "bucket": bucket,
+        "interval_minutes": interval_minutes if bucket == "interval" else None,
+        "split_by": split_by,
+        "resolution": "hourly" if hourly else "event",
+        "labels": labels,
+        "total": total.tolist(),
+        "series": series,
+        "peak": {"label": labels[peak], "count": int(total[peak])} if peak is not None else None,
+    }
@@ -0,0 +1,195 @@
+"""
+알람 source 인덱스 - alarm_events.source 고유값을 메모리에 파싱해 유지.
+
+source 형식: "prov:default:/tag:BMS/MFD/8F/FAN1/Smoke_Detect_Alm:/alm:ALARM"
+  → provider="default", tag_path="BMS/MFD/8F/FAN1/Smoke_Detect_Alm", alarm_name="ALARM"
+
+도구의 태그 검색어("FAN1")를 메모리에서 source 목록으로 해석해 `source IN (...)`로 조회하므로
+(source, eventtime) 인덱스를 탈 수 있습니다. 새 source는 id 워터마크 이후 행만 읽어 증분 반영하며,
+인덱스를 쓸 수 없으면 기존 LIKE 검색으로 대체합니다.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import settings
+from app.services.sql import fetch_rows
+
+
+_SOURCE_PATTERN = re.compile(r"^prov:(?P<prov>[^:]*):/tag:(?P<tag>.+?)(?::/alm:(?P<alm>.*))?$")
+
+
+@dataclass(frozen=True)
+class AlarmSource:
+    """파싱된 알람 source"""
+
+    source: str
+    provider: str
+    tag_path: str
+    alarm_name: str
+    segments: tuple[str, ...]  # 소문자 경로 요소
+
+
+def parse_source(source: str) -> AlarmSource:
+    """source 문자열 파싱. 형식이 다르면 전체를 태그 경로로 취급"""
+    m = _SOURCE_PATTERN.match(source)
+    if m:
+        provider, tag_path, alarm_name = m["prov"], m["tag"], m["alm"] or ""
+    else:
+        provider, tag_path, alarm_name = "", source, ""
+    segments = tuple(s.lower() for s in tag_path.split("/") if s)
+    return AlarmSource(source, provider, tag_path, alarm_name, segments)
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def in_clause(sources: list[str]) -> str:
+    """해석된 source 목록 조건 (빈 목록이면 스캔 없이 빈 결과)"""
+    if not sources:
+        return "1 = 0"
+    if len(sources) == 1:
+        return f"source = {_quote(sources[0])}"
+    return f"source IN ({', '.join(_quote(s) for s in sources)})"
+
+
+def source_matches(source: str, tag_path: str) -> bool:
+    """like_clause와 같은 규칙의 메모리 비교 - 대소문자 무시 부분 문자열"""
+    return tag_path.lower() in source.lower()
+
+
+def like_clause(tag_path: str) -> str:
+    """
+    인덱스를 쓸 수 없을 때의 부분 일치 조건 (source_matches와 같은 규칙).
+
+    DB 기본 collation과 무관하게 대소문자를 무시하고, 검색어의 %/_는 와일드카드가 아닌 문자로 비교합니다.
+    """
+    escaped = tag_path.lower().replace("'", "''")
+    for ch in ("!", "%", "_"):
+        escaped = escaped.replace(ch, "!" + ch)
+    return f"LOWER(source) LIKE '%{escaped}%' ESCAPE '!'"
+
+
+class AlarmSourceIndex:
+    """source → AlarmSource 메모리 맵 (id 워터마크 기준 증분 갱신)"""
+
+    def __init__(self):
+        self._sources: dict[str, AlarmSource] = {}
+        self._watermark_id = 0
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    @property
+    def watermark_id(self) -> int:
+        return self._watermark_id
+
+    def refresh(self) -> int:
+        """워터마크 이후 새 source 반영. 추가된 source 수 반환"""
+        with self._lock:
+            rows = fetch_rows(
+                f"""
+                SELECT source, MAX(id)
+                FROM alarm_events
+                WHERE id > {self._watermark_id}
+                GROUP BY source
+                """
+            )
+            added = 0
+            for source, max_id in rows:
+                if source is None:
+                    continue
+                if source not in self._sources:
+                    self._sources[source] = parse_source(source)
+                    added += 1
+                self._watermark_id = max(self._watermark_id, int(max_id))
+            self._refreshed_at = time.monotonic()
+        if added:
+            print(f"[AlarmIndex] source {added}개 추가 (총 {len(self._sources)}개, id≤{self._watermark_id})")
+        return added
+
+    def ensure_fresh(self) -> None:
+        if time.monotonic() - self._refreshed_at >= settings.alarm_index_refresh_seconds:
+            self.refresh()
+
+    def match(self, query: str) -> list[str]:
+        """
+        검색어에 해당하는 source 목록.
+
+        태그 경로/이름 정확 일치와 경로 요소/알람 이름 일치를 함께 반환하고, 둘 다 없을 때만
+        부분 문자열(LIKE와 동일)로 넓힙니다. "FAN1" 자체가 source여도 FAN1 폴더 아래 알람이 함께
+        나오고, "FAN1"이 "FAN10"까지 끌어오지는 않습니다.
+        """
+        needle = query.strip().lower()
+        if needle.startswith("[") and "]" in needle:
+            needle = needle.split("]", 1)[1]
+        needle = needle.strip("/")
+        if not needle:
+            return []
+        exact, segment, partial = [], [], []
+        for entry in list(self._sources.values()):
+            path = entry.tag_path.lower()
+            if path == needle or path.endswith("/" + needle):
+                exact.append(entry.source)
+            elif needle in entry.segments or entry.alarm_name.lower() == needle:
+                segment.append(entry.source)
+            elif needle in entry.source.lower():
+                partial.append(entry.source)
+        return sorted(exact + segment) if exact or segment else sorted(partial)
+
+    def sources(self) -> list[AlarmSource]:
+        return list(self._sources.values())
+
+
+_index = AlarmSourceIndex()
+
+
+def get_alarm_index() -> AlarmSourceIndex:
+    return _index
+
+
+def warm_alarm_index() -> None:
+    """서버 시작 시 초기 로드 (첫 알람 질문에서 전체 source 집계를 기다리지 않도록)"""
+    if not settings.alarm_index_enabled:
+        return
+    try:
+        _index.refresh()
+    except Exception as e:
+        print(f"[AlarmIndex] 초기 로드 실패 (조회 시 재시도): {e}")
+
+
+def resolve_sources(tag_path: str) -> Optional[list[str]]:
+    """
+    검색어 → source 목록. 인덱스를 쓸 수 없거나 결과가 너무 많으면 None (LIKE 사용).
+    찾지 못하면 새 source일 수 있으므로 한 번 증분 갱신 후 다시 찾고, 그래도 없으면 빈 목록.
+    """
+    if not settings.alarm_index_enabled:
+        return None
+    try:
+        _index.ensure_fresh()
+        matched = _index.match(tag_path)
+        if not matched:
+            _index.refresh()
+            matched = _index.match(tag_path)
+    except Exception as e:
+        print(f"[AlarmIndex] 인덱스 사용 불가, LIKE 검색으로 대체: {e}")
+        return None
+    if len(matched) > settings.alarm_index_max_sources:
+        return None
+    return matched
+
+
+def source_clause(tag_path: str) -> str:
+    """도구 WHERE 조건: 인덱스로 해석된 `source IN (...)` 또는 LIKE 대체"""
+    sources = resolve_sources(tag_path)
+    if sources is None:
+        return like_clause(tag_path)
+    return in_clause(sources)
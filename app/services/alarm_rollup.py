@@ -0,0 +1,548 @@
+"""
+알람 롤업 - source × 시간 × eventtype × priority 발생 건수를 증분 유지.
+
+alarm_events를 eventtime 워터마크(완료된 시간 버킷)와 id 워터마크(늦게 기록된 이벤트 감지)로
+따라가며 alarm_rollup_hourly 테이블에 기록하고, 최근 구간은 메모리 사본(hot copy)으로 보관합니다.
+통계 도구는 정시 경계 안쪽을 롤업에서, 앞/뒤 자투리와 워터마크 이후 구간만 원본에서 집계합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from app.core.config import settings
+from app.services.alarm_index import in_clause, like_clause, resolve_sources, source_matches
+from app.services.sql import advisory_lock, execute_statements, fetch_rows, stream_rows
+
+
+ROLLUP_TABLE = "alarm_rollup_hourly"
+WATERMARK_TABLE = "alarm_rollup_watermark"
+
+# 워커 중 한 곳만 롤업을 갱신하도록 잡는 DB advisory lock 이름
+ROLLUP_LOCK = "alarm_rollup_maintainer"
+
+HOUR = timedelta(hours=1)
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# (source, eventtype, priority)
+CountKey = tuple[str, int, int]
+
+_maintainer_task: Optional[asyncio.Task] = None
+_lock = threading.Lock()
+
+
+@dataclass
+class EventCount:
+    """병합 가능한 건수 + 최초/최종 발생 시각"""
+
+    count: int = 0
+    first: Optional[datetime] = None
+    last: Optional[datetime] = None
+
+    def add(self, count: int, first: Optional[datetime], last: Optional[datetime]) -> None:
+        self.count += count
+        if first is not None and (self.first is None or first < self.first):
+            self.first = first
+        if last is not None and (self.last is None or last > self.last):
+            self.last = last
+
+
+@dataclass
+class SourceSummary:
+    """source 하나의 기간 통계"""
+
+    source: str
+    total: int = 0
+    by_type: dict[int, int] = field(default_factory=dict)       # 0=active, 1=clear, 2=ack
+    by_priority: dict[int, int] = field(default_factory=dict)
+    first: Optional[datetime] = None
+    last: Optional[datetime] = None
+
+    def add(self, eventtype: int, priority: int, counted: EventCount) -> None:
+        self.total += counted.count
+        self.by_type[eventtype] = self.by_type.get(eventtype, 0) + counted.count
+        self.by_priority[priority] = self.by_priority.get(priority, 0) + counted.count
+        if counted.first is not None and (self.first is None or counted.first < self.first):
+            self.first = counted.first
+        if counted.last is not None and (self.last is None or counted.last > self.last):
+            self.last = counted.last
+
+
+# ── 시간 유틸리티 ──────────────────────────────────────────────────
+
+
+def _fmt(dt: datetime) -> str:
+    return dt.strftime(_TIME_FORMAT)
+
+
+def to_datetime(value) -> Optional[datetime]:
+    """eventtime 값(datetime, 문자열, epoch ms)을 로컬 naive datetime으로"""
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000)
+    return datetime.fromisoformat(str(value))
+
+
+def floor_hour(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(dt: datetime) -> datetime:
+    floored = floor_hour(dt)
+    return floored if floored == dt else floored + HOUR
+
+
+# ── 스키마 / 워터마크 ─────────────────────────────────────────────
+
+
+class _State:
+    """워터마크와 hot copy (프로세스 메모리)"""
+
+    def __init__(self):
+        self.loaded = False
+        self.time_watermark: Optional[datetime] = None   # 이 시각 이전 버킷은 롤업 완료
+        self.id_watermark = 0                             # 반영한 최대 alarm_events.id
+        self.hot_start: Optional[datetime] = None
+        self.hot: dict[datetime, dict[CountKey, EventCount]] = {}
+
+
+_state = _State()
+
+
+def ensure_alarm_rollup_tables() -> None:
+    execute_statements([
+        (
+            f"""
+            CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+                source VARCHAR(512) NOT NULL,
+                bucket_start TIMESTAMP NOT NULL,
+                eventtype INTEGER NOT NULL,
+                priority INTEGER NOT NULL,
+                event_count INTEGER NOT NULL,
+                first_event TIMESTAMP,
+                last_event TIMESTAMP,
+                PRIMARY KEY (source, bucket_start, eventtype, priority)
+            )
+            """,
+            None,
+        ),
+        (
+            f"""
+            CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+                name VARCHAR(16) PRIMARY KEY,
+                value BIGINT NOT NULL
+            )
+            """,
+            None,
+        ),
+    ])
+
+
+def _load_state() -> None:
+    rows = dict(fetch_rows(f"SELECT name, value FROM {WATERMARK_TABLE}"))
+    if "eventtime" in rows:
+        _state.time_watermark = datetime.fromtimestamp(int(rows["eventtime"]) / 1000)
+    _state.id_watermark = int(rows.get("id", 0))
+    _state.loaded = True
+
+
+def get_alarm_watermark() -> Optional[datetime]:
+    """롤업이 완료된 시각 (미포함). 롤업을 쓸 수 없으면 None"""
+    if not settings.alarm_rollup_enabled:
+        return None
+    if not _state.loaded:
+        try:
+            _load_state()
+        except Exception as e:
+            print(f"[AlarmRollup] 워터마크 조회 실패 (롤업 미사용): {e}")
+            _state.loaded = True
+    return _state.time_watermark
+
+
+def _watermark_statements(time_watermark: datetime, id_watermark: int) -> list:
+    return [
+        (f"DELETE FROM {WATERMARK_TABLE} WHERE name IN ('eventtime', 'id')", None),
+        (
+            f"INSERT INTO {WATERMARK_TABLE} (name, value) VALUES ('eventtime', :t), ('id', :i)",
+            {"t": int(time_watermark.timestamp() * 1000), "i": id_watermark},
+        ),
+    ]
+
+
+# ── 집계 ──────────────────────────────────────────────────────────
+
+
+def aggregate_events(rows: Iterable[tuple]) -> dict[datetime, dict[CountKey, EventCount]]:
+    """(source, eventtype, priority, eventtime) 행 → 시간 버킷별 건수"""
+    buckets: dict[datetime, dict[CountKey, EventCount]] = {}
+    for source, eventtype, priority, eventtime in rows:
+        ts = to_datetime(eventtime)
+        if source is None or ts is None:
+            continue
+        key = (source, int(eventtype or 0), int(priority or 0))
+        bucket = buckets.setdefault(floor_hour(ts), {})
+        bucket.setdefault(key, EventCount()).add(1, ts, ts)
+    return buckets
+
+
+def _fetch_hours(start: datetime, end: datetime) -> dict[datetime, dict[CountKey, EventCount]]:
+    buckets: dict[datetime, dict[CountKey, EventCount]] = {}
+    query = f"""
+        SELECT source, eventtype, priority, eventtime
+        FROM alarm_events
+        WHERE eventtime >= '{_fmt(start)}' AND eventtime < '{_fmt(end)}'
+    """
+    for chunk in stream_rows(query, chunk_size=20000):
+        for hour, counts in aggregate_events(chunk).items():
+            target = buckets.setdefault(hour, {})
+            for key, counted in counts.items():
+                target.setdefault(key, EventCount()).add(counted.count, counted.first, counted.last)
+    return buckets
+
+
+def _write_statements(start: datetime, end: datetime, buckets: dict) -> list:
+    rows = [
+        {
+            "source": source,
+            "bucket_start": _fmt(hour),
+            "eventtype": eventtype,
+            "priority": priority,
+            "event_count": counted.count,
+            "first_event": _fmt(counted.first),
+            "last_event": _fmt(counted.last),
+        }
+        for hour, counts in buckets.items()
+        for (source, eventtype, priority), counted in counts.items()
+    ]
+    return [
+        (
+            f"DELETE FROM {ROLLUP_TABLE} WHERE bucket_start >= :lo AND bucket_start < :hi",
+            {"lo": _fmt(start), "hi": _fmt(end)},
+        ),
+        (
+            f"""
+            INSERT INTO {ROLLUP_TABLE}
+                (source, bucket_start, eventtype, priority, event_count, first_event, last_event)
+            VALUES (:source, :bucket_start, :eventtype, :priority, :event_count, :first_event, :last_event)
+            """,
+            rows,
+        ),
+    ]
+
+
+def _update_hot(start: datetime, end: datetime, buckets: dict) -> None:
+    if _state.hot_start is None:
+        return
+    hour = max(start, _state.hot_start)
+    while hour < end:
+        _state.hot.pop(hour, None)
+        hour += HOUR
+    for hour, counts in buckets.items():
+        if hour >= _state.hot_start:
+            _state.hot[hour] = counts
+
+
+def _load_hot(now: datetime) -> None:
+    hot_start = floor_hour(now - timedelta(days=settings.alarm_rollup_hot_days))
+    rows = fetch_rows(
+        f"""
+        SELECT source, bucket_start, eventtype, priority, event_count, first_event, last_event
+        FROM {ROLLUP_TABLE}
+        WHERE bucket_start >= '{_fmt(hot_start)}'
+        """
+    )
+    hot: dict[datetime, dict[CountKey, EventCount]] = {}
+    for source, bucket_start, eventtype, priority, count, first, last in rows:
+        hot.setdefault(to_datetime(bucket_start), {})[(source, int(eventtype), int(priority))] = EventCount(
+            int(count), to_datetime(first), to_datetime(last)
+        )
+    _state.hot, _state.hot_start = hot, hot_start
+
+
+def _evict_hot(now: datetime) -> None:
+    hot_start = floor_hour(now - timedelta(days=settings.alarm_rollup_hot_days))
+    for hour in [h for h in _state.hot if h < hot_start]:
+        del _state.hot[hour]
+    _state.hot_start = hot_start
+
+
+def refresh_alarm_rollup(now: Optional[datetime] = None) -> int:
+    """
+    늦게 기록된 이벤트가 있는 시간을 다시 계산하고, 완료된 시간 버킷까지 워터마크를 전진.
+
+    여러 워커가 같은 DB를 쓰므로 ROLLUP_LOCK을 잡은 워커만 DELETE/INSERT를 수행하고,
+    나머지는 워터마크를 다시 읽어 바뀐 경우 hot copy만 새로 고칩니다 (0 반환).
+
+    Returns:
+        다시 계산하거나 새로 기록한 시간 버킷 수
+    """
+    now = now or datetime.now()
+    ensure_alarm_rollup_tables()
+    with _lock, advisory_lock(ROLLUP_LOCK) as leader:
+        previous = (_state.time_watermark, _state.id_watermark)
+        _load_state()
+        if not leader:
+            # 다른 워커가 갱신 중 - 워터마크가 움직였으면 그 결과를 hot copy로 다시 읽음
+            if _state.hot_start is None or (_state.time_watermark, _state.id_watermark) != previous:
+                _load_hot(now)
+            return 0
+        if _state.hot_start is None:
+            _load_hot(now)
+        else:
+            _evict_hot(now)
+
+        target = floor_hour(now - timedelta(seconds=settings.alarm_rollup_settle_seconds))
+        max_id = int(fetch_rows("SELECT MAX(id) FROM alarm_events")[0][0] or 0)
+        time_watermark = _state.time_watermark
+        id_watermark = _state.id_watermark
+        hours = 0
+
+        if time_watermark is None:
+            time_watermark = floor_hour(now - timedelta(days=settings.alarm_rollup_backfill_days))
+        else:
+            # 이미 롤업된 시간에 뒤늦게 기록된 이벤트 (id 워터마크 이후, eventtime 워터마크 이전)
+            late = fetch_rows(
+                f"""
+                SELECT DISTINCT eventtime FROM alarm_events
+                WHERE id > {id_watermark} AND id <= {max_id} AND eventtime < '{_fmt(time_watermark)}'
+                """
+            )
+            for hour in sorted({floor_hour(to_datetime(t)) for (t,) in late if t is not None}):
+                buckets = _fetch_hours(hour, hour + HOUR)
+                execute_statements(_write_statements(hour, hour + HOUR, buckets))
+                _update_hot(hour, hour + HOUR, buckets)
+                hours += 1
+
+        step = timedelta(hours=max(1, settings.alarm_rollup_batch_hours))
+        while time_watermark < target:
+            chunk_end = min(target, time_watermark + step)
+            buckets = _fetch_hours(time_watermark, chunk_end)
+            execute_statements(
+                _write_statements(time_watermark, chunk_end, buckets)
+                + _watermark_statements(chunk_end, id_watermark)
+            )
+            _update_hot(time_watermark, chunk_end, buckets)
+            hours += int((chunk_end - time_watermark) / HOUR)
+            time_watermark = chunk_end
+            _state.time_watermark = chunk_end
+
+        execute_statements(_watermark_statements(time_watermark, max_id))
+        _state.time_watermark, _state.id_watermark = time_watermark, max_id
+    return hours
+
+
+# ── 조회 ──────────────────────────────────────────────────────────
+
+
+def _source_sql(sources: Optional[list[str]], like: Optional[str]) -> str:
+    if sources is not None:
+        return f"AND {in_clause(sources)}"
+    if like:
+        return f"AND {like_clause(like)}"
+    return ""
+
+
+def _merge(result: dict[str, SourceSummary], key: CountKey, counted: EventCount) -> None:
+    source, eventtype, priority = key
+    result.setdefault(source, SourceSummary(source)).add(eventtype, priority, counted)
+
+
+def _rollup_counts(lo: datetime, hi: datetime, sources: Optional[list[str]], like: Optional[str]):
+    """롤업 구간 [lo, hi) 건수 - hot copy가 덮으면 메모리, 아니면 롤업 테이블"""
+    if _state.hot_start is not None and lo >= _state.hot_start:
+        wanted = set(sources) if sources is not None else None
+        hour = lo
+        while hour < hi:
+            for key, counted in _state.hot.get(hour, {}).items():
+                if wanted is not None and key[0] not in wanted:
+                    continue
+                if like and not source_matches(key[0], like):
+                    continue
+                yield key, counted
+            hour += HOUR
+        return
+
+    rows = fetch_rows(
+        f"""
+        SELECT source, eventtype, priority, SUM(event_count), MIN(first_event), MAX(last_event)
+        FROM {ROLLUP_TABLE}
+        WHERE bucket_start >= '{_fmt(lo)}' AND bucket_start < '{_fmt(hi)}' {_source_sql(sources, like)}
+        GROUP BY source, eventtype, priority
+        """
+    )
+    for source, eventtype, priority, count, first, last in rows:
+        yield (source, int(eventtype), int(priority)), EventCount(int(count), to_datetime(first), to_datetime(last))
+
+
+def _raw_counts(start: datetime, end: datetime, sources: Optional[list[str]], like: Optional[str]):
+    rows = fetch_rows(
+        f"""
+        SELECT source, eventtype, priority, COUNT(*), MIN(eventtime), MAX(eventtime)
+        FROM alarm_events
+        WHERE eventtime >= '{_fmt(start)}' AND eventtime < '{_fmt(end)}' {_source_sql(sources, like)}
+        GROUP BY source, eventtype, priority
+        """
+    )
+    for source, eventtype, priority, count, first, last in rows:
+        yield (source, int(eventtype or 0), int(priority or 0)), EventCount(
+            int(count), to_datetime(first), to_datetime(last)
+        )
+
+
+def summarize_alarms(
+    start: datetime, end: datetime, tag_path: Optional[str] = None
+) -> dict[str, SourceSummary]:
+    """
+    [start, end) source별 알람 통계.
+
+    정시 경계 안쪽의 완료 구간은 롤업(hot copy 또는 테이블)에서, 나머지 자투리와
+    워터마크 이후 구간은 원본 alarm_events에서 집계해 합칩니다.
+    """
+    sources = resolve_sources(tag_path) if tag_path else None
+    like = tag_path if tag_path and sources is None else None
+    if sources == []:
+        return {}
+
+    result: dict[str, SourceSummary] = {}
+    raw_ranges = [(start, end)]
+    watermark = get_alarm_watermark()
+    if watermark is not None:
+        lo, hi = ceil_hour(start), min(floor_hour(end), watermark)
+        if hi > lo:
+            for key, counted in _rollup_counts(lo, hi, sources, like):
+                _merge(result, key, counted)
+            raw_ranges = [(start, lo), (hi, end)]
+
+    for range_start, range_end in raw_ranges:
+        if range_end > range_start:
+            for key, counted in _raw_counts(range_start, range_end, sources, like):
+                _merge(result, key, counted)
+    return result
+
+
+def hourly_counts(
+    start: datetime,
+    end: datetime,
+    tag_path: Optional[str] = None,
+    eventtype: int = 0,
+    by_source: bool = False,
+) -> list[tuple[datetime, str, int, int]]:
+    """
+    [start, end) 시간 버킷별 건수 (시간대/요일 분포용).
+
+    summarize_alarms와 같이 정시 경계 안쪽은 롤업에서, 자투리와 워터마크 이후는 원본에서 읽습니다.
+    원본 구간은 이벤트 시각이 속한 정시 버킷으로 모읍니다.
+
+    Returns:
+        (버킷 시작, source 또는 by_source=False면 "", priority, 건수) 목록
+    """
+    sources = resolve_sources(tag_path) if tag_path else None
+    like = tag_path if tag_path and sources is None else None
+    if sources == []:
+        return []
+
+    counts: dict[tuple[datetime, str, int], int] = {}
+
+    def add(hour: datetime, source: str, priority: int, count: int) -> None:
+        key = (hour, source if by_source else "", priority)
+        counts[key] = counts.get(key, 0) + count
+
+    raw_ranges = [(start, end)]
+    watermark = get_alarm_watermark()
+    if watermark is not None:
+        lo, hi = ceil_hour(start), min(floor_hour(end), watermark)
+        if hi > lo:
+            raw_ranges = [(start, lo), (hi, end)]
+            if _state.hot_start is not None and lo >= _state.hot_start:
+                wanted = set(sources) if sources is not None else None
+                hour = lo
+                while hour < hi:
+                    for (source, etype, priority), counted in _state.hot.get(hour, {}).items():
+                        if etype != eventtype or (wanted is not None and source not in wanted):
+                            continue
+                        if like and not source_matches(source, like):
+                            continue
+                        add(hour, source, priority, counted.count)
+                    hour += HOUR
+            else:
+                source_col = "source" if by_source else "''"
+                group_cols = "bucket_start, source, priority" if by_source else "bucket_start, priority"
+                rows = fetch_rows(
+                    f"""
+                    SELECT bucket_start, {source_col}, priority, SUM(event_count)
+                    FROM {ROLLUP_TABLE}
+                    WHERE eventtype = {int(eventtype)}
+                      AND bucket_start >= '{_fmt(lo)}' AND bucket_start < '{_fmt(hi)}' {_source_sql(sources, like)}
+                    GROUP BY {group_cols}
+                    """
+                )
+                for bucket_start, source, priority, count in rows:
+                    add(to_datetime(bucket_start), source or "", int(priority or 0), int(count))
+
+    for range_start, range_end in raw_ranges:
+        if range_end <= range_start:
+            continue
+        query = f"""
+            SELECT source, eventtype, priority, eventtime
+            FROM alarm_events
+            WHERE eventtype = {int(eventtype)}
+              AND eventtime >= '{_fmt(range_start)}' AND eventtime < '{_fmt(range_end)}' {_source_sql(sources, like)}
+        """
+        for chunk in stream_rows(query, chunk_size=20000):
+            for hour, bucket in aggregate_events(chunk).items():
+                for (source, _, priority), counted in bucket.items():
+                    add(hour, source, priority, counted.count)
+
+    return [(hour, source, priority, count) for (hour, source, priority), count in counts.items()]
+
+
+def rollup_status() -> dict:
+    return {
+        "enabled": settings.alarm_rollup_enabled,
+        "time_watermark": _state.time_watermark.isoformat() if _state.time_watermark else None,
+        "id_watermark": _state.id_watermark,
+        "hot_start": _state.hot_start.isoformat() if _state.hot_start else None,
+        "hot_hours": len(_state.hot),
+    }
+
+
+# ── 백그라운드 유지 작업 ──────────────────────────────────────────
+
+
+async def _maintainer_loop() -> None:
+    while True:
+        try:
+            started = time.perf_counter()
+            hours = await asyncio.to_thread(refresh_alarm_rollup)
+            if hours:
+                print(f"[AlarmRollup] {hours}개 시간 버킷 갱신 ({time.perf_counter() - started:.1f}s)")
+        except Exception as e:
+            print(f"[AlarmRollup] 롤업 갱신 실패: {e}")
+        await asyncio.sleep(settings.alarm_rollup_interval_seconds)
+
+
+def start_alarm_rollup_maintainer() -> None:
+    """서버 시작 시 알람 롤업 유지 작업을 백그라운드 태스크로 실행"""
+    global _maintainer_task
+    if not settings.alarm_rollup_enabled or _maintainer_task is not None:
+        return
+    _maintainer_task = asyncio.create_task(_maintainer_loop())
+    print(f"[AlarmRollup] 유지 작업 시작 (주기 {settings.alarm_rollup_interval_seconds}s)")
+
+
+async def stop_alarm_rollup_maintainer() -> None:
+    global _maintainer_task
+    if _maintainer_task is None:
+        return
+    _maintainer_task.cancel()
+    try:
+        await _maintainer_task
+    except asyncio.CancelledError:
+        pass
+    _maintainer_task = None
@@ -0,0 +1,336 @@
+"""
+시간가중 분석 엔진 - 변경 시 기록(on-change) 히스토리 데이터용.
+
+Ignition은 값이 바뀔 때만 샘플을 기록하므로 단순 AVG(floatvalue)는 변화가 잦은 구간에
+치우칩니다. 각 샘플 값이 다음 샘플(또는 구간 끝)까지 유지된다고 보고 시간가중 통계를
+계산합니다. 샘플 수가 많은 요청은 프로세스 풀에서 실행해 이벤트 루프/스레드를 막지 않습니다.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+
+# 지원 지표
+ANALYTICS_METRICS = ("twa", "integral", "std", "percentiles", "rate", "state")
+
+# 적분(totalizer) 시간 단위 → 초. 예: 유량(m3/h) 적분은 "hour"
+INTEGRAL_UNITS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# 이 개수 이하의 고유값만 가지면 이산 상태 태그로 보고 상태별 체류 시간을 계산
+MAX_DISCRETE_STATES = 16
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+# ── 계산 ──────────────────────────────────────────────────────────
+
+
+def hold_segments(
+    ts: Iterable[int],
+    values: Iterable[float],
+    start_ms: int,
+    end_ms: int,
+    prior: Optional[float] = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    샘플을 값 유지 세그먼트 (시작 ms, 유지 시간 ms, 값)로 변환.
+
+    구간 밖/NaN 샘플은 제외합니다. prior(구간 직전 값)가 있으면 구간 시작부터
+    첫 샘플까지를 그 값으로 채우고, 없으면 첫 샘플부터 계산합니다.
+    유지 시간이 0인 세그먼트가 포함될 수 있습니다.
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    mask = ~np.isnan(values) & (ts >= start_ms) & (ts < end_ms)
+    ts, values = ts[mask], values[mask]
+    order = np.argsort(ts, kind="stable")
+    ts, values = ts[order], values[order]
+
+    # 첫 샘플이 구간 시작과 같아도 prior를 길이 0 세그먼트로 남겨 전환 횟수에 반영
+    if prior is not None and not np.isnan(prior):
+        ts = np.r_[np.int64(start_ms), ts]
+        values = np.r_[np.float64(prior), values]
+
+    durations = np.r_[ts[1:], np.int64(end_ms)] - ts
+    return ts, durations, values
+
+
+def weighted_percentiles(
+    values: np.ndarray, weights: np.ndarray, qs: Iterable[float]
+) -> dict[float, float]:
+    """시간가중 백분위수: 값이 유지된 시간 비율 기준 (q는 0~100)"""
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+    cumulative = np.cumsum(weights[order])
+    total = cumulative[-1]
+    result = {}
+    for q in qs:
+        idx = int(np.searchsorted(cumulative, total * q / 100.0, side="left"))
+        result[q] = float(sorted_values[min(idx, len(sorted_values) - 1)])
+    return result
+
+
+def _rate_stats(ts: np.ndarray, values: np.ndarray) -> Optional[dict]:
+    if len(ts) < 2:
+        return None
+    dt = np.diff(ts) / 1000.0
+    dv = np.diff(values)
+    valid = dt > 0
+    if not valid.any():
+        return None
+    rates = dv[valid] / dt[valid]
+    span = (ts[-1] - ts[0]) / 1000.0
+    return {
+        "max_rise_per_s": float(rates.max()),
+        "max_fall_per_s": float(rates.min()),
+        "mean_abs_per_s": float(np.abs(rates).mean()),
+        "net_per_s": float((values[-1] - values[0]) / span) if span > 0 else 0.0,
+    }
+
+
+def _state_stats(durations: np.ndarray, values: np.ndarray) -> Optional[dict]:
+    states = np.unique(values)
+    if len(states) > MAX_DISCRETE_STATES:
+        return None
+    changes = np.flatnonzero(values[1:] != values[:-1]) + 1
+    per_state = {
+        float(s): float(durations[values == s].sum() / 1000.0) for s in states
+    }
+    result = {
+        "durations_s": per_state,
+        "transitions": int(len(changes)),
+    }
+    if set(states.tolist()) <= {0.0, 1.0}:
+        total = durations.sum() / 1000.0
+        on = per_state.get(1.0, 0.0)
+        result.update({
+            "on_s": on,
+            "off_s": per_state.get(0.0, 0.0),
+            "on_fraction": on / total if total else 0.0,
+            "rising": int(np.count_nonzero(values[changes] == 1.0)),
+            "falling": int(np.count_nonzero(values[changes] == 0.0)),
+        })
+    return result
+
+
+def analyze(
+    ts: Iterable[int],
+    values: Iterable[float],
+    start_ms: int,
+    end_ms: int,
+    prior: Optional[float] = None,
+    metrics: Iterable[str] = ANALYTICS_METRICS,
+    percentiles: Iterable[float] = (5, 50, 95),
+    integral_unit: str = "hour",
+) -> dict:
+    """
+    [start, end) 구간의 시간가중 통계 계산.
+
+    Args:
+        ts, values: 원본 샘플 (t_stamp ms, 값)
+        start_ms, end_ms: 분석 구간
+        prior: 구간 직전 마지막 값 (없으면 첫 샘플부터 계산)
+        metrics: ANALYTICS_METRICS 중 계산할 지표
+        percentiles: 시간가중 백분위수 (0~100)
+        integral_unit: 적분 시간 단위 (second, minute, hour, day)
+
+    Returns:
+        지표별 결과 dict. 데이터가 없으면 samples=0, covered_s=0만 포함.
+    """
+    metrics = set(metrics)
+    unknown = metrics - set(ANALYTICS_METRICS)
+    if unknown:
+        raise ValueError(f"지원하지 않는 지표: {', '.join(sorted(unknown))}. 사용 가능: {', '.join(ANALYTICS_METRICS)}")
+    if integral_unit not in INTEGRAL_UNITS:
+        raise ValueError(f"지원하지 않는 integral_unit: {integral_unit}. 사용 가능: {', '.join(INTEGRAL_UNITS)}")
+    if end_ms <= start_ms:
+        raise ValueError("종료 시간은 시작 시간보다 늦어야 합니다.")
+
+    ts = np.asarray(ts, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    in_window = ~np.isnan(values) & (ts >= start_ms) & (ts < end_ms)
+    samples = np.count_nonzero(in_window)
+    seg_ts, durations, seg_values = hold_segments(ts, values, start_ms, end_ms, prior)
+    weights = durations.astype(np.float64)
+    total = float(weights.sum())
+    result: dict = {
+        "start_ms": start_ms,
+        "end_ms": end_ms,
+        "samples": int(samples),
+        "covered_s": total / 1000.0,
+    }
+    if total <= 0:
+        return result
+
+    area = float((seg_values * weights).sum())
+    twa = area / total
+    held = seg_values[weights > 0]
+    if "twa" in metrics:
+        result["twa"] = twa
+        result["min"] = float(held.min())
+        result["max"] = float(held.max())
+    if "integral" in metrics:
+        result["integral"] = area / 1000.0 / INTEGRAL_UNITS[integral_unit]
+        result["integral_unit"] = integral_unit
+    if "std" in metrics:
+        result["std"] = float(np.sqrt((weights * (seg_values - twa) ** 2).sum() / total))
+    if "percentiles" in metrics:
+        result["percentiles"] = weighted_percentiles(held, weights[weights > 0], percentiles)
+    if "rate" in metrics:
+        order = np.argsort(ts[in_window], kind="stable")
+        result["rate"] = _rate_stats(ts[in_window][order], values[in_window][order])
+    if "state" in metrics:
+        result["state"] = _state_stats(durations, seg_values)
+    return result
+
+
+# ── 다중 태그 정렬 / 상관 ───────────────────────────────────────
+
+
+RESAMPLE_METHODS = ("ffill", "linear")
+
+
+def make_grid(start_ms: int, end_ms: int, step_ms: int) -> np.ndarray:
+    """[start, end) 구간의 공통 시간 격자"""
+    if step_ms <= 0:
+        raise ValueError("격자 간격은 0보다 커야 합니다.")
+    return np.arange(start_ms, end_ms, step_ms, dtype=np.int64)
+
+
+def resample(
+    ts: np.ndarray,
+    values: np.ndarray,
+    grid: np.ndarray,
+    method: str = "ffill",
+    prior: Optional[float] = None,
+) -> np.ndarray:
+    """
+    샘플을 격자 시각의 값으로 변환.
+
+    ffill: 격자 시각 이전 마지막 값 (Ignition 변경 시 기록 의미와 일치)
+    linear: 인접 샘플 사이 선형 보간, 마지막 샘플 이후는 값 유지
+    첫 샘플 이전 격자는 prior(없으면 NaN)로 채웁니다.
+    """
+    if method not in RESAMPLE_METHODS:
+        raise ValueError(f"지원하지 않는 보간 방법: {method}. 사용 가능: {', '.join(RESAMPLE_METHODS)}")
+    ts = np.asarray(ts, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    mask = ~np.isnan(values)
+    ts, values = ts[mask], values[mask]
+    fill = np.nan if prior is None else float(prior)
+    if len(ts) == 0:
+        return np.full(len(grid), fill)
+
+    idx = np.searchsorted(ts, grid, side="right") - 1
+    out = np.where(idx >= 0, values[np.clip(idx, 0, None)], fill)
+    if method == "linear":
+        inside = (grid >= ts[0]) & (grid <= ts[-1])
+        out[inside] = np.interp(grid[inside], ts, values)
+    return out
+
+
+def correlation_matrix(aligned: dict[str, np.ndarray]) -> dict[tuple[str, str], Optional[float]]:
+    """
+    격자 정렬된 시계열 쌍별 피어슨 상관계수 (두 값이 모두 있는 시점만 사용).
+    한쪽이 상수이거나 겹치는 시점이 3개 미만이면 None.
+    """
+    labels = list(aligned)
+    result: dict[tuple[str, str], Optional[float]] = {}
+    for i, a in enumerate(labels):
+        for b in labels[i + 1:]:
+            x, y = aligned[a], aligned[b]
+            both = ~np.isnan(x) & ~np.isnan(y)
+            if both.sum() < 3:
+                result[(a, b)] = None
+                continue
+            x, y = x[both], y[both]
+            if x.std() == 0 or y.std() == 0:
+                result[(a, b)] = None
+                continue
+            result[(a, b)] = float(np.corrcoef(x, y)[0, 1])
+    return result
+
+
+# ── 실행 (프로세스 풀) ────────────────────────────────────────────
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.analytics_pool_workers)
+    return _pool
+
+
+def run_analysis(ts, values, start_ms: int, end_ms: int, **kwargs) -> dict:
+    """
+    analyze() 실행. 샘플 수가 analytics_pool_min_samples 이상이면 프로세스 풀 사용.
+    풀이 깨졌거나 비활성(workers=0)이면 현재 프로세스에서 계산합니다.
+    """
+    global _pool
+    ts = np.asarray(ts, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if settings.analytics_pool_workers > 0 and len(ts) >= settings.analytics_pool_min_samples:
+        try:
+            future = _get_pool().submit(analyze, ts, values, start_ms, end_ms, **kwargs)
+            return future.result()
+        except BrokenProcessPool as e:
+            print(f"[Analytics] 프로세스 풀 오류, 인라인 계산으로 전환: {e}")
+            _pool = None
+    return analyze(ts, values, start_ms, end_ms, **kwargs)
+
+
+def shutdown_analytics_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# ── 출력 ──────────────────────────────────────────────────────────
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.6g}"
+
+
+def format_analysis(result: dict) -> str:
+    """분석 결과를 LLM 컨텍스트용 key=value 텍스트로 변환"""
+    lines = [f"samples={result['samples']}, covered_s={_fmt(result['covered_s'])}"]
+    if "twa" in result:
+        lines.append(
+            f"twa={_fmt(result['twa'])}, min={_fmt(result['min'])}, max={_fmt(result['max'])}"
+        )
+    if "integral" in result:
+        lines.append(f"integral={_fmt(result['integral'])} (value x {result['integral_unit']})")
+    if "std" in result:
+        lines.append(f"std={_fmt(result['std'])}")
+    if "percentiles" in result:
+        lines.append(", ".join(
+            f"p{q:g}={_fmt(v)}" for q, v in result["percentiles"].items()
+        ))
+    if result.get("rate"):
+        rate = result["rate"]
+        lines.append(
+            f"rate_per_s: max_rise={_fmt(rate['max_rise_per_s'])}, "
+            f"max_fall={_fmt(rate['max_fall_per_s'])}, "
+            f"mean_abs={_fmt(rate['mean_abs_per_s'])}, net={_fmt(rate['net_per_s'])}"
+        )
+    if result.get("state"):
+        state = result["state"]
+        if "on_s" in state:
+            lines.append(
+                f"state: on_s={_fmt(state['on_s'])}, off_s={_fmt(state['off_s'])}, "
+                f"on_fraction={state['on_fraction']:.4f}, "
+                f"rising={state['rising']}, falling={state['falling']}"
+            )
+        else:
+            durations = ", ".join(f"{s:g}:{_fmt(d)}s" for s, d in state["durations_s"].items())
+            lines.append(f"state_durations: {durations}, transitions={state['transitions']}")
+    return "\n".join(lines)
@@ -0,0 +1,184 @@
+"""
+In-process pub/sub bus for approval events.
+
+store_pending_action / update_pending_action publish "created" / "updated" events here,
+and /pending/stream forwards them to operator consoles over SSE, so new write requests
+reach the HMI as soon as they are stored instead of on the next poll.
+
+- Every event gets a monotonically increasing sequence number. The SSE event id is
+  "<epoch>-<seq>", where the epoch is random per bus (process start): sequence numbers
+  restart at 1 after a restart, so a cursor from another epoch always gets a "reset".
+- The last approval_event_buffer events are kept in a ring buffer; a reconnecting client
+  sends its last sequence number and receives what it missed. If the cursor is older than
+  the buffer, the client gets a "reset" event and should reload GET /pending.
+- Publishing may happen on any thread (graph tool nodes run in worker threads); events are
+  handed to each subscriber's event loop with loop.call_soon_threadsafe.
+- The bus is per process. With several uvicorn workers a console only sees events from
+  the worker it is connected to, plus whatever GET /pending returns on reset.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import secrets
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Iterable, Optional
+
+from app.core.config import settings
+from app.graph.state import PendingAction
+
+
+@dataclass
+class ApprovalEvent:
+    seq: int
+    type: str          # created, updated, snapshot, reset
+    data: dict
+    risk_level: Optional[str] = None
+
+
+def action_to_dict(action: PendingAction) -> dict:
+    data = asdict(action)
+    for name in ("requested_at", "approved_at"):
+        if data[name] is not None:
+            data[name] = data[name].isoformat()
+    return data
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, risk_levels: Optional[frozenset[str]]):
+        self.loop = loop
+        self.risk_levels = risk_levels
+        self.queue: asyncio.Queue[ApprovalEvent] = asyncio.Queue(maxsize=settings.approval_stream_queue_size)
+        self.overflowed = False
+
+    def wants(self, event: ApprovalEvent) -> bool:
+        return self.risk_levels is None or event.risk_level in self.risk_levels
+
+    def offer(self, event: ApprovalEvent) -> None:
+        """Runs on the subscriber's loop."""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # slow consumer: stop queueing; the stream sends a reset and closes
+            self.overflowed = True
+
+
+class ApprovalEventBus:
+    def __init__(self, buffer_size: int = 1000):
+        self._buffer: deque[ApprovalEvent] = deque(maxlen=buffer_size)
+        self._subscribers: set[_Subscriber] = set()
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.epoch = secrets.token_hex(4)
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def event_id(self, seq: int) -> str:
+        """SSE id for a sequence number of this bus."""
+        return f"{self.epoch}-{seq}"
+
+    def parse_event_id(self, event_id: str) -> int:
+        """
+        Sequence number for a client cursor ("<epoch>-<seq>").
+
+        Returns -1 (always reset) for a cursor from another epoch or a bare number.
+        Raises ValueError if the cursor is malformed.
+        """
+        epoch, sep, seq = event_id.strip().rpartition("-")
+        if not sep:
+            int(seq)
+            return -1
+        seq = int(seq)
+        if seq < 0:
+            raise ValueError(f"negative sequence in {event_id!r}")
+        return seq if epoch == self.epoch else -1
+
+    def publish(self, event_type: str, action: PendingAction) -> ApprovalEvent:
+        """Record an event and fan it out. Safe to call from any thread."""
+        with self._lock:
+            self._seq += 1
+            event = ApprovalEvent(self._seq, event_type, action_to_dict(action), action.risk_level)
+            self._buffer.append(event)
+            subscribers = [s for s in self._subscribers if s.wants(event)]
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, event)
+            except RuntimeError:
+                # loop already closed (client gone during shutdown)
+                self._discard(subscriber)
+        return event
+
+    def _discard(self, subscriber: _Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _replay(self, after: int, subscriber: _Subscriber) -> Optional[list[ApprovalEvent]]:
+        """Buffered events after `after`, or None if the cursor fell out of the buffer."""
+        with self._lock:
+            if after < 0 or after > self._seq:
+                return None  # cursor from another epoch (before a restart)
+            if after < self._seq and (not self._buffer or self._buffer[0].seq > after + 1):
+                return None
+            return [e for e in self._buffer if e.seq > after and subscriber.wants(e)]
+
+    async def subscribe(
+        self,
+        after: Optional[int] = None,
+        risk_levels: Optional[Iterable[str]] = None,
+        heartbeat: Optional[float] = None,
+    ) -> AsyncIterator[Optional[ApprovalEvent]]:
+        """
+        Yield events with seq > after (replayed from the buffer first), then live events.
+
+        after=None starts from the current position (no replay); a negative `after`
+        (see parse_event_id) starts with a reset. Yields None every
+        `heartbeat` seconds without events so the transport can send keep-alives.
+        """
+        levels = frozenset(r.lower() for r in risk_levels) if risk_levels else None
+        subscriber = _Subscriber(asyncio.get_running_loop(), levels)
+        # register before replaying so nothing published in between is lost
+        with self._lock:
+            self._subscribers.add(subscriber)
+            start = self._seq if after is None else after
+        try:
+            replay = self._replay(start, subscriber)
+            last = start
+            if replay is None:
+                last = self._seq
+                yield ApprovalEvent(last, "reset", {"reason": "cursor expired", "last_seq": last})
+                replay = []
+            for event in replay:
+                last = event.seq
+                yield event
+            while True:
+                if subscriber.overflowed and subscriber.queue.empty():
+                    yield ApprovalEvent(self._seq, "reset", {"reason": "consumer too slow", "last_seq": self._seq})
+                    return
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event.seq <= last:
+                    continue  # already sent during replay
+                last = event.seq
+                yield event
+        finally:
+            self._discard(subscriber)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+_bus = ApprovalEventBus(settings.approval_event_buffer)
+
+
+def get_approval_event_bus() -> ApprovalEventBus:
+    return _bus
@@ -1,39 +1,508 @@
 """
-In-memory storage for pending actions.
+Durable storage for pending actions.
 
-For production, this should be replaced with a database (Redis, PostgreSQL, etc.)
-to persist across server restarts and support distributed deployments.
+Backends (settings.approval_store_backend):
+- "sqlite" (default): WAL-mode SQLite file shared by every uvicorn worker on the host.
+  Indexed on (status, requested_at) and tag_path, so listing pending actions reads
+  only pending rows instead of the full approval history.
+- "redis": optional, for multi-host deployments (requires the `redis` package).
+  Pending and finished actions live in sorted sets scored by requested_at.
+- "memory": process-local dict (tests / single-process development).
+
+Pending actions older than approval_pending_ttl_seconds are treated as "expired"
+and cannot be approved. A decision first claims the action (pending -> "executing" or
+"rejected") in one atomic step, so concurrent /approve calls, bulk approvals and resumed
+runs cannot write the same action twice. An action left "executing" by a crash is kept
+(never swept) so an operator can check the tag. A background sweeper marks them expired and deletes
+finished actions (executed / rejected / failed / expired / superseded) past the retention window,
+a bounded batch per run.
 """
 
-from typing import Dict, Optional
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
 from app.graph.state import PendingAction
+from app.services.approval_events import get_approval_event_bus
+
+try:
+    import redis
+except ImportError:  # optional backend
+    redis = None
+
+
+FINISHED_STATUSES = ("approved", "executed", "rejected", "failed", "expired", "superseded")
+
+
+# -------------------------
+# Serialization
+# -------------------------
+def _dump(action: PendingAction) -> str:
+    data = asdict(action)
+    for name in ("requested_at", "approved_at"):
+        if data[name] is not None:
+            data[name] = data[name].isoformat()
+    return json.dumps(data, default=str)
+
+
+def _load(payload: str | bytes, status: Optional[str] = None) -> PendingAction:
+    data = json.loads(payload)
+    for name in ("requested_at", "approved_at"):
+        if data.get(name):
+            data[name] = datetime.fromisoformat(data[name])
+    action = PendingAction(**data)
+    if status is not None:
+        action.status = status
+    return action
+
+
+def _ttl_cutoff(now: Optional[float] = None) -> float:
+    """requested_at (epoch) before which a pending action is expired"""
+    return (now or time.time()) - settings.approval_pending_ttl_seconds
+
+
+def _with_expiry(action: Optional[PendingAction]) -> Optional[PendingAction]:
+    """Report a pending action past its TTL as expired even before the sweeper runs."""
+    if action is not None and action.status == "pending" and action.requested_at.timestamp() < _ttl_cutoff():
+        return replace(action, status="expired")
+    return action
+
+
+# -------------------------
+# Backends
+# -------------------------
+class MemoryApprovalStore:
+    """Process-local store (no persistence)."""
+
+    def __init__(self):
+        self._actions: dict[str, PendingAction] = {}
+        self._lock = threading.Lock()
+
+    def put(self, action: PendingAction) -> None:
+        with self._lock:
+            self._actions[action.id] = action
+
+    def get(self, action_id: str) -> Optional[PendingAction]:
+        return self._actions.get(action_id)
+
+    def claim(self, action_id: str, status: str) -> Optional[PendingAction]:
+        with self._lock:
+            action = self._actions.get(action_id)
+            if action is None or action.status != "pending" or action.requested_at.timestamp() < _ttl_cutoff():
+                return None
+            claimed = self._actions[action_id] = replace(action, status=status)
+            return replace(claimed)
+
+    def delete(self, action_id: str) -> None:
+        with self._lock:
+            self._actions.pop(action_id, None)
+
+    def list_pending(self) -> list[PendingAction]:
+        cutoff = _ttl_cutoff()
+        pending = [
+            a for a in self._actions.values()
+            if a.status == "pending" and a.requested_at.timestamp() >= cutoff
+        ]
+        return sorted(pending, key=lambda a: a.requested_at)
+
+    def list_actions(
+        self, tag_path: Optional[str] = None, status: Optional[str] = None, limit: int = 100
+    ) -> list[PendingAction]:
+        actions = [
+            a for a in self._actions.values()
+            if (tag_path is None or a.tag_path == tag_path) and (status is None or a.status == status)
+        ]
+        return sorted(actions, key=lambda a: a.requested_at, reverse=True)[:limit]
+
+    def sweep(self, now: Optional[float] = None) -> dict:
+        now = now or time.time()
+        cutoff = _ttl_cutoff(now)
+        retention_cutoff = now - settings.approval_retention_days * 86400
+        expired = deleted = 0
+        with self._lock:
+            for action_id, action in list(self._actions.items()):
+                requested = action.requested_at.timestamp()
+                if action.status == "pending" and requested < cutoff:
+                    self._actions[action_id] = replace(action, status="expired")
+                    expired += 1
+                elif action.status in FINISHED_STATUSES and requested < retention_cutoff:
+                    if deleted < settings.approval_sweep_batch:
+                        del self._actions[action_id]
+                        deleted += 1
+        return {"expired": expired, "deleted": deleted}
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteApprovalStore:
+    """WAL-mode SQLite store. Safe to share between worker processes on one host."""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS approval_actions ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " requested_at REAL NOT NULL,"
+            " tag_path TEXT NOT NULL,"
+            " risk_level TEXT,"
+            " payload TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_approval_status_requested"
+            " ON approval_actions (status, requested_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_approval_requested ON approval_actions (requested_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_approval_tag ON approval_actions (tag_path, requested_at)"
+        )
+        self._conn.commit()
+
+    def put(self, action: PendingAction) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO approval_actions"
+                " (id, status, requested_at, tag_path, risk_level, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    action.id,
+                    action.status,
+                    action.requested_at.timestamp(),
+                    action.tag_path,
+                    action.risk_level,
+                    _dump(action),
+                ),
+            )
+            self._conn.commit()
+
+    def get(self, action_id: str) -> Optional[PendingAction]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, status FROM approval_actions WHERE id = ?", (action_id,)
+            ).fetchone()
+        return _load(row[0], row[1]) if row else None
+
+    def claim(self, action_id: str, status: str) -> Optional[PendingAction]:
+        # the status column is authoritative (_load overrides the payload), and a single
+        # conditional UPDATE is atomic across every process sharing the file
+        with self._lock:
+            claimed = self._conn.execute(
+                "UPDATE approval_actions SET status = ?"
+                " WHERE id = ? AND status = 'pending' AND requested_at >= ?",
+                (status, action_id, _ttl_cutoff()),
+            ).rowcount
+            self._conn.commit()
+            if not claimed:
+                return None
+            row = self._conn.execute(
+                "SELECT payload, status FROM approval_actions WHERE id = ?", (action_id,)
+            ).fetchone()
+        return _load(row[0], row[1]) if row else None
+
+    def delete(self, action_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM approval_actions WHERE id = ?", (action_id,))
+            self._conn.commit()
+
+    def list_pending(self) -> list[PendingAction]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload, status FROM approval_actions"
+                " WHERE status = 'pending' AND requested_at >= ? ORDER BY requested_at",
+                (_ttl_cutoff(),),
+            ).fetchall()
+        return [_load(payload, status) for payload, status in rows]
+
+    def list_actions(
+        self, tag_path: Optional[str] = None, status: Optional[str] = None, limit: int = 100
+    ) -> list[PendingAction]:
+        conditions, params = [], []
+        if tag_path is not None:
+            conditions.append("tag_path = ?")
+            params.append(tag_path)
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT payload, status FROM approval_actions {where}"
+                " ORDER BY requested_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [_load(payload, status) for payload, status in rows]
 
-# In-memory storage: action_id -> PendingAction
-_pending_actions: Dict[str, PendingAction] = {}
+    def sweep(self, now: Optional[float] = None) -> dict:
+        now = now or time.time()
+        retention_cutoff = now - settings.approval_retention_days * 86400
+        placeholders = ", ".join("?" for _ in FINISHED_STATUSES)
+        with self._lock:
+            expired = self._conn.execute(
+                "UPDATE approval_actions SET status = 'expired'"
+                " WHERE status = 'pending' AND requested_at < ?",
+                (_ttl_cutoff(now),),
+            ).rowcount
+            deleted = self._conn.execute(
+                "DELETE FROM approval_actions WHERE id IN ("
+                f" SELECT id FROM approval_actions WHERE status IN ({placeholders})"
+                " AND requested_at < ? ORDER BY requested_at LIMIT ?)",
+                (*FINISHED_STATUSES, retention_cutoff, settings.approval_sweep_batch),
+            ).rowcount
+            self._conn.commit()
+        return {"expired": expired, "deleted": deleted}
 
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
 
+
+class RedisApprovalStore:
+    """
+    Redis store for multi-host deployments.
+
+    approval:{id} -> JSON payload, approvals:{status} -> sorted set of ids by requested_at,
+    approvals:tag:{tag_path} -> sorted set of ids by requested_at.
+    """
+
+    def __init__(self, url: str):
+        if redis is None:
+            raise RuntimeError("approval_store_backend=redis requires the 'redis' package")
+        self._redis = redis.Redis.from_url(url)
+        self._redis.ping()
+
+    @staticmethod
+    def _key(action_id: str) -> str:
+        return f"approval:{action_id}"
+
+    def put(self, action: PendingAction) -> None:
+        previous = self.get(action.id)
+        score = action.requested_at.timestamp()
+        pipe = self._redis.pipeline()
+        if previous is not None and previous.status != action.status:
+            pipe.zrem(f"approvals:{previous.status}", action.id)
+        pipe.set(self._key(action.id), _dump(action))
+        pipe.zadd(f"approvals:{action.status}", {action.id: score})
+        pipe.zadd(f"approvals:tag:{action.tag_path}", {action.id: score})
+        pipe.expire(f"approvals:tag:{action.tag_path}", settings.approval_retention_days * 86400)
+        if action.status in FINISHED_STATUSES:
+            pipe.expire(self._key(action.id), settings.approval_retention_days * 86400)
+        pipe.execute()
+
+    def get(self, action_id: str) -> Optional[PendingAction]:
+        payload = self._redis.get(self._key(action_id))
+        return _load(payload) if payload else None
+
+    def claim(self, action_id: str, status: str) -> Optional[PendingAction]:
+        key = self._key(action_id)
+        with self._redis.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                payload = pipe.get(key)
+                if not payload:
+                    return None
+                action = _load(payload)
+                if action.status != "pending" or action.requested_at.timestamp() < _ttl_cutoff():
+                    return None
+                claimed = replace(action, status=status)
+                pipe.multi()
+                pipe.zrem("approvals:pending", action_id)
+                pipe.set(key, _dump(claimed))
+                pipe.zadd(f"approvals:{status}", {action_id: action.requested_at.timestamp()})
+                pipe.execute()
+            except redis.WatchError:
+                # another worker changed the action between GET and EXEC
+                return None
+        return claimed
+
+    def delete(self, action_id: str) -> None:
+        action = self.get(action_id)
+        if action is None:
+            return
+        pipe = self._redis.pipeline()
+        pipe.delete(self._key(action_id))
+        pipe.zrem(f"approvals:{action.status}", action_id)
+        pipe.zrem(f"approvals:tag:{action.tag_path}", action_id)
+        pipe.execute()
+
+    def _load_ids(self, ids: list) -> list[PendingAction]:
+        if not ids:
+            return []
+        payloads = self._redis.mget([self._key(i.decode() if isinstance(i, bytes) else i) for i in ids])
+        return [_load(p) for p in payloads if p]
+
+    def list_pending(self) -> list[PendingAction]:
+        ids = self._redis.zrangebyscore("approvals:pending", _ttl_cutoff(), "+inf")
+        return [a for a in self._load_ids(ids) if a.status == "pending"]
+
+    def list_actions(
+        self, tag_path: Optional[str] = None, status: Optional[str] = None, limit: int = 100
+    ) -> list[PendingAction]:
+        if tag_path is not None:
+            # newest ids from the tag index; status is filtered from the payload
+            ids = self._redis.zrevrange(f"approvals:tag:{tag_path}", 0, limit * 4 if status else limit - 1)
+            actions = [a for a in self._load_ids(ids) if status is None or a.status == status]
+            return actions[:limit]
+        statuses = [status] if status else ["pending", "executing", *FINISHED_STATUSES]
+        actions = []
+        for name in statuses:
+            actions.extend(self._load_ids(self._redis.zrevrange(f"approvals:{name}", 0, limit - 1)))
+        return sorted(actions, key=lambda a: a.requested_at, reverse=True)[:limit]
+
+    def sweep(self, now: Optional[float] = None) -> dict:
+        now = now or time.time()
+        stale = self._redis.zrangebyscore(
+            "approvals:pending", "-inf", f"({_ttl_cutoff(now)}", start=0, num=settings.approval_sweep_batch
+        )
+        expired = 0
+        for action in self._load_ids(stale):
+            self.put(replace(action, status="expired"))
+            expired += 1
+        # payload keys disappear via EXPIRE; only the status indexes need trimming
+        retention_cutoff = now - settings.approval_retention_days * 86400
+        deleted = 0
+        for name in FINISHED_STATUSES:
+            deleted += self._redis.zremrangebyscore(f"approvals:{name}", "-inf", f"({retention_cutoff}")
+        return {"expired": expired, "deleted": deleted}
+
+    def close(self) -> None:
+        self._redis.close()
+
+
+# -------------------------
+# Store selection
+# -------------------------
+_store = None
+_store_lock = threading.Lock()
+_sweeper_task: Optional[asyncio.Task] = None
+
+
+def _open_store():
+    backend = settings.approval_store_backend.lower()
+    if backend == "memory":
+        return MemoryApprovalStore()
+    if backend == "redis":
+        try:
+            store = RedisApprovalStore(settings.approval_redis_url)
+            print(f"[Approval] Redis approval store: {settings.approval_redis_url}")
+            return store
+        except Exception as e:
+            print(f"[Approval] Redis store unavailable, falling back to SQLite: {e}")
+    store = SqliteApprovalStore(settings.approval_store_path)
+    print(f"[Approval] SQLite approval store: {settings.approval_store_path}")
+    return store
+
+
+def get_approval_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _open_store()
+    return _store
+
+
+# -------------------------
+# Public API (unchanged signatures)
+# -------------------------
 def store_pending_action(action: PendingAction) -> None:
-    """Store a pending action."""
-    _pending_actions[action.id] = action
+    """Store a pending action and notify /pending/stream subscribers."""
+    get_approval_store().put(action)
+    get_approval_event_bus().publish("created", action)
 
 
 def get_pending_action(action_id: str) -> Optional[PendingAction]:
-    """Retrieve a pending action by ID."""
-    return _pending_actions.get(action_id)
+    """Retrieve a pending action by ID (pending actions past their TTL are reported as expired)."""
+    return _with_expiry(get_approval_store().get(action_id))
+
+
+def claim_pending_action(action_id: str, status: str = "executing") -> Optional[PendingAction]:
+    """
+    Atomically move a pending (not expired) action to `status`.
+
+    Returns the claimed action, or None if it is missing or no longer pending - the
+    caller lost the race and must not write.
+    """
+    action = get_approval_store().claim(action_id, status)
+    if action is not None:
+        get_approval_event_bus().publish("updated", action)
+    return action
 
 
 def update_pending_action(action: PendingAction) -> None:
-    """Update a pending action's status."""
-    if action.id in _pending_actions:
-        _pending_actions[action.id] = action
+    """Update a pending action's status and notify /pending/stream subscribers."""
+    store = get_approval_store()
+    if store.get(action.id) is not None:
+        store.put(action)
+        get_approval_event_bus().publish("updated", action)
 
 
 def delete_pending_action(action_id: str) -> None:
     """Remove a pending action from storage."""
-    if action_id in _pending_actions:
-        del _pending_actions[action_id]
+    get_approval_store().delete(action_id)
 
 
 def list_pending_actions() -> list[PendingAction]:
-    """List all pending actions."""
-    return [action for action in _pending_actions.values() if action.status == "pending"]
+    """List pending actions that have not expired, oldest first."""
+    return get_approval_store().list_pending()
+
+
+def list_actions(
+    tag_path: Optional[str] = None, status: Optional[str] = None, limit: int = 100
+) -> list[PendingAction]:
+    """Recent actions (any status), newest first, optionally filtered by tag or status."""
+    return [_with_expiry(a) for a in get_approval_store().list_actions(tag_path, status, limit)]
+
+
+def sweep_approvals(now: Optional[float] = None) -> dict:
+    """Expire stale pending actions and delete finished ones past retention (one bounded batch)."""
+    return get_approval_store().sweep(now)
+
+
+# -------------------------
+# Background sweeper
+# -------------------------
+async def _sweeper_loop() -> None:
+    while True:
+        try:
+            result = await asyncio.to_thread(sweep_approvals)
+            if result["expired"] or result["deleted"]:
+                print(f"[Approval] Sweep: {result['expired']} expired, {result['deleted']} deleted")
+        except Exception as e:
+            print(f"[Approval] Sweep failed: {e}")
+        await asyncio.sleep(settings.approval_sweep_interval_seconds)
+
+
+def start_approval_sweeper() -> None:
+    """Run the TTL / retention sweeper as a background task."""
+    global _sweeper_task
+    if _sweeper_task is not None:
+        return
+    _sweeper_task = asyncio.create_task(_sweeper_loop())
+
+
+async def stop_approval_sweeper() -> None:
+    global _sweeper_task
+    if _sweeper_task is None:
+        return
+    _sweeper_task.cancel()
+    try:
+        await _sweeper_task
+    except asyncio.CancelledError:
+        pass
+    _sweeper_task = None
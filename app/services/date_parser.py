@@ -0,0 +1,343 @@
+"""
+한국어/영어 시간 표현 파서 - 질문에서 절대 시간 범위 [start, end) 추출.
+
+LLM 도구 호출 없이 "어제", "지난주", "지난달", "최근 3시간", "2025년 9월 1일~5일",
+"어제 오후 2시부터 4시까지", "from 2025-09-01 to 2025-09-03" 같은 표현을 해석해
+에이전트 프롬프트에 파티션 힌트로 주입합니다.
+"""
+
+from __future__ import annotations
+
+import calendar
+import re
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+
+@dataclass
+class TimeRange:
+    """해석된 시간 범위 (end 미포함)"""
+
+    start: datetime
+    end: datetime
+    expression: str
+    granularity: str  # minute, hour, day, week, month, year, relative
+
+    def months(self) -> list[tuple[int, int]]:
+        """범위가 걸친 (연, 월) 목록 - 파티션 sqlt_data_N_YYYY_MM 대응"""
+        result = []
+        year, month = self.start.year, self.start.month
+        last = self.end - timedelta(microseconds=1)
+        while (year, month) <= (last.year, last.month):
+            result.append((year, month))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return result
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "start": self.start.isoformat(timespec="minutes"),
+            "end": self.end.isoformat(timespec="minutes"),
+            "expression": self.expression,
+            "granularity": self.granularity,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "TimeRange":
+        return cls(
+            start=datetime.fromisoformat(data["start"]),
+            end=datetime.fromisoformat(data["end"]),
+            expression=data.get("expression", ""),
+            granularity=data.get("granularity", "day"),
+        )
+
+
+@dataclass
+class _Token:
+    start: datetime
+    end: datetime
+    granularity: str
+    span: tuple[int, int]
+    point: bool = False  # 시각 지정 (범위 끝으로 쓰이면 end 대신 start 사용)
+
+
+# ── 기본 단위 ─────────────────────────────────────────────────────
+
+
+def _day(dt: datetime) -> datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _month_start(year: int, month: int) -> datetime:
+    return datetime(year, month, 1)
+
+
+def _next_month(dt: datetime) -> datetime:
+    return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1)
+
+
+def _month_token(year: int, month: int) -> tuple[datetime, datetime]:
+    start = _month_start(year, month)
+    return start, _next_month(start)
+
+
+def _past_year(year: int, month: int, day: int, now: datetime) -> int:
+    """연도 생략 날짜가 미래면 작년으로 해석"""
+    return year - 1 if datetime(year, month, day) > now else year
+
+
+_RELATIVE_UNITS = {
+    "분": "minutes", "minute": "minutes", "minutes": "minutes", "min": "minutes", "mins": "minutes",
+    "시간": "hours", "hour": "hours", "hours": "hours", "h": "hours", "hr": "hours", "hrs": "hours",
+    "일": "days", "day": "days", "days": "days", "d": "days",
+    "주": "weeks", "주일": "weeks", "week": "weeks", "weeks": "weeks",
+    "개월": "months", "달": "months", "month": "months", "months": "months",
+}
+
+
+def _relative(amount: int, unit: str, now: datetime) -> tuple[datetime, datetime]:
+    kind = _RELATIVE_UNITS[unit.lower()]
+    if kind == "months":
+        month_index = now.year * 12 + now.month - 1 - amount
+        year, month = divmod(month_index, 12)
+        # 3월 31일의 1개월 전 → 2월 말일
+        day = min(now.day, calendar.monthrange(year, month + 1)[1])
+        return now.replace(year=year, month=month + 1, day=day), now
+    return now - timedelta(**{kind: amount}), now
+
+
+# ── 토큰 패턴 ─────────────────────────────────────────────────────
+
+_Builder = Callable[[re.Match, datetime], Optional[tuple[datetime, datetime, str]]]
+
+
+def _abs_date(m: re.Match, now: datetime):
+    start = datetime(int(m["y"]), int(m["m"]), int(m["d"]))
+    return start, start + timedelta(days=1), "day"
+
+
+def _abs_month(m: re.Match, now: datetime):
+    return (*_month_token(int(m["y"]), int(m["m"])), "month")
+
+
+def _month_day(m: re.Match, now: datetime):
+    month, day = int(m["m"]), int(m["d"])
+    start = datetime(_past_year(now.year, month, day, now), month, day)
+    return start, start + timedelta(days=1), "day"
+
+
+def _month_only(m: re.Match, now: datetime):
+    month = int(m["m"])
+    year = now.year - 1 if month > now.month else now.year
+    return (*_month_token(year, month), "month")
+
+
+def _relative_match(m: re.Match, now: datetime):
+    return (*_relative(int(m["n"]), m["u"], now), "relative")
+
+
+def _word(offset_days: int = 0, unit: str = "day"):
+    def build(m: re.Match, now: datetime):
+        today = _day(now)
+        if unit == "day":
+            start = today + timedelta(days=offset_days)
+            return start, start + timedelta(days=1), "day"
+        if unit == "week":
+            monday = today - timedelta(days=today.weekday()) + timedelta(weeks=offset_days)
+            return monday, monday + timedelta(weeks=1), "week"
+        if unit == "month":
+            start = _month_start(now.year, now.month)
+            for _ in range(-offset_days):
+                start = _month_start(*((start.year - 1, 12) if start.month == 1 else (start.year, start.month - 1)))
+            return start, _next_month(start), "month"
+        start = datetime(now.year + offset_days, 1, 1)
+        return start, datetime(start.year + 1, 1, 1), "year"
+
+    return build
+
+
+_UNIT_PATTERN = r"(?P<u>분|시간|주일|주|일|개월|달|minutes?|mins?|hours?|hrs?|h|days?|d|weeks?|months?)"
+
+_PATTERNS: list[tuple[re.Pattern, _Builder]] = [
+    (re.compile(r"(?P<y>\d{4})[-/.](?P<m>\d{1,2})[-/.](?P<d>\d{1,2})"), _abs_date),
+    (re.compile(r"(?P<y>\d{4})\s*년\s*(?P<m>\d{1,2})\s*월\s*(?P<d>\d{1,2})\s*일"), _abs_date),
+    # 공백 구분 "2025 9 1", "2025 9월 1일" (parse_date_to_partition이 받아 온 형식)
+    (re.compile(r"(?<![\d.:/-])(?P<y>(?:19|20)\d{2})\s*년?\s+(?P<m>\d{1,2})\s*월?\s+(?P<d>\d{1,2})(?:\s*일)?(?![\d:])"), _abs_date),
+    (re.compile(r"(?P<y>\d{4})\s*년\s*(?P<m>\d{1,2})\s*월(?!\s*\d)"), _abs_month),
+    (re.compile(r"(?P<y>\d{4})-(?P<m>\d{1,2})(?![-/.\d])"), _abs_month),
+    (re.compile(r"(?<!\d)(?P<m>\d{1,2})\s*월\s*(?P<d>\d{1,2})\s*일"), _month_day),
+    (re.compile(r"(?<!\d)(?P<m>\d{1,2})\s*월(?!\s*\d)"), _month_only),
+    (re.compile(r"(?:최근|지난|past|last)\s*(?P<n>\d+)\s*" + _UNIT_PATTERN + r"(?![가-힣a-z])", re.I), _relative_match),
+    (re.compile(r"(?<!\d)(?P<n>\d+)\s*" + _UNIT_PATTERN + r"\s*(?:전부터|전|동안|ago)", re.I), _relative_match),
+    (re.compile(r"그저께|그제|엊그제|day before yesterday", re.I), _word(-2)),
+    (re.compile(r"어제|yesterday", re.I), _word(-1)),
+    (re.compile(r"오늘|today", re.I), _word(0)),
+    (re.compile(r"지지난\s*주|저저번\s*주"), _word(-2, "week")),
+    (re.compile(r"지난\s*주|저번\s*주|last week", re.I), _word(-1, "week")),
+    (re.compile(r"이번\s*주|금주|this week", re.I), _word(0, "week")),
+    (re.compile(r"지난\s*달|저번\s*달|전월|last month", re.I), _word(-1, "month")),
+    (re.compile(r"이번\s*달|금월|this month", re.I), _word(0, "month")),
+    (re.compile(r"작년|지난\s*해|last year", re.I), _word(-1, "year")),
+    (re.compile(r"올해|금년|this year", re.I), _word(0, "year")),
+]
+
+_TIME_OF_DAY = re.compile(
+    r"\s*(?:(?P<ap>오전|오후|am|pm)\s*(?P<h1>\d{1,2})\s*시(?:\s*(?P<m1>\d{1,2})\s*분)?"
+    r"|(?P<h2>\d{1,2})\s*시(?:\s*(?P<m2>\d{1,2})\s*분)?"
+    r"|(?P<h3>\d{1,2}):(?P<m3>\d{2})(?:\s*(?P<ap3>am|pm))?)",
+    re.I,
+)
+_CONNECTOR = re.compile(r"\s*(?:부터|에서|~|–|-|to|until|till|through|and)\s*", re.I)
+_BARE_DAY = re.compile(r"(?P<d>\d{1,2})\s*일(?!\s*(?:전|동안))")
+
+
+def _time_of_day(text: str, pos: int) -> Optional[tuple[int, int, int]]:
+    """text[pos:]에서 시각 (시, 분, 끝 위치) 추출"""
+    m = _TIME_OF_DAY.match(text, pos)
+    if not m:
+        return None
+    hour = int(m["h1"] or m["h2"] or m["h3"])
+    minute = int(m["m1"] or m["m2"] or m["m3"] or 0)
+    meridiem = (m["ap"] or m["ap3"] or "").lower()
+    if meridiem in ("오후", "pm") and hour < 12:
+        hour += 12
+    if meridiem in ("오전", "am") and hour == 12:
+        hour = 0
+    if hour > 24 or minute > 59:
+        return None
+    return hour, minute, m.end()
+
+
+def _with_time(token: _Token, hour: int, minute: int, end_pos: int) -> _Token:
+    start = token.start + timedelta(hours=hour, minutes=minute)
+    return replace(
+        token,
+        start=start,
+        end=start + timedelta(hours=1),
+        granularity="hour" if minute == 0 else "minute",
+        span=(token.span[0], end_pos),
+        point=True,
+    )
+
+
+def _scan(text: str, now: datetime) -> list[_Token]:
+    candidates: list[_Token] = []
+    for pattern, build in _PATTERNS:
+        for m in pattern.finditer(text):
+            try:
+                built = build(m, now)
+            except ValueError:  # 2월 30일 등
+                continue
+            if built:
+                candidates.append(_Token(built[0], built[1], built[2], m.span()))
+
+    # 겹치는 후보는 먼저 시작하고 더 긴 것을 채택
+    candidates.sort(key=lambda t: (t.span[0], -(t.span[1] - t.span[0])))
+    tokens: list[_Token] = []
+    for token in candidates:
+        if tokens and token.span[0] < tokens[-1].span[1]:
+            continue
+        if token.granularity == "day":
+            time = _time_of_day(text, token.span[1])
+            if time:
+                token = _with_time(token, *time)
+        tokens.append(token)
+    return tokens
+
+
+def _range_tail(text: str, first: _Token) -> Optional[_Token]:
+    """'9월 1일~5일', '오후 2시부터 4시까지'처럼 앞 토큰의 날짜를 물려받는 범위 끝"""
+    connector = _CONNECTOR.match(text, first.span[1])
+    if not connector:
+        return None
+    pos = connector.end()
+    if first.point:
+        time = _time_of_day(text, pos)
+        if time:
+            base = _day(first.start)
+            tail = _with_time(_Token(base, base, "day", (pos, pos)), *time)
+            # "오후 2시부터 4시까지" - 오전/오후 생략 시 앞 시각 기준으로 12시간 보정
+            if tail.start <= first.start and time[0] < 12:
+                tail = replace(tail, start=tail.start + timedelta(hours=12), end=tail.end + timedelta(hours=12))
+            return tail
+    if first.granularity == "day":
+        m = _BARE_DAY.match(text, pos)
+        if m:
+            try:
+                start = first.start.replace(day=int(m["d"]))
+            except ValueError:
+                return None
+            return _Token(start, start + timedelta(days=1), "day", m.span())
+    return None
+
+
+def parse_time_range(text: str, now: Optional[datetime] = None) -> Optional[TimeRange]:
+    """
+    질문에서 첫 번째 시간 표현(또는 범위)을 [start, end)로 해석.
+
+    Args:
+        text: 사용자 질문
+        now: 기준 시각 (테스트용, 기본 현재 시각)
+
+    Returns:
+        TimeRange 또는 시간 표현이 없으면 None
+    """
+    now = now or datetime.now()
+    tokens = _scan(text, now)
+    if not tokens:
+        return None
+
+    first = tokens[0]
+    second: Optional[_Token] = None
+    if len(tokens) > 1:
+        between = text[first.span[1]:tokens[1].span[0]]
+        if _CONNECTOR.fullmatch(between) or between.strip().lower() in ("부터", "에서"):
+            second = tokens[1]
+    if second is None:
+        second = _range_tail(text, first)
+
+    if second is not None and second.start >= first.start:
+        end = second.start if second.point else second.end
+        if end > first.start:
+            if first.granularity == second.granularity:
+                granularity = first.granularity
+            elif first.point and second.point:
+                granularity = "minute"
+            else:
+                granularity = "day"
+            return TimeRange(first.start, end, text[first.span[0]:second.span[1]].strip(), granularity)
+
+    return TimeRange(first.start, first.end, text[first.span[0]:first.span[1]].strip(), first.granularity)
+
+
+# ── 프롬프트 힌트 ─────────────────────────────────────────────────
+
+
+def _fmt(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%d %H:%M")
+
+
+def format_time_hint(time_range: TimeRange, now: Optional[datetime] = None) -> str:
+    """에이전트 시스템 프롬프트에 덧붙일 시간 범위/파티션 힌트 (중괄호 없음)"""
+    now = now or datetime.now()
+    start, end = time_range.start, time_range.end
+    last_day = end - timedelta(microseconds=1)
+    months = time_range.months()
+
+    lines = [
+        f"## 시간 범위 사전 해석: \"{time_range.expression}\"",
+        f"- 범위: {_fmt(start)} ~ {_fmt(end)} (종료 미포함)",
+        f"- start_time=\"{_fmt(start)}\", end_time=\"{_fmt(end)}\"",
+        f"- 알람 도구: start_date=\"{start:%Y-%m-%d}\", end_date=\"{last_day:%Y-%m-%d}\"",
+        "- 파티션: " + ", ".join(f"year={y}, month={m} (sqlt_data_*_{y}_{m:02d})" for y, m in months),
+    ]
+    if len(months) == 1:
+        lines.append(
+            f"- get_tag_history: year={start.year}, month={start.month}, "
+            f"start_day={start.day}, end_day={last_day.day}"
+        )
+    if end >= now - timedelta(minutes=5):
+        hours = max(1, int(-(-(now - start).total_seconds() // 3600)))
+        lines.append(f"- 현재까지 구간: hours_ago={hours}")
+    lines.append("날짜는 이미 해석되었으므로 parse_date_to_partition을 호출하지 말고 위 값을 그대로 사용하세요.")
+    return "\n".join(lines)
@@ -0,0 +1,126 @@
+"""시계열 다운샘플링 - 형태(피크) 보존 LTTB / 버킷별 min-max (NumPy 벡터화)"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax", "none")
+
+
+@dataclass
+class DownsampleResult:
+    """다운샘플링 결과 - 원본 포인트 수를 함께 보고"""
+
+    ts: np.ndarray       # epoch 밀리초 (int64)
+    values: np.ndarray   # float64
+    original_count: int
+    method: str
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+
+def _clean(ts, values) -> tuple[np.ndarray, np.ndarray]:
+    ts = np.asarray(ts, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    mask = ~np.isnan(values)
+    ts, values = ts[mask], values[mask]
+    order = np.argsort(ts, kind="stable")
+    return ts[order], values[order]
+
+
+def lttb(ts: np.ndarray, values: np.ndarray, threshold: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets 다운샘플링.
+
+    첫/마지막 점은 항상 유지하고, 나머지 버킷에서는 이전 선택점과 다음 버킷 평균점으로
+    만든 삼각형 면적이 가장 큰 점을 선택합니다. 버킷 내부 계산은 벡터화되어 있고
+    루프는 출력 포인트 수만큼만 돕니다.
+    """
+    n = len(ts)
+    if threshold >= n or threshold < 3:
+        return ts, values
+
+    x = ts.astype(np.float64)
+    y = values
+    # 첫/마지막 점을 제외한 구간을 threshold-2개 버킷으로 분할
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    # 다음 버킷 평균점은 선택 결과와 무관하므로 한 번에 계산
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) if n > 2 else np.array([])
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) if n > 2 else np.array([])
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    prev = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        nx, ny = avg_x[i + 1], avg_y[i + 1]
+        area = np.abs((x[prev] - nx) * (by - y[prev]) - (x[prev] - bx) * (ny - y[prev]))
+        prev = lo + int(np.argmax(area))
+        selected[i + 1] = prev
+
+    return ts[selected], values[selected]
+
+
+def minmax(ts: np.ndarray, values: np.ndarray, threshold: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    시간 버킷별 최소/최대값 유지 다운샘플링.
+
+    threshold/2개의 균등 시간 버킷마다 최소점과 최대점을 시간순으로 남겨
+    스파이크가 사라지지 않도록 합니다.
+    """
+    n = len(ts)
+    if threshold >= n or threshold < 2:
+        return ts, values
+
+    n_buckets = threshold // 2
+    span = max(int(ts[-1] - ts[0]), 1)
+    bucket_ids = np.minimum((ts - ts[0]) * n_buckets // span, n_buckets - 1)
+
+    # 버킷 내부를 값 기준으로 정렬하면 첫 원소가 최소, 마지막 원소가 최대
+    order = np.lexsort((values, bucket_ids))
+    sorted_ids = bucket_ids[order]
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+
+    picked = np.unique(np.concatenate([order[starts], order[ends]]))
+    return ts[picked], values[picked]
+
+
+def downsample(ts, values, max_points: int, method: str = "lttb") -> DownsampleResult:
+    """
+    원본 시계열을 max_points 이하로 축소.
+
+    Args:
+        ts: epoch 밀리초 배열 (정렬 불필요)
+        values: 값 배열 (NaN은 제외됨)
+        max_points: 목표 포인트 수
+        method: "lttb" (형태 보존), "minmax" (피크 보존), "none"
+
+    Returns:
+        DownsampleResult (시간순 정렬)
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(
+            f"지원하지 않는 다운샘플링 방식: {method}. 사용 가능: {', '.join(DOWNSAMPLE_METHODS)}"
+        )
+
+    ts, values = _clean(ts, values)
+    original = len(ts)
+
+    if method == "lttb":
+        ts, values = lttb(ts, values, max_points)
+    elif method == "minmax":
+        ts, values = minmax(ts, values, max_points)
+
+    return DownsampleResult(ts=ts, values=values, original_count=original, method=method)
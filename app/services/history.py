@@ -0,0 +1,752 @@
+"""태그 히스토리 서비스 - 파티션 범위 계획 및 서버 측 버킷 집계"""
+
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.analytics import analyze
+from app.services.downsample import DownsampleResult
+from app.services.history_cache import get_history_cache
+from app.services.pagination import (
+    Page,
+    decode_cursor,
+    encode_cursor,
+    is_bool,
+    is_int,
+    is_int_list,
+    is_str,
+    optional,
+)
+from app.services.sql import fetch_rows, get_sql_db
+
+
+# 지원 집계 함수 (버킷 단위)
+AGGREGATIONS = ("avg", "min", "max", "sum", "count", "first", "last")
+
+# 한 번의 집계 요청에서 허용하는 최대 버킷 수 (LLM 컨텍스트 보호)
+MAX_BUCKETS = 2000
+
+# 종료된 구간의 캐시 단위 (버킷 수): 버킷 격자에 맞춘 고정 청크로 저장해야
+# 슬라이딩 윈도우(예: "최근 24시간")가 매번 새 키를 만들지 않고 그대로 재사용됨
+CACHE_CHUNK_BUCKETS = 96
+
+# 태그 값 컬럼: Ignition은 타입에 따라 floatvalue / intvalue 중 하나에 저장
+VALUE_EXPR = "COALESCE(floatvalue, intvalue)"
+
+_PARTITION_PATTERN = re.compile(r"^sqlt_data_(\d+)_(\d{4})_(\d{2})$")
+_TABLE_CACHE_TTL = 60.0
+
+_table_cache: tuple[float, list[str]] | None = None
+
+_TIME_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M",
+    "%Y-%m-%d",
+)
+
+
+class RawRowLimitExceeded(ValueError):
+    """원본 조회 행 수가 max_rows를 넘음 - 구간을 줄이거나 버킷 집계를 사용해야 함"""
+
+
+@dataclass
+class PartitionSlice:
+    """범위 계획 결과 - 하나의 파티션 테이블과 그 안에서 조회할 구간"""
+
+    table: str
+    start_ms: int  # 포함
+    end_ms: int    # 미포함
+
+
+@dataclass
+class Bucket:
+    """버킷 하나의 병합 가능한 부분 집계"""
+
+    start_ms: int
+    count: int = 0
+    total: float = 0.0
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    first_ts: Optional[int] = None
+    first_value: Optional[float] = None
+    last_ts: Optional[int] = None
+    last_value: Optional[float] = None
+
+    def merge(self, other: "Bucket") -> None:
+        """다른 파티션에서 계산된 같은 버킷의 부분 집계를 병합"""
+        self.count += other.count
+        self.total += other.total
+        if other.minimum is not None:
+            self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        if other.maximum is not None:
+            self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+        if other.first_ts is not None and (self.first_ts is None or other.first_ts < self.first_ts):
+            self.first_ts, self.first_value = other.first_ts, other.first_value
+        if other.last_ts is not None and (self.last_ts is None or other.last_ts > self.last_ts):
+            self.last_ts, self.last_value = other.last_ts, other.last_value
+
+    def value(self, aggregation: str) -> Optional[float]:
+        if aggregation == "avg":
+            return self.total / self.count if self.count else None
+        if aggregation == "min":
+            return self.minimum
+        if aggregation == "max":
+            return self.maximum
+        if aggregation == "sum":
+            return self.total
+        if aggregation == "count":
+            return float(self.count)
+        if aggregation == "first":
+            return self.first_value
+        if aggregation == "last":
+            return self.last_value
+        raise ValueError(f"지원하지 않는 집계 함수: {aggregation}")
+
+
+# ── 시간 유틸리티 ──────────────────────────────────────────────────
+
+
+def parse_time_arg(value: str) -> datetime:
+    """
+    도구/API 인자로 받은 시간 문자열을 datetime으로 변환.
+
+    지원 형식: "YYYY-MM-DD", "YYYY-MM-DD HH:MM", "YYYY-MM-DD HH:MM:SS" (T 구분자 허용)
+    """
+    value = value.strip()
+    for fmt in _TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"시간 형식 오류: {value}. 'YYYY-MM-DD HH:MM' 형식을 사용하세요.")
+
+
+def to_ms(dt: datetime) -> int:
+    """datetime → t_stamp (epoch 밀리초)"""
+    return int(dt.timestamp() * 1000)
+
+
+def format_ms(ts_ms: int, with_seconds: bool = False) -> str:
+    """t_stamp → 로컬 시간 문자열"""
+    fmt = "%Y-%m-%d %H:%M:%S" if with_seconds else "%Y-%m-%d %H:%M"
+    return datetime.fromtimestamp(ts_ms / 1000).strftime(fmt)
+
+
+def local_offset_ms() -> int:
+    """
+    로컬 타임존의 표준시 UTC 오프셋 (시간/일 버킷을 로컬 자정 기준으로 정렬하기 위함).
+
+    서머타임과 무관한 고정값이어야 롤업 테이블에 이미 기록된 버킷과 조회 격자가
+    계절이 바뀌어도 어긋나지 않습니다 (서머타임 기간의 일 버킷은 01:00 시작).
+    """
+    return -time.timezone * 1000
+
+
+# ── 파티션 범위 계획 ───────────────────────────────────────────────
+
+
+def _table_names() -> list[str]:
+    global _table_cache
+    now = time.monotonic()
+    if _table_cache is None or now - _table_cache[0] > _TABLE_CACHE_TTL:
+        _table_cache = (now, list(get_sql_db().get_table_names()))
+    return _table_cache[1]
+
+
+def _month_start_ms(year: int, month: int) -> int:
+    return to_ms(datetime(year, month, 1))
+
+
+def _iter_months(start_ms: int, end_ms: int) -> Iterable[tuple[int, int]]:
+    start = datetime.fromtimestamp(start_ms / 1000)
+    year, month = start.year, start.month
+    while _month_start_ms(year, month) < end_ms:
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def partition_tables(year: int, month: int) -> list[str]:
+    """해당 연월에 실제로 존재하는 sqlt_data_N_YYYY_MM 테이블 목록"""
+    suffix = f"_{year}_{month:02d}"
+    found = [
+        name for name in _table_names()
+        if _PARTITION_PATTERN.match(name) and name.endswith(suffix)
+    ]
+    return sorted(found)
+
+
+def plan_partitions(start_ms: int, end_ms: int) -> list[PartitionSlice]:
+    """
+    [start_ms, end_ms) 구간을 월별 파티션 테이블 단위로 분할.
+
+    존재하지 않는 월은 건너뛰며, 각 구간은 월 경계로 잘립니다.
+    """
+    slices = []
+    for year, month in _iter_months(start_ms, end_ms):
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        lo = max(start_ms, _month_start_ms(year, month))
+        hi = min(end_ms, _month_start_ms(next_year, next_month))
+        for table in partition_tables(year, month):
+            slices.append(PartitionSlice(table=table, start_ms=lo, end_ms=hi))
+    return slices
+
+
+# ── 버킷 집계 ─────────────────────────────────────────────────────
+
+
+def tag_filter(tag_ids: Iterable[int]) -> str:
+    ids = sorted({int(t) for t in tag_ids})
+    if len(ids) == 1:
+        return f"tagid = {ids[0]}"
+    return f"tagid IN ({', '.join(str(t) for t in ids)})"
+
+
+def _bucket_expr(bucket_ms: int, offset_ms: int) -> str:
+    # FLOOR 기반 정수 나눗셈: PostgreSQL / MariaDB 모두 동일하게 동작
+    return f"FLOOR((t_stamp + {offset_ms}) / {bucket_ms}) * {bucket_ms} - {offset_ms}"
+
+
+def _partial_buckets(
+    part: PartitionSlice, tag_clause: str, bucket_ms: int, offset_ms: int, with_edges: bool
+) -> list[Bucket]:
+    bucket_expr = _bucket_expr(bucket_ms, offset_ms)
+    where = f"{tag_clause} AND t_stamp >= {part.start_ms} AND t_stamp < {part.end_ms}"
+
+    query = f"""
+    SELECT {bucket_expr} AS bucket,
+           COUNT({VALUE_EXPR}), SUM({VALUE_EXPR}), MIN({VALUE_EXPR}), MAX({VALUE_EXPR})
+    FROM {part.table}
+    WHERE {where}
+    GROUP BY 1
+    ORDER BY 1
+    """
+    buckets: dict[int, Bucket] = {}
+    for bucket, count, total, minimum, maximum in fetch_rows(query):
+        key = int(bucket)
+        buckets[key] = Bucket(
+            start_ms=key,
+            count=int(count or 0),
+            total=float(total or 0.0),
+            minimum=None if minimum is None else float(minimum),
+            maximum=None if maximum is None else float(maximum),
+        )
+
+    if with_edges and buckets:
+        # first/last 값은 윈도우 함수로 버킷별 첫/마지막 행만 가져옴
+        for direction, is_first in (("ASC", True), ("DESC", False)):
+            edge_query = f"""
+            SELECT bucket, t_stamp, v FROM (
+                SELECT {bucket_expr} AS bucket, t_stamp, {VALUE_EXPR} AS v,
+                       ROW_NUMBER() OVER (PARTITION BY {bucket_expr} ORDER BY t_stamp {direction}) AS rn
+                FROM {part.table}
+                WHERE {where} AND {VALUE_EXPR} IS NOT NULL
+            ) ranked
+            WHERE rn = 1
+            """
+            for bucket, ts, value in fetch_rows(edge_query):
+                target = buckets.get(int(bucket))
+                if target is None:
+                    continue
+                if is_first:
+                    target.first_ts, target.first_value = int(ts), float(value)
+                else:
+                    target.last_ts, target.last_value = int(ts), float(value)
+
+    return list(buckets.values())
+
+
+def _validate_request(start_ms: int, end_ms: int, bucket_seconds: int, aggregation: str) -> None:
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(
+            f"지원하지 않는 집계 함수: {aggregation}. 사용 가능: {', '.join(AGGREGATIONS)}"
+        )
+    if bucket_seconds <= 0:
+        raise ValueError("bucket_seconds는 0보다 커야 합니다.")
+    if end_ms <= start_ms:
+        raise ValueError("종료 시간이 시작 시간보다 빨라야 합니다.")
+    if (end_ms - start_ms) / (bucket_seconds * 1000) > MAX_BUCKETS:
+        raise ValueError(
+            f"버킷 수가 {MAX_BUCKETS}개를 초과합니다. bucket_seconds를 늘리거나 기간을 줄이세요."
+        )
+
+
+def _collect_buckets(
+    tag_ids: Iterable[int],
+    start_ms: int,
+    end_ms: int,
+    bucket_seconds: int,
+    with_edges: bool,
+) -> dict[int, Bucket]:
+    """
+    범위 계획: 롤업으로 처리 가능한 가운데 구간은 롤업 테이블에서, 나머지 앞/뒤 구간은
+    원본 파티션에서 부분 집계를 가져와 출력 버킷 단위로 병합.
+    """
+    from app.services.rollup import fetch_rollup_buckets, plan_rollup
+
+    bucket_ms = bucket_seconds * 1000
+    # 1시간 이상 버킷은 로컬 시각 경계(정시/자정)에 맞춤
+    offset_ms = local_offset_ms() if bucket_seconds >= 3600 else 0
+    tag_clause = tag_filter(tag_ids)
+
+    merged: dict[int, Bucket] = {}
+
+    def _add(partial: Bucket) -> None:
+        partial.start_ms = (partial.start_ms + offset_ms) // bucket_ms * bucket_ms - offset_ms
+        if partial.start_ms in merged:
+            merged[partial.start_ms].merge(partial)
+        else:
+            merged[partial.start_ms] = partial
+
+    raw_segments = [(start_ms, end_ms)]
+    rollup_plan = plan_rollup(start_ms, end_ms, bucket_seconds)
+    if rollup_plan:
+        level, lo, hi = rollup_plan
+        print(f"[History] 롤업 사용: {level} ({format_ms(lo)} ~ {format_ms(hi)})")
+        for partial in fetch_rollup_buckets(level, tag_clause, lo, hi):
+            _add(partial)
+        raw_segments = [(start_ms, lo), (hi, end_ms)]
+
+    for seg_start, seg_end in raw_segments:
+        if seg_end <= seg_start:
+            continue
+        for part in plan_partitions(seg_start, seg_end):
+            for partial in _partial_buckets(part, tag_clause, bucket_ms, offset_ms, with_edges):
+                _add(partial)
+
+    return merged
+
+
+def closed_until(bucket_ms: int, offset_ms: int) -> int:
+    """이 시각 이전의 버킷은 더 이상 바뀌지 않음 (settle 시간 고려, 버킷 경계로 내림)"""
+    settled = int(time.time() * 1000) - settings.history_cache_settle_seconds * 1000
+    return (settled + offset_ms) // bucket_ms * bucket_ms - offset_ms
+
+
+def _compute_buckets(
+    tag_ids: tuple[int, ...], start_ms: int, end_ms: int, bucket_seconds: int, aggregation: str
+) -> list[tuple[int, Optional[float], int]]:
+    merged = _collect_buckets(
+        tag_ids, start_ms, end_ms, bucket_seconds, aggregation in ("first", "last")
+    )
+    return [
+        (b.start_ms, b.value(aggregation), b.count)
+        for b in sorted(merged.values(), key=lambda b: b.start_ms)
+        if b.count > 0
+    ]
+
+
+def aggregate_buckets(
+    tag_ids: Iterable[int],
+    start_ms: int,
+    end_ms: int,
+    bucket_seconds: int,
+    aggregation: str = "avg",
+) -> list[tuple[int, Optional[float], int]]:
+    """
+    N초 버킷 단위 집계를 SQL에서 계산.
+
+    bucket_seconds가 시간/일의 배수이면 롤업 테이블을 우선 사용합니다.
+    결과는 캐시되며, 종료된 구간은 버킷 격자에 맞춘 CACHE_CHUNK_BUCKETS 단위 청크로
+    무기한 저장하고 열린 꼬리 구간(짧은 TTL)만 다시 계산합니다. 시작/종료 시각이
+    움직이는 슬라이딩 윈도우도 이미 종료된 청크를 그대로 재사용합니다.
+
+    Args:
+        tag_ids: sqlth_te 태그 ID (동일 태그의 이력 ID 여러 개 가능)
+        start_ms, end_ms: 조회 구간 [start, end) (epoch 밀리초)
+        bucket_seconds: 버킷 크기 (초)
+        aggregation: avg, min, max, sum, count, first, last
+
+    Returns:
+        (버킷 시작 ms, 값, 샘플 수) 리스트 - 시간순 정렬, 데이터 없는 버킷 제외
+    """
+    _validate_request(start_ms, end_ms, bucket_seconds, aggregation)
+    ids = tuple(sorted({int(t) for t in tag_ids}))
+    if not settings.history_cache_enabled:
+        return _compute_buckets(ids, start_ms, end_ms, bucket_seconds, aggregation)
+
+    cache = get_history_cache()
+    bucket_ms = bucket_seconds * 1000
+    offset_ms = local_offset_ms() if bucket_seconds >= 3600 else 0
+    chunk_ms = bucket_ms * CACHE_CHUNK_BUCKETS
+    open_ttl = settings.history_cache_open_ttl_seconds
+
+    def _floor(ts: int, step: int) -> int:
+        return (ts + offset_ms) // step * step - offset_ms
+
+    def _cached(seg_start: int, seg_end: int, ttl: Optional[float]) -> list:
+        key = ("buckets", ids, seg_start, seg_end, bucket_seconds, aggregation)
+        cached = cache.get(key)
+        if cached is None:
+            cached = _compute_buckets(ids, seg_start, seg_end, bucket_seconds, aggregation)
+            cache.put(key, cached, ttl=ttl)
+        return cached
+
+    # [start, first): 버킷 경계에 걸친 앞머리 (최대 1버킷, 시작 시각마다 키가 달라 짧은 TTL)
+    first = _floor(start_ms, bucket_ms)
+    if first < start_ms:
+        first = min(first + bucket_ms, end_ms)
+    # [first, closed): 종료된 고정 청크 (무기한), [closed, end): 열린 꼬리 (짧은 TTL)
+    chunk_lo = _floor(first, chunk_ms)
+    closed = max(min(closed_until(chunk_ms, offset_ms), _floor(end_ms, chunk_ms)), chunk_lo)
+
+    points: list[tuple[int, Optional[float], int]] = []
+    if first > start_ms:
+        points.extend(_cached(start_ms, first, open_ttl))
+
+    chunks = {
+        lo: cache.get(("buckets", ids, lo, lo + chunk_ms, bucket_seconds, aggregation))
+        for lo in range(chunk_lo, closed, chunk_ms)
+    }
+    missing = [lo for lo, cached in chunks.items() if cached is None]
+    while missing:
+        # 연속된 미스 청크는 한 번에 계산한 뒤 청크별로 나눠 저장
+        run = [missing.pop(0)]
+        while missing and missing[0] == run[-1] + chunk_ms:
+            run.append(missing.pop(0))
+        computed = _compute_buckets(ids, run[0], run[-1] + chunk_ms, bucket_seconds, aggregation)
+        for lo in run:
+            chunks[lo] = [p for p in computed if lo <= p[0] < lo + chunk_ms]
+            cache.put(("buckets", ids, lo, lo + chunk_ms, bucket_seconds, aggregation), chunks[lo])
+    for lo in sorted(chunks):
+        points.extend(p for p in chunks[lo] if p[0] >= first)
+
+    tail_start = max(first, closed)
+    if tail_start < end_ms:
+        ttl = None if end_ms <= closed_until(bucket_ms, offset_ms) else open_ttl
+        points.extend(_cached(tail_start, end_ms, ttl))
+    return points
+
+
+def aggregate_range(
+    tag_ids: Iterable[int], start_ms: int, end_ms: int, aggregation: str = "avg"
+) -> Bucket:
+    """
+    구간 전체에 대한 단일 집계. 일 단위 롤업을 활용할 수 있도록 일 버킷으로 모은 뒤 병합.
+    """
+    _validate_request(start_ms, end_ms, 86400, aggregation)
+    ids = tuple(sorted({int(t) for t in tag_ids}))
+    with_edges = aggregation in ("first", "last")
+    # 집계 함수와 무관하게 같은 부분 집계를 재사용 (예: "지난달 평균" 후 "지난달 최대")
+    key = ("range", ids, start_ms, end_ms, with_edges)
+    cache = get_history_cache() if settings.history_cache_enabled else None
+
+    total = cache.get(key) if cache else None
+    if total is None:
+        merged = _collect_buckets(ids, start_ms, end_ms, 86400, with_edges)
+        total = Bucket(start_ms=start_ms)
+        for partial in merged.values():
+            total.merge(partial)
+        if cache:
+            closed = end_ms <= closed_until(1000, 0)
+            cache.put(key, total, ttl=None if closed else settings.history_cache_open_ttl_seconds)
+    return total
+
+
+def time_weighted_average(tag_ids: Iterable[int], start_ms: int, end_ms: int) -> Optional[float]:
+    """
+    구간 [start, end)의 시간가중평균 (데이터가 없으면 None).
+
+    Ignition은 값 변경 시에만 기록하므로 샘플 평균(aggregate_range "avg")은 값이 자주
+    바뀐 구간에 치우칩니다. 각 값이 다음 샘플까지 유지된 시간으로 가중하며, 구간 시작
+    시점의 값은 직전 샘플에서 이어받습니다. 롤업이 덮는 구간은 롤업의 twa 컬럼을 사용합니다.
+    """
+    if end_ms <= start_ms:
+        raise ValueError("종료 시간이 시작 시간보다 빨라야 합니다.")
+    ids = tuple(sorted({int(t) for t in tag_ids}))
+    key = ("twa", ids, start_ms, end_ms)
+    cache = get_history_cache() if settings.history_cache_enabled else None
+    cached = cache.get(key) if cache else None
+    if cached is not None:
+        return cached[0]
+
+    from app.services.rollup import plan_rollup, rollup_time_weighted
+
+    # 롤업 구간은 버킷별 twa 컬럼으로, 앞/뒤 나머지 구간만 원본 샘플로 계산
+    raw_segments = [(start_ms, end_ms)]
+    area = covered = 0.0
+    rollup_plan = plan_rollup(start_ms, end_ms, 86400)
+    if rollup_plan:
+        level, lo, hi = rollup_plan
+        prior = _fetch_priors(tag_filter(ids), {i: "tag" for i in ids}, lo).get("tag")
+        area, covered = rollup_time_weighted(level, tag_filter(ids), lo, hi, prior)
+        raw_segments = [(start_ms, lo), (hi, end_ms)]
+
+    for seg_start, seg_end in raw_segments:
+        if seg_end <= seg_start:
+            continue
+        ts, values, prior = fetch_series(ids, seg_start, seg_end)
+        stats = analyze(ts, values, seg_start, seg_end, prior=prior, metrics=["twa"])
+        if "twa" in stats:
+            area += stats["twa"] * stats["covered_s"]
+            covered += stats["covered_s"]
+
+    twa = area / covered if covered > 0 else None
+    if cache:
+        closed = end_ms <= closed_until(1000, 0)
+        cache.put(key, (twa,), ttl=None if closed else settings.history_cache_open_ttl_seconds)
+    return twa
+
+
+# 태그별 (t_stamp 배열, 값 배열, 구간 직전 값)
+Series = tuple[np.ndarray, np.ndarray, Optional[float]]
+
+
+def _fetch_priors(tag_clause: str, owner: dict[int, str], start_ms: int) -> dict[str, float]:
+    """태그 그룹별 start_ms 직전 마지막 값 (최근 파티션부터 최대 한 달 전까지)"""
+    priors: dict[str, float] = {}
+    lookback_start = start_ms - 31 * 86400 * 1000
+    months: dict[tuple[int, int], list[PartitionSlice]] = {}
+    for part in plan_partitions(lookback_start, start_ms):
+        months.setdefault((part.start_ms, part.end_ms), []).append(part)
+
+    for month_key in sorted(months, reverse=True):
+        latest: dict[str, tuple[int, float]] = {}
+        for part in months[month_key]:
+            rows = fetch_rows(
+                f"""
+                SELECT d.tagid, d.t_stamp, COALESCE(d.floatvalue, d.intvalue)
+                FROM {part.table} d
+                JOIN (
+                    SELECT tagid, MAX(t_stamp) AS t_max
+                    FROM {part.table}
+                    WHERE {tag_clause} AND t_stamp >= {part.start_ms} AND t_stamp < {part.end_ms}
+                      AND {VALUE_EXPR} IS NOT NULL
+                    GROUP BY tagid
+                ) m ON d.tagid = m.tagid AND d.t_stamp = m.t_max
+                """
+            )
+            for tagid, t_stamp, value in rows:
+                label = owner.get(int(tagid))
+                if label is None or label in priors or value is None:
+                    continue
+                if label not in latest or int(t_stamp) >= latest[label][0]:
+                    latest[label] = (int(t_stamp), float(value))
+        for label, (_, value) in latest.items():
+            priors[label] = value
+        if len(priors) == len(set(owner.values())):
+            break
+    return priors
+
+
+def fetch_multi_series(
+    tag_map: dict[str, Iterable[int]], start_ms: int, end_ms: int, max_rows: Optional[int] = None
+) -> dict[str, Series]:
+    """
+    여러 태그의 [start, end) 원본 샘플을 파티션당 한 번의 tagid IN 쿼리로 조회.
+
+    Ignition은 값 변경 시에만 기록하므로 구간 시작 시점의 값은 이전 샘플에서 이어집니다.
+    태그별 직전 값도 함께 조회합니다.
+
+    Args:
+        tag_map: 라벨(보통 태그 경로) → sqlth_te ID 목록
+        max_rows: 전체 행 수 상한 (None이면 제한 없음). 파티션 쿼리에 LIMIT으로 적용
+
+    Returns:
+        라벨 → (t_stamp 배열, 값 배열, 직전 값 또는 None) - 시간순 정렬
+
+    Raises:
+        RawRowLimitExceeded: 행 수가 max_rows를 넘음
+    """
+    if end_ms <= start_ms:
+        raise ValueError("종료 시간은 시작 시간보다 늦어야 합니다.")
+    owner = {int(t): label for label, ids in tag_map.items() for t in ids}
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64), None)
+    if not owner:
+        return {label: empty for label in tag_map}
+    tag_clause = tag_filter(owner)
+
+    tagids: list[int] = []
+    ts: list[int] = []
+    values: list[float] = []
+    for part in plan_partitions(start_ms, end_ms):
+        # 상한을 한 행 넘겨 읽어 초과 여부만 판단 (초과분 전체를 가져오지 않음)
+        limit = f" LIMIT {max_rows - len(ts) + 1}" if max_rows is not None else ""
+        rows = fetch_rows(
+            f"""
+            SELECT tagid, t_stamp, {VALUE_EXPR}
+            FROM {part.table}
+            WHERE {tag_clause} AND t_stamp >= {part.start_ms} AND t_stamp < {part.end_ms}{limit}
+            """
+        )
+        if max_rows is not None and len(ts) + len(rows) > max_rows:
+            raise RawRowLimitExceeded(
+                f"원본 샘플이 {max_rows}행을 초과합니다. 기간을 줄이거나 버킷 집계를 사용하세요."
+            )
+        for tagid, t_stamp, value in rows:
+            tagids.append(int(tagid))
+            ts.append(int(t_stamp))
+            values.append(np.nan if value is None else float(value))
+
+    tag_arr = np.asarray(tagids, dtype=np.int64)
+    ts_arr = np.asarray(ts, dtype=np.int64)
+    value_arr = np.asarray(values, dtype=np.float64)
+    priors = _fetch_priors(tag_clause, owner, start_ms)
+
+    result: dict[str, Series] = {}
+    for label, ids in tag_map.items():
+        mask = np.isin(tag_arr, [int(t) for t in ids])
+        order = np.argsort(ts_arr[mask], kind="stable")
+        result[label] = (ts_arr[mask][order], value_arr[mask][order], priors.get(label))
+    return result
+
+
+def fetch_series(tag_ids: Iterable[int], start_ms: int, end_ms: int) -> Series:
+    """단일 태그(동일 태그의 이력 ID 여러 개 가능)의 원본 샘플과 직전 값 조회"""
+    return fetch_multi_series({"tag": list(tag_ids)}, start_ms, end_ms)["tag"]
+
+
+# ── 원본 샘플 페이지 조회 (t_stamp 키셋) ─────────────────────────
+
+RAW_CURSOR_KIND = "history_raw"
+
+# 원본 페이지 크기 상한 (REST /history/raw의 le와 같음, 커서의 limit도 이 값으로 제한)
+MAX_RAW_PAGE_SIZE = 50000
+
+_RAW_CURSOR_SCOPE = {
+    "ids": is_int_list,
+    "start": is_int,
+    "end": is_int,
+    "limit": is_int,
+    "table": optional(is_str),
+    "desc": is_bool,
+}
+_RAW_CURSOR_POSITION = (is_int, is_int)
+
+
+def page_raw_history(
+    tag_ids: Iterable[int] = (),
+    start_ms: int = 0,
+    end_ms: int = 0,
+    limit: int = 1000,
+    cursor: Optional[str] = None,
+    table: Optional[str] = None,
+    descending: bool = False,
+) -> Page:
+    """
+    원본 샘플 한 페이지를 (t_stamp, tagid) 키셋으로 조회.
+
+    OFFSET 대신 마지막 행의 (t_stamp, tagid) 다음부터 읽고, 커서 이전 구간의 파티션은
+    건너뛰므로 몇 번째 페이지든 (tagid, t_stamp) 인덱스 탐색 한 번의 비용입니다.
+    같은 월의 파티션 여러 개(sqlt_data_1, sqlt_data_2 …)는 UNION ALL로 합쳐 정렬합니다.
+    cursor가 있으면 인자 대신 커서에 담긴 첫 페이지의 조건을 사용합니다.
+
+    Args:
+        table: 조회할 파티션 테이블 고정 (None이면 기간으로 파티션 계획)
+        descending: True면 최신순
+
+    Returns:
+        Page(rows=[(tagid, t_stamp, value), ...], next_cursor)
+
+    Raises:
+        ValueError: 잘못된 커서/구간/limit
+    """
+    if cursor:
+        scope, position = decode_cursor(
+            cursor, RAW_CURSOR_KIND, _RAW_CURSOR_SCOPE, _RAW_CURSOR_POSITION, MAX_RAW_PAGE_SIZE
+        )
+        after = (int(position[0]), int(position[1]))
+    else:
+        if end_ms <= start_ms:
+            raise ValueError("end_time must be after start_time")
+        if not 1 <= limit <= MAX_RAW_PAGE_SIZE:
+            raise ValueError(f"limit은 1~{MAX_RAW_PAGE_SIZE} 사이여야 합니다.")
+        scope = {
+            "ids": sorted({int(t) for t in tag_ids}),
+            "start": int(start_ms),
+            "end": int(end_ms),
+            "limit": int(limit),
+            "table": table,
+            "desc": bool(descending),
+        }
+        after = None
+    if scope["table"] is not None and not _PARTITION_PATTERN.match(scope["table"]):
+        raise ValueError(f"잘못된 파티션 테이블: {scope['table']}")
+    if not scope["ids"]:
+        return Page()
+
+    desc = scope["desc"]
+    lo, hi = scope["start"], scope["end"]
+    if after is not None:
+        # 커서 이전(이후) 구간 파티션은 계획에서 제외
+        lo, hi = (lo, min(hi, after[0] + 1)) if desc else (max(lo, after[0]), hi)
+    if scope["table"] is not None:
+        groups = [[PartitionSlice(scope["table"], lo, hi)]] if lo < hi else []
+    else:
+        months: dict[tuple[int, int], list[PartitionSlice]] = {}
+        for part in plan_partitions(lo, hi):
+            months.setdefault((part.start_ms, part.end_ms), []).append(part)
+        groups = [months[key] for key in sorted(months, reverse=desc)]
+
+    tag_clause = tag_filter(scope["ids"])
+    order = "DESC" if desc else "ASC"
+    keyset, params = "", {}
+    if after is not None:
+        op = "<" if desc else ">"
+        keyset = f" AND (t_stamp {op} :after_ts OR (t_stamp = :after_ts AND tagid {op} :after_id))"
+        params = {"after_ts": after[0], "after_id": after[1]}
+
+    wanted = scope["limit"] + 1
+    rows: list[tuple[int, int, Optional[float]]] = []
+    for parts in groups:
+        selects = [
+            f"""
+            SELECT tagid, t_stamp, {VALUE_EXPR} AS value
+            FROM {part.table}
+            WHERE {tag_clause} AND t_stamp >= {part.start_ms} AND t_stamp < {part.end_ms}{keyset}
+            """
+            for part in parts
+        ]
+        query = " UNION ALL ".join(selects)
+        if len(selects) > 1:
+            query = f"SELECT tagid, t_stamp, value FROM ({query}) u"
+        fetched = fetch_rows(
+            f"{query} ORDER BY t_stamp {order}, tagid {order} LIMIT {wanted - len(rows)}", params
+        )
+        rows.extend(
+            (int(tagid), int(t_stamp), None if value is None else float(value))
+            for tagid, t_stamp, value in fetched
+        )
+        if len(rows) >= wanted:
+            break
+
+    next_cursor = None
+    if len(rows) > scope["limit"]:
+        rows = rows[: scope["limit"]]
+        next_cursor = encode_cursor(RAW_CURSOR_KIND, scope, [rows[-1][1], rows[-1][0]])
+    return Page(rows=rows, next_cursor=next_cursor)
+
+
+def format_series(
+    points: list[tuple[int, Optional[float], int]],
+    bucket_seconds: int,
+    aggregation: str,
+) -> str:
+    """버킷 시계열을 LLM 컨텍스트용 압축 텍스트로 변환 (한 줄에 한 버킷)"""
+    header = f"bucket={bucket_seconds}s agg={aggregation} points={len(points)}"
+    with_seconds = bucket_seconds % 60 != 0
+    lines = [header, "time,value,n"]
+    for ts, value, count in points:
+        value_str = "" if value is None else f"{value:.6g}"
+        lines.append(f"{format_ms(ts, with_seconds)},{value_str},{count}")
+    return "\n".join(lines)
+
+
+def format_downsampled(result: DownsampleResult) -> str:
+    """다운샘플링된 raw 시계열을 압축 텍스트로 변환 (원본 포인트 수 포함)"""
+    header = (
+        f"original_points={result.original_count} returned={len(result)} "
+        f"method={result.method}"
+    )
+    lines = [header, "time,value"]
+    for ts, value in zip(result.ts.tolist(), result.values.tolist()):
+        lines.append(f"{format_ms(ts, with_seconds=True)},{value:.6g}")
+    return "\n".join(lines)
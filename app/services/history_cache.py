@@ -0,0 +1,174 @@
+"""
+히스토리 결과 캐시 - 메모리 LRU + 선택적 디스크(SQLite) 계층.
+
+종료된 구간(과거 월 등)의 집계 결과는 바뀌지 않으므로 TTL 없이 보관하고,
+현재 시각에 걸친 구간은 짧은 TTL로만 보관합니다. 디스크 계층에는 불변 결과만 저장합니다.
+"""
+
+from __future__ import annotations
+
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Hashable, Optional
+
+from app.core.config import settings
+
+
+_MISSING = object()
+
+
+class HistoryCache:
+    """크기 제한 LRU 캐시. 항목별 만료 시각(None = 무기한)을 가짐."""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        disk_path: str = "",
+        disk_max_entries: int = 10000,
+    ):
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self._entries: OrderedDict[Hashable, tuple[Optional[float], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "disk_hits": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "stores": 0,
+        }
+        if disk_path:
+            self._open_disk(disk_path)
+
+    # -------------------------
+    # Disk tier
+    # -------------------------
+    def _open_disk(self, disk_path: str) -> None:
+        try:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(disk_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS history_cache ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_history_cache_accessed"
+                " ON history_cache (accessed_at)"
+            )
+            conn.commit()
+            self._disk = conn
+            print(f"[HistoryCache] 디스크 캐시 사용: {disk_path}")
+        except Exception as e:
+            print(f"[HistoryCache] 디스크 캐시 초기화 실패 (메모리만 사용): {e}")
+            self._disk = None
+
+    def _disk_get(self, key: Hashable) -> Any:
+        if self._disk is None:
+            return _MISSING
+        row = self._disk.execute(
+            "SELECT value FROM history_cache WHERE key = ?", (repr(key),)
+        ).fetchone()
+        if row is None:
+            return _MISSING
+        self._disk.execute(
+            "UPDATE history_cache SET accessed_at = ? WHERE key = ?", (time.time(), repr(key))
+        )
+        self._disk.commit()
+        return pickle.loads(row[0])
+
+    def _disk_put(self, key: Hashable, value: Any) -> None:
+        if self._disk is None:
+            return
+        self._disk.execute(
+            "INSERT OR REPLACE INTO history_cache (key, value, accessed_at) VALUES (?, ?, ?)",
+            (repr(key), pickle.dumps(value), time.time()),
+        )
+        # 디스크 계층도 크기 제한: 오래 접근되지 않은 항목부터 삭제
+        self._disk.execute(
+            "DELETE FROM history_cache WHERE key IN ("
+            " SELECT key FROM history_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max_entries,),
+        )
+        self._disk.commit()
+
+    # -------------------------
+    # Public
+    # -------------------------
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return value
+                del self._entries[key]
+                self.stats["expirations"] += 1
+
+            value = self._disk_get(key)
+            if value is not _MISSING:
+                self.stats["disk_hits"] += 1
+                self._store(key, value, None)
+                return value
+
+            self.stats["misses"] += 1
+            return default
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """ttl=None이면 무기한 (불변 결과, 디스크 계층에도 저장)"""
+        expires_at = None if ttl is None else time.time() + ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+            if expires_at is None:
+                self._disk_put(key, value)
+
+    def _store(self, key: Hashable, value: Any, expires_at: Optional[float]) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        self.stats["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM history_cache")
+                self._disk.commit()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hit_rate = (self.stats["hits"] + self.stats["disk_hits"]) / lookups if lookups else 0.0
+            disk_entries = 0
+            if self._disk is not None:
+                disk_entries = self._disk.execute("SELECT COUNT(*) FROM history_cache").fetchone()[0]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_enabled": self._disk is not None,
+                "disk_entries": disk_entries,
+                "hit_rate": round(hit_rate, 4),
+            }
+
+
+history_cache = HistoryCache(
+    max_entries=settings.history_cache_max_entries,
+    disk_path=settings.history_cache_disk_path,
+    disk_max_entries=settings.history_cache_disk_max_entries,
+)
+
+
+def get_history_cache() -> HistoryCache:
+    return history_cache
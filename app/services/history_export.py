@@ -0,0 +1,151 @@
+"""
+히스토리 내보내기 - 파티션별 서버 측 커서로 읽어 CSV / NDJSON / Parquet로 스트리밍 인코딩.
+
+행은 chunk 단위로만 메모리에 존재하므로 기간 길이와 무관하게 메모리 사용량이 일정합니다.
+Parquet는 pyarrow가 설치된 경우에만 지원하며, chunk마다 row group 하나를 씁니다.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+from app.services.history import VALUE_EXPR, format_ms, plan_partitions, tag_filter
+from app.services.sql import stream_rows
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 선택 의존성
+    pa = None
+    pq = None
+
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+EXPORT_COLUMNS = ("tag_path", "t_stamp", "time", "value")
+
+# 행 = (tag_path, t_stamp ms, value)
+ExportRow = tuple[str, int, float | None]
+
+
+def parquet_available() -> bool:
+    return pq is not None
+
+
+def iter_export_chunks(
+    tag_map: dict[str, Iterable[int]],
+    start_ms: int,
+    end_ms: int,
+    chunk_size: int = 5000,
+) -> Iterator[list[ExportRow]]:
+    """
+    태그들의 [start, end) 원본 샘플을 파티션 순서대로 chunk 단위로 반환.
+    같은 파티션 안에서는 t_stamp 순으로 정렬됩니다.
+    """
+    owner = {int(t): label for label, ids in tag_map.items() for t in ids}
+    if not owner:
+        return
+    tag_clause = tag_filter(owner)
+    for part in plan_partitions(start_ms, end_ms):
+        query = f"""
+            SELECT tagid, t_stamp, {VALUE_EXPR}
+            FROM {part.table}
+            WHERE {tag_clause} AND t_stamp >= {part.start_ms} AND t_stamp < {part.end_ms}
+            ORDER BY t_stamp, tagid
+        """
+        for rows in stream_rows(query, chunk_size=chunk_size):
+            yield [
+                (owner[int(tagid)], int(t_stamp), None if value is None else float(value))
+                for tagid, t_stamp, value in rows
+            ]
+
+
+def encode_csv(chunks: Iterable[list[ExportRow]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        for path, t_stamp, value in chunk:
+            writer.writerow((path, t_stamp, format_ms(t_stamp, True), "" if value is None else value))
+        yield buffer.getvalue()
+
+
+def encode_ndjson(chunks: Iterable[list[ExportRow]]) -> Iterator[str]:
+    for chunk in chunks:
+        yield "".join(
+            json.dumps(
+                {"tag_path": path, "t_stamp": t_stamp, "time": format_ms(t_stamp, True), "value": value},
+                ensure_ascii=False,
+            ) + "\n"
+            for path, t_stamp, value in chunk
+        )
+
+
+class _DrainSink(io.RawIOBase):
+    """ParquetWriter 출력 버퍼 - 쓰인 바이트를 꺼낼 때마다 비움"""
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def encode_parquet(chunks: Iterable[list[ExportRow]]) -> Iterator[bytes]:
+    if pq is None:
+        raise RuntimeError("parquet export requires pyarrow (pip install pyarrow)")
+    schema = pa.schema([
+        ("tag_path", pa.string()),
+        ("t_stamp", pa.int64()),
+        ("time", pa.timestamp("ms")),
+        ("value", pa.float64()),
+    ])
+    sink = _DrainSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            paths, stamps, values = zip(*chunk)
+            writer.write_table(pa.table(
+                [list(paths), list(stamps), list(stamps), list(values)], schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def encode_export(chunks: Iterable[list[ExportRow]], fmt: str) -> Iterator[str | bytes]:
+    if fmt == "csv":
+        return encode_csv(chunks)
+    if fmt == "ndjson":
+        return encode_ndjson(chunks)
+    if fmt == "parquet":
+        return encode_parquet(chunks)
+    raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
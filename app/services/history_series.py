@@ -0,0 +1,117 @@
+"""
+차트용 히스토리 시계열 - LLM 없이 태그 경로 → 컬럼형 배열.
+
+구간 길이와 max_points로 해상도를 정해, 버킷 집계(롤업 + 결과 캐시)나
+원본 조회 + 다운샘플링 중 빠른 경로를 선택합니다. 원본 조회는 MAX_RAW_PAGE_SIZE행까지입니다.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from app.services.downsample import DOWNSAMPLE_METHODS, downsample
+from app.services.history import (
+    AGGREGATIONS,
+    MAX_BUCKETS,
+    MAX_RAW_PAGE_SIZE,
+    RawRowLimitExceeded,
+    aggregate_buckets,
+    closed_until,
+    fetch_multi_series,
+)
+from app.services.tag_resolver import resolve_tags
+
+
+SERIES_MODES = ("auto", "bucket", "raw")
+
+# 자동 버킷 크기 후보 (초). 이보다 크면 일 단위 배수
+_NICE_BUCKETS = (1, 5, 10, 15, 30, 60, 300, 600, 900, 1800, 3600, 7200, 10800, 21600, 43200, 86400)
+
+# auto 모드에서 이 버킷 크기 미만이면 원본 + 다운샘플링이 더 정확하고 충분히 빠름
+_RAW_BELOW_SECONDS = 60
+
+
+def choose_bucket_seconds(start_ms: int, end_ms: int, max_points: int) -> int:
+    """max_points 이하가 되는 가장 작은 '보기 좋은' 버킷 크기"""
+    target = (end_ms - start_ms) / 1000 / max(1, max_points)
+    for seconds in _NICE_BUCKETS:
+        if seconds >= target:
+            return seconds
+    return int(-(-target // 86400)) * 86400
+
+
+def build_series(
+    tag_specs: list[str],
+    start_ms: int,
+    end_ms: int,
+    max_points: int = 500,
+    mode: str = "auto",
+    bucket_seconds: Optional[int] = None,
+    aggregation: str = "avg",
+    method: str = "lttb",
+) -> dict:
+    """
+    태그별 컬럼형 시계열 생성.
+
+    Returns:
+        {"start", "end", "mode", "bucket_seconds", "aggregation", "closed", "missing",
+         "series": [{"tag_path", "timestamps", "values", "original_points"}]}
+    """
+    if end_ms <= start_ms:
+        raise ValueError("end must be after start")
+    if mode not in SERIES_MODES:
+        raise ValueError(f"mode must be one of {', '.join(SERIES_MODES)}")
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"aggregation must be one of {', '.join(AGGREGATIONS)}")
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"method must be one of {', '.join(DOWNSAMPLE_METHODS)}")
+    max_points = max(2, min(max_points, MAX_BUCKETS))
+
+    if bucket_seconds is None:
+        bucket_seconds = choose_bucket_seconds(start_ms, end_ms, max_points)
+    auto = mode == "auto"
+    if auto:
+        mode = "raw" if bucket_seconds < _RAW_BELOW_SECONDS else "bucket"
+
+    tag_map, missing = resolve_tags(tag_specs)
+    fetched = {}
+    if mode == "raw":
+        # 원본은 /history/raw 페이지와 같은 행 수 상한. auto는 넘치면 버킷 집계로 전환
+        try:
+            fetched = fetch_multi_series(tag_map, start_ms, end_ms, max_rows=MAX_RAW_PAGE_SIZE)
+        except RawRowLimitExceeded:
+            if not auto:
+                raise
+            mode = "bucket"
+
+    series = []
+    if mode == "bucket":
+        for path in sorted(tag_map):
+            points = aggregate_buckets(tag_map[path], start_ms, end_ms, bucket_seconds, aggregation)
+            series.append({
+                "tag_path": path,
+                "timestamps": [ts for ts, _, _ in points],
+                "values": [value for _, value, _ in points],
+                "original_points": sum(count for _, _, count in points),
+            })
+    else:
+        for path in sorted(fetched):
+            ts, values, _ = fetched[path]
+            result = downsample(ts, values, max_points, method)
+            series.append({
+                "tag_path": path,
+                "timestamps": result.ts.tolist(),
+                "values": result.values.tolist(),
+                "original_points": result.original_count,
+            })
+
+    return {
+        "start": start_ms,
+        "end": end_ms,
+        "mode": mode,
+        "bucket_seconds": bucket_seconds if mode == "bucket" else None,
+        "aggregation": aggregation if mode == "bucket" else None,
+        "closed": end_ms <= closed_until(1000, 0),
+        "missing": missing,
+        "series": series,
+    }
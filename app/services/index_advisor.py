@@ -0,0 +1,302 @@
+"""
+인덱스 점검 / 생성 - 히스토리 파티션(sqlt_data_*)과 알람 테이블.
+
+도구가 실제로 보내는 쿼리 형태로 EXPLAIN을 실행해 전체 스캔 여부를 확인하고,
+권장 인덱스가 없으면 DB 방언에 맞는 무중단 생성 문장을 제시/실행합니다.
+  - PostgreSQL: CREATE INDEX CONCURRENTLY
+  - MariaDB/MySQL: ALTER TABLE ... ADD INDEX, ALGORITHM=INPLACE, LOCK=NONE
+
+CLI:
+    python -m app.services.index_advisor            # 점검 결과 출력
+    python -m app.services.index_advisor --apply    # 누락 인덱스 생성
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import inspect, text
+
+from app.services.history import VALUE_EXPR, to_ms
+from app.services.sql import execute_autocommit, fetch_rows, get_dialect_name, get_sql_db
+
+
+_PARTITION_PATTERN = re.compile(r"^sqlt_data_\d+_\d{4}_\d{2}$")
+
+# 테이블(또는 패턴) → 권장 인덱스 컬럼 목록. 앞 컬럼이 일치하는 기존 인덱스가 있으면 충족
+RECOMMENDED_INDEXES: dict[str, list[tuple[str, ...]]] = {
+    "sqlt_data_*": [("tagid", "t_stamp")],
+    "sqlth_te": [("tagpath",)],
+    "alarm_events": [("eventtime",), ("source", "eventtime")],
+}
+
+
+@dataclass
+class IndexFinding:
+    """점검 결과 한 건"""
+
+    table: str
+    kind: str                       # missing, unused, full_scan, ok
+    columns: list[str] = field(default_factory=list)
+    index_name: Optional[str] = None
+    detail: str = ""
+    create_sql: Optional[str] = None
+
+
+# ── 방언별 SQL ────────────────────────────────────────────────────
+
+
+def index_name(table: str, columns: tuple[str, ...]) -> str:
+    return f"ix_{table}_{'_'.join(columns)}"[:63]
+
+
+def create_index_sql(dialect: str, table: str, columns: tuple[str, ...]) -> str:
+    name = index_name(table, columns)
+    cols = ", ".join(columns)
+    if dialect == "postgresql":
+        return f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({cols})"
+    return f"ALTER TABLE {table} ADD INDEX IF NOT EXISTS {name} ({cols}), ALGORITHM=INPLACE, LOCK=NONE"
+
+
+def _is_full_scan(dialect: str, table: str, plan_rows: list[tuple], columns: list[str]) -> bool:
+    if dialect == "postgresql":
+        return any(f"Seq Scan on {table}" in str(row[0]) for row in plan_rows)
+    # MySQL/MariaDB: type 컬럼이 ALL이면 전체 스캔
+    lowered = [c.lower() for c in columns]
+    if "type" not in lowered:
+        return False
+    type_idx, table_idx = lowered.index("type"), lowered.index("table")
+    return any(row[table_idx] == table and row[type_idx] == "ALL" for row in plan_rows)
+
+
+def _explain(query: str) -> tuple[list[tuple], list[str]]:
+    with get_sql_db()._engine.connect() as conn:
+        result = conn.execute(text(f"EXPLAIN {query}"))
+        return [tuple(r) for r in result.fetchall()], list(result.keys())
+
+
+# ── 대표 쿼리 (도구 쿼리 형태) ─────────────────────────────────────
+
+
+def _probe_queries(table: str) -> list[str]:
+    now = datetime.now()
+    if _PARTITION_PATTERN.match(table):
+        start, end = to_ms(now - timedelta(days=1)), to_ms(now)
+        # get_tag_history raw / 버킷 집계와 같은 필터
+        return [
+            f"SELECT t_stamp, {VALUE_EXPR} FROM {table} "
+            f"WHERE tagid = 1 AND t_stamp >= {start} AND t_stamp <= {end} "
+            f"ORDER BY t_stamp DESC LIMIT 1000",
+        ]
+    if table == "alarm_events":
+        since = (now - timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S")
+        return [
+            f"SELECT id, eventtime, source FROM alarm_events "
+            f"WHERE eventtime >= '{since}' ORDER BY eventtime DESC LIMIT 100",
+            f"SELECT id, eventtime FROM alarm_events "
+            f"WHERE source = 'prov:default:/tag:fan1' AND eventtime >= '{since}' "
+            f"ORDER BY eventtime DESC LIMIT 1",
+        ]
+    if table == "sqlth_te":
+        return ["SELECT id, tagpath FROM sqlth_te WHERE tagpath IN ('fan1')"]
+    return []
+
+
+# ── 점검 ──────────────────────────────────────────────────────────
+
+
+def target_tables(all_tables: list[str]) -> list[str]:
+    partitions = sorted(t for t in all_tables if _PARTITION_PATTERN.match(t))
+    fixed = [t for t in ("sqlth_te", "alarm_events") if t in all_tables]
+    return fixed + partitions
+
+
+def _requirements(table: str) -> list[tuple[str, ...]]:
+    if _PARTITION_PATTERN.match(table):
+        return RECOMMENDED_INDEXES["sqlt_data_*"]
+    return RECOMMENDED_INDEXES.get(table, [])
+
+
+def _existing_indexes(inspector, table: str) -> list[tuple[str, tuple[str, ...]]]:
+    indexes = [
+        (idx["name"], tuple(c.lower() for c in idx["column_names"] if c))
+        for idx in inspector.get_indexes(table)
+    ]
+    pk = inspector.get_pk_constraint(table) or {}
+    if pk.get("constrained_columns"):
+        indexes.append((pk.get("name") or "PRIMARY", tuple(c.lower() for c in pk["constrained_columns"])))
+    return indexes
+
+
+# 미사용 인덱스 판정 근거 (finding detail) - 통계 출처별
+_UNUSED_PG = "pg_stat_user_indexes.idx_scan = 0 (통계 초기화 이후 스캔 없음)"
+_UNUSED_SYS = "sys.schema_unused_indexes: performance_schema 기준 서버 기동 이후 사용 없음"
+_UNUSED_USERSTAT = "information_schema.INDEX_STATISTICS(userstat)에 사용 기록 없음"
+
+
+def _mariadb_unused(tables: list[str]) -> Optional[tuple[str, list[tuple[str, str]]]]:
+    """
+    MariaDB/MySQL 미사용 (비고유) 인덱스와 판정 근거.
+
+    performance_schema가 켜져 있으면 sys.schema_unused_indexes, 아니면 userstat=1의
+    INDEX_STATISTICS를 사용합니다. 둘 다 없으면 None.
+    """
+    inspector = inspect(get_sql_db()._engine)
+    non_unique = [
+        (t, idx["name"]) for t in tables for idx in inspector.get_indexes(t) if not idx.get("unique")
+    ]
+    if fetch_rows("SELECT @@performance_schema")[0][0]:
+        rows = fetch_rows(
+            "SELECT object_name, index_name FROM sys.schema_unused_indexes WHERE object_schema = DATABASE()"
+        )
+        unused = {(t, i) for t, i in rows}
+        return _UNUSED_SYS, [key for key in non_unique if key in unused]
+    # userstat: 사용된 인덱스만 기록되므로 통계가 비어 있으면 판단 불가
+    used = fetch_rows("SELECT TABLE_NAME, INDEX_NAME FROM information_schema.INDEX_STATISTICS")
+    if not used:
+        return None
+    used_set = {(t, i) for t, i in used}
+    return _UNUSED_USERSTAT, [key for key in non_unique if key not in used_set]
+
+
+def _unused_indexes(dialect: str, tables: list[str]) -> Optional[tuple[str, dict[str, list[str]]]]:
+    """사용 통계상 한 번도 쓰이지 않은 (비고유) 인덱스와 판정 근거. 통계를 얻을 수 없으면 None"""
+    try:
+        if dialect == "postgresql":
+            source = _UNUSED_PG
+            rows = fetch_rows(
+                """
+                SELECT s.relname, s.indexrelname
+                FROM pg_stat_user_indexes s
+                JOIN pg_index i ON i.indexrelid = s.indexrelid
+                WHERE s.idx_scan = 0 AND NOT i.indisunique
+                """
+            )
+        else:
+            found = _mariadb_unused(tables)
+            if found is None:
+                return None
+            source, rows = found
+    except Exception as e:
+        print(f"[IndexAdvisor] 인덱스 사용 통계 조회 실패: {e}")
+        return None
+
+    wanted = set(tables)
+    result: dict[str, list[str]] = {}
+    for table, name in rows:
+        if table in wanted:
+            result.setdefault(table, []).append(name)
+    return source, result
+
+
+def inspect_indexes(tables: Optional[list[str]] = None, explain: bool = True) -> dict:
+    """
+    대상 테이블 인덱스 점검.
+
+    Args:
+        tables: 점검할 테이블 (기본: sqlth_te, alarm_events, 모든 sqlt_data_* 파티션)
+        explain: 대표 쿼리 EXPLAIN 실행 여부
+
+    Returns:
+        {"dialect", "tables_checked", "findings": [IndexFinding dict...], "unused_check"}
+    """
+    dialect = get_dialect_name()
+    engine = get_sql_db()._engine
+    inspector = inspect(engine)
+    available = inspector.get_table_names()
+    tables = [t for t in (tables or target_tables(available)) if t in available]
+
+    findings: list[IndexFinding] = []
+    for table in tables:
+        existing = _existing_indexes(inspector, table)
+        for columns in _requirements(table):
+            match = next((name for name, cols in existing if cols[: len(columns)] == columns), None)
+            if match:
+                findings.append(IndexFinding(table, "ok", list(columns), match))
+            else:
+                findings.append(IndexFinding(
+                    table, "missing", list(columns), index_name(table, columns),
+                    detail="도구 쿼리 필터를 지원하는 인덱스 없음",
+                    create_sql=create_index_sql(dialect, table, columns),
+                ))
+
+        if not explain:
+            continue
+        for query in _probe_queries(table):
+            try:
+                plan_rows, columns = _explain(query)
+            except Exception as e:
+                findings.append(IndexFinding(table, "explain_failed", detail=f"{e}"))
+                continue
+            if _is_full_scan(dialect, table, plan_rows, columns):
+                # 행 수가 적은 테이블은 플래너가 전체 스캔을 택할 수 있음 (missing과 함께 볼 것)
+                findings.append(IndexFinding(table, "full_scan", detail=query))
+
+    unused = _unused_indexes(dialect, tables)
+    if unused is not None:
+        source, by_table = unused
+        for table, names in by_table.items():
+            for name in names:
+                findings.append(IndexFinding(table, "unused", index_name=name, detail=source))
+
+    return {
+        "dialect": dialect,
+        "tables_checked": len(tables),
+        "findings": [asdict(f) for f in findings if f.kind != "ok"],
+        "ok": sum(1 for f in findings if f.kind == "ok"),
+        "unused_check": "available" if unused is not None else "unavailable",
+    }
+
+
+def apply_missing_indexes(report: dict) -> list[dict]:
+    """점검 결과의 누락 인덱스를 무중단 방식으로 생성 (테이블 잠금 최소화)"""
+    applied = []
+    for finding in report["findings"]:
+        if finding["kind"] != "missing" or not finding["create_sql"]:
+            continue
+        try:
+            execute_autocommit(finding["create_sql"])
+            applied.append({"table": finding["table"], "sql": finding["create_sql"], "status": "created"})
+        except Exception as e:
+            applied.append({"table": finding["table"], "sql": finding["create_sql"], "status": f"error: {e}"})
+    return applied
+
+
+# ── CLI ───────────────────────────────────────────────────────────
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ignition 히스토리/알람 테이블 인덱스 점검")
+    parser.add_argument("--apply", action="store_true", help="누락 인덱스 생성")
+    parser.add_argument("--no-explain", action="store_true", help="EXPLAIN 생략")
+    parser.add_argument("--json", action="store_true", help="JSON 출력")
+    parser.add_argument("tables", nargs="*", help="점검할 테이블 (기본: 전체)")
+    args = parser.parse_args(argv)
+
+    report = inspect_indexes(args.tables or None, explain=not args.no_explain)
+    if args.apply:
+        report["applied"] = apply_missing_indexes(report)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"dialect={report['dialect']} tables={report['tables_checked']} ok={report['ok']} "
+          f"unused_check={report['unused_check']}")
+    for f in report["findings"]:
+        cols = ",".join(f["columns"])
+        print(f"[{f['kind']}] {f['table']} {cols} {f['index_name'] or ''} {f['detail']}".rstrip())
+        if f["create_sql"]:
+            print(f"    {f['create_sql']};")
+    for a in report.get("applied", []):
+        print(f"[apply] {a['table']}: {a['status']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,236 @@
+"""
+실시간 알람 테이블 - OPC UA Alarms & Conditions 이벤트 구독으로 유지하는 현재 활성 알람.
+
+"현재 알람" 질문은 alarm_events 이력의 마지막 이벤트로 상태를 추정하지 않고 이 테이블에서 답합니다.
+- 구독 직후 ConditionRefresh로 Retain 상태인 조건 전체를 다시 받아 테이블을 채움
+- 이후 조건 상태 변경 이벤트마다 갱신하고, Retain=False(해제 + 확인 완료)가 되면 제거
+- 연결이 끊기면 유지 작업이 재구독하며, 그동안 테이블은 stale로 표시
+- 구독은 전용 OPC UA 세션을 사용 (태그 읽기/쓰기 세션과 분리), 실패가 이어지면 재시도 간격을 지수로 늘림
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.services.opc import get_alarm_opc_client
+
+
+@dataclass
+class ActiveAlarm:
+    """활성(또는 미확인) 알람 조건"""
+
+    key: str
+    source: str
+    condition: str
+    priority: int
+    severity: int
+    message: str
+    active: bool
+    acked: bool
+    active_since: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        for name in ("active_since", "updated_at"):
+            data[name] = data[name].strftime("%Y-%m-%d %H:%M:%S") if data[name] else None
+        return data
+
+
+def severity_to_priority(severity: int) -> int:
+    """
+    OPC UA Severity(1~1000) → Ignition priority(0 Diagnostic ~ 4 Critical).
+    Ignition은 priority를 severity 구간으로 내보내므로 200 단위로 되돌립니다.
+    """
+    return max(0, min(4, int(severity or 0) // 200))
+
+
+def _local_time(value: Any) -> Optional[datetime]:
+    """OPC UA 시각(UTC) → 로컬 naive datetime (alarm_events.eventtime과 같은 기준)"""
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone().replace(tzinfo=None)
+
+
+def _text(value: Any) -> str:
+    """LocalizedText/QualifiedName → 문자열"""
+    for attr in ("Text", "Name"):
+        if hasattr(value, attr):
+            return str(getattr(value, attr) or "")
+    return "" if value is None else str(value)
+
+
+class ActiveAlarmTable:
+    """조건 키 → ActiveAlarm (이벤트 콜백은 이벤트 루프, 조회는 도구 스레드에서 호출)"""
+
+    def __init__(self):
+        self._alarms: dict[str, ActiveAlarm] = {}
+        self._lock = threading.Lock()
+        self.connected = False
+        self.last_error: Optional[str] = None
+        self.last_event_at: Optional[float] = None
+        self.subscribed_at: Optional[float] = None
+        self.events = 0
+
+    def __len__(self) -> int:
+        return len(self._alarms)
+
+    def apply_event(self, fields: dict[str, Any]) -> None:
+        """조건 이벤트 필드(SourceName, ConditionName, ActiveState/Id, AckedState/Id, Retain 등) 반영"""
+        source = _text(fields.get("SourceName"))
+        condition = _text(fields.get("ConditionName"))
+        if not source and not condition:
+            return
+        key = str(fields.get("NodeId") or f"{source}:{condition}")
+        active = bool(fields.get("ActiveState/Id"))
+        acked = bool(fields.get("AckedState/Id"))
+        retain = fields.get("Retain")
+        event_time = _local_time(fields.get("Time"))
+
+        with self._lock:
+            self.events += 1
+            self.last_event_at = time.time()
+            # Retain=False: 해제되고 확인까지 끝나 더 이상 표시할 필요가 없는 조건
+            if retain is False or (not active and acked):
+                self._alarms.pop(key, None)
+                return
+            previous = self._alarms.get(key)
+            if active:
+                active_since = previous.active_since if previous and previous.active else event_time
+            else:
+                active_since = previous.active_since if previous else None
+            severity = int(fields.get("Severity") or 0)
+            self._alarms[key] = ActiveAlarm(
+                key=key,
+                source=source,
+                condition=condition,
+                priority=severity_to_priority(severity),
+                severity=severity,
+                message=_text(fields.get("Message")),
+                active=active,
+                acked=acked,
+                active_since=active_since,
+                updated_at=event_time,
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._alarms.clear()
+
+    def mark_subscribed(self) -> None:
+        self.connected = True
+        self.last_error = None
+        self.subscribed_at = time.time()
+
+    def mark_disconnected(self, error: str) -> None:
+        self.connected = False
+        self.last_error = error
+
+    def snapshot(
+        self, tag_path: Optional[str] = None, unacked_only: bool = False, active_only: bool = False
+    ) -> list[ActiveAlarm]:
+        """필터된 현재 알람 (priority 높은 순 → 오래된 순)"""
+        needle = tag_path.lower() if tag_path else None
+        with self._lock:
+            alarms = list(self._alarms.values())
+        if needle:
+            alarms = [a for a in alarms if needle in a.source.lower() or needle in a.condition.lower()]
+        if unacked_only:
+            alarms = [a for a in alarms if not a.acked]
+        if active_only:
+            alarms = [a for a in alarms if a.active]
+        return sorted(alarms, key=lambda a: (-a.priority, a.active_since or datetime.max))
+
+    def status(self) -> dict:
+        with self._lock:
+            alarms = list(self._alarms.values())
+        return {
+            "enabled": settings.live_alarms_enabled,
+            "connected": self.connected,
+            "last_error": self.last_error,
+            "subscribed_at": self.subscribed_at,
+            "last_event_at": self.last_event_at,
+            "events": self.events,
+            "active": sum(1 for a in alarms if a.active),
+            "unacked": sum(1 for a in alarms if not a.acked),
+            "total": len(alarms),
+        }
+
+
+_table = ActiveAlarmTable()
+_maintainer_task: Optional[asyncio.Task] = None
+
+
+def get_active_alarm_table() -> ActiveAlarmTable:
+    return _table
+
+
+# ── 구독 유지 작업 ────────────────────────────────────────────────
+
+
+def _retry_delay(failures: int) -> float:
+    """연속 실패 횟수 → 다음 확인까지 대기 (check 주기에서 2배씩, 상한 live_alarm_max_backoff_seconds)"""
+    delay = settings.live_alarm_check_seconds * 2 ** min(failures, 16)
+    return min(delay, max(settings.live_alarm_max_backoff_seconds, settings.live_alarm_check_seconds))
+
+
+async def _maintainer_loop() -> None:
+    client = get_alarm_opc_client()
+    failures = 0
+    while True:
+        if not client.alarm_subscription_alive:
+            if _table.connected:
+                _table.mark_disconnected("subscription lost")
+                print("[LiveAlarms] 구독 끊김, 재구독 시도")
+            try:
+                # ConditionRefresh가 현재 조건 전체를 다시 보내므로 비우고 시작
+                _table.reset()
+                await client.subscribe_alarms(_table.apply_event, settings.live_alarm_publishing_ms)
+                _table.mark_subscribed()
+                failures = 0
+                print(f"[LiveAlarms] 알람 구독 시작 (활성 {len(_table)}개)")
+            except Exception as e:
+                _table.mark_disconnected(str(e))
+                failures += 1
+                print(f"[LiveAlarms] 알람 구독 실패 ({failures}회, {_retry_delay(failures):.0f}초 후 재시도): {e}")
+                # 세션이 끊긴 채 연결 상태로 남아 있을 수 있으므로 다음 시도에서 새로 연결
+                # (알람 전용 세션만 닫음 - 태그 읽기/쓰기 세션은 건드리지 않음)
+                try:
+                    await client.disconnect()
+                except Exception:
+                    pass
+        await asyncio.sleep(_retry_delay(failures))
+
+
+def start_live_alarms() -> None:
+    """서버 시작 시 OPC UA 알람 구독을 백그라운드 태스크로 유지"""
+    global _maintainer_task
+    if not settings.live_alarms_enabled or _maintainer_task is not None:
+        return
+    _maintainer_task = asyncio.create_task(_maintainer_loop())
+
+
+async def stop_live_alarms() -> None:
+    global _maintainer_task
+    if _maintainer_task is None:
+        return
+    _maintainer_task.cancel()
+    try:
+        await _maintainer_task
+    except asyncio.CancelledError:
+        pass
+    _maintainer_task = None
+    client = get_alarm_opc_client()
+    try:
+        await client.unsubscribe_alarms()
+        await client.disconnect()
+    except Exception as e:
+        print(f"[LiveAlarms] 구독 해제 실패: {e}")
@@ -12,3 +12,15 @@ _opc_client = IgnitionOpcClient(
 
 def get_opc_client() -> IgnitionOpcClient:
     return _opc_client
+
+# 알람 구독 전용 세션: 구독 실패/재연결이 태그 읽기·쓰기 세션을 끊지 않도록 분리
+_alarm_opc_client = IgnitionOpcClient(
+    endpoint_url=settings.opc_endpoint,
+    username=settings.opc_username,
+    password=settings.opc_password,
+    security_policy=settings.opc_security_policy,
+)
+
+
+def get_alarm_opc_client() -> IgnitionOpcClient:
+    return _alarm_opc_client
@@ -0,0 +1,100 @@
+"""
+키셋(커서) 페이지네이션 - OFFSET 없이 마지막 행의 정렬 키 다음부터 조회.
+
+커서는 URL-safe base64로 인코딩한 JSON 토큰이며 세 가지를 담습니다.
+- k: 커서 종류 (다른 조회에 잘못 전달된 토큰 거부)
+- q: 첫 페이지의 조회 조건 (다음 페이지는 인자 대신 이 조건을 사용하므로 기간/필터가 고정됨)
+- p: 마지막으로 반환한 행의 정렬 키 (예: [eventtime, id], [t_stamp])
+
+다음 페이지 쿼리는 정렬 키 인덱스에서 바로 시작 위치를 찾으므로 몇 번째 페이지든 비용이 같습니다.
+
+토큰은 서명하지 않으므로 클라이언트가 수정할 수 있습니다. decode_cursor가 조회 종류별
+스키마(필수 키, 값 타입)로 검사하고 limit을 조회 상한으로 줄여, 수정한 토큰으로
+상한을 넘는 스캔을 하거나 KeyError/TypeError(500)를 일으킬 수 없게 합니다.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Mapping, Optional, Sequence
+
+
+@dataclass
+class Page:
+    """조회 결과 한 페이지"""
+
+    rows: list = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+# ── 커서 값 검사기 ──
+Check = Callable[[Any], bool]
+
+
+def is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def is_bool(value: Any) -> bool:
+    return isinstance(value, bool)
+
+
+def is_str(value: Any) -> bool:
+    return isinstance(value, str)
+
+
+def optional(check: Check) -> Check:
+    return lambda value: value is None or check(value)
+
+
+def is_int_list(value: Any) -> bool:
+    return isinstance(value, list) and all(is_int(v) for v in value)
+
+
+_INVALID = "잘못된 커서입니다. 이전 결과의 next_cursor 값을 그대로 전달하세요."
+
+
+def encode_cursor(kind: str, scope: dict[str, Any], position: list[Any]) -> str:
+    payload = json.dumps({"k": kind, "q": scope, "p": position}, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(
+    token: str,
+    kind: str,
+    scope_schema: Mapping[str, Check],
+    position_schema: Sequence[Check],
+    max_limit: int,
+) -> tuple[dict[str, Any], list[Any]]:
+    """
+    커서 토큰 → (조회 조건, 정렬 키 위치)
+
+    Args:
+        scope_schema: 조회 조건의 키별 검사기 (키 집합이 정확히 같아야 함, "limit" 필수)
+        position_schema: 정렬 키 위치 값별 검사기
+        max_limit: 조회 상한 - 커서의 limit이 더 크면 줄임
+
+    Raises:
+        ValueError: 형식/스키마가 잘못됐거나 다른 종류의 커서인 경우
+    """
+    try:
+        padded = token.strip() + "=" * (-len(token.strip()) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError(_INVALID)
+    if not isinstance(payload, dict) or payload.get("k") != kind:
+        raise ValueError(f"{kind} 조회용 커서가 아닙니다.")
+    scope, position = payload.get("q"), payload.get("p")
+    if not isinstance(scope, dict) or not isinstance(position, list):
+        raise ValueError(_INVALID)
+    if set(scope) != set(scope_schema) or not all(check(scope[key]) for key, check in scope_schema.items()):
+        raise ValueError(_INVALID)
+    if len(position) != len(position_schema) or not all(check(v) for check, v in zip(position_schema, position)):
+        raise ValueError(_INVALID)
+    if not is_int(scope.get("limit")) or scope["limit"] < 1:
+        raise ValueError(_INVALID)
+    scope["limit"] = min(scope["limit"], max_limit)
+    return scope, position
@@ -0,0 +1,275 @@
+"""
+db_query 가드 - LLM이 작성한 임의 SELECT로부터 히스토리안 DB 보호.
+
+1. 문장 검사: 주석 제거, 단일 문장, SELECT/WITH만 허용, 쓰기/위험 키워드 단어 경계 차단
+2. LIMIT 자동 추가 또는 상한으로 축소
+3. EXPLAIN으로 비용/예상 행 수 확인 후 임계값 초과 시 거부 (EXPLAIN 실패는 통과)
+4. 문장별 실행 제한 시간
+   - PostgreSQL: SET LOCAL statement_timeout
+   - MariaDB: SET STATEMENT max_statement_time=N FOR ...
+5. 거부/시간 초과/느린 쿼리는 JSONL 느린 쿼리 로그에 기록
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+# 파라미터 없이 DBAPI에 그대로 전달 - psycopg2/pymysql(pyformat)이 LIKE '%FAN1%'의 %를
+# 포맷 문자로 해석하지 않도록
+_RAW_SQL = {"no_parameters": True}
+
+
+class QueryRejected(ValueError):
+    """가드 규칙 위반 - 메시지는 에이전트가 쿼리를 고칠 수 있도록 작성"""
+
+
+# 문자열 리터럴 / 인용 식별자 / 주석
+_TOKEN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/", re.S)
+
+_FORBIDDEN_KEYWORDS = re.compile(
+    r"\b(insert|update|delete|drop|alter|create|truncate|grant|revoke|merge|call|"
+    r"exec|execute|copy|lock|set|load|handler|rename|vacuum|into|outfile|dumpfile)\b",
+    re.I,
+)
+_FORBIDDEN_FUNCTIONS = re.compile(
+    r"\b(pg_sleep|sleep|benchmark|pg_read_file|pg_read_binary_file|load_file|"
+    r"pg_terminate_backend|pg_cancel_backend|dblink)\s*\(",
+    re.I,
+)
+_LIMIT_TAIL = re.compile(
+    r"\blimit\s+(\d+|all)(?:\s*,\s*(\d+))?(?:\s+offset\s+\d+)?\s*$", re.I
+)
+_FETCH_TAIL = re.compile(r"\bfetch\s+(?:first|next)\s+(\d+)\s+rows?\s+only\s*$", re.I)
+
+_log_lock = threading.Lock()
+
+
+# ── 문장 검사 / LIMIT ─────────────────────────────────────────────
+
+
+def _strip_and_mask(query: str) -> tuple[str, str]:
+    """
+    (주석 제거본, 주석 제거 + 리터럴 마스킹본) 반환. 두 문자열의 위치는 일치합니다.
+    마스킹본은 키워드 검사용으로 문자열 안의 'delete' 등에 반응하지 않게 합니다.
+    """
+    clean: list[str] = []
+    masked: list[str] = []
+    pos = 0
+    for m in _TOKEN.finditer(query):
+        clean.append(query[pos:m.start()])
+        masked.append(query[pos:m.start()])
+        token = m.group()
+        if token.startswith(("--", "/*")):
+            clean.append(" ")
+            masked.append(" ")
+        else:
+            clean.append(token)
+            masked.append(token[0] + "x" * (len(token) - 2) + token[-1])
+        pos = m.end()
+    clean.append(query[pos:])
+    masked.append(query[pos:])
+    return "".join(clean), "".join(masked)
+
+
+def prepare_query(query: str, max_rows: Optional[int] = None) -> str:
+    """
+    쿼리를 검사하고 LIMIT을 적용한 실행용 SQL 반환.
+
+    Raises:
+        QueryRejected: 읽기 전용 단일 SELECT/WITH 문장이 아닌 경우
+    """
+    max_rows = max_rows or settings.db_query_max_rows
+    clean, masked = _strip_and_mask(query)
+    clean, masked = clean.strip(), masked.strip()
+    while masked.endswith(";"):
+        clean, masked = clean[:-1].rstrip(), masked[:-1].rstrip()
+
+    if not masked:
+        raise QueryRejected("Read-only allowed: empty query.")
+    if ";" in masked:
+        raise QueryRejected("Read-only allowed: only a single statement per call.")
+    first = re.match(r"[\s(]*(\w*)", masked).group(1).lower()
+    if first not in ("select", "with"):
+        raise QueryRejected("Read-only allowed: query must start with SELECT or WITH.")
+    keyword = _FORBIDDEN_KEYWORDS.search(masked)
+    if keyword:
+        raise QueryRejected(f"Read-only allowed: '{keyword.group(1).upper()}' is not permitted.")
+    function = _FORBIDDEN_FUNCTIONS.search(masked)
+    if function:
+        raise QueryRejected(f"Read-only allowed: function '{function.group(1)}' is not permitted.")
+
+    limit = _LIMIT_TAIL.search(masked)
+    if limit:
+        # MySQL "LIMIT offset, count" 형식이면 두 번째 숫자가 행 수. PostgreSQL "LIMIT ALL"은 상한으로 교체
+        group = 2 if limit.group(2) else 1
+        rows = limit.group(group)
+        if not rows.isdigit() or int(rows) > max_rows:
+            clean = clean[: limit.start(group)] + str(max_rows) + clean[limit.end(group):]
+        return clean
+    fetch = _FETCH_TAIL.search(masked)
+    if fetch:
+        if int(fetch.group(1)) > max_rows:
+            clean = clean[: fetch.start(1)] + str(max_rows) + clean[fetch.end(1):]
+        return clean
+    return f"{clean}\nLIMIT {max_rows}"
+
+
+# ── EXPLAIN ───────────────────────────────────────────────────────
+
+
+def _walk_pg_plan(node: dict, seq_scans: list[str]) -> float:
+    rows = float(node.get("Plan Rows", 0))
+    if node.get("Node Type") == "Seq Scan" and node.get("Relation Name"):
+        seq_scans.append(node["Relation Name"])
+    for child in node.get("Plans", []):
+        rows = max(rows, _walk_pg_plan(child, seq_scans))
+    return rows
+
+
+def explain_estimate(engine: Engine, sql: str) -> dict:
+    """
+    EXPLAIN(미실행)으로 비용/예상 행 수 추정.
+
+    Returns:
+        {"cost": float | None, "rows": float, "full_scans": [table, ...]}
+    """
+    dialect = engine.dialect.name
+    with engine.connect() as conn:
+        if dialect == "postgresql":
+            plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", execution_options=_RAW_SQL).fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            top = plan[0]["Plan"]
+            full_scans: list[str] = []
+            rows = _walk_pg_plan(top, full_scans)
+            return {"cost": float(top["Total Cost"]), "rows": rows, "full_scans": full_scans}
+
+        result = conn.exec_driver_sql(f"EXPLAIN {sql}", execution_options=_RAW_SQL)
+        keys = [k.lower() for k in result.keys()]
+        rows, full_scans = 0.0, []
+        for row in result.fetchall():
+            record = dict(zip(keys, row))
+            rows += float(record.get("rows") or 0)
+            if record.get("type") == "ALL" and record.get("table"):
+                full_scans.append(str(record["table"]))
+        return {"cost": None, "rows": rows, "full_scans": full_scans}
+
+
+def check_estimate(estimate: dict) -> None:
+    """임계값 초과 시 QueryRejected (에이전트가 고칠 수 있는 안내 포함)"""
+    reasons = []
+    if estimate["cost"] is not None and estimate["cost"] > settings.db_query_max_cost:
+        reasons.append(f"estimated cost {estimate['cost']:,.0f} > {settings.db_query_max_cost:,.0f}")
+    # PostgreSQL은 LIMIT이 비용에 반영되므로 비용으로 판단하고, 행 수는 비용이 없을 때만 사용
+    if estimate["cost"] is None and estimate["rows"] > settings.db_query_max_plan_rows:
+        reasons.append(f"estimated rows {estimate['rows']:,.0f} > {settings.db_query_max_plan_rows:,}")
+    if not reasons:
+        return
+    scans = f" Full scan on: {', '.join(sorted(set(estimate['full_scans'])))}." if estimate["full_scans"] else ""
+    raise QueryRejected(
+        f"Query too expensive ({'; '.join(reasons)}).{scans} "
+        "Filter on indexed columns (sqlt_data_*: tagid + t_stamp range, alarm_events: eventtime range) "
+        "or use get_tag_history_buckets / get_tag_statistics / alarm tools instead."
+    )
+
+
+# ── 실행 ──────────────────────────────────────────────────────────
+
+
+def _with_timeout(engine: Engine, sql: str) -> str:
+    seconds = settings.db_query_timeout_seconds
+    if engine.dialect.name == "postgresql":
+        return sql  # SET LOCAL로 같은 트랜잭션에 적용
+    if getattr(engine.dialect, "is_mariadb", False):
+        return f"SET STATEMENT max_statement_time={seconds:g} FOR {sql}"
+    # MySQL: 옵티마이저 힌트 (SELECT 문장에만 적용 가능)
+    if sql[:6].lower() == "select":
+        return f"SELECT /*+ MAX_EXECUTION_TIME({int(seconds * 1000)}) */{sql[6:]}"
+    return sql
+
+
+def _is_timeout(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(
+        marker in message
+        for marker in ("statement timeout", "max_statement_time", "max_execution_time", "query execution was interrupted")
+    )
+
+
+def _format_value(value: Any) -> Any:
+    if isinstance(value, str) and len(value) > 300:
+        return value[:300] + "..."
+    return value
+
+
+def log_query(event: str, sql: str, **fields: Any) -> None:
+    """느린 쿼리 로그(JSONL)에 기록. 로그 실패는 무시"""
+    path = settings.db_query_slow_log_path
+    if not path:
+        return
+    record = {"time": datetime.now().isoformat(timespec="seconds"), "event": event, "query": sql, **fields}
+    try:
+        with _log_lock:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    except Exception as e:
+        print(f"[QueryGuard] 느린 쿼리 로그 기록 실패: {e}")
+
+
+def run_guarded(engine: Engine, query: str) -> str:
+    """
+    가드를 적용해 쿼리 실행. 결과는 SQLDatabase.run()과 같은 튜플 리스트 문자열.
+
+    Raises:
+        QueryRejected: 문장 검사 또는 비용 검사 실패, 시간 초과
+    """
+    sql = prepare_query(query)
+
+    estimate: Optional[dict] = None
+    try:
+        estimate = explain_estimate(engine, sql)
+    except Exception as e:
+        # EXPLAIN 실패는 치명적이지 않음 (실제 실행에서 오류가 드러남)
+        print(f"[QueryGuard] EXPLAIN 실패, 비용 검사 생략: {e}")
+    if estimate is not None:
+        try:
+            check_estimate(estimate)
+        except QueryRejected as e:
+            log_query("rejected", sql, reason=str(e), **estimate)
+            raise
+
+    started = time.perf_counter()
+    try:
+        with engine.connect() as conn, conn.begin():
+            if engine.dialect.name == "postgresql":
+                timeout_ms = int(settings.db_query_timeout_seconds * 1000)
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+            result = conn.exec_driver_sql(_with_timeout(engine, sql), execution_options=_RAW_SQL)
+            rows = result.fetchall() if result.returns_rows else []
+    except Exception as e:
+        elapsed_ms = int((time.perf_counter() - started) * 1000)
+        if _is_timeout(e):
+            log_query("timeout", sql, duration_ms=elapsed_ms, estimate=estimate)
+            raise QueryRejected(
+                f"Query cancelled after {settings.db_query_timeout_seconds:g}s timeout. "
+                "Narrow the time range, filter on tagid/t_stamp or eventtime, "
+                "or use an aggregation tool."
+            ) from e
+        log_query("error", sql, duration_ms=elapsed_ms, error=str(e))
+        raise
+
+    elapsed_ms = int((time.perf_counter() - started) * 1000)
+    if elapsed_ms >= settings.db_query_slow_ms:
+        log_query("slow", sql, duration_ms=elapsed_ms, rows=len(rows), estimate=estimate)
+    return str([tuple(_format_value(v) for v in row) for row in rows])
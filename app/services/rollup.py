@@ -0,0 +1,458 @@
+"""
+태그 히스토리 롤업 - 시간별/일별 집계 테이블을 증분 유지.
+
+sqlt_data_* 원본 파티션을 t_stamp 워터마크 기준으로 따라가며 tagid별
+count, sum, min, max, first, last, 시간가중평균(twa)을 롤업 테이블에 기록합니다.
+범위 계획기(history.aggregate_buckets)는 요청 해상도를 만족하는 가장 거친 롤업을
+자동으로 선택해 월 단위 질문도 원본 스캔 없이 응답하고, 시간가중평균
+(history.time_weighted_average)은 twa 컬럼을 사용합니다.
+유지 작업은 워커마다 실행되지만 DB advisory lock을 잡은 한 곳만 갱신하며,
+버킷은 서머타임과 무관한 표준시 오프셋(history.local_offset_ms)에 맞춥니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.history import (
+    VALUE_EXPR,
+    Bucket,
+    local_offset_ms,
+    plan_partitions,
+    to_ms,
+)
+from app.services.sql import advisory_lock, execute_statements, fetch_rows
+
+
+# 롤업 레벨: 이름 → (버킷 크기 초, 테이블명). 거친 레벨이 먼저 오도록 정렬
+ROLLUP_LEVELS: dict[str, tuple[int, str]] = {
+    "daily": (86400, "tag_rollup_daily"),
+    "hourly": (3600, "tag_rollup_hourly"),
+}
+
+WATERMARK_TABLE = "tag_rollup_watermark"
+
+# 워커 중 한 곳만 롤업을 갱신하도록 잡는 DB advisory lock 이름
+ROLLUP_LOCK = "tag_rollup_maintainer"
+
+_ROLLUP_COLUMNS = (
+    "tagid, bucket_start, sample_count, value_sum, value_min, value_max, "
+    "first_ts, first_value, last_ts, last_value, twa"
+)
+
+# 레벨별 워터마크 캐시 (이 시각 이전 버킷은 롤업 완료)
+_watermarks: dict[str, int] = {}
+_watermarks_loaded: bool = False
+
+# 레벨별 태그 마지막 값 (다음 버킷의 시간가중평균 선행 구간 계산용)
+_carry: dict[str, dict[int, float]] = {}
+
+_maintainer_task: Optional[asyncio.Task] = None
+
+
+# ── 스키마 / 워터마크 ─────────────────────────────────────────────
+
+
+def ensure_rollup_tables() -> None:
+    """롤업 테이블과 워터마크 테이블 생성 (없을 때만)"""
+    statements = []
+    for _, table in ROLLUP_LEVELS.values():
+        statements.append((
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                tagid INTEGER NOT NULL,
+                bucket_start BIGINT NOT NULL,
+                sample_count INTEGER NOT NULL,
+                value_sum DOUBLE PRECISION,
+                value_min DOUBLE PRECISION,
+                value_max DOUBLE PRECISION,
+                first_ts BIGINT,
+                first_value DOUBLE PRECISION,
+                last_ts BIGINT,
+                last_value DOUBLE PRECISION,
+                twa DOUBLE PRECISION,
+                PRIMARY KEY (tagid, bucket_start)
+            )
+            """,
+            None,
+        ))
+    statements.append((
+        f"""
+        CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+            level VARCHAR(16) PRIMARY KEY,
+            t_stamp BIGINT NOT NULL
+        )
+        """,
+        None,
+    ))
+    execute_statements(statements)
+
+
+def _load_watermarks() -> None:
+    global _watermarks_loaded
+    try:
+        rows = fetch_rows(f"SELECT level, t_stamp FROM {WATERMARK_TABLE}")
+        _watermarks.update({level: int(ts) for level, ts in rows})
+    except Exception as e:
+        print(f"[Rollup] 워터마크 조회 실패 (롤업 미사용): {e}")
+    _watermarks_loaded = True
+
+
+def get_watermark(level: str) -> Optional[int]:
+    """해당 레벨에서 롤업이 완료된 시각 (epoch ms, 미포함). 없으면 None"""
+    if not settings.rollup_enabled:
+        return None
+    if not _watermarks_loaded:
+        _load_watermarks()
+    return _watermarks.get(level)
+
+
+def _save_watermark(level: str, ts_ms: int, extra: list) -> None:
+    statements = list(extra)
+    statements.append((f"DELETE FROM {WATERMARK_TABLE} WHERE level = :level", {"level": level}))
+    statements.append((
+        f"INSERT INTO {WATERMARK_TABLE} (level, t_stamp) VALUES (:level, :ts)",
+        {"level": level, "ts": ts_ms},
+    ))
+    execute_statements(statements)
+    _watermarks[level] = ts_ms
+
+
+# ── 롤업 계산 (NumPy) ─────────────────────────────────────────────
+
+
+def compute_rollup_rows(
+    tagids: np.ndarray,
+    ts: np.ndarray,
+    values: np.ndarray,
+    bucket_ms: int,
+    offset_ms: int,
+    carry: dict[int, float],
+) -> list[dict]:
+    """
+    원본 샘플을 (tagid, 버킷)별 롤업 행으로 변환.
+
+    시간가중평균은 각 샘플 값이 다음 샘플(또는 버킷 끝)까지 유지된다고 보고 계산하며,
+    버킷 시작부터 첫 샘플까지는 직전 값(같은 태그의 이전 샘플 또는 carry)을 사용합니다.
+    carry는 태그별 마지막 값으로 갱신됩니다.
+
+    Args:
+        tagids, ts, values: 같은 길이의 배열 (정렬 불필요, NaN 값은 제외)
+        bucket_ms: 버킷 크기 (ms)
+        offset_ms: 로컬 시각 정렬 오프셋
+        carry: 태그별 직전 값 (입력 구간 이전 마지막 값)
+    """
+    tagids = np.asarray(tagids, dtype=np.int64)
+    ts = np.asarray(ts, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    mask = ~np.isnan(values)
+    tagids, ts, values = tagids[mask], ts[mask], values[mask]
+    if len(ts) == 0:
+        return []
+
+    order = np.lexsort((ts, tagids))
+    tagids, ts, values = tagids[order], ts[order], values[order]
+    buckets = (ts + offset_ms) // bucket_ms * bucket_ms - offset_ms
+    bucket_end = buckets + bucket_ms
+
+    # 각 샘플의 유지 구간: 다음 샘플(같은 태그) 또는 버킷 끝까지
+    same_tag_next = np.r_[tagids[1:] == tagids[:-1], False]
+    next_ts = np.where(same_tag_next, np.r_[ts[1:], 0], bucket_end)
+    seg_end = np.minimum(next_ts, bucket_end)
+    area = values * (seg_end - ts)
+
+    group_start = np.flatnonzero(
+        np.r_[True, (tagids[1:] != tagids[:-1]) | (buckets[1:] != buckets[:-1])]
+    )
+    group_end = np.r_[group_start[1:], len(ts)] - 1
+
+    counts = np.diff(np.r_[group_start, len(ts)])
+    sums = np.add.reduceat(values, group_start)
+    mins = np.minimum.reduceat(values, group_start)
+    maxs = np.maximum.reduceat(values, group_start)
+    areas = np.add.reduceat(area, group_start)
+
+    rows = []
+    for g, (lo, hi) in enumerate(zip(group_start.tolist(), group_end.tolist())):
+        tagid = int(tagids[lo])
+        b_start = int(buckets[lo])
+        # 버킷 시작 ~ 첫 샘플 구간의 값: 같은 태그의 이전 샘플 또는 carry
+        if lo > 0 and tagids[lo - 1] == tagid:
+            lead_value: Optional[float] = float(values[lo - 1])
+        else:
+            lead_value = carry.get(tagid)
+        lead = int(ts[lo]) - b_start
+        if lead_value is not None:
+            twa = (float(areas[g]) + lead * lead_value) / bucket_ms
+        else:
+            covered = b_start + bucket_ms - int(ts[lo])
+            twa = float(areas[g]) / covered if covered else float(values[lo])
+
+        rows.append({
+            "tagid": tagid,
+            "bucket_start": b_start,
+            "sample_count": int(counts[g]),
+            "value_sum": float(sums[g]),
+            "value_min": float(mins[g]),
+            "value_max": float(maxs[g]),
+            "first_ts": int(ts[lo]),
+            "first_value": float(values[lo]),
+            "last_ts": int(ts[hi]),
+            "last_value": float(values[hi]),
+            "twa": twa,
+        })
+        carry[tagid] = float(values[hi])
+
+    return rows
+
+
+def _fetch_raw(start_ms: int, end_ms: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    tagids, ts, values = [], [], []
+    for part in plan_partitions(start_ms, end_ms):
+        rows = fetch_rows(
+            f"""
+            SELECT tagid, t_stamp, {VALUE_EXPR}
+            FROM {part.table}
+            WHERE t_stamp >= {part.start_ms} AND t_stamp < {part.end_ms}
+            """
+        )
+        for tagid, t_stamp, value in rows:
+            tagids.append(tagid)
+            ts.append(t_stamp)
+            values.append(np.nan if value is None else value)
+    return (
+        np.asarray(tagids, dtype=np.int64),
+        np.asarray(ts, dtype=np.int64),
+        np.asarray(values, dtype=np.float64),
+    )
+
+
+def _load_carry(level: str, table: str) -> dict[int, float]:
+    if level not in _carry:
+        rows = fetch_rows(
+            f"""
+            SELECT r.tagid, r.last_value
+            FROM {table} r
+            JOIN (SELECT tagid, MAX(bucket_start) AS b FROM {table} GROUP BY tagid) m
+              ON r.tagid = m.tagid AND r.bucket_start = m.b
+            """
+        )
+        _carry[level] = {int(t): float(v) for t, v in rows if v is not None}
+    return _carry[level]
+
+
+def _floor_to_level(ts_ms: int, bucket_ms: int, offset_ms: int) -> int:
+    return (ts_ms + offset_ms) // bucket_ms * bucket_ms - offset_ms
+
+
+def refresh_level(level: str, now: Optional[datetime] = None) -> int:
+    """
+    한 레벨의 롤업을 워터마크부터 마지막 완료 버킷까지 증분 계산.
+
+    Returns:
+        기록된 롤업 행 수
+    """
+    bucket_seconds, table = ROLLUP_LEVELS[level]
+    bucket_ms = bucket_seconds * 1000
+    offset_ms = local_offset_ms()
+    now = now or datetime.now()
+
+    # 늦게 들어오는 히스토리안 버퍼를 고려해 settle 시간 이후의 완료 버킷까지만 계산
+    settled = to_ms(now - timedelta(seconds=settings.rollup_settle_seconds))
+    target = _floor_to_level(settled, bucket_ms, offset_ms)
+
+    watermark = get_watermark(level)
+    if watermark is None:
+        backfill = to_ms(now - timedelta(days=settings.rollup_backfill_days))
+        watermark = _floor_to_level(backfill, bucket_ms, offset_ms)
+
+    carry = _load_carry(level, table)
+    step_ms = max(settings.rollup_batch_hours * 3600 * 1000, bucket_ms)
+    written = 0
+
+    while watermark < target:
+        chunk_end = min(target, _floor_to_level(watermark + step_ms, bucket_ms, offset_ms))
+        if chunk_end <= watermark:
+            chunk_end = min(target, watermark + bucket_ms)
+
+        tagids, ts, values = _fetch_raw(watermark, chunk_end)
+        rows = compute_rollup_rows(tagids, ts, values, bucket_ms, offset_ms, carry)
+
+        # 재실행 시에도 중복이 생기지 않도록 구간 삭제 후 삽입 (워터마크와 같은 트랜잭션)
+        placeholders = ", ".join(f":{c.strip()}" for c in _ROLLUP_COLUMNS.split(","))
+        _save_watermark(level, chunk_end, [
+            (
+                f"DELETE FROM {table} WHERE bucket_start >= :lo AND bucket_start < :hi",
+                {"lo": watermark, "hi": chunk_end},
+            ),
+            (f"INSERT INTO {table} ({_ROLLUP_COLUMNS}) VALUES ({placeholders})", rows),
+        ])
+        written += len(rows)
+        watermark = chunk_end
+
+    return written
+
+
+def refresh_rollups() -> dict[str, int]:
+    """
+    모든 레벨 롤업 증분 갱신 (백그라운드 유지 작업에서 호출).
+
+    워커마다 유지 작업이 돌지만 DB advisory lock을 잡은 한 곳만 계산하고, 나머지는
+    워터마크만 다시 읽어 범위 계획기가 최신 롤업을 쓰게 합니다.
+    """
+    ensure_rollup_tables()
+    with advisory_lock(ROLLUP_LOCK) as leader:
+        # 다른 워커가 진행시킨 워터마크 반영 (리더도 이어서 계산할 위치를 다시 읽음)
+        _load_watermarks()
+        if not leader:
+            # 다른 워커가 계산한 구간이 생기므로 carry는 다음에 리더가 될 때 테이블에서 다시 읽음
+            _carry.clear()
+            return {}
+        result = {}
+        for level in reversed(list(ROLLUP_LEVELS)):
+            started = time.perf_counter()
+            result[level] = refresh_level(level)
+            if result[level]:
+                elapsed = time.perf_counter() - started
+                print(f"[Rollup] {level}: {result[level]}개 행 갱신 ({elapsed:.1f}s)")
+        return result
+
+
+# ── 범위 계획기 연동 ──────────────────────────────────────────────
+
+
+def plan_rollup(
+    start_ms: int, end_ms: int, bucket_seconds: int
+) -> Optional[tuple[str, int, int]]:
+    """
+    요청 해상도를 만족하는 가장 거친 롤업 레벨과 그 레벨로 처리할 구간 선택.
+
+    bucket_seconds가 레벨 크기의 배수일 때만 사용하며, 구간은 레벨 경계에 정렬되고
+    워터마크 이전으로 제한됩니다. 나머지 앞/뒤 구간은 호출자가 원본에서 계산합니다.
+
+    Returns:
+        (레벨, 롤업 구간 시작, 롤업 구간 끝) 또는 None
+    """
+    offset_ms = local_offset_ms()
+    for level, (level_seconds, _) in ROLLUP_LEVELS.items():
+        if bucket_seconds % level_seconds != 0:
+            continue
+        watermark = get_watermark(level)
+        if watermark is None:
+            continue
+        level_ms = level_seconds * 1000
+        lo = -_floor_to_level(-start_ms, level_ms, -offset_ms)  # 올림
+        hi = min(_floor_to_level(end_ms, level_ms, offset_ms), watermark)
+        if hi > lo:
+            return level, lo, hi
+    return None
+
+
+def fetch_rollup_buckets(
+    level: str, tag_clause: str, start_ms: int, end_ms: int
+) -> list[Bucket]:
+    """롤업 테이블의 행을 부분 집계(Bucket)로 반환 (bucket_start 기준)"""
+    _, table = ROLLUP_LEVELS[level]
+    rows = fetch_rows(
+        f"""
+        SELECT bucket_start, sample_count, value_sum, value_min, value_max,
+               first_ts, first_value, last_ts, last_value
+        FROM {table}
+        WHERE {tag_clause} AND bucket_start >= {start_ms} AND bucket_start < {end_ms}
+        """
+    )
+    return [
+        Bucket(
+            start_ms=int(b),
+            count=int(n),
+            total=float(s or 0.0),
+            minimum=mn,
+            maximum=mx,
+            first_ts=None if fts is None else int(fts),
+            first_value=fv,
+            last_ts=None if lts is None else int(lts),
+            last_value=lv,
+        )
+        for b, n, s, mn, mx, fts, fv, lts, lv in rows
+    ]
+
+
+def rollup_time_weighted(
+    level: str, tag_clause: str, start_ms: int, end_ms: int, prior: Optional[float]
+) -> tuple[float, float]:
+    """
+    롤업 twa 컬럼으로 [start, end) 구간의 (값 × 시간 합, 값이 알려진 시간) - 초 단위.
+
+    값 변경이 없어 행이 없는 버킷은 직전 값(prior 또는 앞 버킷의 last_value)이 유지된
+    것으로 봅니다. 직전 값을 모르는 첫 버킷은 첫 샘플 이후 구간만 셉니다.
+    """
+    level_seconds, table = ROLLUP_LEVELS[level]
+    bucket_ms = level_seconds * 1000
+    rows = fetch_rows(
+        f"""
+        SELECT bucket_start, twa, first_ts, last_value
+        FROM {table}
+        WHERE {tag_clause} AND bucket_start >= {start_ms} AND bucket_start < {end_ms}
+        ORDER BY bucket_start, last_ts
+        """
+    )
+    area = covered = 0.0
+    held, cursor = prior, start_ms
+    for bucket_start, twa, first_ts, last_value in rows:
+        bucket_start = int(bucket_start)
+        if bucket_start >= cursor and twa is not None:
+            if held is not None and bucket_start > cursor:
+                area += held * (bucket_start - cursor)
+                covered += bucket_start - cursor
+            weight = bucket_ms if held is not None else bucket_start + bucket_ms - int(first_ts)
+            area += float(twa) * weight
+            covered += weight
+            cursor = bucket_start + bucket_ms
+        # 같은 버킷의 다른 이력 ID 행은 마지막 값만 이어받음
+        if last_value is not None:
+            held = float(last_value)
+    if held is not None and cursor < end_ms:
+        area += held * (end_ms - cursor)
+        covered += end_ms - cursor
+    return area / 1000.0, covered / 1000.0
+
+
+# ── 백그라운드 유지 작업 ──────────────────────────────────────────
+
+
+async def _maintainer_loop() -> None:
+    while True:
+        try:
+            await asyncio.to_thread(refresh_rollups)
+        except Exception as e:
+            print(f"[Rollup] 롤업 갱신 실패: {e}")
+            # 실패한 구간의 carry는 신뢰할 수 없으므로 다음 주기에 테이블에서 다시 읽음
+            _carry.clear()
+        await asyncio.sleep(settings.rollup_interval_seconds)
+
+
+def start_rollup_maintainer() -> None:
+    """서버 시작 시 롤업 유지 작업을 백그라운드 태스크로 실행"""
+    global _maintainer_task
+    if not settings.rollup_enabled or _maintainer_task is not None:
+        return
+    _maintainer_task = asyncio.create_task(_maintainer_loop())
+    print(f"[Rollup] 유지 작업 시작 (주기 {settings.rollup_interval_seconds}s)")
+
+
+async def stop_rollup_maintainer() -> None:
+    global _maintainer_task
+    if _maintainer_task is None:
+        return
+    _maintainer_task.cancel()
+    try:
+        await _maintainer_task
+    except asyncio.CancelledError:
+        pass
+    _maintainer_task = None
@@ -1,4 +1,8 @@
+from contextlib import contextmanager
+from typing import Iterator
+
 from langchain_community.utilities import SQLDatabase
+from sqlalchemy import text
 
 from app.core.config import settings
 
@@ -18,3 +22,91 @@ def get_sql_db() -> SQLDatabase:
     if _sql_db is None:
         _sql_db = SQLDatabase.from_uri(build_db_uri(), sample_rows_in_table_info=0)
     return _sql_db
+
+
+def fetch_rows(query: str, parameters: dict | None = None) -> list[tuple]:
+    """
+    SQL 실행 후 행을 튜플 리스트로 반환.
+
+    SQLDatabase.run()은 결과를 문자열로 직렬화하므로, 서버 측에서 결과를
+    가공해야 하는 서비스(집계, 다운샘플링 등)는 이 함수를 사용합니다.
+    """
+    with get_sql_db()._engine.connect() as conn:
+        result = conn.execute(text(query), parameters or {})
+        if not result.returns_rows:
+            return []
+        return [tuple(row) for row in result.fetchall()]
+
+
+def stream_rows(
+    query: str, parameters: dict | None = None, chunk_size: int = 5000
+) -> Iterator[list[tuple]]:
+    """
+    서버 측 커서(stream_results)로 결과를 chunk_size 행씩 나눠 반환.
+
+    전체 결과를 메모리에 올리지 않으므로 대용량 내보내기에 사용합니다.
+    제너레이터가 끝나거나 닫힐 때까지 연결을 점유합니다.
+    """
+    with get_sql_db()._engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(
+            text(query), parameters or {}
+        )
+        try:
+            for partition in result.partitions(chunk_size):
+                yield [tuple(row) for row in partition]
+        finally:
+            result.close()
+
+
+def execute_statements(statements: list[tuple[str, dict | list[dict] | None]]) -> None:
+    """
+    DDL/DML 문장들을 하나의 트랜잭션으로 실행.
+
+    각 항목은 (SQL, parameters) 튜플이며, parameters가 리스트면 executemany로 실행됩니다.
+    """
+    with get_sql_db()._engine.begin() as conn:
+        for query, parameters in statements:
+            if isinstance(parameters, list) and not parameters:
+                continue
+            conn.execute(text(query), parameters or {})
+
+
+def execute_autocommit(query: str) -> None:
+    """
+    트랜잭션 밖에서 단일 문장 실행 (PostgreSQL CREATE INDEX CONCURRENTLY 등).
+    """
+    with get_sql_db()._engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(query))
+
+
+def get_dialect_name() -> str:
+    """'postgresql' 또는 'mysql' / 'mariadb'"""
+    return get_sql_db()._engine.dialect.name
+
+
+@contextmanager
+def advisory_lock(name: str) -> Iterator[bool]:
+    """
+    이름 기반 DB 전역 잠금 (대기 없이 시도). 획득하면 True, 다른 연결이 보유 중이면 False.
+
+    여러 워커/호스트 중 한 곳에서만 실행해야 하는 유지 작업(롤업 갱신 등)에 사용합니다.
+    PostgreSQL pg_try_advisory_lock / MariaDB GET_LOCK이며, 연결이 끊기면 서버가 자동 해제합니다.
+    잠금을 지원하지 않는 DB(SQLite 등)는 단일 프로세스로 보고 항상 True.
+    """
+    with get_sql_db()._engine.connect() as conn:
+        dialect = conn.dialect.name
+        if dialect == "postgresql":
+            acquire = "SELECT pg_try_advisory_lock(hashtext(:name))"
+            release = "SELECT pg_advisory_unlock(hashtext(:name))"
+        elif dialect in ("mysql", "mariadb"):
+            acquire, release = "SELECT GET_LOCK(:name, 0)", "SELECT RELEASE_LOCK(:name)"
+        else:
+            yield True
+            return
+        acquired = bool(conn.execute(text(acquire), {"name": name}).scalar())
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(text(release), {"name": name})
+                conn.commit()
@@ -0,0 +1,146 @@
+"""
+태그 경로 → sqlth_te 히스토리 ID 해석.
+
+sqlth_te.tagpath는 provider 없이 소문자로 저장됩니다 (예: "line1/fan/fan1").
+OPC/사용자 경로("[default]Line1/FAN/FAN1")를 같은 형태로 정규화해 조회하며,
+태그가 재생성되면 같은 경로에 여러 ID(retired 포함)가 생기므로 경로별 ID 목록을 반환합니다.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from typing import Iterable
+
+from app.services.sql import fetch_rows
+
+
+# 해석 결과 캐시 TTL (초) - 태그 생성/삭제는 드물게 일어남
+_CACHE_TTL = 300.0
+
+# 패턴 확장 시 기본 최대 태그 수
+MAX_PATTERN_TAGS = 50
+
+_PROVIDER_PATTERN = re.compile(r"^\s*\[[^\]]*\]")
+
+_cache: dict[str, tuple[float, tuple[int, ...]]] = {}
+
+
+def normalize_tag_path(path: str) -> str:
+    """'[default]Line1/FAN/FAN1' → 'line1/fan/fan1' (sqlth_te.tagpath 형식)"""
+    path = _PROVIDER_PATTERN.sub("", path.strip())
+    return path.strip().strip("/").lower()
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _group_rows(rows: Iterable[tuple]) -> dict[str, tuple[int, ...]]:
+    grouped: dict[str, list[int]] = {}
+    for tag_id, tagpath in rows:
+        grouped.setdefault(str(tagpath).lower(), []).append(int(tag_id))
+    return {path: tuple(sorted(ids)) for path, ids in grouped.items()}
+
+
+def resolve_tag_paths(paths: Iterable[str]) -> dict[str, tuple[int, ...]]:
+    """
+    정확한 경로 목록을 한 번의 IN 쿼리로 해석.
+
+    Returns:
+        정규화 경로 → ID 튜플. 찾지 못한 경로는 결과에 없음.
+    """
+    now = time.time()
+    resolved: dict[str, tuple[int, ...]] = {}
+    missing: list[str] = []
+    for path in {normalize_tag_path(p) for p in paths if p and p.strip()}:
+        entry = _cache.get(path)
+        if entry is not None and now - entry[0] < _CACHE_TTL:
+            resolved[path] = entry[1]
+        else:
+            missing.append(path)
+
+    if missing:
+        rows = fetch_rows(
+            f"""
+            SELECT id, tagpath
+            FROM sqlth_te
+            WHERE tagpath IN ({', '.join(_quote(p) for p in sorted(missing))})
+            """
+        )
+        for path, ids in _group_rows(rows).items():
+            _cache[path] = (now, ids)
+            resolved[path] = ids
+    return resolved
+
+
+def expand_tag_pattern(pattern: str, limit: int = MAX_PATTERN_TAGS) -> dict[str, tuple[int, ...]]:
+    """
+    와일드카드 패턴으로 태그 그룹 조회 ('line1/fan/*' → line1/fan 아래 전체).
+    '*'는 임의 문자열, '?'는 한 글자.
+    """
+    like = normalize_tag_path(pattern).replace("%", r"\%").replace("_", r"\_")
+    like = like.replace("*", "%").replace("?", "_")
+    rows = fetch_rows(
+        f"""
+        SELECT id, tagpath
+        FROM sqlth_te
+        WHERE tagpath IN (
+            SELECT DISTINCT tagpath FROM sqlth_te WHERE tagpath LIKE {_quote(like)}
+            ORDER BY tagpath LIMIT {int(limit)}
+        )
+        """
+    )
+    return _group_rows(rows)
+
+
+def _match_tag_names(names: list[str]) -> dict[str, tuple[int, ...]]:
+    # 폴더 없이 태그 이름만 준 경우 ("FAN1") → 마지막 경로 요소가 일치하는 태그
+    conditions = " OR ".join(
+        f"tagpath = {_quote(n)} OR tagpath LIKE {_quote('%/' + n)}" for n in names
+    )
+    rows = fetch_rows(f"SELECT id, tagpath FROM sqlth_te WHERE {conditions}")
+    return _group_rows(rows)
+
+
+def resolve_tags(
+    specs: Iterable[str], limit: int = MAX_PATTERN_TAGS
+) -> tuple[dict[str, tuple[int, ...]], list[str]]:
+    """
+    태그 지정 목록(정확한 경로, 태그 이름, 와일드카드 패턴 혼용)을 ID로 해석.
+
+    Returns:
+        (sqlth_te 경로 → ID 튜플, 해석하지 못한 입력 목록)
+    """
+    specs = [s.strip() for s in specs if s and s.strip()]
+    patterns = [s for s in specs if "*" in s or "?" in s]
+    exact = [s for s in specs if s not in patterns]
+
+    resolved = resolve_tag_paths(exact)
+    unresolved = [s for s in exact if normalize_tag_path(s) not in resolved]
+    missing: list[str] = []
+
+    names = [normalize_tag_path(s) for s in unresolved]
+    if names:
+        by_name = _match_tag_names(names)
+        for spec, name in zip(unresolved, names):
+            matched = {p: ids for p, ids in by_name.items() if p == name or p.endswith("/" + name)}
+            if matched:
+                resolved.update(matched)
+            else:
+                missing.append(spec)
+
+    for pattern in patterns:
+        expanded = expand_tag_pattern(pattern, limit)
+        if expanded:
+            resolved.update(expanded)
+        else:
+            missing.append(pattern)
+
+    if len(resolved) > limit:
+        resolved = dict(sorted(resolved.items())[:limit])
+    return resolved, missing
+
+
+def clear_tag_cache() -> None:
+    _cache.clear()
@@ -0,0 +1,187 @@
+"""
+Batched execution of approved tag writes.
+
+Approved actions are sent to the OPC UA server as one Write request, and their
+VariantTypes come from the client's browse-time type cache. Before this, every
+action did its own read and write round trip.
+- Coalescing (settings.opc_write_coalesce): if several actions in a batch target the
+  same tag, only the most recently requested one is written. Last wins; the others
+  are reported as "superseded". With coalescing off, the writes to a tag go out in
+  successive Write requests, oldest first.
+- Rate limiting (settings.opc_write_min_interval_seconds): a tag is written at most
+  once per interval. With opc_write_rate_scope="device", the limit covers every tag
+  under the same parent folder. A batch counts as one write per key. Limited actions
+  are reported as "rate_limited" and go back to pending, so they can be approved again.
+- Each result carries the OPC UA StatusCode the server returned for that node.
+
+The rate limiter is per process.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+from app.core.config import settings
+from app.graph.state import PendingAction
+from app.services.approval_storage import update_pending_action
+from app.services.opc import get_opc_client
+
+
+OUTCOMES = ("executed", "failed", "superseded", "rate_limited")
+
+
+@dataclass
+class WriteOutcome:
+    action: PendingAction
+    status: str                          # one of OUTCOMES
+    opc_result: Optional[dict] = None
+    superseded_by: Optional[str] = None  # winning action id when coalesced
+    retry_after: Optional[float] = None  # seconds, when rate limited
+
+    @property
+    def error(self) -> Optional[str]:
+        return (self.opc_result or {}).get("error")
+
+
+def _tag_key(tag_path: str) -> str:
+    # "[default]/Line1/X" and "[default]Line1/X" address the same node
+    return tag_path.strip().replace("]/", "]", 1)
+
+
+def rate_key(tag_path: str) -> str:
+    """Rate-limit key: the tag itself, or its parent folder (device) in "device" scope."""
+    key = _tag_key(tag_path)
+    if settings.opc_write_rate_scope == "device":
+        if "/" in key:
+            return key.rsplit("/", 1)[0]
+        return key.split("]", 1)[0] + "]" if "]" in key else key
+    return key
+
+
+class WriteRateLimiter:
+    def __init__(self):
+        self._last: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, keys: Iterable[str], now: Optional[float] = None) -> dict[str, float]:
+        """
+        Reserve a write slot for each key; returns {key: retry_after} for the keys
+        that were written too recently (those are not reserved).
+        """
+        interval = settings.opc_write_min_interval_seconds
+        now = time.monotonic() if now is None else now
+        denied = {}
+        with self._lock:
+            for key in keys:
+                last = self._last.get(key)
+                if interval > 0 and last is not None and now - last < interval:
+                    denied[key] = round(interval - (now - last), 3)
+                else:
+                    self._last[key] = now
+        return denied
+
+    def clear(self) -> None:
+        with self._lock:
+            self._last.clear()
+
+
+_limiter = WriteRateLimiter()
+
+
+def _plan_rounds(actions: list[PendingAction], coalesce: bool) -> tuple[list[list[PendingAction]], dict[str, str]]:
+    """Split actions into Write requests with at most one write per tag; returns (rounds, superseded)."""
+    by_tag: dict[str, list[PendingAction]] = {}
+    for action in actions:
+        by_tag.setdefault(_tag_key(action.tag_path), []).append(action)
+
+    superseded: dict[str, str] = {}
+    rounds: list[list[PendingAction]] = []
+    for group in by_tag.values():
+        # stable sort: equal timestamps keep request order, so the later entry wins
+        group = sorted(group, key=lambda a: a.requested_at)
+        if coalesce:
+            winner = group[-1]
+            for loser in group[:-1]:
+                superseded[loser.id] = winner.id
+            group = [winner]
+        for i, action in enumerate(group):
+            if i == len(rounds):
+                rounds.append([])
+            rounds[i].append(action)
+    return rounds, superseded
+
+
+async def execute_writes(actions: list[PendingAction], coalesce: Optional[bool] = None) -> list[WriteOutcome]:
+    """
+    Write approved actions in as few OPC UA Write requests as possible.
+
+    Args:
+        actions: approved actions (distinct ids), already claimed via claim_pending_action
+        coalesce: overrides settings.opc_write_coalesce
+
+    Returns:
+        One WriteOutcome per action, in input order. Storage is not updated here
+        (see record_outcome).
+    """
+    coalesce = settings.opc_write_coalesce if coalesce is None else coalesce
+    rounds, superseded = _plan_rounds(actions, coalesce)
+    by_id = {a.id: a for a in actions}
+    outcomes: dict[str, WriteOutcome] = {
+        action_id: WriteOutcome(by_id[action_id], "superseded", superseded_by=winner)
+        for action_id, winner in superseded.items()
+    }
+
+    to_write = [action for rnd in rounds for action in rnd]
+    denied = _limiter.reserve({rate_key(a.tag_path) for a in to_write})
+    for action in to_write:
+        retry_after = denied.get(rate_key(action.tag_path))
+        if retry_after is not None:
+            outcomes[action.id] = WriteOutcome(action, "rate_limited", retry_after=retry_after)
+
+    client = get_opc_client()
+    for i, rnd in enumerate(rounds):
+        batch = [a for a in rnd if a.id not in outcomes]
+        if not batch:
+            continue
+        try:
+            results = await client.write_tags([(a.tag_path, a.value) for a in batch])
+        except Exception as e:
+            # earlier rounds already reached the server - keep their outcomes,
+            # fail this round and every later one (never sent)
+            for action in (a for later in rounds[i:] for a in later if a.id not in outcomes):
+                outcomes[action.id] = WriteOutcome(action, "failed", opc_result={"error": str(e)})
+            break
+        for action, result in zip(batch, results):
+            status = "failed" if "error" in result else "executed"
+            outcomes[action.id] = WriteOutcome(action, status, opc_result=result)
+
+    return [outcomes[a.id] for a in actions]
+
+
+def record_outcome(outcome: WriteOutcome, operator: str, notes: Optional[str]) -> None:
+    """
+    Persist the decision for a write outcome.
+
+    The operator approved every recorded outcome, so a write the server refused is
+    stored as "failed" (error kept in notes), never "rejected". Rate-limited actions
+    are released from their claim back to pending.
+    """
+    action = outcome.action
+    if outcome.status == "rate_limited":
+        action.status = "pending"
+        update_pending_action(action)
+        return
+    action.operator = operator
+    action.approved_at = datetime.now()
+    action.notes = notes
+    if outcome.status == "superseded":
+        action.notes = notes or f"Superseded by {outcome.superseded_by}"
+    elif outcome.status == "failed":
+        error = f"Write failed: {outcome.error}"
+        action.notes = f"{error} | {notes}" if notes else error
+    action.status = outcome.status
+    update_pending_action(action)
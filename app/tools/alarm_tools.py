@@ -1,11 +1,26 @@
 """Alarm History 조회 도구"""
 
-import re
 from datetime import datetime, timedelta
 from typing import Optional
 
 from langchain_core.tools import tool
 
+from app.core.config import settings
+from app.services.alarm_analytics import build_alarm_report, find_stale_alarms
+from app.services.alarm_correlation import correlate_alarm
+from app.services.alarm_episodes import (
+    ack_statistics,
+    alarm_time_by_source,
+    episodes_between,
+    format_duration,
+    longest_episodes,
+)
+from app.services.alarm_events import EVENT_TYPES, page_alarm_events
+from app.services.alarm_histogram import alarm_histogram
+from app.services.alarm_index import parse_source, source_clause
+from app.services.alarm_rollup import summarize_alarms
+from app.services.history import parse_time_arg
+from app.services.live_alarms import get_active_alarm_table
 from app.services.sql import get_sql_db
 
 
@@ -15,10 +30,7 @@ def extract_tag_from_source(source: str) -> str:
     형식: "prov:default:/tag:BMS/MFD/8F/ELEC1-SA-MFD-1/Smoke_Detect_Alm:/alm:ALARM"
     추출: "/tag:" 와 ":/alm:" 사이 값
     """
-    match = re.search(r"/tag:(.+?):/alm:", source)
-    if match:
-        return match.group(1)
-    return source
+    return parse_source(source).tag_path
 
 
 def format_timestamp(ts_ms: int) -> str:
@@ -30,19 +42,53 @@ def format_timestamp(ts_ms: int) -> str:
         return str(ts_ms)
 
 
+_EVENT_TYPE_NAMES = {code: name for name, code in EVENT_TYPES.items() if name != "acknowledged"}
+
+
+def _event_time(value) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S") if isinstance(value, datetime) else str(value)[:19]
+
+
+def _parse_period(start_date: Optional[str], end_date: Optional[str]):
+    """
+    "YYYY-MM-DD" 기간 → (start_dt, end_dt). 종료 날짜는 당일 포함.
+    기본값은 7일 전 ~ 현재. 형식 오류면 오류 메시지 문자열 반환.
+    """
+    today = datetime.now()
+
+    if start_date:
+        try:
+            start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+        except ValueError:
+            return f"날짜 형식 오류: {start_date}. YYYY-MM-DD 형식을 사용하세요."
+    else:
+        start_dt = today - timedelta(days=7)
+
+    if end_date:
+        try:
+            # 종료 날짜 당일 포함
+            end_dt = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+        except ValueError:
+            return f"날짜 형식 오류: {end_date}. YYYY-MM-DD 형식을 사용하세요."
+    else:
+        end_dt = today
+
+    return start_dt, end_dt
+
+
 @tool
 def get_latest_alarm_for_tag(tag_path: Optional[str] = None) -> str:
     """
     특정 태그의 가장 최근 알람 조회. tag_path를 지정하지 않으면 전체 태그 중 가장 최근 알람을 반환.
 
     Args:
-        tag_path: 태그 경로 (예: "FAN1", "Smoke_Detect", "Motor") - 부분 일치 검색. None이면 전체 조회.
+        tag_path: 태그 경로 (예: "FAN1", "Smoke_Detect", "Motor") - 태그 이름/경로 요소 일치, 없으면 부분 일치. None이면 전체 조회.
 
     Returns:
         가장 최근 알람 정보 (발생 시간, 태그, 상태)
     """
     if tag_path:
-        where_clause = f"WHERE source LIKE '%{tag_path}%'"
+        where_clause = f"WHERE {source_clause(tag_path)}"
         not_found_msg = f"'{tag_path}' 관련 알람 기록이 없습니다."
     else:
         where_clause = ""
@@ -77,58 +123,46 @@ def search_alarm_events(
     hours_ago: int = 24,
     event_type: Optional[str] = None,
     limit: int = 50,
+    cursor: Optional[str] = None,
 ) -> str:
     """
-    알람 이벤트 검색.
+    알람 이벤트 검색 (최신순, 페이지 단위).
 
     Args:
         tag_path: 태그 경로 검색어 (예: "FAN1", "Tank") - 부분 일치, None이면 전체
         hours_ago: 최근 N시간 내 조회 (기본 24시간)
         event_type: "active", "clear", "ack" 또는 None (전체)
-        limit: 최대 반환 행 수 (기본 50)
+        limit: 페이지당 최대 행 수 (기본 50)
+        cursor: 이전 결과의 next_cursor 값 (다음 페이지 조회, 다른 인자는 첫 페이지 조건이 유지됨)
 
     Returns:
-        알람 이벤트 목록
+        알람 이벤트 목록과 다음 페이지가 있으면 next_cursor
     """
-    # 시간 범위 계산
     start_dt = datetime.now() - timedelta(hours=hours_ago)
-    start_str = start_dt.strftime("%Y-%m-%d %H:%M:%S")
-
-    # WHERE 조건 구성
-    conditions = [f"eventtime >= '{start_str}'"]
-
-    if tag_path:
-        conditions.append(f"source LIKE '%{tag_path}%'")
-
-    if event_type:
-        event_type_map = {"active": 0, "clear": 1, "ack": 2, "acknowledged": 2}
-        if event_type.lower() in event_type_map:
-            conditions.append(f"eventtype = {event_type_map[event_type.lower()]}")
-
-    where_clause = " AND ".join(conditions)
-
-    query = f"""
-    SELECT
-        eventtime,
-        source,
-        displaypath,
-        priority,
-        eventtype
-    FROM alarm_events
-    WHERE {where_clause}
-    ORDER BY eventtime DESC
-    LIMIT {limit}
-    """
-
     try:
-        result = get_sql_db().run(query)
-        if not result or result == "[]" or result == "":
-            filter_desc = f"태그: {tag_path}, " if tag_path else ""
-            return f"조건에 맞는 알람이 없습니다. ({filter_desc}최근 {hours_ago}시간)"
-        return f"알람 이벤트 조회 결과 (최근 {hours_ago}시간):\n{result}"
+        page = page_alarm_events(start_dt, None, tag_path, event_type, limit, cursor)
+    except ValueError as e:
+        return str(e)
     except Exception as e:
         return f"알람 검색 오류: {e}"
 
+    if not page.rows:
+        if cursor:
+            return "더 이상 알람 이벤트가 없습니다."
+        filter_desc = f"태그: {tag_path}, " if tag_path else ""
+        return f"조건에 맞는 알람이 없습니다. ({filter_desc}최근 {hours_ago}시간)"
+
+    header = "알람 이벤트 조회 결과 (이어서)" if cursor else f"알람 이벤트 조회 결과 (최근 {hours_ago}시간)"
+    lines = [
+        f"- {_event_time(row['eventtime'])} | {row['source']} | {row['displaypath']} | "
+        f"priority={row['priority']} | {_EVENT_TYPE_NAMES.get(row['eventtype'], row['eventtype'])}"
+        for row in page.rows
+    ]
+    footer = (
+        f"\n다음 페이지: search_alarm_events(cursor=\"{page.next_cursor}\")" if page.next_cursor else ""
+    )
+    return f"{header} {len(page.rows)}건:\n" + "\n".join(lines) + footer
+
 
 @tool
 def get_alarm_statistics(tag_path: Optional[str] = None, days: int = 7) -> str:
@@ -142,30 +176,26 @@ def get_alarm_statistics(tag_path: Optional[str] = None, days: int = 7) -> str:
     Returns:
         알람 통계 정보
     """
-    start_dt = datetime.now() - timedelta(days=days)
-    start_str = start_dt.strftime("%Y-%m-%d %H:%M:%S")
-
-    tag_filter = f"AND source LIKE '%{tag_path}%'" if tag_path else ""
-
-    query = f"""
-    SELECT
-        source,
-        COUNT(*) as alarm_count,
-        SUM(CASE WHEN eventtype = 0 THEN 1 ELSE 0 END) as active_count,
-        SUM(CASE WHEN eventtype = 1 THEN 1 ELSE 0 END) as clear_count,
-        MIN(eventtime) as first_alarm,
-        MAX(eventtime) as last_alarm
-    FROM alarm_events
-    WHERE eventtime >= '{start_str}' {tag_filter}
-    GROUP BY source
-    ORDER BY alarm_count DESC
-    LIMIT 20
-    """
+    end_dt = datetime.now()
+    start_dt = end_dt - timedelta(days=days)
 
     try:
-        result = get_sql_db().run(query)
-        if not result or result == "[]" or result == "":
+        summaries = summarize_alarms(start_dt, end_dt, tag_path)
+        if not summaries:
             return f"최근 {days}일간 알람 기록이 없습니다."
+        top = sorted(summaries.values(), key=lambda s: (-s.total, s.source))[:20]
+        # (source, alarm_count, active_count, clear_count, first_alarm, last_alarm)
+        result = [
+            (
+                s.source,
+                s.total,
+                s.by_type.get(0, 0),
+                s.by_type.get(1, 0),
+                s.first.strftime("%Y-%m-%d %H:%M:%S") if s.first else None,
+                s.last.strftime("%Y-%m-%d %H:%M:%S") if s.last else None,
+            )
+            for s in top
+        ]
         return f"알람 통계 (최근 {days}일):\n{result}"
     except Exception as e:
         return f"알람 통계 조회 오류: {e}"
@@ -188,55 +218,494 @@ def get_alarm_count_by_period(
     Returns:
         기간별 알람 발생 횟수
     """
-    today = datetime.now()
+    period = _parse_period(start_date, end_date)
+    if isinstance(period, str):
+        return period
+    start_dt, end_dt = period
 
-    # 날짜 파싱
-    if start_date:
-        try:
-            start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        except ValueError:
-            return f"날짜 형식 오류: {start_date}. YYYY-MM-DD 형식을 사용하세요."
-    else:
-        start_dt = today - timedelta(days=7)
+    try:
+        summaries = summarize_alarms(start_dt, end_dt, tag_path).values()
+        active = sum(s.by_type.get(0, 0) for s in summaries)
+        clear = sum(s.by_type.get(1, 0) for s in summaries)
+        ack = sum(s.by_type.get(2, 0) for s in summaries)
+        priorities: dict[int, int] = {}
+        for s in summaries:
+            for priority, count in s.by_priority.items():
+                priorities[priority] = priorities.get(priority, 0) + count
+        result = (
+            f"total_alarms={sum(s.total for s in summaries)}, active_count={active}, "
+            f"clear_count={clear}, ack_count={ack}, "
+            f"by_priority={dict(sorted(priorities.items()))}"
+        )
+        last_day = end_dt - timedelta(seconds=1) if end_date else end_dt
+        period_str = f"{start_dt.strftime('%Y-%m-%d')} ~ {last_day.strftime('%Y-%m-%d')}"
+        if tag_path:
+            return f"'{tag_path}' 알람 통계 ({period_str}):\n{result}"
+        return f"전체 알람 통계 ({period_str}):\n{result}"
+    except Exception as e:
+        return f"알람 횟수 조회 오류: {e}"
 
-    if end_date:
-        try:
-            end_dt = datetime.strptime(end_date, "%Y-%m-%d").replace(
-                hour=23, minute=59, second=59
+
+def _period_label(start_dt: datetime, end_dt: datetime) -> str:
+    return f"{start_dt.strftime('%Y-%m-%d %H:%M')} ~ {end_dt.strftime('%Y-%m-%d %H:%M')}"
+
+
+@tool
+def get_alarm_histogram(
+    tag_path: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    bucket: str = "hour_of_day",
+    interval_minutes: int = 60,
+    split_by: Optional[str] = None,
+) -> str:
+    """
+    알람 발생 분포 - 시간대별(0~23시), 요일별, 고정 간격별 발생(active) 건수 벡터.
+    "알람이 주로 언제 발생해?", "시간대별 알람 분포", "요일별 알람" 질문에 사용 (이벤트를 나열하지 마세요).
+
+    Args:
+        tag_path: 태그 경로 필터 (선택)
+        start_date: 시작 날짜 "YYYY-MM-DD" (선택, 기본 7일 전)
+        end_date: 종료 날짜 "YYYY-MM-DD" (선택, 기본 오늘)
+        bucket: "hour_of_day" (24개), "day_of_week" (월~일), "interval" (interval_minutes 간격 추이)
+        interval_minutes: bucket="interval"일 때 간격 (분, 기본 60)
+        split_by: None, "priority" (priority별), "area" (운영 구역별)
+
+    Returns:
+        버킷 라벨과 건수 벡터 (분할 시 그룹별 벡터), 최다 버킷
+    """
+    period = _parse_period(start_date, end_date)
+    if isinstance(period, str):
+        return period
+    try:
+        result = alarm_histogram(period[0], period[1], tag_path, bucket, interval_minutes, split_by)
+    except ValueError as e:
+        return str(e)
+    except Exception as e:
+        return f"알람 분포 조회 오류: {e}"
+
+    kind = {"hour_of_day": "시간대별", "day_of_week": "요일별"}.get(bucket, f"{interval_minutes}분 간격")
+    scope = f"'{tag_path}' " if tag_path else ""
+    total = sum(result["total"])
+    header = f"{scope}알람 발생 분포 ({kind}, {result['start']} ~ {result['end']}, 발생 {total}건)"
+    if total == 0:
+        return f"{header}\n알람 발생 기록이 없습니다."
+    lines = [header, f"buckets: {','.join(result['labels'])}", f"total: {','.join(map(str, result['total']))}"]
+    for name, counts in result["series"].items():
+        lines.append(f"{name}: {','.join(map(str, counts))}")
+    lines.append(f"최다: {result['peak']['label']} ({result['peak']['count']}건)")
+    return "\n".join(lines)
+
+
+@tool
+def get_alarm_duration(
+    tag_path: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: int = 20,
+) -> str:
+    """
+    알람 상태로 있던 총 시간 조회 (active → clear 구간 합계, source별).
+    "얼마나 오래 알람 상태였나", "알람 지속 시간" 질문에 사용.
+
+    Args:
+        tag_path: 태그 경로 필터 (선택)
+        start_date: 시작 날짜 "YYYY-MM-DD" (선택, 기본 7일 전)
+        end_date: 종료 날짜 "YYYY-MM-DD" (선택, 기본 오늘)
+        limit: 최대 source 수 (기본 20)
+
+    Returns:
+        source별 알람 시간, 에피소드 수, 미해제 수
+    """
+    period = _parse_period(start_date, end_date)
+    if isinstance(period, str):
+        return period
+    start_dt, end_dt = period
+
+    try:
+        now = datetime.now()
+        episodes = episodes_between(start_dt, end_dt, tag_path, now=now)
+        if not episodes:
+            return f"알람 에피소드가 없습니다. ({_period_label(start_dt, end_dt)})"
+        totals = alarm_time_by_source(episodes, start_dt, end_dt, now)
+        lines = [
+            f"- {extract_tag_from_source(t['source'])}: {format_duration(t['alarm_s'])} "
+            f"(episodes={t['episodes']}, open={t['open']})"
+            for t in totals[:limit]
+        ]
+        total_s = sum(t["alarm_s"] for t in totals)
+        return (
+            f"알람 지속 시간 ({_period_label(start_dt, end_dt)}, 합계 {format_duration(total_s)}, "
+            f"source {len(totals)}개):\n" + "\n".join(lines)
+        )
+    except Exception as e:
+        return f"알람 지속 시간 조회 오류: {e}"
+
+
+@tool
+def get_alarm_ack_stats(
+    tag_path: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> str:
+    """
+    알람 확인(ack)까지 걸린 시간 통계 - 평균(MTTA), 중앙값, 최대, 미확인 건수 (priority별).
+
+    Args:
+        tag_path: 태그 경로 필터 (선택)
+        start_date: 시작 날짜 "YYYY-MM-DD" (선택, 기본 7일 전)
+        end_date: 종료 날짜 "YYYY-MM-DD" (선택, 기본 오늘)
+
+    Returns:
+        전체 및 priority별 확인 시간 통계
+    """
+    period = _parse_period(start_date, end_date)
+    if isinstance(period, str):
+        return period
+    start_dt, end_dt = period
+
+    def line(label: str, s: dict) -> str:
+        return (
+            f"{label}: episodes={s['episodes']}, acked={s['acked']}, unacked={s['unacked']}, "
+            f"mtta={format_duration(s['mtta_s'])}, median={format_duration(s['median_s'])}, "
+            f"max={format_duration(s['max_s'])}"
+        )
+
+    try:
+        # 창 안에서 시작한 에피소드만 집계
+        episodes = [
+            e for e in episodes_between(start_dt, end_dt, tag_path)
+            if e.start is not None and e.start >= start_dt
+        ]
+        if not episodes:
+            return f"알람 에피소드가 없습니다. ({_period_label(start_dt, end_dt)})"
+        stats = ack_statistics(episodes)
+        lines = [line("전체", stats["overall"])]
+        lines += [line(f"priority={p}", s) for p, s in stats["by_priority"].items()]
+        return f"알람 확인 시간 통계 ({_period_label(start_dt, end_dt)}):\n" + "\n".join(lines)
+    except Exception as e:
+        return f"알람 확인 시간 조회 오류: {e}"
+
+
+@tool
+def get_longest_alarm_episodes(
+    tag_path: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: int = 10,
+) -> str:
+    """
+    가장 오래 지속된 알람 에피소드 목록 (발생 ~ 해제, 미해제는 현재까지).
+
+    Args:
+        tag_path: 태그 경로 필터 (선택)
+        start_date: 시작 날짜 "YYYY-MM-DD" (선택, 기본 7일 전)
+        end_date: 종료 날짜 "YYYY-MM-DD" (선택, 기본 오늘)
+        limit: 최대 반환 수 (기본 10)
+
+    Returns:
+        에피소드별 태그, 발생/확인/해제 시각, 지속 시간, priority
+    """
+    period = _parse_period(start_date, end_date)
+    if isinstance(period, str):
+        return period
+    start_dt, end_dt = period
+
+    def fmt(dt: Optional[datetime]) -> str:
+        return dt.strftime("%Y-%m-%d %H:%M:%S") if dt else "-"
+
+    try:
+        now = datetime.now()
+        episodes = longest_episodes(episodes_between(start_dt, end_dt, tag_path, now=now), limit, now)
+        if not episodes:
+            return f"알람 에피소드가 없습니다. ({_period_label(start_dt, end_dt)})"
+        lines = [
+            f"- {extract_tag_from_source(e.source)}: {format_duration(e.duration_s(now))} "
+            f"(active={fmt(e.start)}, ack={fmt(e.ack)}, clear={fmt(e.clear) if e.clear else '미해제'}, "
+            f"priority={e.priority})"
+            for e in episodes
+        ]
+        return f"최장 알람 에피소드 ({_period_label(start_dt, end_dt)}):\n" + "\n".join(lines)
+    except Exception as e:
+        return f"알람 에피소드 조회 오류: {e}"
+
+
+# ── 알람 성능 분석 (ISA-18.2) ─────────────────────────────────────
+# flood/chattering/bad actor 도구는 같은 기간 보고서(build_alarm_report)를 공유하므로 연달아 호출해도 한 번만 계산
+
+
+def _report(tag_path: Optional[str], start_date: Optional[str], end_date: Optional[str], **kwargs):
+    period = _parse_period(start_date, end_date)
+    if isinstance(period, str):
+        return period
+    return build_alarm_report(period[0], period[1], tag_path, **kwargs)
+
+
+@tool
+def get_alarm_flood_report(
+    tag_path: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> str:
+    """
+    알람 flood 분석 - 운영 구역별 10분당 알람률, flood 구간(10분 내 기준 건수 초과), ISA-18.2 등급.
+    "알람 폭주", "flood", "알람이 몰린 시간" 질문에 사용.
+
+    Args:
+        tag_path: 태그 경로 필터 (선택)
+        start_date: 시작 날짜 "YYYY-MM-DD" (선택, 기본 7일 전)
+        end_date: 종료 날짜 "YYYY-MM-DD" (선택, 기본 오늘)
+
+    Returns:
+        구역별 평균/최대 알람률, flood 횟수/시간, 주요 flood 구간
+    """
+    try:
+        report = _report(tag_path, start_date, end_date)
+        if isinstance(report, str):
+            return report
+        p = report["parameters"]
+        header = (
+            f"알람 flood 분석 ({report['start']} ~ {report['end']}, 발생 {report['total_activations']}건, "
+            f"기준: {p['window_minutes']}분당 {p['flood_threshold']}건 초과)"
+        )
+        if not report["areas"]:
+            return f"{header}\n알람 발생 기록이 없습니다."
+        lines = [header]
+        for a in report["areas"]:
+            lines.append(
+                f"- {a['area']}: 발생 {a['activations']}건, 평균 {a['avg_per_window']}/{p['window_minutes']}분, "
+                f"최대 {a['peak_per_window']}, flood {a['flood_count']}회 ({a['flood_minutes']}분), 등급={a['rating']}"
             )
-        except ValueError:
-            return f"날짜 형식 오류: {end_date}. YYYY-MM-DD 형식을 사용하세요."
-    else:
-        end_dt = today
+            for f in a["floods"][:3]:
+                lines.append(f"    flood {f['start']} ~ {f['end']} (최대 {f['peak']}건)")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"알람 flood 분석 오류: {e}"
 
-    start_str = start_dt.strftime("%Y-%m-%d %H:%M:%S")
-    end_str = end_dt.strftime("%Y-%m-%d %H:%M:%S")
 
-    tag_filter = f"AND source LIKE '%{tag_path}%'" if tag_path else ""
+@tool
+def get_chattering_alarms(
+    tag_path: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    min_count: Optional[int] = None,
+    window_seconds: Optional[int] = None,
+) -> str:
+    """
+    chattering 알람 탐지 - window_seconds 안에 min_count회 이상 발생한 알람.
 
-    query = f"""
-    SELECT
-        COUNT(*) as total_alarms,
-        SUM(CASE WHEN eventtype = 0 THEN 1 ELSE 0 END) as active_count,
-        SUM(CASE WHEN eventtype = 1 THEN 1 ELSE 0 END) as clear_count,
-        SUM(CASE WHEN eventtype = 2 THEN 1 ELSE 0 END) as ack_count
-    FROM alarm_events
-    WHERE eventtime >= '{start_str}' AND eventtime <= '{end_str}' {tag_filter}
+    Args:
+        tag_path: 태그 경로 필터 (선택)
+        start_date: 시작 날짜 "YYYY-MM-DD" (선택, 기본 7일 전)
+        end_date: 종료 날짜 "YYYY-MM-DD" (선택, 기본 오늘)
+        min_count: 발생 횟수 기준 (선택, 기본 3회)
+        window_seconds: 시간 창 (선택, 기본 60초)
+
+    Returns:
+        chattering 알람 목록 (창 내 최대 발생 수, 총 발생 수)
+    """
+    try:
+        report = _report(
+            tag_path, start_date, end_date, chatter_count=min_count, chatter_seconds=window_seconds
+        )
+        if isinstance(report, str):
+            return report
+        p = report["parameters"]
+        header = (
+            f"chattering 알람 ({report['start']} ~ {report['end']}, "
+            f"기준: {p['chatter_seconds']}초 내 {p['chatter_count']}회 이상)"
+        )
+        if not report["chattering"]:
+            return f"{header}\nchattering 알람이 없습니다."
+        lines = [
+            f"- {c['tag_path']}: 창 내 최대 {c['max_in_window']}회, 총 {c['activations']}회"
+            for c in report["chattering"][:20]
+        ]
+        return f"{header} {len(report['chattering'])}개:\n" + "\n".join(lines)
+    except Exception as e:
+        return f"chattering 분석 오류: {e}"
+
+
+@tool
+def get_stale_alarms(tag_path: Optional[str] = None, hours: Optional[float] = None) -> str:
     """
+    stale 알람 - 현재 해제되지 않은 채 hours 이상 지속 중인 알람.
 
+    Args:
+        tag_path: 태그 경로 필터 (선택)
+        hours: 지속 시간 기준 (선택, 기본 24시간)
+
+    Returns:
+        stale 알람 목록 (발생 시각, 지속 시간, 확인 여부, priority)
+    """
+    hours = settings.alarm_stale_hours if hours is None else hours
     try:
-        result = get_sql_db().run(query)
-        period_str = f"{start_dt.strftime('%Y-%m-%d')} ~ {end_dt.strftime('%Y-%m-%d')}"
-        if tag_path:
-            return f"'{tag_path}' 알람 통계 ({period_str}):\n{result}"
-        return f"전체 알람 통계 ({period_str}):\n{result}"
+        end_dt = datetime.now()
+        # 에피소드 저장소 범위 안에서 조회 (원본 재구성 없이)
+        start_dt = end_dt - timedelta(days=settings.alarm_episode_days or 7)
+        stale = find_stale_alarms(start_dt, end_dt, tag_path, hours, end_dt)
+        header = f"stale 알람 (기준: {hours}시간 이상 미해제)"
+        if settings.alarm_episode_days:
+            header += f" - 최근 {settings.alarm_episode_days}일 안에 발생한 알람만 대상"
+        if not stale:
+            return f"{header}\nstale 알람이 없습니다."
+        lines = [
+            f"- {s['tag_path']}: {s['active_since']}부터 {s['hours']}시간, "
+            f"{'확인됨' if s['acked'] else '미확인'}, priority={s['priority']}"
+            for s in stale[:20]
+        ]
+        return f"{header} {len(stale)}개:\n" + "\n".join(lines)
     except Exception as e:
-        return f"알람 횟수 조회 오류: {e}"
+        return f"stale 알람 조회 오류: {e}"
+
+
+@tool
+def get_bad_actor_alarms(
+    tag_path: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: int = 10,
+) -> str:
+    """
+    bad actor 알람 - 발생 건수 상위 알람과 전체 대비 비중(누적 %).
+
+    Args:
+        tag_path: 태그 경로 필터 (선택)
+        start_date: 시작 날짜 "YYYY-MM-DD" (선택, 기본 7일 전)
+        end_date: 종료 날짜 "YYYY-MM-DD" (선택, 기본 오늘)
+        limit: 상위 N개 (기본 10)
+
+    Returns:
+        순위별 태그, 발생 건수, 비중, 누적 비중
+    """
+    try:
+        report = _report(tag_path, start_date, end_date, top_n=limit)
+        if isinstance(report, str):
+            return report
+        header = f"bad actor 알람 ({report['start']} ~ {report['end']}, 전체 {report['total_activations']}건)"
+        if not report["bad_actors"]:
+            return f"{header}\n알람 발생 기록이 없습니다."
+        lines = [
+            f"{b['rank']}. {b['tag_path']}: {b['activations']}건 ({b['share_pct']}%, 누적 {b['cumulative_pct']}%)"
+            for b in report["bad_actors"]
+        ]
+        return f"{header}:\n" + "\n".join(lines)
+    except Exception as e:
+        return f"bad actor 분석 오류: {e}"
+
+
+@tool
+def analyze_alarm_cause(
+    tag_path: str,
+    alarm_time: Optional[str] = None,
+    limit: int = 5,
+) -> str:
+    """
+    알람 원인 분석 - 알람 발생 전후 같은 폴더 태그들의 변화점, 직전 추세, 지연 상관관계로 원인 후보 순위 산출.
+    "알람 원인", "왜 알람이 발생했나" 질문에 한 번의 호출로 사용 (히스토리 도구를 여러 번 호출하지 마세요).
+
+    Args:
+        tag_path: 알람 태그 경로 검색어 (예: "FAN1", "Tank1/Temp_Hi")
+        alarm_time: 분석할 알람 발생 시각 "YYYY-MM-DD HH:MM" (선택, 기본 가장 최근 알람)
+        limit: 원인 후보 수 (기본 5)
+
+    Returns:
+        알람 정보와 원인 후보 태그 (점수, 상관계수/선행 시간, 변화점, 추세)
+    """
+    try:
+        when = parse_time_arg(alarm_time) if alarm_time else None
+    except ValueError as e:
+        return str(e)
+
+    try:
+        result = correlate_alarm(tag_path, when, limit)
+    except LookupError as e:
+        return str(e)
+    except Exception as e:
+        return f"알람 원인 분석 오류: {e}"
+
+    header = (
+        f"알람 원인 분석: {result['alarm_tag']} (발생 {result['alarm_start']}, "
+        f"해제 {result['alarm_clear'] or '미해제'}, priority={result['priority']})\n"
+        f"분석 구간 {result['window'][0]} ~ {result['window'][1]}, "
+        f"후보 태그 {result['candidates']}개, 기준 신호={result['signal']}"
+    )
+    if not result["contributors"]:
+        return f"{header}\n알람 전후로 뚜렷한 변화를 보인 태그가 없습니다."
+    lines = []
+    for rank, c in enumerate(result["contributors"], start=1):
+        parts = [f"{rank}. {c['tag_path']} (score={c['score']})"]
+        if c["correlation"] is not None:
+            parts.append(f"corr={c['correlation']} ({c['lead_s']}초 선행)")
+        if c["change_point"]:
+            parts.append(f"변화점={c['change_point']} (shift={c['shift_z']}σ)")
+        if c["trend_z"] is not None:
+            parts.append(f"직전 추세={c['trend_z']}σ")
+        parts.append(f"값 {c['value_before']} → {c['value_at_alarm']}")
+        lines.append(", ".join(parts))
+    return f"{header}\n" + "\n".join(lines)
+
+
+@tool
+def get_active_alarms(
+    tag_path: Optional[str] = None,
+    unacked_only: bool = False,
+    limit: int = 50,
+) -> str:
+    """
+    현재 알람 조회 - OPC UA 알람 구독으로 유지하는 실시간 활성/미확인 알람 목록.
+    "지금 울리고 있는 알람", "현재 활성 알람", "미확인 알람" 질문에 사용 (과거 이력은 search_alarm_events).
+
+    Args:
+        tag_path: 알람 source/조건 이름 검색어 (예: "FAN1", "Tank1") - 부분 일치. None이면 전체.
+        unacked_only: True면 미확인(unacknowledged) 알람만
+        limit: 최대 표시 개수 (기본 50)
+
+    Returns:
+        priority 높은 순 현재 알람 (source, 조건, priority, 활성/확인 상태, 발생 시각)
+    """
+    table = get_active_alarm_table()
+    if not table.connected:
+        reason = f" ({table.last_error})" if table.last_error else ""
+        return (
+            f"실시간 알람 구독에 연결되어 있지 않아 현재 알람을 확인할 수 없습니다{reason}. "
+            "search_alarm_events로 최근 이력을 조회하세요."
+        )
+
+    alarms = table.snapshot(tag_path, unacked_only=unacked_only)
+    scope = f"'{tag_path}' " if tag_path else ""
+    if not alarms:
+        kind = "미확인 알람" if unacked_only else "활성 알람"
+        return f"현재 {scope}{kind}이 없습니다."
+
+    lines = []
+    for a in alarms[:limit]:
+        state = ("활성" if a.active else "해제") + ("/확인" if a.acked else "/미확인")
+        since = a.active_since.strftime("%Y-%m-%d %H:%M:%S") if a.active_since else "-"
+        lines.append(f"- {a.source} [{a.condition}] priority={a.priority}, {state}, 발생 {since}")
+    more = f"\n... 외 {len(alarms) - limit}개" if len(alarms) > limit else ""
+    active = sum(1 for a in alarms if a.active)
+    unacked = sum(1 for a in alarms if not a.acked)
+    return (
+        f"현재 {scope}알람 {len(alarms)}개 (활성 {active}, 미확인 {unacked}):\n"
+        + "\n".join(lines)
+        + more
+    )
 
 
 alarm_tools_list = [
+    get_active_alarms,
     get_latest_alarm_for_tag,
     search_alarm_events,
     get_alarm_statistics,
     get_alarm_count_by_period,
+    get_alarm_histogram,
+    get_alarm_duration,
+    get_alarm_ack_stats,
+    get_longest_alarm_episodes,
+    get_alarm_flood_report,
+    get_chattering_alarms,
+    get_stale_alarms,
+    get_bad_actor_alarms,
+    analyze_alarm_cause,
 ]
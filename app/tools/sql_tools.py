@@ -1,5 +1,6 @@
 from langchain_core.tools import tool
 
+from app.services.query_guard import QueryRejected, prepare_query, run_guarded
 from app.services.sql import get_sql_db
 
 
@@ -25,11 +26,20 @@ def db_get_schema(table_names: str):
 
 @tool
 def db_query(query: str):
-    """Run a read-only SELECT query. Always include LIMIT."""
+    """
+    Run a single read-only SELECT/WITH query.
+    LIMIT is added or clamped automatically; expensive plans (full scans of
+    sqlt_data_* / alarm_events) are rejected - filter on tagid + t_stamp or eventtime.
+    """
     try:
-        if any(x in query.lower() for x in ["update", "delete", "drop", "insert"]):
-            return "Error: Read-only allowed."
-        return get_sql_db().run(query)
+        db = get_sql_db()
+        engine = getattr(db, "_engine", None)
+        if engine is None:
+            # 엔진을 노출하지 않는 SQLDatabase 호환 객체: 문장 검사/LIMIT만 적용
+            return db.run(prepare_query(query))
+        return run_guarded(engine, query)
+    except QueryRejected as exc:
+        return f"Error: {exc}"
     except Exception as exc:
         return f"SQL Error: {exc}"
 
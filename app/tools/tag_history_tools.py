@@ -4,9 +4,35 @@ import re
 from datetime import datetime, timedelta
 from typing import Optional
 
+import numpy as np
 from langchain_core.tools import tool
 
+from app.services.analytics import (
+    ANALYTICS_METRICS,
+    analyze,
+    correlation_matrix,
+    format_analysis,
+    make_grid,
+    resample,
+    run_analysis,
+)
+from app.services.date_parser import parse_time_range
+from app.services.downsample import downsample
+from app.services.history import (
+    aggregate_buckets,
+    aggregate_range,
+    MAX_BUCKETS,
+    fetch_multi_series,
+    fetch_series,
+    format_ms,
+    format_downsampled,
+    format_series,
+    page_raw_history,
+    parse_time_arg,
+    to_ms,
+)
 from app.services.sql import get_sql_db
+from app.services.tag_resolver import resolve_tags
 
 
 @tool
@@ -15,49 +41,22 @@ def parse_date_to_partition(date_string: str) -> str:
     자연어 날짜를 파티션 테이블 정보로 변환.
 
     Args:
-        date_string: "2025년 9월 1일", "2025-09-01", "어제", "오늘" 등
+        date_string: "2025년 9월 1일", "2025-09-01", "어제", "지난달", "최근 3시간", "9월 1일~5일" 등
 
     Returns:
-        year, month, day 및 예상 테이블명 정보
+        시작일 year, month, day, 예상 테이블명 및 범위(start_time, end_time 미포함, end_day, months)
     """
-    today = datetime.now()
-
-    # 상대적 날짜 처리
-    if "어제" in date_string:
-        target = today - timedelta(days=1)
-    elif "오늘" in date_string:
-        target = today
-    elif "그제" in date_string or "그저께" in date_string:
-        target = today - timedelta(days=2)
-    elif "지난주" in date_string:
-        target = today - timedelta(weeks=1)
-    elif "지난달" in date_string:
-        target = today - timedelta(days=30)
-    else:
-        # "2025년 9월 1일" 패턴
-        match = re.search(r"(\d{4})년?\s*(\d{1,2})월?\s*(\d{1,2})일?", date_string)
-        if match:
-            target = datetime(
-                int(match.group(1)), int(match.group(2)), int(match.group(3))
-            )
-        else:
-            # "2025-09-01" 패턴
-            match = re.search(r"(\d{4})-(\d{1,2})-(\d{1,2})", date_string)
-            if match:
-                target = datetime(
-                    int(match.group(1)), int(match.group(2)), int(match.group(3))
-                )
-            else:
-                # "9월 1일" 패턴 (연도 생략 - 현재 연도 가정)
-                match = re.search(r"(\d{1,2})월?\s*(\d{1,2})일?", date_string)
-                if match:
-                    target = datetime(today.year, int(match.group(1)), int(match.group(2)))
-                else:
-                    return f"날짜 파싱 실패: {date_string}. 예시: '2025년 9월 1일', '어제'"
+    time_range = parse_time_range(date_string)
+    if time_range is None:
+        return f"날짜 파싱 실패: {date_string}. 예시: '2025년 9월 1일', '어제', '지난달', '최근 3시간'"
 
+    target = time_range.start
+    last = time_range.end - timedelta(microseconds=1)
     return (
         f"year={target.year}, month={target.month}, day={target.day}, "
-        f"expected_table=sqlt_data_1_{target.year}_{target.month:02d}"
+        f"expected_table=sqlt_data_1_{target.year}_{target.month:02d}, "
+        f"start_time={target:%Y-%m-%d %H:%M}, end_time={time_range.end:%Y-%m-%d %H:%M}, "
+        f"end_day={last.day}, months={', '.join(f'{y}-{m:02d}' for y, m in time_range.months())}"
     )
 
 
@@ -201,6 +200,9 @@ def get_tag_history(
     end_day: Optional[int] = None,
     aggregation: str = "raw",
     limit: int = 1000,
+    max_points: int = 200,
+    downsample_method: str = "lttb",
+    cursor: Optional[str] = None,
 ) -> str:
     """
     태그 히스토리 데이터 조회. 파티션 테이블 직접 지정.
@@ -212,7 +214,10 @@ def get_tag_history(
         start_day: 시작일 (선택, 미지정시 월 전체)
         end_day: 종료일 (선택)
         aggregation: "raw", "avg", "max", "min", "sum", "count" 중 선택
-        limit: 최대 반환 행 수 (기본 1000, raw 모드에서만 적용)
+        limit: 최대 조회 행 수 (기본 1000, raw 모드에서만 적용, 최신순 페이지 크기)
+        max_points: raw 결과를 축소할 목표 포인트 수 (기본 200, raw 모드에서만 적용)
+        downsample_method: "lttb" (형태 보존), "minmax" (피크 보존), "none"
+        cursor: raw 모드 이전 결과의 다음 페이지 커서 (첫 페이지 조건이 유지됨)
 
     Returns:
         히스토리 데이터 또는 집계 결과
@@ -220,64 +225,233 @@ def get_tag_history(
     # 파티션 테이블명 생성 (기본 인덱스 1)
     table_name = f"sqlt_data_1_{year}_{month:02d}"
 
-    # 날짜 범위 조건 생성 (t_stamp는 밀리초 단위)
-    where_parts = [f"tagid = {tag_id}"]
-
-    if start_day:
-        start_ts = int(datetime(year, month, start_day).timestamp() * 1000)
-        where_parts.append(f"t_stamp >= {start_ts}")
-    if end_day:
-        end_ts = int(datetime(year, month, end_day, 23, 59, 59).timestamp() * 1000)
-        where_parts.append(f"t_stamp <= {end_ts}")
-
-    where_clause = " AND ".join(where_parts)
-
     # 집계 쿼리 생성
     if aggregation == "raw":
-        query = f"""
-        SELECT t_stamp, floatvalue, intvalue
-        FROM {table_name}
-        WHERE {where_clause}
-        ORDER BY t_stamp DESC
-        LIMIT {limit}
-        """
+        # t_stamp는 밀리초 단위, end_day는 그날 23:59:59까지 포함
+        start_ts = to_ms(datetime(year, month, start_day or 1))
+        if end_day:
+            end_ts = to_ms(datetime(year, month, end_day, 23, 59, 59)) + 1
+        else:
+            end_ts = to_ms(datetime(year + month // 12, month % 12 + 1, 1))
+        try:
+            page = page_raw_history(
+                [tag_id], start_ts, end_ts, limit, cursor, table=table_name, descending=True
+            )
+            if not page.rows:
+                if cursor:
+                    return "더 이상 데이터가 없습니다."
+                return f"데이터가 없습니다. (테이블: {table_name}, tagid: {tag_id})"
+            ts = [row[1] for row in page.rows]
+            values = [float("nan") if row[2] is None else row[2] for row in page.rows]
+            result = format_downsampled(downsample(ts, values, max_points, downsample_method))
+            if page.next_cursor:
+                result += (
+                    f"\n더 이전 데이터 있음 (이번 페이지 {len(page.rows)}행). "
+                    f"다음 페이지: get_tag_history(..., cursor=\"{page.next_cursor}\")"
+                )
+            return result
+        except ValueError as e:
+            return f"입력 오류: {e}"
+        except Exception as e:
+            return _history_error(e, table_name, year, month)
     elif aggregation in ("avg", "max", "min", "sum", "count"):
-        agg_func = aggregation.upper()
-        if aggregation == "count":
-            select_expr = "COUNT(*) as count_value"
+        # 구간 집계는 범위 계획기를 통해 일/시간 롤업을 우선 사용 (모든 sqlt_data_N 파티션 포함)
+        range_start = datetime(year, month, start_day or 1)
+        if end_day:
+            range_end = datetime(year, month, end_day) + timedelta(days=1)
         else:
-            select_expr = f"{agg_func}(COALESCE(floatvalue, intvalue)) as {aggregation}_value"
-
-        query = f"""
-        SELECT
-            {select_expr},
-            COUNT(*) as data_count,
-            MIN(t_stamp) as first_ts,
-            MAX(t_stamp) as last_ts
-        FROM {table_name}
-        WHERE {where_clause}
-        """
+            range_end = datetime(year + month // 12, month % 12 + 1, 1)
+        try:
+            total = aggregate_range([tag_id], to_ms(range_start), to_ms(range_end), aggregation)
+        except ValueError as e:
+            return f"입력 오류: {e}"
+        except Exception as e:
+            return _history_error(e, table_name, year, month)
+        if total.count == 0:
+            return f"데이터가 없습니다. (기간: {range_start:%Y-%m-%d} ~ {range_end:%Y-%m-%d}, tagid: {tag_id})"
+        return (
+            f"{aggregation}_value={total.value(aggregation):.6g}, data_count={total.count}, "
+            f"period={range_start:%Y-%m-%d}~{range_end - timedelta(days=1):%Y-%m-%d}"
+        )
     else:
         return f"지원하지 않는 집계 함수: {aggregation}. 사용 가능: raw, avg, max, min, sum, count"
 
+
+def _history_error(e: Exception, table_name: str, year: int, month: int) -> str:
+    error_msg = str(e)
+    if "doesn't exist" in error_msg or "Table" in error_msg:
+        return (
+            f"테이블 {table_name}이 존재하지 않습니다. "
+            f"find_partition_table({year}, {month})로 실제 테이블명을 확인하세요."
+        )
+    return f"쿼리 오류: {e}"
+
+
+@tool
+def get_tag_history_buckets(
+    tag_id: int,
+    start_time: str,
+    end_time: str,
+    bucket_seconds: int = 3600,
+    aggregation: str = "avg",
+) -> str:
+    """
+    시간 버킷 단위 집계 조회 (예: 어제 시간별 평균, 이번 달 일별 최대).
+    여러 월에 걸친 기간도 파티션을 자동으로 나눠 조회합니다.
+
+    Args:
+        tag_id: sqlth_te에서 조회한 태그 ID
+        start_time: 시작 시각 "YYYY-MM-DD" 또는 "YYYY-MM-DD HH:MM"
+        end_time: 종료 시각 (미포함) "YYYY-MM-DD" 또는 "YYYY-MM-DD HH:MM"
+        bucket_seconds: 버킷 크기 (초) - 3600=시간별, 86400=일별
+        aggregation: "avg", "min", "max", "sum", "count", "first", "last" 중 선택
+
+    Returns:
+        버킷별 집계값 시계열 (time,value,n 형식)
+    """
     try:
-        result = get_sql_db().run(query)
-        if not result or result == "[]":
-            return f"데이터가 없습니다. (테이블: {table_name}, tagid: {tag_id})"
-        return result
+        start_ms = to_ms(parse_time_arg(start_time))
+        end_ms = to_ms(parse_time_arg(end_time))
+        points = aggregate_buckets([tag_id], start_ms, end_ms, bucket_seconds, aggregation)
+    except ValueError as e:
+        return f"입력 오류: {e}"
     except Exception as e:
-        error_msg = str(e)
-        if "doesn't exist" in error_msg or "Table" in error_msg:
-            return (
-                f"테이블 {table_name}이 존재하지 않습니다. "
-                f"find_partition_table({year}, {month})로 실제 테이블명을 확인하세요."
-            )
         return f"쿼리 오류: {e}"
 
+    if not points:
+        return f"데이터가 없습니다. (tagid: {tag_id}, {start_time} ~ {end_time})"
+    return format_series(points, bucket_seconds, aggregation)
+
+
+@tool
+def get_tag_statistics(
+    tag_id: int,
+    start_time: str,
+    end_time: str,
+    metrics: str = "all",
+    integral_unit: str = "hour",
+) -> str:
+    """
+    시간가중 통계 계산 (값 변경 시에만 기록되는 Ignition 데이터에 정확한 평균/적산).
+    평균, 적산량(totalizer), 표준편차, 백분위수, 변화율, ON/OFF 시간 및 전환 횟수를 한 번에 계산합니다.
+
+    Args:
+        tag_id: sqlth_te에서 조회한 태그 ID
+        start_time: 시작 시각 "YYYY-MM-DD" 또는 "YYYY-MM-DD HH:MM"
+        end_time: 종료 시각 (미포함) "YYYY-MM-DD" 또는 "YYYY-MM-DD HH:MM"
+        metrics: "all" 또는 쉼표 구분 목록 (twa, integral, std, percentiles, rate, state)
+        integral_unit: 적산 시간 단위 - 값이 시간당 유량이면 "hour" (second, minute, hour, day)
+
+    Returns:
+        지표별 key=value 결과 (twa=시간가중평균, state=ON/OFF 체류 시간 및 전환 횟수)
+    """
+    selected = (
+        ANALYTICS_METRICS if metrics.strip() == "all"
+        else [m.strip() for m in metrics.split(",") if m.strip()]
+    )
+    try:
+        start_ms = to_ms(parse_time_arg(start_time))
+        end_ms = to_ms(parse_time_arg(end_time))
+        ts, values, prior = fetch_series([tag_id], start_ms, end_ms)
+        result = run_analysis(
+            ts, values, start_ms, end_ms,
+            prior=prior, metrics=selected, integral_unit=integral_unit,
+        )
+    except ValueError as e:
+        return f"입력 오류: {e}"
+    except Exception as e:
+        return f"쿼리 오류: {e}"
+
+    if result["covered_s"] == 0:
+        return f"데이터가 없습니다. (tagid: {tag_id}, {start_time} ~ {end_time})"
+    return format_analysis(result)
+
+
+@tool
+def get_multi_tag_history(
+    tag_paths: str,
+    start_time: str,
+    end_time: str,
+    step_seconds: int = 0,
+    method: str = "ffill",
+    correlation: bool = False,
+    max_points: int = 100,
+) -> str:
+    """
+    여러 태그 히스토리를 한 번에 조회해 공통 시간 격자로 정렬 (태그 비교, 설비 그룹 조회).
+    태그별 get_tag_id / get_tag_history 반복 호출 대신 사용하세요.
+
+    Args:
+        tag_paths: 쉼표 구분 태그 목록. 전체 경로("Line1/FAN/FAN1"), 태그 이름("FAN1"),
+                   와일드카드 그룹("Line1/FAN/*") 모두 가능
+        start_time: 시작 시각 "YYYY-MM-DD" 또는 "YYYY-MM-DD HH:MM"
+        end_time: 종료 시각 (미포함) "YYYY-MM-DD" 또는 "YYYY-MM-DD HH:MM"
+        step_seconds: 격자 간격 (초). 0이면 max_points에 맞춰 자동 결정
+        method: "ffill" (직전 값 유지) 또는 "linear" (선형 보간)
+        correlation: True이면 태그 쌍별 상관계수 포함
+        max_points: 자동 격자 사용 시 최대 행 수 (기본 100)
+
+    Returns:
+        태그별 요약(samples, twa, min, max), 정렬된 시계열 표, 선택적 상관계수
+    """
+    try:
+        start_ms = to_ms(parse_time_arg(start_time))
+        end_ms = to_ms(parse_time_arg(end_time))
+        if end_ms <= start_ms:
+            raise ValueError("종료 시간은 시작 시간보다 늦어야 합니다.")
+        step_ms = step_seconds * 1000 if step_seconds > 0 else max(
+            1000, -(-(end_ms - start_ms) // max(1, max_points) // 1000) * 1000
+        )
+        if (end_ms - start_ms) // step_ms > MAX_BUCKETS:
+            raise ValueError(f"시점 수가 {MAX_BUCKETS}개를 초과합니다. step_seconds를 늘리거나 기간을 줄이세요.")
+        grid = make_grid(start_ms, end_ms, step_ms)
+
+        tag_map, missing = resolve_tags(tag_paths.split(","))
+        if not tag_map:
+            return f"태그를 찾을 수 없습니다: {tag_paths}. get_tag_id로 경로를 확인하세요."
+        series = fetch_multi_series(tag_map, start_ms, end_ms)
+        aligned = {
+            label: resample(ts, values, grid, method, prior)
+            for label, (ts, values, prior) in series.items()
+        }
+    except ValueError as e:
+        return f"입력 오류: {e}"
+    except Exception as e:
+        return f"쿼리 오류: {e}"
+
+    labels = sorted(aligned)
+    lines = [f"tags={len(labels)}" + (f" missing={','.join(missing)}" if missing else "")]
+    lines.append("tag,samples,twa,min,max")
+    for label in labels:
+        ts, values, prior = series[label]
+        stats = analyze(ts, values, start_ms, end_ms, prior=prior, metrics=["twa"])
+        if "twa" in stats:
+            lines.append(
+                f"{label},{stats['samples']},{stats['twa']:.6g},{stats['min']:.6g},{stats['max']:.6g}"
+            )
+        else:
+            lines.append(f"{label},0,,,")
+
+    with_seconds = step_ms % 60000 != 0
+    lines.append(f"step={step_ms // 1000}s method={method} points={len(grid)}")
+    lines.append("time," + ",".join(labels))
+    for i, t in enumerate(grid.tolist()):
+        row = ["" if np.isnan(aligned[l][i]) else f"{aligned[l][i]:.6g}" for l in labels]
+        lines.append(f"{format_ms(t, with_seconds)}," + ",".join(row))
+
+    if correlation and len(labels) > 1:
+        lines.append("correlation")
+        for (a, b), r in correlation_matrix({l: aligned[l] for l in labels}).items():
+            lines.append(f"{a}~{b}=" + ("n/a" if r is None else f"{r:.3f}"))
+    return "\n".join(lines)
+
 
 tag_history_tools_list = [
     parse_date_to_partition,
     find_partition_table,
     get_tag_id,
     get_tag_history,
+    get_tag_history_buckets,
+    get_tag_statistics,
+    get_multi_tag_history,
 ]
@@ -0,0 +1,144 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from sqlalchemy import create_engine, text
+
+from app.services import alarm_analytics, alarm_episodes, alarm_index, sql
+from app.services.alarm_analytics import (
+    bucket_counts,
+    build_alarm_report,
+    flood_intervals,
+    max_windowed_counts,
+    operator_area,
+    windowed_counts,
+)
+from app.services.alarm_episodes import EpisodeStore
+from app.services.history_cache import HistoryCache
+
+
+NOW = datetime(2026, 3, 10, 12, 0)
+FAN1 = "prov:default:/tag:BMS/MFD/8F/FAN1:/alm:Hi"
+FAN2 = "prov:default:/tag:BMS/MFD/9F/FAN2:/alm:Hi"
+PUMP = "prov:default:/tag:WTR/P1/PUMP2:/alm:Lo"
+MINUTE = 60_000
+
+
+class WindowTests(unittest.TestCase):
+    def test_windowed_counts_are_half_open(self):
+        times = np.array([0, 1, 2, 10, 11]) * MINUTE
+        np.testing.assert_array_equal(windowed_counts(times, 10 * MINUTE), [3, 3, 3, 2, 1])
+
+    def test_flood_intervals_merge_overlapping_windows(self):
+        # 0~4분 12건, 30분에 1건, 40~41분 12건
+        times = np.r_[np.linspace(0, 4, 12), [30], np.linspace(40, 41, 12)] * MINUTE
+        intervals = flood_intervals(times, 10 * MINUTE, 10)
+        self.assertEqual([(s / MINUTE, e / MINUTE, p) for s, e, p in intervals], [
+            (0, 4, 12), (40, 41, 12),
+        ])
+        self.assertEqual(flood_intervals(times[:5], 10 * MINUTE, 10), [])
+
+    def test_bucket_counts(self):
+        times = np.array([0, 5, 9.9, 10, 35]) * MINUTE
+        np.testing.assert_array_equal(bucket_counts(times, 0, 40 * MINUTE, 10 * MINUTE), [3, 1, 0, 1])
+
+    def test_max_windowed_counts_do_not_cross_groups(self):
+        codes = np.array([0, 0, 1, 1, 1, 0])
+        # 그룹 0: 0, 100s, 101s / 그룹 1: 10s, 20s, 30s
+        times = np.array([0, 100_000, 10_000, 20_000, 30_000, 101_000])
+        np.testing.assert_array_equal(max_windowed_counts(codes, times, 60_000), [2, 3])
+
+    def test_operator_area(self):
+        self.assertEqual(operator_area(FAN1, 2), "BMS/MFD")
+        self.assertEqual(operator_area(PUMP, 1), "WTR")
+
+
+class AlarmReportTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE alarm_events (id INTEGER PRIMARY KEY, eventid TEXT, source TEXT, "
+                "displaypath TEXT, priority INT, eventtype INT, eventtime TIMESTAMP)"
+            ))
+        self.next_id = 1
+        base = NOW - timedelta(hours=6)
+        # FAN1: 20초 간격 12회 발생 (flood + chattering), FAN2: 1회, PUMP: 30시간 전 발생 후 미해제
+        for i in range(12):
+            self._insert(base + timedelta(seconds=20 * i), FAN1, f"f{i}", 0)
+            self._insert(base + timedelta(seconds=20 * i + 10), FAN1, f"f{i}", 1)
+        self._insert(base + timedelta(hours=1), FAN2, "g", 0)
+        self._insert(NOW - timedelta(hours=30), PUMP, "p", 0, priority=4)
+
+        db = MagicMock()
+        db._engine = self.engine
+        patches = [
+            patch.object(sql, "get_sql_db", return_value=db),
+            patch.object(alarm_analytics, "_report_cache", HistoryCache(max_entries=8)),
+            patch.object(alarm_episodes, "_store", EpisodeStore()),
+            patch.object(alarm_episodes.settings, "alarm_episode_days", 0),
+            patch.object(alarm_episodes.settings, "alarm_episode_lookback_hours", 48),
+            patch.object(alarm_index, "_index", alarm_index.AlarmSourceIndex()),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _insert(self, when, source, eventid, eventtype, priority=2):
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO alarm_events VALUES (:id, :eid, :source, '', :p, :t, :time)"),
+                {"id": self.next_id, "eid": eventid, "source": source, "p": priority,
+                 "t": eventtype, "time": when.strftime("%Y-%m-%d %H:%M:%S")},
+            )
+        self.next_id += 1
+
+    def test_report_sections(self):
+        report = build_alarm_report(NOW - timedelta(days=1), NOW, now=NOW)
+
+        self.assertEqual(report["total_activations"], 13)
+        mfd = next(a for a in report["areas"] if a["area"] == "BMS/MFD")
+        self.assertEqual(mfd["flood_count"], 1)
+        self.assertEqual(mfd["peak_per_window"], 12)
+        self.assertEqual(mfd["floods"][0]["peak"], 12)
+
+        self.assertEqual([c["source"] for c in report["chattering"]], [FAN1])
+        self.assertEqual(report["chattering"][0]["max_in_window"], 3)
+
+        self.assertEqual(report["bad_actors"][0]["source"], FAN1)
+        self.assertEqual(report["bad_actors"][-1]["cumulative_pct"], 100.0)
+
+        self.assertEqual([s["source"] for s in report["stale"]], [PUMP])
+        self.assertEqual(report["stale"][0]["hours"], 30.0)
+
+    def test_report_filters_by_tag_and_is_cached(self):
+        start = NOW - timedelta(days=1)
+        report = build_alarm_report(start, NOW, "FAN2", now=NOW)
+        self.assertEqual(report["total_activations"], 1)
+        self.assertEqual(report["chattering"], [])
+
+        self._insert(NOW - timedelta(hours=2), FAN2, "g2", 0)
+        cached = build_alarm_report(start, NOW, "FAN2", now=NOW)
+        self.assertIs(cached, report)
+
+        alarm_analytics._report_cache.clear()
+        self.assertEqual(build_alarm_report(start, NOW, "FAN2", now=NOW)["total_activations"], 2)
+
+    def test_open_window_calls_share_one_computation(self):
+        calls = []
+        compute = alarm_analytics._compute_report
+
+        def counting(*args, **kwargs):
+            calls.append(args[:2])
+            return compute(*args, **kwargs)
+
+        first_now = NOW + timedelta(seconds=20, microseconds=1234)
+        with patch.object(alarm_analytics, "_compute_report", side_effect=counting):
+            for now in (first_now, first_now + timedelta(milliseconds=5)):
+                build_alarm_report(now - timedelta(days=7), now, now=now)
+        self.assertEqual(calls, [(NOW - timedelta(days=7), NOW)])
+
+
+if __name__ == "__main__":
+    unittest.main()
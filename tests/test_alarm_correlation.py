@@ -0,0 +1,78 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
+
+from app.services import alarm_correlation
+from app.services.alarm_correlation import change_point, correlate_alarm, lagged_correlation, trend_z
+from app.services.alarm_episodes import Episode
+from app.services.history import to_ms
+
+
+ALARM = datetime(2026, 3, 10, 12, 0)
+SOURCE = "prov:default:/tag:Line1/Tank1/Temp_Hi:/alm:Hi"
+
+
+class MetricTests(unittest.TestCase):
+    def test_change_point_finds_mean_shift(self):
+        values = np.r_[np.zeros(30), np.full(20, 5.0)] + np.tile([0.1, -0.1], 25)
+        split, z = change_point(values)
+        self.assertEqual(split, 30)
+        self.assertGreater(z, 10)
+        self.assertIsNone(change_point(np.ones(10)))
+
+    def test_lagged_correlation_reports_lead(self):
+        rng = np.random.default_rng(0)
+        x = rng.normal(size=200)
+        y = np.r_[np.zeros(5), x[:-5]]   # y는 x를 5스텝 뒤따름
+        lag, corr = lagged_correlation(x, y, 10)
+        self.assertEqual(lag, 5)
+        self.assertAlmostEqual(corr, 1.0, places=6)
+        self.assertIsNone(lagged_correlation(np.ones(50), y[:50], 10))
+
+    def test_trend_z_sign_and_scale(self):
+        baseline = np.tile([9.0, 11.0], 20)      # 표준편차 1
+        rising = np.linspace(10, 14, 11)
+        self.assertAlmostEqual(trend_z(rising, baseline, 10), 4.0)
+        self.assertAlmostEqual(trend_z(rising[::-1], baseline, 10), -4.0)
+
+
+class CorrelateAlarmTests(unittest.TestCase):
+    def test_ranks_ramping_sibling_first(self):
+        step = 10_000
+        start = to_ms(ALARM - timedelta(minutes=60))
+        ts = np.arange(start, to_ms(ALARM + timedelta(minutes=10)), step)
+        minutes_before = (to_ms(ALARM) - ts) / 60_000
+        rng = np.random.default_rng(1)
+        series = {
+            # 알람 20분 전부터 상승
+            "line1/tank1/temp": (ts, np.where(minutes_before > 20, 50.0, 50.0 + (20 - minutes_before)), None),
+            "line1/tank1/noise": (ts, rng.normal(size=len(ts)), None),
+            "line1/tank1/level": (ts[:1], np.array([3.0]), None),
+        }
+        episode = Episode(SOURCE, "e1", 3, ALARM, None, ALARM + timedelta(minutes=5))
+
+        with patch.object(alarm_correlation, "find_episode", return_value=episode), \
+                patch.object(alarm_correlation, "sibling_tags", return_value=(None, {p: (1,) for p in series})), \
+                patch.object(alarm_correlation, "fetch_multi_series", return_value=series) as fetch:
+            result = correlate_alarm("Temp_Hi", now=ALARM + timedelta(hours=1))
+
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(result["alarm_tag"], "Line1/Tank1/Temp_Hi")
+        self.assertEqual(result["signal"], "alarm_state")
+        top = result["contributors"][0]
+        self.assertEqual(top["tag_path"], "line1/tank1/temp")
+        self.assertGreater(top["trend_z"], 4)
+        self.assertGreater(top["change_lead_s"], 0)
+        # 상수 태그는 후보에서 제외
+        self.assertNotIn("line1/tank1/level", [c["tag_path"] for c in result["contributors"]])
+
+    def test_missing_episode_raises_lookup_error(self):
+        with patch.object(alarm_correlation, "find_episode", return_value=None):
+            with self.assertRaises(LookupError):
+                correlate_alarm("FAN9")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import create_engine, text
+
+from app.services import alarm_episodes, alarm_index, sql
+from app.services.alarm_episodes import (
+    EpisodeStore,
+    ack_statistics,
+    alarm_time_by_source,
+    build_episodes,
+    episodes_between,
+    longest_episodes,
+)
+
+
+NOW = datetime(2026, 3, 10, 12, 0)
+FAN1 = "prov:default:/tag:Line1/FAN1:/alm:Hi"
+PUMP = "prov:default:/tag:Line1/PUMP2:/alm:Lo"
+
+
+def _ms(dt):
+    return dt.timestamp() * 1000
+
+
+class BuildEpisodesTests(unittest.TestCase):
+    def test_pairs_active_ack_clear_per_eventid(self):
+        t0 = datetime(2026, 3, 10, 8)
+        # 입력 순서와 무관하게 (source, eventid, 시각) 순으로 정렬되어야 함
+        events = [
+            (FAN1, "a", 1, t0 + timedelta(minutes=30), 3),
+            (PUMP, "b", 0, t0 + timedelta(minutes=5), 1),
+            (FAN1, "a", 0, t0, 3),
+            (FAN1, "a", 2, t0 + timedelta(minutes=10), 3),
+            (FAN1, "c", 1, t0 + timedelta(minutes=1), 2),   # active가 범위 이전
+        ]
+        episodes = build_episodes(
+            [e[0] for e in events], [e[1] for e in events], [e[2] for e in events],
+            [_ms(e[3]) for e in events], [e[4] for e in events],
+        )
+        by_key = {(e.source, e.eventid): e for e in episodes}
+        self.assertEqual(len(episodes), 3)
+
+        fan = by_key[(FAN1, "a")]
+        self.assertEqual((fan.start, fan.ack, fan.clear), (t0, t0 + timedelta(minutes=10), t0 + timedelta(minutes=30)))
+        self.assertEqual(fan.time_to_ack_s(), 600)
+        self.assertEqual(fan.duration_s(NOW), 1800)
+
+        self.assertIsNone(by_key[(PUMP, "b")].clear)
+        self.assertIsNone(by_key[(FAN1, "c")].start)
+
+    def test_reactivation_starts_new_episode(self):
+        t0 = datetime(2026, 3, 10, 8)
+        times = [t0, t0 + timedelta(minutes=1), t0 + timedelta(minutes=2), t0 + timedelta(minutes=5)]
+        episodes = build_episodes([FAN1] * 4, ["a"] * 4, [0, 1, 0, 1], [_ms(t) for t in times], [1, 1, 4, 4])
+        self.assertEqual([(e.start, e.clear, e.priority) for e in episodes], [
+            (times[0], times[1], 1), (times[2], times[3], 4),
+        ])
+
+    def test_metrics(self):
+        t0 = datetime(2026, 3, 10, 8)
+        episodes = build_episodes(
+            [FAN1, FAN1, FAN1, PUMP],
+            ["a", "a", "a", "b"],
+            [0, 2, 1, 0],
+            [_ms(t0), _ms(t0 + timedelta(minutes=2)), _ms(t0 + timedelta(hours=1)), _ms(t0 + timedelta(hours=3))],
+            [3, 3, 3, 1],
+        )
+        window = (datetime(2026, 3, 10, 8, 30), datetime(2026, 3, 10, 12))
+        totals = alarm_time_by_source(episodes, *window, now=NOW)
+        # PUMP: 11:00 ~ 현재(12:00) 미해제, FAN1: 08:30 ~ 09:00 (창으로 잘림)
+        self.assertEqual([(t["source"], t["alarm_s"], t["open"]) for t in totals], [
+            (PUMP, 3600, 1), (FAN1, 1800, 0),
+        ])
+
+        stats = ack_statistics(episodes)
+        self.assertEqual(stats["overall"]["acked"], 1)
+        self.assertEqual(stats["overall"]["unacked"], 1)
+        self.assertEqual(stats["by_priority"][3]["mtta_s"], 120)
+        self.assertIsNone(stats["by_priority"][1]["mtta_s"])
+
+        self.assertEqual([e.source for e in longest_episodes(episodes, now=NOW)], [FAN1, PUMP])
+
+
+class EpisodeStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE alarm_events (id INTEGER PRIMARY KEY, eventid TEXT, source TEXT, "
+                "displaypath TEXT, priority INT, eventtype INT, eventtime TIMESTAMP)"
+            ))
+        self.next_id = 1
+        db = MagicMock()
+        db._engine = self.engine
+        self.store = EpisodeStore()
+        patches = [
+            patch.object(sql, "get_sql_db", return_value=db),
+            patch.object(alarm_episodes, "_store", self.store),
+            patch.object(alarm_episodes.settings, "alarm_episode_days", 2),
+            patch.object(alarm_episodes.settings, "alarm_episode_refresh_seconds", 3600),
+            patch.object(alarm_index, "_index", alarm_index.AlarmSourceIndex()),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _insert(self, when, source, eventid, eventtype, priority=2):
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO alarm_events VALUES (:id, :eid, :source, '', :p, :t, :time)"),
+                {"id": self.next_id, "eid": eventid, "source": source, "p": priority,
+                 "t": eventtype, "time": when.strftime("%Y-%m-%d %H:%M:%S")},
+            )
+        self.next_id += 1
+
+    def test_incremental_refresh_merges_continuation_events(self):
+        self._insert(NOW - timedelta(hours=3), FAN1, "a", 0)
+        self._insert(NOW - timedelta(hours=2), PUMP, "b", 0)
+        self.store.refresh(NOW)
+        self.assertEqual(len(self.store), 2)
+
+        # 이전 배치에서 시작한 에피소드의 ack/clear가 나중에 들어옴
+        self._insert(NOW - timedelta(hours=2, minutes=50), FAN1, "a", 2)
+        self._insert(NOW - timedelta(hours=1), FAN1, "a", 1)
+        self.store.refresh(NOW)
+
+        self.assertEqual(len(self.store), 2)
+        fan = next(e for e in self.store.episodes() if e.source == FAN1)
+        self.assertEqual(fan.ack, NOW - timedelta(hours=2, minutes=50))
+        self.assertEqual(fan.clear, NOW - timedelta(hours=1))
+        self.assertEqual(self.store.watermark_id, 4)
+
+        episodes = episodes_between(NOW - timedelta(hours=4), NOW, "FAN1", now=NOW)
+        self.assertEqual([e.source for e in episodes], [FAN1])
+
+    def test_initial_load_in_chunks_joins_split_episodes(self):
+        self._insert(NOW - timedelta(hours=3), FAN1, "a", 0)
+        self._insert(NOW - timedelta(hours=2, minutes=50), FAN1, "a", 2)
+        self._insert(NOW - timedelta(hours=2), PUMP, "b", 0)
+        self._insert(NOW - timedelta(hours=1), FAN1, "a", 1)
+        with patch.object(alarm_episodes, "_LOAD_CHUNK_ROWS", 1):
+            self.store.refresh(NOW)
+
+        self.assertEqual(len(self.store), 2)
+        fan = next(e for e in self.store.episodes() if e.source == FAN1)
+        self.assertEqual((fan.start, fan.clear), (NOW - timedelta(hours=3), NOW - timedelta(hours=1)))
+        self.assertEqual(self.store.watermark_id, 4)
+
+    def test_store_and_raw_paths_match_sources_alike(self):
+        self._insert(NOW - timedelta(days=3), FAN1, "a", 0)
+        self._insert(NOW - timedelta(hours=3), FAN1, "b", 0)
+        self.store.refresh(NOW)
+        with patch.object(alarm_index.settings, "alarm_index_enabled", False):
+            for query, expected in (("line1/fan1", [FAN1]), ("FAN_", [])):
+                stored = episodes_between(NOW - timedelta(hours=4), NOW, query, now=NOW)
+                raw = episodes_between(NOW - timedelta(days=3, hours=1), NOW - timedelta(days=2), query, now=NOW)
+                self.assertEqual([e.source for e in stored], expected)
+                self.assertEqual([e.source for e in raw], expected)
+
+    def test_raw_build_for_range_older_than_store(self):
+        self._insert(NOW - timedelta(days=5, hours=2), FAN1, "a", 0)
+        self._insert(NOW - timedelta(days=4, hours=23), FAN1, "a", 1)
+        self.store.refresh(NOW)
+        self.assertEqual(len(self.store), 0)
+
+        # 창 시작 이전에 발생한 에피소드도 lookback 구간으로 포착
+        start, end = NOW - timedelta(days=5), NOW - timedelta(days=4)
+        episodes = episodes_between(start, end, now=NOW)
+        self.assertEqual(len(episodes), 1)
+        self.assertEqual(alarm_time_by_source(episodes, start, end, NOW)[0]["alarm_s"], 3600)
+
+
+if __name__ == "__main__":
+    unittest.main()
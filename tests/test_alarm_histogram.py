@@ -0,0 +1,109 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import create_engine, text
+
+from app.services import alarm_index, alarm_rollup, sql
+from app.services.alarm_histogram import alarm_histogram
+from app.services.alarm_rollup import _State, refresh_alarm_rollup
+from app.tools.alarm_tools import get_alarm_histogram
+
+
+NOW = datetime(2026, 3, 10, 12, 30)   # 화요일
+FAN1 = "prov:default:/tag:Line1/FAN1:/alm:Hi"
+PUMP = "prov:default:/tag:Line2/PUMP2:/alm:Lo"
+
+# (NOW 기준 몇 시간 전, source, eventtype, priority)
+EVENTS = [
+    (27.3, FAN1, 0, 3), (27.2, FAN1, 1, 3), (26.0, PUMP, 0, 1), (25.95, PUMP, 0, 1),
+    (5.5, FAN1, 0, 3), (5.4, FAN1, 2, 3), (2.2, PUMP, 0, 1), (0.2, FAN1, 0, 4),
+]
+
+
+class AlarmHistogramTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE alarm_events (id INTEGER PRIMARY KEY, eventid TEXT, source TEXT, "
+                "displaypath TEXT, priority INT, eventtype INT, eventtime TIMESTAMP)"
+            ))
+            for i, (hours_before, source, eventtype, priority) in enumerate(EVENTS, start=1):
+                conn.execute(
+                    text("INSERT INTO alarm_events VALUES (:id, :eid, :source, '', :p, :t, :time)"),
+                    {"id": i, "eid": f"e{i}", "source": source, "p": priority, "t": eventtype,
+                     "time": (NOW - timedelta(hours=hours_before)).strftime("%Y-%m-%d %H:%M:%S")},
+                )
+        db = MagicMock()
+        db._engine = self.engine
+        patches = [
+            patch.object(sql, "get_sql_db", return_value=db),
+            patch.object(alarm_rollup, "_state", _State()),
+            patch.object(alarm_rollup.settings, "alarm_rollup_backfill_days", 2),
+            patch.object(alarm_rollup.settings, "alarm_rollup_settle_seconds", 0),
+            patch.object(alarm_index, "_index", alarm_index.AlarmSourceIndex()),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.start, self.end = NOW - timedelta(hours=28), NOW
+
+    def _expected_hours(self):
+        hours = [0] * 24
+        for hours_before, _, eventtype, _ in EVENTS:
+            if eventtype == 0:
+                hours[(NOW - timedelta(hours=hours_before)).hour] += 1
+        return hours
+
+    def test_hour_of_day_same_from_raw_hot_copy_and_table(self):
+        raw = alarm_histogram(self.start, self.end)
+        self.assertEqual(raw["total"], self._expected_hours())
+        self.assertEqual(raw["peak"], {"label": "10", "count": 3})
+
+        refresh_alarm_rollup(NOW)
+        self.assertEqual(alarm_histogram(self.start, self.end)["total"], self._expected_hours())
+
+        # hot copy가 구간을 덮지 않으면 롤업 테이블에서 조회
+        alarm_rollup._state.hot_start = NOW
+        self.assertEqual(alarm_histogram(self.start, self.end)["total"], self._expected_hours())
+
+    def test_split_by_priority_and_area(self):
+        refresh_alarm_rollup(NOW)
+        by_priority = alarm_histogram(self.start, self.end, bucket="day_of_week", split_by="priority")
+        self.assertEqual(by_priority["labels"][0], "월")
+        self.assertEqual(list(by_priority["series"]), ["priority 4", "priority 3", "priority 1"])
+        self.assertEqual(by_priority["series"]["priority 1"], [2, 1, 0, 0, 0, 0, 0])
+        self.assertEqual(by_priority["total"], [3, 3, 0, 0, 0, 0, 0])
+
+        by_area = alarm_histogram(self.start, self.end, split_by="area")
+        self.assertEqual(set(by_area["series"]), {"Line1/FAN1", "Line2/PUMP2"})
+        self.assertEqual(sum(by_area["series"]["Line2/PUMP2"]), 3)
+
+    def test_interval_resolution_and_limit(self):
+        fine = alarm_histogram(NOW - timedelta(hours=3), NOW, bucket="interval", interval_minutes=15)
+        self.assertEqual(fine["resolution"], "event")
+        self.assertEqual(len(fine["total"]), 12)
+        self.assertEqual(sum(fine["total"]), 2)
+
+        coarse = alarm_histogram(self.start, self.end, bucket="interval", interval_minutes=360)
+        self.assertEqual(coarse["resolution"], "hourly")
+        self.assertEqual(coarse["labels"][0], "03-09 08:00")
+        self.assertEqual(sum(coarse["total"]), 6)
+
+        with self.assertRaises(ValueError):
+            alarm_histogram(self.start, self.end, bucket="interval", interval_minutes=1)
+        with self.assertRaises(ValueError):
+            alarm_histogram(self.start, self.end, bucket="month")
+
+    def test_tool_output_is_compact_vector(self):
+        result = get_alarm_histogram.invoke({"start_date": "2026-03-09", "end_date": "2026-03-10"})
+        lines = result.splitlines()
+        self.assertIn("시간대별", lines[0])
+        self.assertIn("발생 6건", lines[0])
+        self.assertEqual(lines[2], "total: " + ",".join(map(str, self._expected_hours())))
+        self.assertEqual(lines[-1], "최다: 10 (3건)")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import patch
+
+from app.services import alarm_index
+from app.services.alarm_index import AlarmSourceIndex, parse_source, source_clause
+from app.tools.alarm_tools import extract_tag_from_source
+
+
+FAN1 = "prov:default:/tag:Line1/FAN1/Fault:/alm:ALARM"
+FAN10 = "prov:default:/tag:Line1/FAN10/Fault:/alm:ALARM"
+SMOKE = "prov:default:/tag:BMS/8F/Smoke_Detect_Alm:/alm:Smoke"
+
+
+class ParseSourceTests(unittest.TestCase):
+    def test_parses_provider_path_and_alarm(self):
+        parsed = parse_source(SMOKE)
+        self.assertEqual(parsed.provider, "default")
+        self.assertEqual(parsed.tag_path, "BMS/8F/Smoke_Detect_Alm")
+        self.assertEqual(parsed.alarm_name, "Smoke")
+        self.assertEqual(parsed.segments, ("bms", "8f", "smoke_detect_alm"))
+        self.assertEqual(extract_tag_from_source(FAN1), "Line1/FAN1/Fault")
+        self.assertEqual(parse_source("legacy-source").tag_path, "legacy-source")
+
+
+class AlarmSourceIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = AlarmSourceIndex()
+        self.queries = []
+        self.batches = [[(FAN1, 10), (FAN10, 12)], [(SMOKE, 15)]]
+
+        def fake_fetch(query, parameters=None):
+            self.queries.append(query)
+            return self.batches.pop(0) if self.batches else []
+
+        patcher = patch.object(alarm_index, "fetch_rows", side_effect=fake_fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_incremental_refresh_by_id_watermark(self):
+        self.assertEqual(self.index.refresh(), 2)
+        self.assertEqual(self.index.refresh(), 1)
+        self.assertEqual(self.index.watermark_id, 15)
+        self.assertIn("id > 0", self.queries[0])
+        self.assertIn("id > 12", self.queries[1])
+
+    def test_match_prefers_exact_segments_over_substring(self):
+        self.index.refresh()
+        self.index.refresh()
+        self.assertEqual(self.index.match("FAN1"), [FAN1])
+        self.assertEqual(self.index.match("[default]Line1/FAN10/Fault"), [FAN10])
+        self.assertEqual(self.index.match("line1"), [FAN1, FAN10])
+        self.assertEqual(self.index.match("smoke_det"), [SMOKE])
+        self.assertEqual(self.index.match("pump"), [])
+
+    def test_exact_match_keeps_segment_matches(self):
+        folder_alarm = "prov:default:/tag:Line1/FAN1:/alm:Trip"
+        self.batches = [[(FAN1, 10), (FAN10, 12), (folder_alarm, 13)]]
+        self.index.refresh()
+        self.assertEqual(self.index.match("FAN1"), sorted([folder_alarm, FAN1]))
+
+    def test_source_clause_uses_in_list_or_falls_back(self):
+        with patch.object(alarm_index, "_index", self.index):
+            self.assertEqual(source_clause("FAN1"), f"source = '{FAN1}'")
+            self.assertEqual(source_clause("line1"), f"source IN ('{FAN1}', '{FAN10}')")
+            self.assertEqual(source_clause("pump"), "1 = 0")
+            with patch.object(alarm_index.settings, "alarm_index_max_sources", 1):
+                self.assertEqual(source_clause("line1"), "LOWER(source) LIKE '%line1%' ESCAPE '!'")
+            with patch.object(alarm_index.settings, "alarm_index_enabled", False):
+                self.assertEqual(source_clause("O'Brien"), "LOWER(source) LIKE '%o''brien%' ESCAPE '!'")
+                self.assertEqual(source_clause("Fan_1%"), "LOWER(source) LIKE '%fan!_1!%%' ESCAPE '!'")
+
+
+if __name__ == "__main__":
+    unittest.main()
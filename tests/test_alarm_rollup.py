@@ -0,0 +1,132 @@
+import unittest
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import create_engine, text
+
+from app.services import alarm_index, alarm_rollup, sql
+from app.services.alarm_rollup import _State, refresh_alarm_rollup, summarize_alarms
+
+
+NOW = datetime(2026, 3, 10, 12, 30)
+FAN1 = "prov:default:/tag:Line1/FAN1:/alm:Hi"
+PUMP = "prov:default:/tag:Line1/PUMP2:/alm:Lo"
+
+
+class AlarmRollupTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE alarm_events (id INTEGER PRIMARY KEY, eventid TEXT, source TEXT, "
+                "displaypath TEXT, priority INT, eventtype INT, eventtime TIMESTAMP)"
+            ))
+        self.next_id = 1
+        # 어제 09:10 ~ 오늘 12:20 사이 이벤트
+        for hours_before, source, eventtype, priority in [
+            (27.3, FAN1, 0, 3), (27.2, FAN1, 1, 3), (26.0, PUMP, 0, 1),
+            (5.5, FAN1, 0, 3), (5.4, FAN1, 2, 3), (2.2, PUMP, 0, 1), (0.2, FAN1, 0, 4),
+        ]:
+            self._insert(NOW - timedelta(hours=hours_before), source, eventtype, priority)
+
+        db = MagicMock()
+        db._engine = self.engine
+        patches = [
+            patch.object(sql, "get_sql_db", return_value=db),
+            patch.object(alarm_rollup, "_state", _State()),
+            patch.object(alarm_rollup.settings, "alarm_rollup_backfill_days", 2),
+            patch.object(alarm_rollup.settings, "alarm_rollup_settle_seconds", 0),
+            patch.object(alarm_rollup.settings, "alarm_rollup_batch_hours", 6),
+            patch.object(alarm_index, "_index", alarm_index.AlarmSourceIndex()),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _insert(self, when, source, eventtype, priority):
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO alarm_events VALUES (:id, :eid, :source, '', :p, :t, :time)"),
+                {"id": self.next_id, "eid": f"e{self.next_id}", "source": source, "p": priority,
+                 "t": eventtype, "time": when.strftime("%Y-%m-%d %H:%M:%S")},
+            )
+        self.next_id += 1
+
+    def _raw_total(self, start, end, source=None):
+        query = "SELECT COUNT(*) FROM alarm_events WHERE eventtime >= :a AND eventtime < :b"
+        params = {"a": start.strftime("%Y-%m-%d %H:%M:%S"), "b": end.strftime("%Y-%m-%d %H:%M:%S")}
+        if source:
+            query += " AND source = :s"
+            params["s"] = source
+        with self.engine.connect() as conn:
+            return conn.execute(text(query), params).scalar()
+
+    def test_refresh_then_summary_matches_raw_counts_with_edges(self):
+        refresh_alarm_rollup(NOW)
+        self.assertEqual(alarm_rollup._state.time_watermark, datetime(2026, 3, 10, 12))
+
+        start, end = NOW - timedelta(hours=27, minutes=15), NOW
+        summary = summarize_alarms(start, end)
+        self.assertEqual(sum(s.total for s in summary.values()), self._raw_total(start, end))
+        self.assertEqual(summary[FAN1].total, self._raw_total(start, end, FAN1))
+        self.assertEqual(summary[PUMP].by_priority, {1: 2})
+
+        fan = summarize_alarms(start, end, "FAN1")
+        self.assertEqual(list(fan), [FAN1])
+        # 09:12 이벤트는 시작(09:15) 이전이므로 제외
+        self.assertEqual(fan[FAN1].by_type, {1: 1, 0: 2, 2: 1})
+        self.assertEqual(fan[FAN1].by_priority, {3: 3, 4: 1})
+
+    def test_late_events_recompute_rolled_hours(self):
+        refresh_alarm_rollup(NOW)
+        late_time = NOW - timedelta(hours=5, minutes=40)
+        self._insert(late_time, PUMP, 0, 2)
+        refresh_alarm_rollup(NOW + timedelta(minutes=5))
+
+        start, end = NOW - timedelta(hours=8), NOW - timedelta(hours=1)
+        summary = summarize_alarms(start, end)
+        self.assertEqual(sum(s.total for s in summary.values()), self._raw_total(start, end))
+        self.assertEqual(summary[PUMP].by_priority.get(2), 1)
+        self.assertIn(alarm_rollup.floor_hour(late_time), alarm_rollup._state.hot)
+
+    def test_rollup_table_used_outside_hot_copy(self):
+        refresh_alarm_rollup(NOW)
+        with patch.object(alarm_rollup._state, "hot_start", None):
+            start, end = NOW - timedelta(days=2), NOW
+            summary = summarize_alarms(start, end)
+        self.assertEqual(sum(s.total for s in summary.values()), self._raw_total(start, end))
+
+    def test_hot_copy_and_table_use_same_source_rule(self):
+        refresh_alarm_rollup(NOW)
+        start, end = NOW - timedelta(hours=8), NOW - timedelta(hours=1)
+        with patch.object(alarm_index.settings, "alarm_index_enabled", False):
+            hot = {q: list(summarize_alarms(start, end, q)) for q in ("line1/fan1", "FAN_")}
+            with patch.object(alarm_rollup._state, "hot_start", None):
+                table = {q: list(summarize_alarms(start, end, q)) for q in ("line1/fan1", "FAN_")}
+        self.assertEqual(hot, {"line1/fan1": [FAN1], "FAN_": []})
+        self.assertEqual(table, hot)
+
+    def test_only_lock_holder_writes_rollup(self):
+        @contextmanager
+        def held_elsewhere(name):
+            yield False
+
+        with patch.object(alarm_rollup, "advisory_lock", held_elsewhere):
+            self.assertEqual(refresh_alarm_rollup(NOW), 0)
+        self.assertIsNone(alarm_rollup._state.time_watermark)
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text("SELECT COUNT(*) FROM alarm_rollup_hourly")).scalar(), 0)
+
+        refresh_alarm_rollup(NOW)
+        # 다른 워커가 갱신한 워터마크를 읽고 hot copy를 테이블에서 다시 채움
+        alarm_rollup._state.hot.clear()
+        alarm_rollup._state.time_watermark = None
+        with patch.object(alarm_rollup, "advisory_lock", held_elsewhere):
+            refresh_alarm_rollup(NOW)
+        self.assertEqual(alarm_rollup._state.time_watermark, datetime(2026, 3, 10, 12))
+        self.assertTrue(alarm_rollup._state.hot)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from app.services import analytics
+from app.services.analytics import analyze, format_analysis, run_analysis
+
+MIN = 60 * 1000
+
+
+class AnalyticsTests(unittest.TestCase):
+    def test_time_weighted_average_is_not_biased_by_sample_density(self):
+        # 0~10분 값 0 (샘플 1개), 10~20분 값 10 (샘플 10개가 같은 값으로 몰림)
+        ts = [0] + [10 * MIN + i * 1000 for i in range(10)]
+        values = [0.0] + [10.0] * 10
+
+        result = analyze(ts, values, 0, 20 * MIN)
+
+        self.assertAlmostEqual(result["twa"], 5.0)
+        self.assertAlmostEqual(np.mean(values), 100 / 11)
+        self.assertEqual(result["samples"], 11)
+
+    def test_prior_value_fills_window_start_and_integral(self):
+        # 직전 값 6 (0~30분), 30분부터 12 → 1시간 적산 = 6*0.5 + 12*0.5
+        result = analyze([30 * MIN], [12.0], 0, 60 * MIN, prior=6.0, integral_unit="hour")
+
+        self.assertAlmostEqual(result["integral"], 9.0)
+        self.assertAlmostEqual(result["twa"], 9.0)
+        self.assertAlmostEqual(result["std"], 3.0)
+        self.assertEqual(result["covered_s"], 3600)
+
+    def test_boolean_state_durations_and_transitions(self):
+        ts = [0, 10 * MIN, 15 * MIN, 40 * MIN]
+        values = [1, 0, 1, 0]
+
+        state = analyze(ts, values, 0, 60 * MIN, prior=0.0, metrics=["state"])["state"]
+
+        self.assertEqual(state["on_s"], 35 * 60)
+        self.assertEqual(state["off_s"], 25 * 60)
+        self.assertEqual((state["rising"], state["falling"]), (2, 2))
+        self.assertEqual(state["transitions"], 4)
+
+    def test_weighted_percentiles_and_rate(self):
+        ts = [0, 30 * MIN, 40 * MIN]
+        values = [1.0, 2.0, 3.0]
+
+        result = analyze(ts, values, 0, 60 * MIN, metrics=["percentiles", "rate"])
+
+        self.assertEqual(result["percentiles"], {5: 1.0, 50: 1.0, 95: 3.0})
+        self.assertAlmostEqual(result["rate"]["max_rise_per_s"], 1 / 600)
+
+    def test_rejects_unknown_metric(self):
+        with self.assertRaisesRegex(ValueError, "지원하지 않는 지표: median"):
+            analyze([0], [1.0], 0, MIN, metrics=["median"])
+        with self.assertRaisesRegex(ValueError, "종료 시간은 시작 시간보다 늦어야 합니다"):
+            analyze([0], [1.0], MIN, 0)
+
+    def test_small_inputs_skip_process_pool(self):
+        with patch.object(analytics, "_get_pool") as get_pool:
+            result = run_analysis([0], [1.0], 0, MIN)
+
+        get_pool.assert_not_called()
+        self.assertIn("twa=1", format_analysis(result))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from app.graph.state import PendingAction
+from app.services import approval_events, approval_storage
+from app.services.approval_events import ApprovalEventBus
+from app.services.approval_storage import MemoryApprovalStore, store_pending_action, update_pending_action
+
+
+def _action(action_id, risk_level="medium"):
+    return PendingAction(
+        id=action_id,
+        action_type="write_tag",
+        tag_path="[default]Line1/FAN1/Speed",
+        value=42.5,
+        reason="test",
+        requested_at=datetime.now(),
+        status="pending",
+        risk_level=risk_level,
+    )
+
+
+async def _take(stream, n, timeout=1.0):
+    events = []
+    while len(events) < n:
+        events.append(await asyncio.wait_for(stream.__anext__(), timeout))
+    return events
+
+
+class ApprovalEventBusTests(unittest.IsolatedAsyncioTestCase):
+    async def test_replay_after_cursor_then_live(self):
+        bus = ApprovalEventBus(buffer_size=10)
+        for i in range(3):
+            bus.publish("created", _action(f"a{i}"))
+
+        stream = bus.subscribe(after=1)
+        replayed = await _take(stream, 2)
+        self.assertEqual([(e.seq, e.data["id"]) for e in replayed], [(2, "a1"), (3, "a2")])
+
+        bus.publish("updated", _action("a1"))
+        (live,) = await _take(stream, 1)
+        self.assertEqual((live.seq, live.type), (4, "updated"))
+        await stream.aclose()
+        self.assertEqual(bus.subscriber_count(), 0)
+
+    async def test_risk_level_filter(self):
+        bus = ApprovalEventBus()
+        bus.publish("created", _action("low1", "low"))
+        bus.publish("created", _action("high1", "high"))
+        stream = bus.subscribe(after=0, risk_levels=["HIGH"])
+        (replayed,) = await _take(stream, 1)
+        self.assertEqual(replayed.data["id"], "high1")
+        bus.publish("created", _action("med1"))
+        bus.publish("created", _action("high2", "high"))
+        (live,) = await _take(stream, 1)
+        self.assertEqual(live.data["id"], "high2")
+        await stream.aclose()
+
+    async def test_publish_from_worker_thread(self):
+        bus = ApprovalEventBus()
+        stream = bus.subscribe()
+        first = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)  # 구독 등록
+        worker = threading.Thread(target=bus.publish, args=("created", _action("t1")))
+        worker.start()
+        worker.join()
+        event = await asyncio.wait_for(first, 1.0)
+        self.assertEqual(event.data["id"], "t1")
+        self.assertIsInstance(event.data["requested_at"], str)
+        await stream.aclose()
+
+    async def test_expired_cursor_resets(self):
+        bus = ApprovalEventBus(buffer_size=2)
+        for i in range(5):
+            bus.publish("created", _action(f"a{i}"))
+
+        stream = bus.subscribe(after=1)
+        (reset,) = await _take(stream, 1)
+        self.assertEqual((reset.type, reset.data["last_seq"]), ("reset", 5))
+        await stream.aclose()
+
+        # 재시작 전 커서 (현재 seq보다 큼)
+        stream = bus.subscribe(after=99)
+        self.assertEqual((await _take(stream, 1))[0].type, "reset")
+        await stream.aclose()
+
+    async def test_cursor_from_previous_boot_resets(self):
+        before = ApprovalEventBus()
+        for i in range(5):
+            before.publish("created", _action(f"old{i}"))
+        stale_id = before.event_id(2)
+
+        # 재시작 후 seq가 다시 커져도 이전 epoch의 커서는 재생하지 않고 reset
+        bus = ApprovalEventBus()
+        for i in range(5):
+            bus.publish("created", _action(f"new{i}"))
+        self.assertEqual(bus.parse_event_id(stale_id), -1)
+        self.assertEqual(bus.parse_event_id("3"), -1)
+        self.assertEqual(bus.parse_event_id(bus.event_id(3)), 3)
+        with self.assertRaises(ValueError):
+            bus.parse_event_id(f"{bus.epoch}-x")
+
+        stream = bus.subscribe(after=bus.parse_event_id(stale_id))
+        (reset,) = await _take(stream, 1)
+        self.assertEqual((reset.type, reset.seq), ("reset", 5))
+        await stream.aclose()
+
+    async def test_heartbeat_yields_none(self):
+        bus = ApprovalEventBus()
+        stream = bus.subscribe(heartbeat=0.01)
+        self.assertEqual(await _take(stream, 1), [None])
+        await stream.aclose()
+
+    async def test_store_and_update_publish(self):
+        bus = ApprovalEventBus()
+        with patch.object(approval_storage, "_store", MemoryApprovalStore()), \
+                patch.object(approval_events, "_bus", bus):
+            stream = bus.subscribe(after=bus.last_seq)
+            action = _action("s1", "high")
+            store_pending_action(action)
+            action.status = "approved"
+            update_pending_action(action)
+            events = await _take(stream, 2)
+            self.assertEqual([(e.type, e.data["status"]) for e in events],
+                             [("created", "pending"), ("updated", "approved")])
+            await stream.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+import uuid
+from typing import Any, List, TypedDict
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Command
+
+from app.api.v1.approve import ApprovalRequest, approve_action
+from app.graph.nodes import execute_tool_with_approval
+from app.services import approval_storage, write_executor
+from app.services.approval_storage import MemoryApprovalStore, get_pending_action, list_pending_actions
+from app.services.write_executor import WriteRateLimiter
+
+
+class _State(TypedDict, total=False):
+    messages: List[Any]
+
+
+class FakeOpcClient:
+    def __init__(self):
+        self.calls = []
+
+    async def write_tags(self, items):
+        self.calls.append(list(items))
+        return [{"tag": tag, "written": value, "status": "OK", "status_code": "Good"} for tag, value in items]
+
+
+def _graph(tool_calls):
+    """LLM 없이 쓰기 tool_call을 만든 뒤 실제 execute_tool_with_approval 노드 실행"""
+
+    def generate(state):
+        return {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+
+    g = StateGraph(_State)
+    g.add_node("generate_chat", generate)
+    g.add_node("chat_tools_node", execute_tool_with_approval)
+    g.add_edge(START, "generate_chat")
+    g.add_edge("generate_chat", "chat_tools_node")
+    g.add_edge("chat_tools_node", END)
+    return g.compile(checkpointer=MemorySaver())
+
+
+def _write_call(call_id, tag, value):
+    return {"name": "write_ignition_tag", "args": {"tag_path": tag, "value": value}, "id": call_id}
+
+
+def _action_id(call_id):
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"tool_call:{call_id}"))
+
+
+class ApprovalNodeTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.opc = FakeOpcClient()
+        for patcher in (
+            patch.object(approval_storage, "_store", MemoryApprovalStore()),
+            patch.object(write_executor, "get_opc_client", return_value=self.opc),
+            patch.object(write_executor, "_limiter", WriteRateLimiter()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.config = {"configurable": {"thread_id": "t1"}}
+
+    async def _interrupt(self, graph, inputs):
+        result = await graph.ainvoke(inputs, self.config)
+        (pending,) = result["__interrupt__"]
+        return pending.value
+
+    async def test_action_id_is_stable_and_approve_writes(self):
+        graph = _graph([_write_call("c1", "[default]Tank/SP", "5")])
+        request = await self._interrupt(graph, {"messages": []})
+        self.assertEqual(request["action_id"], _action_id("c1"))
+        self.assertEqual([a.id for a in list_pending_actions()], [_action_id("c1")])
+
+        result = await graph.ainvoke(Command(resume={"approved": True, "operator": "kim"}), self.config)
+        self.assertTrue(result["messages"][-1].content.startswith("✅ Approved by kim"))
+        self.assertEqual(self.opc.calls, [[("[default]Tank/SP", "5")]])
+        # 재실행된 노드가 같은 id를 다시 만들어 저장된 action을 찾음 (중복 저장 없음)
+        stored = get_pending_action(_action_id("c1"))
+        self.assertEqual((stored.status, stored.operator), ("executed", "kim"))
+
+    async def test_reject_on_resume_does_not_write(self):
+        graph = _graph([_write_call("c1", "[default]Tank/SP", "5")])
+        await self._interrupt(graph, {"messages": []})
+
+        result = await graph.ainvoke(
+            Command(resume={"approved": False, "operator": "lee", "notes": "wrong tank"}), self.config
+        )
+        self.assertEqual(result["messages"][-1].content, "🚫 Rejected by lee\nReason: wrong tank")
+        self.assertEqual(self.opc.calls, [])
+        self.assertEqual(get_pending_action(_action_id("c1")).status, "rejected")
+
+    async def test_decided_elsewhere_reports_stored_outcome(self):
+        graph = _graph([_write_call("c1", "[default]Tank/SP", "5")])
+        request = await self._interrupt(graph, {"messages": []})
+        await approve_action(ApprovalRequest(action_id=request["action_id"], approved=True, operator="park"))
+
+        result = await graph.ainvoke(Command(resume={"approved": True, "operator": "kim"}), self.config)
+        content = result["messages"][-1].content
+        self.assertTrue(content.startswith("✅ Approved by park"))
+        self.assertNotIn("no write performed", content)
+        self.assertEqual(len(self.opc.calls), 1)
+
+    async def test_several_writes_report_earlier_decisions(self):
+        graph = _graph([
+            _write_call("c1", "[default]Tank/SP", "5"),
+            _write_call("c2", "[default]Tank/Level", "7"),
+        ])
+        first = await self._interrupt(graph, {"messages": []})
+        self.assertEqual(first["action_id"], _action_id("c1"))
+
+        result = await graph.ainvoke(Command(resume={"approved": True, "operator": "kim"}), self.config)
+        (second,) = result["__interrupt__"]
+        self.assertEqual(second.value["action_id"], _action_id("c2"))
+
+        result = await graph.ainvoke(Command(resume={"approved": False, "operator": "kim"}), self.config)
+        contents = [m.content for m in result["messages"][-2:]]
+        self.assertTrue(contents[0].startswith("✅ Approved by kim"))
+        self.assertTrue(contents[1].startswith("🚫 Rejected by kim"))
+        self.assertEqual(self.opc.calls, [[("[default]Tank/SP", "5")]])
+
+
+if __name__ == "__main__":
+    unittest.main()
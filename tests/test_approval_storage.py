@@ -0,0 +1,142 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.graph.state import PendingAction
+from app.services import approval_storage
+from app.services.approval_storage import (
+    MemoryApprovalStore,
+    SqliteApprovalStore,
+    claim_pending_action,
+    get_pending_action,
+    list_actions,
+    list_pending_actions,
+    store_pending_action,
+    sweep_approvals,
+    update_pending_action,
+)
+
+
+def _action(action_id, minutes_ago=0, tag="[default]Line1/FAN1/Speed", status="pending"):
+    return PendingAction(
+        id=action_id,
+        action_type="write_tag",
+        tag_path=tag,
+        value=42.5,
+        reason="test",
+        requested_at=datetime.now() - timedelta(minutes=minutes_ago),
+        status=status,
+        risk_level="medium",
+    )
+
+
+class _StoreContract:
+    """Behaviour shared by every backend."""
+
+    def make_store(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.store = self.make_store()
+        for patcher in (
+            patch.object(approval_storage, "_store", self.store),
+            patch.object(approval_storage.settings, "approval_pending_ttl_seconds", 3600),
+            patch.object(approval_storage.settings, "approval_retention_days", 1),
+            patch.object(approval_storage.settings, "approval_sweep_batch", 2),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_round_trip_and_update(self):
+        store_pending_action(_action("a1"))
+        action = get_pending_action("a1")
+        self.assertEqual((action.value, action.status), (42.5, "pending"))
+
+        action.status, action.operator, action.approved_at = "executed", "kim", datetime.now()
+        update_pending_action(action)
+        stored = get_pending_action("a1")
+        self.assertEqual((stored.status, stored.operator), ("executed", "kim"))
+        self.assertIsInstance(stored.approved_at, datetime)
+
+        # 존재하지 않는 action은 update로 생성되지 않음
+        update_pending_action(_action("missing"))
+        self.assertIsNone(get_pending_action("missing"))
+
+    def test_claim_is_granted_once(self):
+        store_pending_action(_action("a1"))
+        store_pending_action(_action("old", minutes_ago=120))
+
+        claimed = claim_pending_action("a1")
+        self.assertEqual(claimed.status, "executing")
+        self.assertIsNone(claim_pending_action("a1"))
+        self.assertEqual(get_pending_action("a1").status, "executing")
+        self.assertEqual(list_pending_actions(), [])
+
+        # 만료·미존재 action은 claim 불가
+        self.assertIsNone(claim_pending_action("old"))
+        self.assertIsNone(claim_pending_action("missing"))
+
+    def test_pending_list_excludes_finished_and_expired(self):
+        store_pending_action(_action("old", minutes_ago=120))
+        store_pending_action(_action("p2", minutes_ago=5))
+        store_pending_action(_action("p1", minutes_ago=10))
+        store_pending_action(_action("done", status="executed"))
+
+        self.assertEqual([a.id for a in list_pending_actions()], ["p1", "p2"])
+        self.assertEqual(get_pending_action("old").status, "expired")
+
+    def test_sweep_expires_pending_and_deletes_in_bounded_batches(self):
+        store_pending_action(_action("stale", minutes_ago=90))
+        for i in range(3):
+            store_pending_action(_action(f"done{i}", minutes_ago=3 * 1440 + i, status="rejected"))
+        store_pending_action(_action("recent", minutes_ago=30, status="executed"))
+
+        self.assertEqual(sweep_approvals(), {"expired": 1, "deleted": 2})
+        self.assertEqual(sweep_approvals(), {"expired": 0, "deleted": 1})
+        remaining = {a.id: a.status for a in list_actions()}
+        self.assertEqual(remaining, {"stale": "expired", "recent": "executed"})
+
+    def test_list_actions_by_tag(self):
+        store_pending_action(_action("f1", minutes_ago=3))
+        store_pending_action(_action("f2", minutes_ago=1, status="executed"))
+        store_pending_action(_action("t1", tag="[default]Tank1/Level"))
+        self.assertEqual([a.id for a in list_actions("[default]Line1/FAN1/Speed")], ["f2", "f1"])
+        self.assertEqual([a.id for a in list_actions(status="executed")], ["f2"])
+
+
+class MemoryStoreTests(_StoreContract, unittest.TestCase):
+    def make_store(self):
+        return MemoryApprovalStore()
+
+
+class SqliteStoreTests(_StoreContract, unittest.TestCase):
+    def make_store(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "approvals.db")
+        store = SqliteApprovalStore(self.path)
+        self.addCleanup(store.close)
+        return store
+
+    def test_survives_restart_and_uses_wal(self):
+        store_pending_action(_action("a1"))
+        reopened = SqliteApprovalStore(self.path)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.get("a1").tag_path, "[default]Line1/FAN1/Speed")
+        mode = reopened._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_pending_query_uses_status_index(self):
+        plan = self.store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT payload, status FROM approval_actions"
+            " WHERE status = 'pending' AND requested_at >= ? ORDER BY requested_at",
+            (time.time(),),
+        ).fetchall()
+        self.assertIn("idx_approval_status_requested", " ".join(str(row) for row in plan))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from datetime import datetime
+
+from app.services.date_parser import TimeRange, format_time_hint, parse_time_range
+from app.tools.tag_history_tools import parse_date_to_partition
+
+
+NOW = datetime(2025, 10, 15, 13, 30)
+
+
+def _range(text):
+    result = parse_time_range(text, now=NOW)
+    return (result.start, result.end) if result else None
+
+
+class DateParserTests(unittest.TestCase):
+    def test_day_words(self):
+        self.assertEqual(_range("어제 FAN1 평균"), (datetime(2025, 10, 14), datetime(2025, 10, 15)))
+        self.assertEqual(_range("그저께"), (datetime(2025, 10, 13), datetime(2025, 10, 14)))
+        self.assertEqual(_range("today"), (datetime(2025, 10, 15), datetime(2025, 10, 16)))
+
+    def test_last_month_is_calendar_month(self):
+        self.assertEqual(_range("지난달 알람 통계"), (datetime(2025, 9, 1), datetime(2025, 10, 1)))
+        january = parse_time_range("지난달", now=datetime(2025, 1, 20))
+        self.assertEqual((january.start, january.end), (datetime(2024, 12, 1), datetime(2025, 1, 1)))
+
+    def test_weeks_start_on_monday(self):
+        self.assertEqual(_range("지난주"), (datetime(2025, 10, 6), datetime(2025, 10, 13)))
+        self.assertEqual(_range("this week"), (datetime(2025, 10, 13), datetime(2025, 10, 20)))
+
+    def test_relative_hours(self):
+        self.assertEqual(_range("최근 3시간 온도"), (datetime(2025, 10, 15, 10, 30), NOW))
+        self.assertEqual(_range("last 24 hours"), (datetime(2025, 10, 14, 13, 30), NOW))
+        self.assertEqual(_range("최근 7일 알람"), (datetime(2025, 10, 8, 13, 30), NOW))
+
+    def test_relative_months_clamp_to_month_end(self):
+        may_end = parse_time_range("최근 1개월", now=datetime(2025, 5, 31, 9))
+        self.assertEqual(may_end.start, datetime(2025, 4, 30, 9))
+        march_end = parse_time_range("3 months ago", now=datetime(2024, 5, 31))
+        self.assertEqual(march_end.start, datetime(2024, 2, 29))
+
+    def test_space_separated_date(self):
+        self.assertEqual(_range("2025 9 1"), (datetime(2025, 9, 1), datetime(2025, 9, 2)))
+        self.assertEqual(_range("2025 9월 1일 FAN1"), (datetime(2025, 9, 1), datetime(2025, 9, 2)))
+        self.assertTrue(parse_date_to_partition.invoke({"date_string": "2025 9 1"}).startswith(
+            "year=2025, month=9, day=1, expected_table=sqlt_data_1_2025_09"
+        ))
+
+    def test_absolute_dates_and_months(self):
+        self.assertEqual(_range("2025년 9월 1일"), (datetime(2025, 9, 1), datetime(2025, 9, 2)))
+        self.assertEqual(_range("2025-09-01"), (datetime(2025, 9, 1), datetime(2025, 9, 2)))
+        self.assertEqual(_range("2025년 9월"), (datetime(2025, 9, 1), datetime(2025, 10, 1)))
+        # 연도 생략 날짜가 미래면 작년
+        self.assertEqual(_range("12월 25일"), (datetime(2024, 12, 25), datetime(2024, 12, 26)))
+
+    def test_ranges(self):
+        self.assertEqual(_range("9월 1일부터 9월 3일까지"), (datetime(2025, 9, 1), datetime(2025, 9, 4)))
+        self.assertEqual(_range("2025년 9월 1일~5일"), (datetime(2025, 9, 1), datetime(2025, 9, 6)))
+        self.assertEqual(_range("from 2025-09-01 to 2025-09-03"), (datetime(2025, 9, 1), datetime(2025, 9, 4)))
+        self.assertEqual(
+            _range("어제 오후 2시부터 4시까지"),
+            (datetime(2025, 10, 14, 14), datetime(2025, 10, 14, 16)),
+        )
+        self.assertEqual(
+            _range("어제 14:00 - 16:30"),
+            (datetime(2025, 10, 14, 14), datetime(2025, 10, 14, 16, 30)),
+        )
+
+    def test_no_time_expression(self):
+        self.assertIsNone(parse_time_range("FAN1-2 상태 알려줘", now=NOW))
+        self.assertIsNone(parse_time_range("2025-02-30", now=NOW))
+
+    def test_months_and_hint(self):
+        spanning = TimeRange(datetime(2025, 8, 30), datetime(2025, 10, 1), "x", "day")
+        self.assertEqual(spanning.months(), [(2025, 8), (2025, 9)])
+        self.assertEqual(TimeRange.from_dict(spanning.to_dict()).start, spanning.start)
+
+        hint = format_time_hint(parse_time_range("지난달", now=NOW), now=NOW)
+        self.assertIn("year=2025, month=9", hint)
+        self.assertIn("start_day=1, end_day=30", hint)
+        self.assertIn("parse_date_to_partition", hint)
+        self.assertNotIn("{", hint)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from app.services.downsample import downsample, lttb, minmax
+
+
+class DownsampleTests(unittest.TestCase):
+    def setUp(self):
+        self.ts = np.arange(10_000, dtype=np.int64) * 1000
+        self.values = np.sin(np.linspace(0, 20, 10_000))
+        self.values[4321] = 50.0  # 단일 스파이크
+
+    def test_lttb_keeps_endpoints_and_spike(self):
+        ts, values = lttb(self.ts, self.values, 200)
+
+        self.assertEqual(len(ts), 200)
+        self.assertEqual(ts[0], self.ts[0])
+        self.assertEqual(ts[-1], self.ts[-1])
+        self.assertIn(50.0, values)
+        self.assertTrue(np.all(np.diff(ts) > 0))
+
+    def test_minmax_keeps_extremes_per_bucket(self):
+        ts, values = minmax(self.ts, self.values, 100)
+
+        self.assertLessEqual(len(ts), 100)
+        self.assertEqual(values.max(), 50.0)
+        self.assertAlmostEqual(values.min(), self.values.min())
+        self.assertTrue(np.all(np.diff(ts) > 0))
+
+    def test_downsample_reports_original_count_and_drops_nan(self):
+        values = self.values.copy()
+        values[:10] = np.nan
+
+        result = downsample(self.ts[::-1], values[::-1], 50)
+
+        self.assertEqual(result.original_count, 9_990)
+        self.assertEqual(len(result), 50)
+        self.assertTrue(np.all(np.diff(result.ts) > 0))
+
+    def test_small_input_is_returned_unchanged(self):
+        result = downsample([3000, 1000, 2000], [3.0, 1.0, 2.0], 200, "lttb")
+
+        self.assertEqual(result.ts.tolist(), [1000, 2000, 3000])
+        self.assertEqual(result.values.tolist(), [1.0, 2.0, 3.0])
+
+    def test_unknown_method_is_rejected(self):
+        with self.assertRaises(ValueError):
+            downsample([1], [1.0], 10, "average")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.services import history
+from app.services.history import aggregate_buckets, to_ms
+from app.services.history_cache import HistoryCache
+
+
+class HistoryCacheTests(unittest.TestCase):
+    def test_lru_eviction_and_metrics(self):
+        cache = HistoryCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        metrics = cache.metrics()
+        self.assertEqual(metrics["evictions"], 1)
+        self.assertEqual(metrics["entries"], 2)
+
+    def test_ttl_expiry(self):
+        cache = HistoryCache()
+        cache.put("open", [1], ttl=0.01)
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.get("open"))
+        self.assertEqual(cache.metrics()["expirations"], 1)
+
+    def test_disk_tier_keeps_only_immutable_entries(self):
+        cache = HistoryCache(max_entries=1, disk_path=":memory:")
+        cache.put(("buckets", (1,), 0, 10), [(0, 1.0, 1)])
+        cache.put("open", [2], ttl=60)
+
+        self.assertEqual(cache.get(("buckets", (1,), 0, 10)), [(0, 1.0, 1)])
+        self.assertEqual(cache.metrics()["disk_hits"], 1)
+        self.assertEqual(cache.metrics()["disk_entries"], 1)
+
+
+class HistoryCacheIntegrationTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = HistoryCache()
+        self.calls = []
+
+        def fake_compute(ids, seg_start, seg_end, bucket_seconds, aggregation):
+            self.calls.append((seg_start, seg_end))
+            step = bucket_seconds * 1000
+            first = seg_start // step * step
+            return [(t, float(t), 1) for t in range(first, seg_end, step)]
+
+        for patcher in (
+            patch.object(history, "get_history_cache", return_value=self.cache),
+            patch.object(history, "_compute_buckets", side_effect=fake_compute),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_open_range_recomputes_only_tail(self):
+        now = datetime.now().replace(minute=0, second=0, microsecond=0)
+        start = to_ms(now - timedelta(days=2))
+        end = to_ms(now + timedelta(hours=1))
+
+        points = aggregate_buckets([5], start, end, 3600, "avg")
+        self.assertEqual([p[0] for p in points], list(range(start, end, 3600 * 1000)))
+        first_calls = len(self.calls)
+        aggregate_buckets([5], start, end, 3600, "avg")
+        self.assertEqual(len(self.calls), first_calls)  # 짧은 TTL 안에서는 꼬리도 캐시됨
+
+    def test_sliding_window_reuses_closed_chunks(self):
+        minute = 60 * 1000
+        now = to_ms(datetime.now()) // minute * minute
+        chunk = minute * history.CACHE_CHUNK_BUCKETS
+
+        start, end = now - 5 * chunk + 30 * 1000, now  # 버킷 경계에 걸친 시작
+        first = aggregate_buckets([5], start, end, 60, "avg")
+        self.assertEqual([p[0] for p in first], list(range(start - 30 * 1000, end, minute)))
+        closed = [c for c in self.calls if c[1] - c[0] >= chunk]
+        self.assertEqual(len(closed), 1)  # 연속된 청크는 한 번에 계산
+        self.assertEqual(closed[0][0] % chunk, 0)
+
+        # 3분 뒤 같은 "최근 N분" 요청: 종료된 청크는 다시 계산하지 않음
+        self.calls.clear()
+        shift = 3 * minute
+        with patch.object(history.time, "time", return_value=(now + shift) / 1000):
+            moved = aggregate_buckets([5], start + shift, end + shift, 60, "avg")
+        self.assertEqual([p[0] for p in moved], list(range(start + shift - 30 * 1000, end + shift, minute)))
+        # 다시 계산하는 범위: 앞머리 1버킷 + 마지막 청크 경계 이후의 꼬리뿐
+        settle = history.settings.history_cache_settle_seconds * 1000
+        self.assertLessEqual(sum(c[1] - c[0] for c in self.calls), minute + chunk + settle + shift)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import json
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import history as history_api
+from app.services import history, history_export
+from app.services.history import to_ms
+from app.services.history_export import encode_csv, encode_ndjson, iter_export_chunks
+
+
+TS = to_ms(datetime(2026, 2, 1, 13))
+
+
+class HistoryExportTests(unittest.TestCase):
+    def test_chunks_stream_each_partition_with_one_in_query(self):
+        queries = []
+
+        def fake_stream(query, parameters=None, chunk_size=5000):
+            queries.append(query)
+            yield [(5, TS, 1.5), (9, TS, None)]
+            yield [(5, TS + 1000, 2)]
+
+        with patch.object(history, "_table_names", return_value=["sqlt_data_1_2026_02"]), \
+                patch.object(history_export, "stream_rows", side_effect=fake_stream):
+            chunks = list(iter_export_chunks({"fan1": [5], "fan2": [9]}, TS, TS + 60000))
+
+        self.assertEqual(len(queries), 1)
+        self.assertIn("tagid IN (5, 9)", queries[0])
+        self.assertEqual(chunks[0], [("fan1", TS, 1.5), ("fan2", TS, None)])
+        self.assertEqual(chunks[1], [("fan1", TS + 1000, 2.0)])
+
+    def test_csv_and_ndjson_encoding(self):
+        chunks = [[("fan1", TS, 1.5)], [("fan2", TS, None)]]
+
+        csv_text = "".join(encode_csv(iter(chunks))).splitlines()
+        ndjson = "".join(encode_ndjson(iter(chunks))).splitlines()
+
+        self.assertEqual(csv_text[0], "tag_path,t_stamp,time,value")
+        self.assertEqual(csv_text[1], f"fan1,{TS},2026-02-01 13:00:00,1.5")
+        self.assertEqual(csv_text[2], f"fan2,{TS},2026-02-01 13:00:00,")
+        self.assertEqual(json.loads(ndjson[1])["value"], None)
+
+    def test_endpoint_streams_and_validates(self):
+        app = FastAPI()
+        app.include_router(history_api.router, prefix="/history")
+        client = TestClient(app)
+
+        with patch.object(history_api, "resolve_tags", return_value=({"fan1": (5,)}, ["x"])), \
+                patch.object(history_api, "iter_export_chunks", return_value=iter([[("fan1", TS, 1.0)]])):
+            response = client.get(
+                "/history/export",
+                params={"tags": "fan1,x", "start": "2026-02-01", "end": "2026-02-02", "format": "ndjson"},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["x-missing-tags"], "x")
+        self.assertEqual(json.loads(response.text.splitlines()[0])["tag_path"], "fan1")
+
+        bad = client.get(
+            "/history/export",
+            params={"tags": "fan1", "start": "2026-02-01", "end": "2026-02-02", "format": "xml"},
+        )
+        self.assertEqual(bad.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
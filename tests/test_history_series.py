@@ -0,0 +1,78 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import history as history_api
+from app.services import history_series
+from app.services.history import to_ms
+from app.services.history_series import build_series, choose_bucket_seconds
+
+
+DAY = 86400 * 1000
+START = to_ms(datetime(2026, 2, 1))
+
+
+class HistorySeriesTests(unittest.TestCase):
+    def test_choose_bucket_seconds_rounds_up_to_nice_step(self):
+        self.assertEqual(choose_bucket_seconds(START, START + DAY, 500), 300)
+        self.assertEqual(choose_bucket_seconds(START, START + 3600 * 1000, 500), 10)
+        self.assertEqual(choose_bucket_seconds(START, START + 3000 * DAY, 500), 6 * 86400)
+
+    def test_long_range_uses_bucket_aggregation(self):
+        with patch.object(history_series, "resolve_tags", return_value=({"fan1": (5,)}, [])), \
+                patch.object(history_series, "aggregate_buckets",
+                             return_value=[(START, 1.5, 10), (START + 3600000, None, 0)]) as agg:
+            payload = build_series(["FAN1"], START, START + 30 * DAY, max_points=500)
+
+        agg.assert_called_once_with((5,), START, START + 30 * DAY, 7200, "avg")
+        self.assertEqual(payload["mode"], "bucket")
+        self.assertEqual(payload["series"][0]["timestamps"], [START, START + 3600000])
+        self.assertEqual(payload["series"][0]["values"], [1.5, None])
+
+    def test_short_range_downsamples_raw(self):
+        ts = np.arange(START, START + 3600 * 1000, 1000)
+        with patch.object(history_series, "resolve_tags", return_value=({"fan1": (5,)}, [])), \
+                patch.object(history_series, "fetch_multi_series",
+                             return_value={"fan1": (ts, np.sin(ts / 1e5), None)}):
+            payload = build_series(["FAN1"], START, START + 3600 * 1000, max_points=1000)
+
+        self.assertEqual(payload["mode"], "raw")
+        self.assertEqual(len(payload["series"][0]["values"]), 1000)
+        self.assertEqual(payload["series"][0]["original_points"], 3600)
+
+    def test_raw_row_cap_rejects_or_falls_back_to_buckets(self):
+        overflow = history_series.RawRowLimitExceeded("too many")
+        with patch.object(history_series, "resolve_tags", return_value=({"fan1": (5,)}, [])), \
+                patch.object(history_series, "fetch_multi_series", side_effect=overflow) as fetch, \
+                patch.object(history_series, "aggregate_buckets", return_value=[(START, 1.0, 3)]):
+            with self.assertRaises(ValueError):
+                build_series(["FAN1"], START, START + DAY, mode="raw")
+            payload = build_series(["FAN1"], START, START + 3600 * 1000, max_points=1000)
+
+        self.assertEqual(fetch.call_args.kwargs["max_rows"], history_series.MAX_RAW_PAGE_SIZE)
+        self.assertEqual((payload["mode"], payload["bucket_seconds"]), ("bucket", 5))
+
+    def test_endpoint_etag_and_not_modified(self):
+        app = FastAPI()
+        app.include_router(history_api.router, prefix="/history")
+        client = TestClient(app)
+        payload = {"closed": True, "missing": [], "series": [{"tag_path": "fan1", "timestamps": [1], "values": [2.0]}]}
+        params = {"tags": "fan1", "start": "2026-02-01", "end": "2026-02-02"}
+
+        with patch.object(history_api, "build_series", return_value=payload):
+            first = client.get("/history/series", params=params)
+            second = client.get("/history/series", params=params,
+                                headers={"If-None-Match": first.headers["etag"]})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()["series"][0]["values"], [2.0])
+        self.assertIn("max-age=86400", first.headers["cache-control"])
+        self.assertEqual(second.status_code, 304)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from app.services import history
+import numpy as np
+
+from app.services.history import (
+    aggregate_buckets,
+    format_series,
+    plan_partitions,
+    time_weighted_average,
+    to_ms,
+)
+from app.tools.tag_history_tools import get_tag_history_buckets
+
+
+TABLES = ["sqlth_te", "sqlt_data_1_2026_01", "sqlt_data_1_2026_02", "sqlt_data_2_2026_02"]
+
+
+class HistoryServiceTests(unittest.TestCase):
+    def setUp(self):
+        for patcher in (
+            patch.object(history, "_table_names", return_value=TABLES),
+            patch("app.services.rollup.get_watermark", return_value=None),
+            patch.object(history.settings, "history_cache_enabled", False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_plan_partitions_splits_on_month_boundary(self):
+        start = to_ms(datetime(2026, 1, 31, 12))
+        end = to_ms(datetime(2026, 2, 1, 12))
+
+        slices = plan_partitions(start, end)
+
+        self.assertEqual(
+            [s.table for s in slices],
+            ["sqlt_data_1_2026_01", "sqlt_data_1_2026_02", "sqlt_data_2_2026_02"],
+        )
+        self.assertEqual(slices[0].start_ms, start)
+        self.assertEqual(slices[0].end_ms, to_ms(datetime(2026, 2, 1)))
+        self.assertEqual(slices[-1].end_ms, end)
+
+    def test_aggregate_buckets_merges_partials_across_partitions(self):
+        bucket = to_ms(datetime(2026, 2, 1))
+        queries = []
+
+        def fake_fetch(query, parameters=None):
+            queries.append(query)
+            if "sqlt_data_1_2026_02" in query:
+                return [(bucket, 2, 10.0, 4.0, 6.0)]
+            if "sqlt_data_2_2026_02" in query:
+                return [(bucket, 2, 30.0, 14.0, 16.0)]
+            return []
+
+        with patch.object(history, "fetch_rows", side_effect=fake_fetch):
+            points = aggregate_buckets(
+                [5], bucket, to_ms(datetime(2026, 2, 2)), 86400, "avg"
+            )
+
+        self.assertEqual(points, [(bucket, 10.0, 4)])
+        self.assertTrue(all("GROUP BY 1" in q for q in queries))
+        self.assertTrue(all("tagid = 5" in q for q in queries))
+
+    def test_aggregate_buckets_rejects_too_many_buckets(self):
+        with self.assertRaises(ValueError):
+            aggregate_buckets(
+                [5], to_ms(datetime(2026, 1, 1)), to_ms(datetime(2026, 2, 1)), 60, "avg"
+            )
+
+    def test_time_weighted_average_weights_by_hold_time(self):
+        start = to_ms(datetime(2026, 3, 1))
+        hour = 3600 * 1000
+        # 직전 값 0이 1시간 유지 → 10이 1시간 → 마지막 10분에 100으로 5번 변동
+        ts = np.array([start + hour] + [start + 2 * hour + i * 60_000 for i in range(5)])
+        values = np.array([10.0, 100.0, 100.0, 100.0, 100.0, 100.0])
+        with patch.object(history, "fetch_series", return_value=(ts, values, 0.0)):
+            twa = time_weighted_average([5], start, start + 2 * hour + 10 * 60_000)
+        self.assertAlmostEqual(twa, (10 * 60 + 100 * 10) / 130)
+
+    def test_format_series_is_compact(self):
+        ts = to_ms(datetime(2026, 2, 1, 13))
+        text = format_series([(ts, 12.345678, 60)], 3600, "avg")
+
+        self.assertEqual(
+            text.splitlines(),
+            ["bucket=3600s agg=avg points=1", "time,value,n", "2026-02-01 13:00,12.3457,60"],
+        )
+
+    def test_bucket_tool_reports_bad_input(self):
+        result = get_tag_history_buckets.invoke(
+            {"tag_id": 5, "start_time": "어제", "end_time": "2026-02-02"}
+        )
+        self.assertIn("입력 오류", result)
+
+
+if __name__ == "__main__":
+    unittest.main()
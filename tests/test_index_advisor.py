@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import create_engine, text
+
+from app.services import index_advisor, sql
+from app.services.index_advisor import _is_full_scan, _unused_indexes, create_index_sql, inspect_indexes
+
+
+class IndexAdvisorTests(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE sqlth_te (id INTEGER PRIMARY KEY, tagpath TEXT)"))
+            conn.execute(text("CREATE INDEX sqlth_te_path ON sqlth_te (tagpath)"))
+            conn.execute(text(
+                "CREATE TABLE sqlt_data_1_2026_02 (tagid INT, t_stamp BIGINT, floatvalue REAL, intvalue INT)"
+            ))
+            conn.execute(text(
+                "CREATE TABLE sqlt_data_1_2026_01 (tagid INT, t_stamp BIGINT, floatvalue REAL, intvalue INT)"
+            ))
+            conn.execute(text("CREATE INDEX t01 ON sqlt_data_1_2026_01 (tagid, t_stamp, floatvalue)"))
+        db = MagicMock()
+        db._engine = engine
+        for target in (index_advisor, sql):
+            patcher = patch.object(target, "get_sql_db", return_value=db)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_reports_partition_missing_tagid_tstamp_index(self):
+        report = inspect_indexes(explain=False)
+
+        missing = [f for f in report["findings"] if f["kind"] == "missing"]
+        self.assertEqual([f["table"] for f in missing], ["sqlt_data_1_2026_02"])
+        self.assertEqual(missing[0]["columns"], ["tagid", "t_stamp"])
+        self.assertEqual(report["ok"], 2)
+        self.assertEqual(report["tables_checked"], 3)
+
+    def test_mariadb_unused_indexes_name_their_source(self):
+        tables = ["sqlth_te", "sqlt_data_1_2026_01"]
+
+        def fake_fetch(performance_schema):
+            def fetch(query, parameters=None):
+                if "@@performance_schema" in query:
+                    return [(performance_schema,)]
+                if "schema_unused_indexes" in query:
+                    return [("sqlth_te", "sqlth_te_path"), ("other", "x")]
+                return [("sqlth_te", "sqlth_te_path")]
+            return fetch
+
+        with patch.object(index_advisor, "fetch_rows", side_effect=fake_fetch(1)):
+            source, unused = _unused_indexes("mysql", tables)
+        self.assertIn("sys.schema_unused_indexes", source)
+        self.assertEqual(unused, {"sqlth_te": ["sqlth_te_path"]})
+
+        with patch.object(index_advisor, "fetch_rows", side_effect=fake_fetch(0)):
+            source, unused = _unused_indexes("mysql", tables)
+        self.assertIn("INDEX_STATISTICS", source)
+        self.assertEqual(unused, {"sqlt_data_1_2026_01": ["t01"]})
+
+    def test_dialect_specific_online_ddl(self):
+        pg = create_index_sql("postgresql", "sqlt_data_1_2026_02", ("tagid", "t_stamp"))
+        maria = create_index_sql("mysql", "alarm_events", ("eventtime",))
+
+        self.assertTrue(pg.startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS"))
+        self.assertIn("ALGORITHM=INPLACE, LOCK=NONE", maria)
+
+    def test_full_scan_detection(self):
+        self.assertTrue(_is_full_scan(
+            "postgresql", "alarm_events", [("Seq Scan on alarm_events  (cost=0.00..1.10)",)], ["QUERY PLAN"]
+        ))
+        self.assertFalse(_is_full_scan(
+            "mysql", "alarm_events",
+            [(1, "SIMPLE", "alarm_events", "range", "ix_e", "ix_e")],
+            ["id", "select_type", "table", "type", "possible_keys", "key"],
+        ))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.services import live_alarms
+from app.services.live_alarms import ActiveAlarmTable, severity_to_priority
+from app.tools.alarm_tools import get_active_alarms
+
+
+def _event(source, active, acked, minute, severity=800, retain=True, condition="Hi"):
+    return {
+        "SourceName": source,
+        "ConditionName": condition,
+        "ActiveState/Id": active,
+        "AckedState/Id": acked,
+        "Retain": retain,
+        "Severity": severity,
+        "Message": SimpleNamespace(Text=f"{source} {condition}"),
+        "Time": datetime(2026, 3, 10, 12, minute, tzinfo=timezone.utc),
+    }
+
+
+class ActiveAlarmTableTests(unittest.TestCase):
+    def test_lifecycle_keeps_active_since_and_removes_on_ack_after_clear(self):
+        table = ActiveAlarmTable()
+        table.apply_event(_event("FAN1", True, False, 0))
+        first = table.snapshot()[0]
+        self.assertTrue(first.active)
+        self.assertFalse(first.acked)
+        self.assertEqual(first.message, "FAN1 Hi")
+
+        table.apply_event(_event("FAN1", True, True, 5))
+        acked = table.snapshot()[0]
+        self.assertTrue(acked.acked)
+        self.assertEqual(acked.active_since, first.active_since)
+        self.assertGreater(acked.updated_at, first.updated_at)
+
+        table.apply_event(_event("FAN1", False, True, 9, retain=False))
+        self.assertEqual(len(table), 0)
+
+    def test_cleared_but_unacked_stays_until_ack(self):
+        table = ActiveAlarmTable()
+        table.apply_event(_event("PUMP2", True, False, 0))
+        table.apply_event(_event("PUMP2", False, False, 3))
+        alarm = table.snapshot()[0]
+        self.assertFalse(alarm.active)
+        self.assertIsNotNone(alarm.active_since)
+
+        table.apply_event(_event("PUMP2", False, True, 4))
+        self.assertEqual(len(table), 0)
+
+    def test_snapshot_filters_and_order(self):
+        table = ActiveAlarmTable()
+        table.apply_event(_event("Line1/FAN1", True, True, 0, severity=500))
+        table.apply_event(_event("Line1/FAN2", True, False, 1, severity=900))
+        table.apply_event(_event("Line2/PUMP", False, False, 2, severity=900))
+
+        self.assertEqual([a.source for a in table.snapshot()], ["Line1/FAN2", "Line2/PUMP", "Line1/FAN1"])
+        self.assertEqual([a.source for a in table.snapshot("line1")], ["Line1/FAN2", "Line1/FAN1"])
+        self.assertEqual([a.source for a in table.snapshot(unacked_only=True)], ["Line1/FAN2", "Line2/PUMP"])
+        self.assertEqual([a.source for a in table.snapshot(active_only=True)], ["Line1/FAN2", "Line1/FAN1"])
+
+        status = table.status()
+        self.assertEqual((status["total"], status["active"], status["unacked"]), (3, 2, 2))
+
+    def test_severity_to_priority(self):
+        self.assertEqual(severity_to_priority(1), 0)
+        self.assertEqual(severity_to_priority(250), 1)
+        self.assertEqual(severity_to_priority(500), 2)
+        self.assertEqual(severity_to_priority(1000), 4)
+        self.assertEqual(severity_to_priority(None), 0)
+
+
+class ActiveAlarmToolTests(unittest.TestCase):
+    def test_disconnected_table_points_to_history(self):
+        table = ActiveAlarmTable()
+        table.mark_disconnected("BadTimeout")
+        with patch.object(live_alarms, "_table", table):
+            result = get_active_alarms.invoke({})
+        self.assertIn("BadTimeout", result)
+        self.assertIn("search_alarm_events", result)
+
+    def test_lists_current_alarms(self):
+        table = ActiveAlarmTable()
+        table.mark_subscribed()
+        table.apply_event(_event("FAN1", True, False, 0, severity=900))
+        with patch.object(live_alarms, "_table", table):
+            result = get_active_alarms.invoke({"tag_path": "FAN1"})
+            empty = get_active_alarms.invoke({"tag_path": "PUMP"})
+        self.assertIn("알람 1개 (활성 1, 미확인 1)", result)
+        self.assertIn("FAN1 [Hi] priority=4, 활성/미확인", result)
+        self.assertIn("활성 알람이 없습니다", empty)
+
+
+class MaintainerLoopTests(unittest.IsolatedAsyncioTestCase):
+    async def test_failed_subscribe_backs_off_and_leaves_shared_session(self):
+        class NoAlarmsClient:
+            alarm_subscription_alive = False
+            disconnects = 0
+
+            async def subscribe_alarms(self, callback, publishing_interval_ms):
+                raise RuntimeError("BadServiceUnsupported")
+
+            async def disconnect(self):
+                self.disconnects += 1
+
+        alarm_client, delays = NoAlarmsClient(), []
+
+        async def fake_sleep(seconds):
+            delays.append(seconds)
+            if len(delays) == 5:
+                raise asyncio.CancelledError
+
+        shared = NoAlarmsClient()
+        with patch.object(live_alarms, "get_alarm_opc_client", return_value=alarm_client), \
+                patch("app.services.opc.get_opc_client", return_value=shared), \
+                patch.object(live_alarms, "_table", ActiveAlarmTable()), \
+                patch.object(live_alarms.settings, "live_alarm_check_seconds", 10), \
+                patch.object(live_alarms.settings, "live_alarm_max_backoff_seconds", 100), \
+                patch.object(live_alarms.asyncio, "sleep", fake_sleep):
+            with self.assertRaises(asyncio.CancelledError):
+                await live_alarms._maintainer_loop()
+
+        self.assertEqual(delays, [20, 40, 80, 100, 100])
+        self.assertEqual(alarm_client.disconnects, 5)
+        self.assertEqual(shared.disconnects, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+
+from app.services import history, tag_resolver
+from app.services.analytics import correlation_matrix, resample
+from app.services.history import fetch_multi_series, to_ms
+from app.services.tag_resolver import normalize_tag_path, resolve_tags
+from app.tools.tag_history_tools import get_multi_tag_history
+
+
+class TagResolverTests(unittest.TestCase):
+    def setUp(self):
+        tag_resolver.clear_tag_cache()
+
+    def test_normalize_strips_provider_and_lowercases(self):
+        self.assertEqual(normalize_tag_path("[default]Line1/FAN/FAN1"), "line1/fan/fan1")
+
+    def test_resolves_paths_names_and_patterns(self):
+        queries = []
+
+        def fake_fetch(query, parameters=None):
+            queries.append(query)
+            if "tagpath IN ('line1/fan/fan1', 'pump9')" in query:
+                return [(5, "line1/fan/fan1"), (12, "line1/fan/fan1")]
+            if "LIKE '%/pump9'" in query:
+                return []
+            if "LIKE 'line2/%'" in query:
+                return [(7, "line2/tank"), (8, "line2/valve")]
+            return []
+
+        with patch.object(tag_resolver, "fetch_rows", side_effect=fake_fetch):
+            resolved, missing = resolve_tags(["[default]Line1/FAN/FAN1", "PUMP9", "Line2/*"])
+
+        self.assertEqual(resolved["line1/fan/fan1"], (5, 12))
+        self.assertEqual(set(resolved), {"line1/fan/fan1", "line2/tank", "line2/valve"})
+        self.assertEqual(missing, ["PUMP9"])
+
+
+class MultiSeriesTests(unittest.TestCase):
+    def test_one_in_query_per_partition_split_per_tag(self):
+        start = to_ms(datetime(2026, 2, 10))
+        queries = []
+
+        def fake_fetch(query, parameters=None):
+            queries.append(query)
+            if "JOIN" in query:
+                return [(2, start - 5000, 7.0)]
+            return [(1, start + 2000, 2.0), (2, start + 1000, 8.0), (1, start + 1000, 1.0)]
+
+        with patch.object(history, "_table_names", return_value=["sqlt_data_1_2026_02"]), \
+                patch.object(history, "fetch_rows", side_effect=fake_fetch):
+            series = fetch_multi_series({"a": [1], "b": [2]}, start, start + 10000)
+
+        data_queries = [q for q in queries if "JOIN" not in q]
+        self.assertEqual(len(data_queries), 1)
+        self.assertIn("tagid IN (1, 2)", data_queries[0])
+        self.assertEqual(series["a"][0].tolist(), [start + 1000, start + 2000])
+        self.assertEqual(series["a"][2], None)
+        self.assertEqual(series["b"][2], 7.0)
+
+    def test_max_rows_limits_query_and_rejects_overflow(self):
+        start = to_ms(datetime(2026, 2, 10))
+        queries = []
+
+        def fake_fetch(query, parameters=None):
+            queries.append(query)
+            return [(1, start + 1000, 1.0), (1, start + 2000, 2.0), (1, start + 3000, 3.0)]
+
+        with patch.object(history, "_table_names", return_value=["sqlt_data_1_2026_02"]), \
+                patch.object(history, "fetch_rows", side_effect=fake_fetch):
+            with self.assertRaises(history.RawRowLimitExceeded):
+                fetch_multi_series({"a": [1]}, start, start + 10000, max_rows=2)
+            series = fetch_multi_series({"a": [1]}, start, start + 10000, max_rows=3)
+
+        self.assertIn("LIMIT 3", queries[0])
+        self.assertEqual(len(series["a"][0]), 3)
+
+
+class ResampleTests(unittest.TestCase):
+    def test_ffill_and_linear(self):
+        grid = np.array([0, 5, 10, 15])
+        ts, values = np.array([5, 15]), np.array([1.0, 3.0])
+
+        self.assertEqual(resample(ts, values, grid, "ffill", prior=0.0).tolist(), [0.0, 1.0, 1.0, 3.0])
+        self.assertEqual(resample(ts, values, grid, "linear").tolist()[1:], [1.0, 2.0, 3.0])
+        self.assertTrue(np.isnan(resample(ts, values, grid, "linear")[0]))
+        with self.assertRaisesRegex(ValueError, "지원하지 않는 보간 방법: cubic"):
+            resample(ts, values, grid, "cubic")
+
+    def test_correlation_uses_overlapping_points(self):
+        corr = correlation_matrix({
+            "a": np.array([1.0, 2.0, 3.0, np.nan]),
+            "b": np.array([2.0, 4.0, 6.0, 1.0]),
+            "c": np.array([5.0, 5.0, 5.0, 5.0]),
+        })
+
+        self.assertAlmostEqual(corr[("a", "b")], 1.0)
+        self.assertIsNone(corr[("a", "c")])
+
+    def test_tool_reports_unknown_tags(self):
+        with patch("app.tools.tag_history_tools.resolve_tags", return_value=({}, ["NOPE"])):
+            result = get_multi_tag_history.invoke(
+                {"tag_paths": "NOPE", "start_time": "2026-02-01", "end_time": "2026-02-02"}
+            )
+        self.assertIn("태그를 찾을 수 없습니다", result)
+
+
+if __name__ == "__main__":
+    unittest.main()
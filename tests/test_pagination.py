@@ -0,0 +1,193 @@
+import base64
+import json
+import re
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import create_engine, text
+
+from app.services import alarm_events, alarm_index, history, sql
+from app.services.alarm_events import CURSOR_KIND, page_alarm_events
+from app.services.history import RAW_CURSOR_KIND, page_raw_history, to_ms
+from app.services.pagination import decode_cursor, encode_cursor, is_int, is_str, optional
+from app.tools.alarm_tools import search_alarm_events
+
+
+T0 = datetime(2026, 1, 31, 23, 59)
+FAN1 = "prov:default:/tag:Line1/FAN1:/alm:Hi"
+PUMP = "prov:default:/tag:Line1/PUMP2:/alm:Lo"
+PARTITIONS = ["sqlt_data_1_2026_01", "sqlt_data_1_2026_02", "sqlt_data_2_2026_02"]
+
+
+def decode_cursor_raw(token):
+    """검증 없이 커서 내용 확인 (클라이언트의 토큰 수정 재현용)"""
+    payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    return payload["q"], payload["p"]
+
+
+class CursorTests(unittest.TestCase):
+    SCOPE = {"tag_path": optional(is_str), "limit": is_int}
+    POSITION = (is_str, is_int)
+
+    def _decode(self, token, kind="alarm_events"):
+        return decode_cursor(token, kind, self.SCOPE, self.POSITION, max_limit=100)
+
+    def test_round_trip_and_rejection(self):
+        token = encode_cursor("alarm_events", {"tag_path": "FAN1", "limit": 5}, ["2026-03-10 12:00:00", 7])
+        self.assertNotIn("=", token)
+        self.assertEqual(self._decode(token), ({"tag_path": "FAN1", "limit": 5}, ["2026-03-10 12:00:00", 7]))
+        with self.assertRaises(ValueError):
+            self._decode(token, "history_raw")
+        with self.assertRaises(ValueError):
+            self._decode("not-a-cursor!")
+
+    def test_schema_checked_and_limit_clamped(self):
+        clamped = encode_cursor("alarm_events", {"tag_path": None, "limit": 10 ** 9}, ["t", 1])
+        self.assertEqual(self._decode(clamped)[0]["limit"], 100)
+        for scope, position in (
+            ({"limit": 5}, ["t", 1]),                                  # 키 누락
+            ({"tag_path": None, "limit": 5, "extra": 1}, ["t", 1]),     # 키 추가
+            ({"tag_path": None, "limit": "5"}, ["t", 1]),               # 타입
+            ({"tag_path": None, "limit": 0}, ["t", 1]),
+            ({"tag_path": None, "limit": 5}, ["t", "1"]),               # 위치 타입
+            ({"tag_path": None, "limit": 5}, ["t"]),
+        ):
+            with self.assertRaises(ValueError):
+                self._decode(encode_cursor("alarm_events", scope, position))
+
+
+class _SqliteCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        db = MagicMock()
+        db._engine = self.engine
+        for patcher in (
+            patch.object(sql, "get_sql_db", return_value=db),
+            patch.object(alarm_index, "_index", alarm_index.AlarmSourceIndex()),
+            patch.object(history, "_table_names", return_value=PARTITIONS),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class AlarmEventPageTests(_SqliteCase):
+    def setUp(self):
+        super().setUp()
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE alarm_events (id INTEGER PRIMARY KEY, eventid TEXT, source TEXT, "
+                "displaypath TEXT, priority INT, eventtype INT, eventtime TIMESTAMP)"
+            ))
+            # 같은 eventtime을 가진 행이 페이지 경계에 걸리도록 2건씩 같은 시각
+            for i in range(10):
+                conn.execute(
+                    text("INSERT INTO alarm_events VALUES (:id, 'e', :source, 'disp', 2, :t, :time)"),
+                    {"id": i + 1, "source": FAN1 if i % 3 else PUMP, "t": i % 2,
+                     "time": (T0 + timedelta(minutes=i // 2)).strftime("%Y-%m-%d %H:%M:%S")},
+                )
+
+    def _all_pages(self, **kwargs):
+        ids, cursor, pages = [], None, 0
+        while True:
+            page = page_alarm_events(T0 - timedelta(hours=1), None, limit=3, cursor=cursor, **kwargs)
+            ids.extend(row["id"] for row in page.rows)
+            pages += 1
+            cursor = page.next_cursor
+            if cursor is None:
+                return ids, pages
+
+    def test_pages_cover_every_row_once_in_keyset_order(self):
+        ids, pages = self._all_pages()
+        self.assertEqual(ids, [10, 9, 8, 7, 6, 5, 4, 3, 2, 1])
+        self.assertEqual(pages, 4)
+
+    def test_cursor_keeps_first_page_filters(self):
+        first = page_alarm_events(T0 - timedelta(hours=1), None, "PUMP2", None, 2)
+        self.assertEqual([r["id"] for r in first.rows], [10, 7])
+        # 다음 페이지는 인자와 무관하게 커서의 조건(PUMP2, limit 2)을 사용
+        second = page_alarm_events(None, None, "FAN1", "clear", 50, first.next_cursor)
+        self.assertEqual([r["id"] for r in second.rows], [4, 1])
+        self.assertIsNone(second.next_cursor)
+
+    def test_tampered_limit_is_capped(self):
+        first = page_alarm_events(T0 - timedelta(hours=1), None, limit=2)
+        scope, position = decode_cursor_raw(first.next_cursor)
+        scope["limit"] = 10 ** 9
+        with patch.object(alarm_events, "MAX_PAGE_SIZE", 3):
+            page = page_alarm_events(cursor=encode_cursor(CURSOR_KIND, scope, position))
+        self.assertLessEqual(len(page.rows), 3)
+        scope.pop("eventtype")
+        with self.assertRaises(ValueError):
+            page_alarm_events(cursor=encode_cursor(CURSOR_KIND, scope, position))
+
+    def test_tool_returns_cursor_for_next_page(self):
+        hours = int((datetime.now() - T0).total_seconds() // 3600) + 1
+        first = search_alarm_events.invoke({"hours_ago": hours, "limit": 6})
+        self.assertIn("6건", first)
+        cursor = re.search(r'cursor="([^"]+)"', first).group(1)
+        second = search_alarm_events.invoke({"cursor": cursor})
+        self.assertIn("(이어서) 4건", second)
+        self.assertNotIn("다음 페이지", second)
+
+
+class RawHistoryPageTests(_SqliteCase):
+    def setUp(self):
+        super().setUp()
+        self.samples = []
+        with self.engine.begin() as conn:
+            for table in PARTITIONS:
+                conn.execute(text(
+                    f"CREATE TABLE {table} (tagid INT, intvalue INT, floatvalue REAL, t_stamp INT)"
+                ))
+            # 1월 말 ~ 2월 초, tagid 5는 sqlt_data_1, tagid 6은 sqlt_data_2 (2월) 파티션
+            for i in range(12):
+                ts = to_ms(T0) + i * 15_000
+                table = "sqlt_data_1_2026_01" if ts < to_ms(datetime(2026, 2, 1)) else "sqlt_data_1_2026_02"
+                conn.execute(text(f"INSERT INTO {table} VALUES (5, NULL, :v, :ts)"), {"v": float(i), "ts": ts})
+                self.samples.append((5, ts, float(i)))
+                if ts >= to_ms(datetime(2026, 2, 1)):
+                    conn.execute(text("INSERT INTO sqlt_data_2_2026_02 VALUES (6, :v, NULL, :ts)"), {"v": i, "ts": ts})
+                    self.samples.append((6, ts, float(i)))
+        self.start, self.end = to_ms(T0), to_ms(T0 + timedelta(hours=1))
+
+    def _collect(self, descending):
+        rows, cursor = [], None
+        while True:
+            page = page_raw_history([5, 6], self.start, self.end, 5, cursor, descending=descending)
+            self.assertLessEqual(len(page.rows), 5)
+            rows.extend(page.rows)
+            cursor = page.next_cursor
+            if cursor is None:
+                return rows
+
+    def test_pages_merge_partitions_in_order(self):
+        expected = sorted(self.samples, key=lambda r: (r[1], r[0]))
+        self.assertEqual(self._collect(False), expected)
+        self.assertEqual(self._collect(True), expected[::-1])
+
+    def test_deep_page_skips_earlier_partitions(self):
+        first = page_raw_history([5, 6], self.start, self.end, 6)
+        queries = []
+        real_fetch = history.fetch_rows
+
+        def spy(query, parameters=None):
+            queries.append(query)
+            return real_fetch(query, parameters)
+
+        with patch.object(history, "fetch_rows", side_effect=spy):
+            page_raw_history(cursor=first.next_cursor)
+        self.assertFalse(any("sqlt_data_1_2026_01" in q for q in queries))
+
+    def test_rejects_tampered_table(self):
+        token = encode_cursor(
+            RAW_CURSOR_KIND,
+            {"ids": [5], "start": 0, "end": 1, "limit": 1, "table": "sqlth_te; DROP TABLE x", "desc": True},
+            [0, 5],
+        )
+        with self.assertRaises(ValueError):
+            page_raw_history(cursor=token)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from langchain_core.tools import tool
+
+from app.graph import plan_execute
+from app.graph.plan_execute import PlanError, execute_plan, plan_and_execute, plan_levels, resolve_args
+from app.graph.state import PlanStep, ToolPlanOutput
+
+
+_active = 0
+_peak = 0
+_lock = threading.Lock()
+
+
+@tool
+def slow_lookup(name: str) -> str:
+    """이름으로 태그 ID 조회"""
+    global _active, _peak
+    with _lock:
+        _active += 1
+        _peak = max(_peak, _active)
+    time.sleep(0.05)
+    with _lock:
+        _active -= 1
+    return f"[({len(name)},)]"
+
+
+@tool
+def history(tag_id: int, year: int) -> str:
+    """태그 히스토리 조회"""
+    return f"tag={tag_id} year={year}"
+
+
+@tool
+def failing(name: str) -> str:
+    """항상 실패"""
+    raise RuntimeError("boom")
+
+
+TOOLS = {t.name: t for t in (slow_lookup, history, failing)}
+
+
+def _step(id, tool, args=None, depends_on=None):
+    return PlanStep(id=id, tool=tool, args=args or {}, depends_on=depends_on or [])
+
+
+class PlanLevelTests(unittest.TestCase):
+    def test_levels_follow_dependencies(self):
+        steps = [_step("a", "slow_lookup"), _step("b", "slow_lookup"), _step("c", "history", depends_on=["a", "b"])]
+        levels = plan_levels(steps, set(TOOLS), 8)
+        self.assertEqual([[s.id for s in level] for level in levels], [["a", "b"], ["c"]])
+
+    def test_rejects_invalid_plans(self):
+        with self.assertRaises(PlanError):
+            plan_levels([_step("a", "drop_tables")], set(TOOLS), 8)
+        with self.assertRaises(PlanError):
+            plan_levels([_step("a", "history", depends_on=["b"]), _step("b", "history", depends_on=["a"])], set(TOOLS), 8)
+        with self.assertRaises(PlanError):
+            plan_levels([_step("a", "history", depends_on=["z"])], set(TOOLS), 8)
+        with self.assertRaises(PlanError):
+            plan_levels([_step(str(i), "history") for i in range(3)], set(TOOLS), 2)
+
+    def test_resolve_args_references(self):
+        outputs = {"s1": "year=2025, month=9, day=1", "s2": "[(42,)]"}
+        self.assertEqual(
+            resolve_args({"year": "{s1}", "tag_id": "{s2}", "note": "id {s2}", "n": 3}, outputs),
+            {"year": "2025", "tag_id": "42", "note": "id [(42,)]", "n": 3},
+        )
+
+
+class ExecutePlanTests(unittest.TestCase):
+    def test_independent_steps_run_in_parallel_and_failures_skip_dependents(self):
+        global _peak
+        _peak = 0
+        steps = [
+            _step("a", "slow_lookup", {"name": "fan1"}),
+            _step("b", "slow_lookup", {"name": "tank10"}),
+            _step("c", "history", {"tag_id": "{a}", "year": 2025}, ["a"]),
+            _step("d", "failing", {"name": "x"}),
+            _step("e", "history", {"tag_id": 1, "year": 2025}, ["d"]),
+        ]
+        outputs = execute_plan(plan_levels(steps, set(TOOLS), 8), TOOLS, 4)
+
+        self.assertEqual(_peak, 2)
+        self.assertEqual(outputs["c"], "tag=4 year=2025")
+        self.assertTrue(outputs["d"].startswith("Error:"))
+        self.assertTrue(outputs["e"].startswith("Skipped:"))
+
+
+class PlanAndExecuteTests(unittest.TestCase):
+    def test_two_llm_calls_and_fallback(self):
+        llm = MagicMock()
+        llm.with_structured_output.return_value.invoke.return_value = ToolPlanOutput(
+            steps=[_step("a", "slow_lookup", {"name": "fan1"})]
+        )
+        llm.invoke.return_value = MagicMock(content="FAN1 ID는 4입니다.")
+
+        with patch.object(plan_execute, "get_llm", return_value=llm):
+            response = plan_and_execute("FAN1 ID?", list(TOOLS.values()), "system", "Historian Agent")
+        self.assertEqual(response.content, "FAN1 ID는 4입니다.")
+        self.assertEqual(response.name, "Historian Agent")
+        self.assertIn("[(4,)]", llm.invoke.call_args.args[0][1].content)
+
+        llm.with_structured_output.return_value.invoke.return_value = ToolPlanOutput(
+            steps=[_step("a", "unknown_tool")]
+        )
+        with patch.object(plan_execute, "get_llm", return_value=llm):
+            self.assertIsNone(plan_and_execute("?", list(TOOLS.values()), "system", "Historian Agent"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event, text
+
+from app.services import query_guard
+from app.services.query_guard import QueryRejected, prepare_query, run_guarded
+
+
+class PrepareQueryTests(unittest.TestCase):
+    def test_injects_or_clamps_limit(self):
+        self.assertEqual(prepare_query("SELECT * FROM t;", max_rows=50), "SELECT * FROM t\nLIMIT 50")
+        self.assertEqual(prepare_query("SELECT * FROM t LIMIT 10", max_rows=50), "SELECT * FROM t LIMIT 10")
+        self.assertEqual(prepare_query("SELECT * FROM t LIMIT 9999", max_rows=50), "SELECT * FROM t LIMIT 50")
+        self.assertEqual(prepare_query("SELECT * FROM t LIMIT 5, 9999", max_rows=50), "SELECT * FROM t LIMIT 5, 50")
+        self.assertEqual(prepare_query("SELECT * FROM t LIMIT ALL", max_rows=50), "SELECT * FROM t LIMIT 50")
+        self.assertEqual(
+            prepare_query("SELECT * FROM t limit all offset 20;", max_rows=50), "SELECT * FROM t limit 50 offset 20"
+        )
+        self.assertEqual(
+            prepare_query("SELECT a FROM (SELECT a FROM t LIMIT 9999) s", max_rows=50),
+            "SELECT a FROM (SELECT a FROM t LIMIT 9999) s\nLIMIT 50",
+        )
+
+    def test_rejects_writes_multiple_statements_and_functions(self):
+        for query in (
+            "DELETE FROM sqlth_te",
+            "SELECT 1; DROP TABLE sqlth_te",
+            "WITH x AS (DELETE FROM t RETURNING *) SELECT * FROM x",
+            "SELECT * INTO backup FROM t",
+            "SELECT pg_sleep(100)",
+        ):
+            with self.assertRaises(QueryRejected, msg=query):
+                prepare_query(query)
+
+    def test_word_boundaries_and_literals_do_not_false_positive(self):
+        sql = prepare_query(
+            "SELECT updated_at, created_by FROM alarm_events "
+            "WHERE displaypath = 'delete; drop' -- update later\nLIMIT 5"
+        )
+        self.assertIn("'delete; drop'", sql)
+        self.assertNotIn("update later", sql)
+
+
+class RunGuardedTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE t (a INTEGER)"))
+            conn.execute(text("INSERT INTO t VALUES (1), (2), (3)"))
+        self.log_path = Path(tempfile.mkdtemp()) / "slow.jsonl"
+        patcher = patch.object(query_guard.settings, "db_query_slow_log_path", str(self.log_path))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_runs_with_limit_when_explain_fails(self):
+        with patch.object(query_guard, "explain_estimate", side_effect=RuntimeError("no explain")), \
+                patch.object(query_guard.settings, "db_query_max_rows", 2):
+            result = run_guarded(self.engine, "SELECT a FROM t ORDER BY a")
+
+        self.assertEqual(result, "[(1,), (2,)]")
+
+    def test_literal_percent_is_not_a_format_character(self):
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE alarms (source TEXT)"))
+            conn.execute(text("INSERT INTO alarms VALUES ('Line1/FAN1'), ('Line2/PUMP')"))
+        raw = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, stmt, params, context, many: raw.append(context.no_parameters))
+
+        result = run_guarded(self.engine, "SELECT source FROM alarms WHERE source LIKE '%FAN1%'")
+
+        self.assertEqual(result, "[('Line1/FAN1',)]")
+        # EXPLAIN과 본 쿼리 모두 파라미터 없이 실행 (pyformat 드라이버가 %를 해석하지 않음)
+        self.assertEqual(raw, [True, True])
+
+    def test_rejects_expensive_plan_and_logs(self):
+        estimate = {"cost": 9e9, "rows": 1e8, "full_scans": ["sqlt_data_1_2026_02"]}
+        with patch.object(query_guard, "explain_estimate", return_value=estimate):
+            with self.assertRaises(QueryRejected) as ctx:
+                run_guarded(self.engine, "SELECT * FROM sqlt_data_1_2026_02")
+
+        self.assertIn("sqlt_data_1_2026_02", str(ctx.exception))
+        record = json.loads(self.log_path.read_text().splitlines()[0])
+        self.assertEqual(record["event"], "rejected")
+
+
+if __name__ == "__main__":
+    unittest.main()
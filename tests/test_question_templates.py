@@ -0,0 +1,86 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from app.graph import question_templates
+from app.graph.question_templates import (
+    answer_with_template,
+    match_template,
+    reset_template_stats,
+    tag_candidates,
+    template_stats,
+)
+from app.services.date_parser import TimeRange
+from app.services.history import Bucket
+
+
+def _fake_resolve(specs, limit=50):
+    spec = specs[0].lower()
+    if spec == "fan1/rpm":
+        return {"line1/fan1/rpm": (3,)}, []
+    if spec == "rpm":
+        return {"line1/fan1/rpm": (3,), "line2/fan2/rpm": (4,)}, []
+    return {}, list(specs)
+
+
+YESTERDAY = TimeRange(
+    datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1),
+    datetime.now().replace(hour=0, minute=0, second=0, microsecond=0),
+    "어제",
+    "day",
+)
+
+
+class TemplateMatchTests(unittest.TestCase):
+    def setUp(self):
+        reset_template_stats()
+
+    def test_tag_candidates_join_adjacent_words(self):
+        self.assertEqual(tag_candidates("어제 FAN1 평균 RPM은?"), ["FAN1/RPM", "FAN1", "RPM"])
+
+    def test_matches_shapes_and_falls_through(self):
+        with patch.object(question_templates, "resolve_tags", side_effect=_fake_resolve):
+            self.assertEqual(match_template("어제 FAN1 평균 RPM은?", YESTERDAY).template, "tag_statistic")
+            # 여러 태그로 해석되면 에이전트가 명확화
+            self.assertIsNone(match_template("어제 평균 RPM은?", YESTERDAY))
+            self.assertIsNone(match_template("어제 FAN1 RPM 추이 보여줘", YESTERDAY))
+        self.assertEqual(match_template("FAN1 알람 최근에 언제 발생했어?").template, "alarm_latest")
+        self.assertEqual(match_template("어제 알람 몇 번 발생했어?", YESTERDAY).template, "alarm_statistics")
+        self.assertIsNone(match_template("알람 통계 보여줘"))
+
+    def test_executes_chain_with_single_llm_call_and_records_stats(self):
+        bucket = Bucket(start_ms=0, count=4, total=40.0, minimum=5.0, maximum=15.0)
+        llm = MagicMock()
+        llm.invoke.return_value = MagicMock(content="어제 FAN1 RPM 평균은 10입니다.")
+
+        with patch.object(question_templates, "resolve_tags", side_effect=_fake_resolve), \
+                patch.object(question_templates, "aggregate_range", return_value=bucket) as aggregate, \
+                patch.object(question_templates, "time_weighted_average", return_value=12.0) as twa, \
+                patch.object(question_templates, "get_llm", return_value=llm):
+            answer = answer_with_template("어제 FAN1 평균 RPM은?", YESTERDAY)
+            self.assertIsNone(answer_with_template("FAN1 고장 원인 분석해줘"))
+
+        self.assertEqual(answer, "어제 FAN1 RPM 평균은 10입니다.")
+        self.assertEqual(aggregate.call_args.args[0], (3,))
+        self.assertEqual(llm.invoke.call_count, 1)
+        # 샘플 평균(10)이 아닌 시간가중평균
+        self.assertEqual(twa.call_args.args[0], (3,))
+        self.assertIn("시간가중 평균=12", llm.invoke.call_args.args[0][1].content)
+
+        stats = template_stats()
+        self.assertEqual(stats["questions"], 2)
+        self.assertEqual(stats["fallthrough"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertEqual(stats["templates"]["tag_statistic"]["hits"], 1)
+        self.assertEqual(stats["templates"]["tag_statistic"]["llm_calls"], 1)
+        self.assertIsNotNone(stats["templates"]["tag_statistic"]["avg_ms"])
+
+    def test_execution_error_falls_through(self):
+        with patch.object(question_templates, "resolve_tags", side_effect=_fake_resolve), \
+                patch.object(question_templates, "aggregate_range", side_effect=RuntimeError("db down")):
+            self.assertIsNone(answer_with_template("어제 FAN1 평균 RPM은?", YESTERDAY))
+        self.assertEqual(template_stats()["templates"]["tag_statistic"]["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
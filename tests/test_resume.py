@@ -0,0 +1,83 @@
+import unittest
+from types import SimpleNamespace
+from typing import Any, List, TypedDict
+
+from fastapi import HTTPException
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import interrupt
+
+from app.api.v1.chat import QueryRequest, ResumeRequest, ask, resume
+
+
+class _State(TypedDict, total=False):
+    messages: List[Any]
+    confirmed_tag_path: Any
+    tag_candidates: Any
+    pending_actions: Any
+    retry_count: int
+
+
+def _graph(counter, checkpointer):
+    """generate_chat → chat_tools_node 축소판: 쓰기 도구 호출 후 interrupt()"""
+
+    def generate(state):
+        counter["llm"] += 1
+        return {"messages": [AIMessage(content="", tool_calls=[
+            {"name": "write_ignition_tag", "args": {"tag_path": "[default]Tank/SP", "value": "5"}, "id": "c1"}
+        ])]}
+
+    async def tools(state):
+        decision = interrupt({"action_id": "a1", "tag_path": "[default]Tank/SP", "value": "5",
+                              "risk_level": "low", "requested_at": "2026-03-10T09:00:00",
+                              "message": "승인 필요"})
+        verdict = "approved" if decision["approved"] else "rejected"
+        return {"messages": [ToolMessage(content=f"{verdict} by {decision['operator']}", tool_call_id="c1")]}
+
+    g = StateGraph(_State)
+    g.add_node("generate_chat", generate)
+    g.add_node("chat_tools_node", tools)
+    g.add_edge(START, "generate_chat")
+    g.add_edge("generate_chat", "chat_tools_node")
+    g.add_edge("chat_tools_node", END)
+    return g.compile(checkpointer=checkpointer)
+
+
+class ResumeTests(unittest.IsolatedAsyncioTestCase):
+    def _request(self, checkpointer):
+        self.counter = {"llm": 0}
+        state = SimpleNamespace(app_graph=_graph(self.counter, checkpointer), checkpointer=checkpointer)
+        return SimpleNamespace(app=SimpleNamespace(state=state))
+
+    async def test_ask_returns_interrupt_and_resume_continues_without_llm(self):
+        request = self._request(MemorySaver())
+        asked = await ask(QueryRequest(question="Tank SP 5로 바꿔줘", thread_id="t1"), request)
+        self.assertEqual(asked["__interrupt__"][0]["value"]["action_id"], "a1")
+        self.assertEqual(asked["pending_action"]["approval_url"], "/resume")
+        self.assertEqual(asked["answer"], "승인 필요")
+
+        # 승인 대기 중인 thread에 새 질문 → 409
+        with self.assertRaises(HTTPException) as ctx:
+            await ask(QueryRequest(question="다른 질문", thread_id="t1"), request)
+        self.assertEqual(ctx.exception.status_code, 409)
+
+        resumed = await resume(ResumeRequest(thread_id="t1", approved=True, operator="kim"), request)
+        self.assertEqual(resumed["answer"], "approved by kim")
+        self.assertNotIn("__interrupt__", resumed)
+        self.assertEqual(self.counter["llm"], 1)
+
+        # 이미 재개된 thread는 다시 resume 불가
+        with self.assertRaises(HTTPException) as ctx:
+            await resume(ResumeRequest(thread_id="t1", approved=True, operator="kim"), request)
+        self.assertEqual(ctx.exception.status_code, 404)
+
+    async def test_resume_requires_checkpointer(self):
+        request = self._request(None)
+        with self.assertRaises(HTTPException) as ctx:
+            await resume(ResumeRequest(thread_id="t1", approved=False, operator="kim"), request)
+        self.assertEqual(ctx.exception.status_code, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()
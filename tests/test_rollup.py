@@ -0,0 +1,140 @@
+import unittest
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+
+from app.services import history, rollup
+from app.services.history import aggregate_buckets, time_weighted_average, to_ms
+from app.services.rollup import compute_rollup_rows, plan_rollup, refresh_rollups, rollup_time_weighted
+
+
+HOUR = 3600 * 1000
+
+
+class RollupComputeTests(unittest.TestCase):
+    def test_time_weighted_average_uses_carry_and_hold_last_value(self):
+        base = to_ms(datetime(2026, 2, 1, 10))
+        carry = {7: 0.0}
+        # 10:00~10:15 carry(0), 10:15~10:45 값 10, 10:45~11:00 값 20
+        rows = compute_rollup_rows(
+            np.array([7, 7]),
+            np.array([base + HOUR // 4, base + 3 * HOUR // 4]),
+            np.array([10.0, 20.0]),
+            HOUR,
+            0,
+            carry,
+        )
+
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual(row["sample_count"], 2)
+        self.assertEqual(row["value_sum"], 30.0)
+        self.assertEqual((row["first_value"], row["last_value"]), (10.0, 20.0))
+        self.assertAlmostEqual(row["twa"], (0 * 15 + 10 * 30 + 20 * 15) / 60)
+        self.assertEqual(carry[7], 20.0)
+
+    def test_groups_by_tag_and_bucket(self):
+        base = to_ms(datetime(2026, 2, 1, 10))
+        rows = compute_rollup_rows(
+            np.array([2, 1, 1, 2]),
+            np.array([base + 10, base + 20, base + HOUR + 5, base + HOUR + 50]),
+            np.array([1.0, 2.0, 3.0, np.nan]),
+            HOUR,
+            0,
+            {},
+        )
+
+        keys = [(r["tagid"], r["bucket_start"], r["sample_count"]) for r in rows]
+        self.assertEqual(keys, [(1, base, 1), (1, base + HOUR, 1), (2, base, 1)])
+
+
+class RollupPlannerTests(unittest.TestCase):
+    def test_plan_prefers_coarsest_level_within_watermark(self):
+        watermarks = {"daily": to_ms(datetime(2026, 2, 10)), "hourly": to_ms(datetime(2026, 2, 12))}
+        with patch.object(rollup, "get_watermark", side_effect=watermarks.get):
+            plan = plan_rollup(
+                to_ms(datetime(2026, 2, 1, 6)), to_ms(datetime(2026, 2, 20)), 86400
+            )
+            hourly_plan = plan_rollup(
+                to_ms(datetime(2026, 2, 1, 6)), to_ms(datetime(2026, 2, 20)), 3600
+            )
+            none_plan = plan_rollup(
+                to_ms(datetime(2026, 2, 1)), to_ms(datetime(2026, 2, 2)), 600
+            )
+
+        self.assertEqual(plan, ("daily", to_ms(datetime(2026, 2, 2)), watermarks["daily"]))
+        self.assertEqual(
+            hourly_plan, ("hourly", to_ms(datetime(2026, 2, 1, 6)), watermarks["hourly"])
+        )
+        self.assertIsNone(none_plan)
+
+    def test_aggregate_buckets_reads_rollup_and_raw_tail(self):
+        watermark = to_ms(datetime(2026, 2, 3))
+        day1 = to_ms(datetime(2026, 2, 1))
+        day3 = to_ms(datetime(2026, 2, 3))
+        raw_queries = []
+
+        def fake_rollup_fetch(query, parameters=None):
+            return [
+                (day1, 2, 4.0, 1.0, 3.0, day1 + 1, 1.0, day1 + 2, 3.0),
+                (day1 + 86400000, 1, 5.0, 5.0, 5.0, day1 + 5, 5.0, day1 + 5, 5.0),
+            ]
+
+        def fake_raw_fetch(query, parameters=None):
+            raw_queries.append(query)
+            return [(day3, 1, 9.0, 9.0, 9.0)]
+
+        with patch.object(history, "_table_names", return_value=["sqlt_data_1_2026_02"]), \
+                patch.object(rollup, "get_watermark", side_effect={"daily": watermark}.get), \
+                patch.object(rollup, "fetch_rows", side_effect=fake_rollup_fetch), \
+                patch.object(history, "fetch_rows", side_effect=fake_raw_fetch), \
+                patch.object(history.settings, "history_cache_enabled", False):
+            points = aggregate_buckets([5], day1, to_ms(datetime(2026, 2, 4)), 86400, "max")
+
+        self.assertEqual([p[1] for p in points], [3.0, 5.0, 9.0])
+        self.assertEqual(len(raw_queries), 1)
+        self.assertIn(f"t_stamp >= {watermark}", raw_queries[0])
+
+    def test_rollup_twa_holds_value_through_buckets_without_rows(self):
+        day1 = to_ms(datetime(2026, 2, 1))
+        day = 86400 * 1000
+        # 1일: twa 10 (마지막 값 20), 2일: 변경 없음 → 20 유지, 3일: twa 30
+        rows = [(day1, 10.0, day1 + 5, 20.0), (day1 + 2 * day, 30.0, day1 + 2 * day + 5, 30.0)]
+        with patch.object(rollup, "fetch_rows", return_value=rows):
+            area, covered = rollup_time_weighted("daily", "tagid = 5", day1, day1 + 4 * day, prior=1.0)
+        self.assertEqual(covered, 4 * 86400)
+        self.assertAlmostEqual(area / covered, (10 + 20 + 30 + 30) / 4)
+
+    def test_time_weighted_average_uses_rollup_and_raw_edges(self):
+        day1 = to_ms(datetime(2026, 2, 1))
+        day = 86400 * 1000
+        with patch.object(rollup, "get_watermark", side_effect={"daily": day1 + 2 * day}.get), \
+                patch.object(rollup, "fetch_rows", return_value=[(day1, 4.0, day1, 4.0), (day1 + day, 6.0, day1 + day, 6.0)]), \
+                patch.object(history, "_fetch_priors", return_value={"tag": 4.0}), \
+                patch.object(history, "fetch_series", return_value=(np.array([day1 + 2 * day]), np.array([8.0]), 6.0)) as raw, \
+                patch.object(history.settings, "history_cache_enabled", False):
+            twa = time_weighted_average([5], day1, day1 + 3 * day)
+        self.assertAlmostEqual(twa, 6.0)
+        # 원본은 워터마크 이후 꼬리만 조회
+        self.assertEqual(raw.call_args.args[1:], (day1 + 2 * day, day1 + 3 * day))
+
+
+class RollupMaintainerTests(unittest.TestCase):
+    def test_only_lock_holder_refreshes(self):
+        @contextmanager
+        def held_elsewhere(name):
+            yield False
+
+        with patch.object(rollup, "ensure_rollup_tables"), \
+                patch.object(rollup, "advisory_lock", held_elsewhere), \
+                patch.object(rollup, "_load_watermarks") as reload, \
+                patch.object(rollup, "refresh_level") as refresh:
+            self.assertEqual(refresh_rollups(), {})
+        reload.assert_called_once()
+        refresh.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
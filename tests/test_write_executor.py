@@ -0,0 +1,261 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from asyncua import ua
+
+from fastapi import HTTPException
+
+from app.api.v1.approve import ApprovalRequest, BulkApprovalRequest, approve_action, approve_bulk
+from app.graph.state import PendingAction
+from app.opc_client import IgnitionOpcClient
+from app.services import approval_storage, write_executor
+from app.services.approval_storage import MemoryApprovalStore, get_pending_action, store_pending_action
+from app.services.write_executor import WriteRateLimiter, execute_writes
+
+
+T0 = datetime.now() - timedelta(minutes=10)
+
+
+def _action(action_id, tag, value, minutes=0):
+    return PendingAction(
+        id=action_id,
+        action_type="write_tag",
+        tag_path=tag,
+        value=value,
+        reason="test",
+        requested_at=T0 + timedelta(minutes=minutes),
+        status="pending",
+        risk_level="medium",
+    )
+
+
+class FakeOpcClient:
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+
+    async def write_tags(self, items):
+        self.calls.append(list(items))
+        return [
+            {"tag": tag, "error": "BadNotWritable", "status_code": "BadNotWritable"} if tag in self.fail
+            else {"tag": tag, "written": value, "status": "OK", "status_code": "Good"}
+            for tag, value in items
+        ]
+
+
+class WriteExecutorTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.opc = FakeOpcClient(fail={"[default]Line1/Pump/Run"})
+        for patcher in (
+            patch.object(write_executor, "get_opc_client", return_value=self.opc),
+            patch.object(write_executor, "_limiter", WriteRateLimiter()),
+            patch.object(write_executor.settings, "opc_write_min_interval_seconds", 60.0),
+            patch.object(write_executor.settings, "opc_write_rate_scope", "tag"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_single_request_with_last_wins_coalescing(self):
+        actions = [
+            _action("a", "[default]Line1/FAN1/Speed", 10, minutes=1),
+            _action("b", "[default]Line1/FAN1/Temp", 20),
+            _action("c", "[default]/Line1/FAN1/Speed", 30, minutes=2),
+            _action("d", "[default]Line1/Pump/Run", 1),
+        ]
+        outcomes = await execute_writes(actions)
+
+        self.assertEqual(len(self.opc.calls), 1)
+        self.assertEqual([v for _, v in self.opc.calls[0]], [30, 20, 1])
+        self.assertEqual([o.status for o in outcomes], ["superseded", "executed", "executed", "failed"])
+        self.assertEqual(outcomes[0].superseded_by, "c")
+        self.assertEqual(outcomes[3].error, "BadNotWritable")
+
+    async def test_without_coalescing_writes_go_out_in_order(self):
+        actions = [
+            _action("new", "[default]Tank/SP", 2, minutes=5),
+            _action("old", "[default]Tank/SP", 1),
+        ]
+        with patch.object(write_executor.settings, "opc_write_min_interval_seconds", 0):
+            outcomes = await execute_writes(actions, coalesce=False)
+        self.assertEqual(self.opc.calls, [[("[default]Tank/SP", 1)], [("[default]Tank/SP", 2)]])
+        self.assertEqual([o.status for o in outcomes], ["executed", "executed"])
+
+    async def test_failed_round_keeps_earlier_outcomes(self):
+        calls = []
+
+        class DroppingClient:
+            async def write_tags(self, items):
+                calls.append(list(items))
+                if len(calls) > 1:
+                    raise ConnectionError("session closed")
+                return [{"tag": tag, "written": value, "status": "OK", "status_code": "Good"} for tag, value in items]
+
+        actions = [
+            _action("a0", "[default]Tank/SP", 1),
+            _action("a1", "[default]Tank/SP", 2, minutes=1),
+            _action("a2", "[default]Tank/SP", 3, minutes=2),
+        ]
+        with patch.object(write_executor, "get_opc_client", return_value=DroppingClient()), \
+                patch.object(write_executor.settings, "opc_write_min_interval_seconds", 0):
+            outcomes = await execute_writes(actions, coalesce=False)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual([o.status for o in outcomes], ["executed", "failed", "failed"])
+        self.assertEqual(outcomes[2].error, "session closed")
+
+    async def test_rate_limit_per_tag_and_device(self):
+        await execute_writes([_action("a", "[default]Line1/FAN1/Speed", 1)])
+        outcomes = await execute_writes([
+            _action("b", "[default]Line1/FAN1/Speed", 2),
+            _action("c", "[default]Line1/FAN1/Temp", 3),
+        ])
+        self.assertEqual([o.status for o in outcomes], ["rate_limited", "executed"])
+        self.assertGreater(outcomes[0].retry_after, 0)
+
+        with patch.object(write_executor.settings, "opc_write_rate_scope", "device"):
+            (outcome,) = await execute_writes([_action("d", "[default]Line1/FAN1/Mode", 4)])
+            self.assertEqual(outcome.status, "executed")  # 첫 device 단위 쓰기
+            (outcome,) = await execute_writes([_action("e", "[default]Line1/FAN1/Temp", 5)])
+            self.assertEqual(outcome.status, "rate_limited")
+
+
+class BulkApproveTests(unittest.IsolatedAsyncioTestCase):
+    async def test_bulk_approve_records_per_item_status(self):
+        opc = FakeOpcClient()
+        with patch.object(approval_storage, "_store", MemoryApprovalStore()), \
+                patch.object(write_executor, "get_opc_client", return_value=opc), \
+                patch.object(write_executor, "_limiter", WriteRateLimiter()):
+            store_pending_action(_action("a", "[default]Tank/SP", 1))
+            store_pending_action(_action("b", "[default]Tank/SP", 2, minutes=1))
+            done = _action("c", "[default]Tank/Level", 3)
+            done.status = "executed"
+            store_pending_action(done)
+
+            response = await approve_bulk(BulkApprovalRequest(
+                action_ids=["a", "b", "c", "missing", "a"], approved=True, operator="kim",
+            ))
+            self.assertEqual(
+                [(r.action_id, r.status) for r in response.results],
+                [("a", "superseded"), ("b", "executed"), ("c", "not_pending"), ("missing", "not_found")],
+            )
+            self.assertEqual(response.counts["executed"], 1)
+            self.assertEqual(response.results[1].status_code, "Good")
+            self.assertEqual(len(opc.calls), 1)
+            self.assertEqual(get_pending_action("a").status, "superseded")
+            self.assertEqual(get_pending_action("b").operator, "kim")
+
+    async def test_failed_write_is_recorded_as_failed_with_error(self):
+        opc = FakeOpcClient(fail={"[default]Tank/SP"})
+        with patch.object(approval_storage, "_store", MemoryApprovalStore()), \
+                patch.object(write_executor, "get_opc_client", return_value=opc), \
+                patch.object(write_executor, "_limiter", WriteRateLimiter()):
+            store_pending_action(_action("a", "[default]Tank/SP", 1))
+            response = await approve_bulk(BulkApprovalRequest(
+                action_ids=["a"], approved=True, operator="kim", notes="shift change",
+            ))
+            self.assertEqual(response.results[0].status, "failed")
+            stored = get_pending_action("a")
+            self.assertEqual((stored.status, stored.operator), ("failed", "kim"))
+            self.assertEqual(stored.notes, "Write failed: BadNotWritable | shift change")
+
+    async def test_concurrent_approvals_write_once(self):
+        class SlowClient(FakeOpcClient):
+            async def write_tags(self, items):
+                await asyncio.sleep(0.01)
+                return await super().write_tags(items)
+
+        opc = SlowClient()
+        with patch.object(approval_storage, "_store", MemoryApprovalStore()), \
+                patch.object(write_executor, "get_opc_client", return_value=opc), \
+                patch.object(write_executor, "_limiter", WriteRateLimiter()):
+            store_pending_action(_action("a", "[default]Tank/SP", 1))
+            single, bulk = await asyncio.gather(
+                approve_action(ApprovalRequest(action_id="a", approved=True, operator="kim")),
+                approve_bulk(BulkApprovalRequest(action_ids=["a"], approved=True, operator="lee")),
+            )
+            self.assertEqual(single.status, "executed")
+            self.assertEqual(bulk.results[0].status, "not_pending")
+            self.assertEqual(len(opc.calls), 1)
+
+            with self.assertRaises(HTTPException) as ctx:
+                await approve_action(ApprovalRequest(action_id="a", approved=True, operator="lee"))
+            self.assertEqual(ctx.exception.status_code, 400)
+            self.assertEqual(get_pending_action("a").operator, "kim")
+
+    async def test_rate_limited_action_is_released_to_pending(self):
+        opc = FakeOpcClient()
+        with patch.object(approval_storage, "_store", MemoryApprovalStore()), \
+                patch.object(write_executor, "get_opc_client", return_value=opc), \
+                patch.object(write_executor, "_limiter", WriteRateLimiter()), \
+                patch.object(write_executor.settings, "opc_write_min_interval_seconds", 60.0):
+            store_pending_action(_action("a", "[default]Tank/SP", 1))
+            store_pending_action(_action("b", "[default]Tank/SP", 2, minutes=1))
+            await approve_bulk(BulkApprovalRequest(action_ids=["a"], approved=True, operator="kim"))
+
+            with self.assertRaises(HTTPException) as ctx:
+                await approve_action(ApprovalRequest(action_id="b", approved=True, operator="kim"))
+            self.assertEqual(ctx.exception.status_code, 429)
+            self.assertEqual(get_pending_action("b").status, "pending")
+
+
+class FakeNode:
+    def __init__(self, node_id):
+        self.nodeid = node_id
+
+
+class FakeUaClient:
+    def __init__(self):
+        self.reads = []
+        self.writes = []
+
+    def get_node(self, node_id):
+        return FakeNode(node_id)
+
+    async def read_attributes(self, nodes):
+        self.reads.append([n.nodeid for n in nodes])
+        return [ua.DataValue(ua.Variant(0, ua.VariantType.Int32)) for _ in nodes]
+
+    async def write_values(self, nodes, values, raise_on_partial_error=True):
+        self.writes.append([(n.nodeid, v) for n, v in zip(nodes, values)])
+        return [ua.StatusCode(ua.StatusCodes.BadTypeMismatch) if "Bad" in n.nodeid else ua.StatusCode()
+                for n in nodes]
+
+
+class OpcClientWriteTagsTests(unittest.IsolatedAsyncioTestCase):
+    async def test_batches_write_and_uses_cached_types(self):
+        client = IgnitionOpcClient()
+        client._client, client._connected = FakeUaClient(), True
+        client._remember_type("[default]Tank/Run", ua.VariantType.Boolean)
+
+        results = await client.write_tags([("[default]Tank/Run", "true"), ("[default]Tank/SP", "42"),
+                                           ("[default]Bad", 1)])
+        self.assertEqual(client._client.reads, [["ns=2;s=[default]/Tank/SP", "ns=2;s=[default]/Bad"]])
+        (written,) = client._client.writes
+        self.assertEqual([(v.Value, v.VariantType) for _, v in written],
+                         [(True, ua.VariantType.Boolean), (42, ua.VariantType.Int32), (1, ua.VariantType.Int32)])
+        self.assertEqual([r.get("status") for r in results], ["OK", "OK", None])
+        self.assertEqual(results[2]["error"], "BadTypeMismatch")
+
+        # 두 번째 쓰기는 사전 읽기 없이 캐시 사용, 타입 불일치 태그만 다시 조회
+        await client.write_tags([("[default]Tank/SP", 7), ("[default]Bad", 2)])
+        self.assertEqual(client._client.reads[1], ["ns=2;s=[default]/Bad"])
+
+    async def test_non_integral_value_for_int_tag_is_rejected(self):
+        client = IgnitionOpcClient()
+        client._client, client._connected = FakeUaClient(), True
+        client._remember_type("[default]Tank/SP", ua.VariantType.Int32)
+        client._remember_type("[default]Tank/Count", ua.VariantType.Int64)
+
+        results = await client.write_tags([("[default]Tank/SP", "12.7"), ("[default]Tank/SP", 3.5)])
+        self.assertEqual(client._client.writes, [])
+        self.assertTrue(all(r["error"].startswith("Invalid value for Int32") for r in results))
+
+        results = await client.write_tags([("[default]Tank/SP", " 12.0 "), ("[default]Tank/Count", "9007199254740993")])
+        (written,) = client._client.writes
+        self.assertEqual([v.Value for _, v in written], [12, 9007199254740993])
+        self.assertEqual([r.get("status") for r in results], ["OK", "OK"])
+
+
+if __name__ == "__main__":
+    unittest.main()